@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from datetime import datetime
 from decimal import Decimal
 from typing import List, Optional
@@ -11,13 +11,76 @@ class CrearVentaDTO(BaseModel):
     detalles: List[DetalleVentaDTO]
     usuario_id: Optional[int] = None
 
+class DetalleVentaResponseDTO(BaseModel):
+    id: Optional[int]
+    producto_id: int
+    producto_nombre: str
+    cantidad: int
+    precio: Decimal
+    subtotal: Decimal
+    
+    class Config:
+        from_attributes = True
+
+class CrearVentasBulkDTO(BaseModel):
+    ventas: List[CrearVentaDTO] = Field(..., min_length=1, max_length=10000)
+
+class ResultadoVentaBulkDTO(BaseModel):
+    indice: int
+    ok: bool
+    venta_id: Optional[int] = None
+    total: Optional[float] = None
+    error: Optional[str] = None
+
+class VentasBulkResponseDTO(BaseModel):
+    total: int
+    creadas: int
+    fallidas: int
+    resultados: List[ResultadoVentaBulkDTO]
+
 class VentaResponseDTO(BaseModel):
     id: int
     fecha: datetime
     total: Decimal
     usuario_id: Optional[int]
     usuario_nombre: Optional[str]
-    detalles: List[dict]
+    detalles: List[DetalleVentaResponseDTO]
+    
+    class Config:
+        from_attributes = True
+
+class DetalleDevolucionDTO(BaseModel):
+    producto_id: int
+    cantidad: int = Field(..., gt=0)
+
+class CrearDevolucionDTO(BaseModel):
+    # Sin detalles se devuelve todo lo que quede pendiente de la venta
+    detalles: Optional[List[DetalleDevolucionDTO]] = None
+    motivo: Optional[str] = None
+    usuario_id: Optional[int] = None
+
+class DetalleDevolucionResponseDTO(BaseModel):
+    id: Optional[int]
+    producto_id: int
+    producto_nombre: str
+    cantidad: int
+    precio: Decimal
+    subtotal: Decimal
+    
+    class Config:
+        from_attributes = True
+
+class DevolucionResponseDTO(BaseModel):
+    id: int
+    venta_id: int
+    fecha: datetime
+    motivo: Optional[str]
+    usuario_id: Optional[int]
+    total: Decimal
+    detalles: List[DetalleDevolucionResponseDTO]
+    
+    class Config:
+        from_attributes = True
 
 class EstadisticasResponseDTO(BaseModel):
     total_ventas: int
@@ -25,4 +88,7 @@ class EstadisticasResponseDTO(BaseModel):
     promedio_venta: Decimal
     total_productos_vendidos: int
     ventas_hoy: int
-    ingresos_hoy: Decimal
\ No newline at end of file
+    ingresos_hoy: Decimal
+    total_devoluciones: int = 0
+    monto_devuelto: Decimal = Decimal('0.00')
+    ingresos_netos: Decimal = Decimal('0.00')
\ No newline at end of file
@@ -0,0 +1,62 @@
+import csv
+import io
+import json
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, AsyncIterator, Dict
+
+# Columnas de la exportación: una fila por línea de detalle con la venta aplanada
+EXPORT_COLUMNS = [
+    "venta_id",
+    "fecha",
+    "total",
+    "usuario_id",
+    "usuario_nombre",
+    "detalle_id",
+    "producto_id",
+    "producto_nombre",
+    "cantidad",
+    "precio",
+    "subtotal",
+]
+
+# Filas agrupadas por cada chunk enviado al cliente
+FILAS_POR_CHUNK = 500
+
+
+def _serializar(valor: Any) -> Any:
+    if isinstance(valor, datetime):
+        return valor.isoformat()
+    if isinstance(valor, Decimal):
+        return str(valor)
+    return valor
+
+
+async def ndjson_chunks(filas: AsyncIterator[Dict[str, Any]]) -> AsyncIterator[str]:
+    """Convierte las filas en NDJSON, agrupando FILAS_POR_CHUNK líneas por chunk"""
+    buffer = []
+    async for fila in filas:
+        buffer.append(json.dumps({c: _serializar(fila.get(c)) for c in EXPORT_COLUMNS}, ensure_ascii=False))
+        if len(buffer) >= FILAS_POR_CHUNK:
+            yield "\n".join(buffer) + "\n"
+            buffer.clear()
+    if buffer:
+        yield "\n".join(buffer) + "\n"
+
+
+async def csv_chunks(filas: AsyncIterator[Dict[str, Any]]) -> AsyncIterator[str]:
+    """Convierte las filas en CSV con encabezado, agrupando FILAS_POR_CHUNK filas por chunk"""
+    output = io.StringIO()
+    writer = csv.DictWriter(output, fieldnames=EXPORT_COLUMNS, extrasaction="ignore")
+    writer.writeheader()
+    pendientes = 0
+    async for fila in filas:
+        writer.writerow({c: _serializar(fila.get(c)) for c in EXPORT_COLUMNS})
+        pendientes += 1
+        if pendientes >= FILAS_POR_CHUNK:
+            yield output.getvalue()
+            output.seek(0)
+            output.truncate(0)
+            pendientes = 0
+    if output.tell():
+        yield output.getvalue()
@@ -1,58 +1,65 @@
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 from datetime import datetime
 from decimal import Decimal
 
-from ..domain.entities import Venta, DetalleVenta, ProductoVenta, EstadisticasVentas
-from ..domain.repositories import VentaRepository, ProductoRepository
-from ..domain.exception import StockInsuficienteError, ProductoNoEncontradoError, VentaNoEncontradaError
+from ...core.pagination import next_cursor
+from ..domain.entities import (
+    Venta, DetalleVenta, ProductoVenta, EstadisticasVentas, Devolucion, DetalleDevolucion
+)
+from ..domain.repositories import VentaRepository, ProductoRepository, DevolucionRepository
+from ..domain.exception import (
+    VentaError, StockInsuficienteError, ProductoNoEncontradoError, VentaNoEncontradaError,
+    VentaInvalidaError, UsuarioNoEncontradoError, DevolucionInvalidaError
+)
 
 class VentaService:
-    def __init__(self, venta_repository: VentaRepository, producto_repository: ProductoRepository):
+    def __init__(
+        self,
+        venta_repository: VentaRepository,
+        producto_repository: ProductoRepository,
+        devolucion_repository: DevolucionRepository
+    ):
         self.venta_repository = venta_repository
         self.producto_repository = producto_repository
+        self.devolucion_repository = devolucion_repository
     
     async def crear_venta(self, detalles: List[Dict[str, Any]], usuario_id: Optional[int] = None) -> Venta:
         """
-        Crea una nueva venta validando stock y precios
+        Crea una nueva venta validando cantidades, stock y precios.
+        
+        El stock de todos los productos se reserva en una sola sentencia y la
+        venta con sus detalles se guarda en la misma transacción (un commit).
         """
-        # Validar y obtener productos
+        # Agrupar cantidades por producto (una línea repetida no debe reservarse dos veces)
+        cantidades: Dict[int, int] = {}
+        for detalle in detalles:
+            producto_id = detalle['producto_id']
+            # Una cantidad negativa pasaría el chequeo de stock y lo sumaría
+            if detalle['cantidad'] <= 0:
+                raise VentaInvalidaError(f"cantidad inválida para el producto {producto_id}")
+            cantidades[producto_id] = cantidades.get(producto_id, 0) + detalle['cantidad']
+        
+        # Reservar stock (lanza ProductoNoEncontradoError / StockInsuficienteError)
+        productos = await self.producto_repository.reservar_stock(cantidades, usuario_id=usuario_id)
+        
         productos_validados = []
         total_venta = Decimal('0.00')
-        
         for detalle in detalles:
-            producto_id = detalle['producto_id']
+            producto = productos[detalle['producto_id']]
             cantidad = detalle['cantidad']
             
-            # Obtener producto - Asegúrate de usar await si es async
-            producto = await self.producto_repository.get_by_id(producto_id)
-            if not producto:
-                raise ProductoNoEncontradoError(producto_id)
-            
-            # Validar stock
-            if producto.stock < cantidad:
-                raise StockInsuficienteError(
-                    producto.nombre, 
-                    producto.stock, 
-                    cantidad
-                )
-            
             # Calcular subtotal
             subtotal = producto.precio * cantidad
             total_venta += subtotal
             
-            # Crear detalle de venta
-            detalle_venta = DetalleVenta(
+            productos_validados.append(DetalleVenta(
                 id=None,
-                producto_id=producto_id,
+                producto_id=producto.id,
                 producto_nombre=producto.nombre,
                 cantidad=cantidad,
                 precio=producto.precio,
                 subtotal=subtotal
-            )
-            productos_validados.append(detalle_venta)
-            
-            # Actualizar stock (reducir) - Asegúrate de usar await si es async
-            await self.producto_repository.update_stock(producto_id, -cantidad)
+            ))
         
         # Crear venta
         venta = Venta(
@@ -64,49 +71,239 @@ class VentaService:
             detalles=productos_validados
         )
         
-        # Guardar venta - Asegúrate de usar await si es async
-        venta_guardada = await self.venta_repository.save(venta)
-        return venta_guardada
+        # Guardar venta y confirmar la reserva en un solo commit
+        return await self.venta_repository.save(venta)
+    
+    async def crear_ventas_bulk(self, ventas: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Crea un lote de ventas (ej. la carga de un punto de venta que estuvo offline).
+        
+        - Todos los productos del lote se cargan y bloquean con una sola consulta.
+        - Cada venta se valida en orden contra el stock restante del lote; las que
+          fallan se reportan y no afectan a las demás (éxito parcial).
+        - El stock de las ventas aceptadas se descuenta en una sola sentencia, las
+          salidas se anotan en el ledger a nombre del usuario de cada venta y las
+          ventas/detalles se insertan con executemany, todo en un solo commit.
+        
+        Retorna un resultado por venta, en el mismo orden recibido.
+        """
+        producto_ids = {d['producto_id'] for venta in ventas for d in venta['detalles']}
+        usuario_ids = {venta['usuario_id'] for venta in ventas if venta.get('usuario_id') is not None}
+        
+        productos = await self.producto_repository.bloquear_productos(producto_ids)
+        usuarios = await self.venta_repository.usuarios_existentes(usuario_ids)
+        
+        stock_disponible = {pid: producto.stock for pid, producto in productos.items()}
+        cantidades_reservadas: Dict[int, int] = {}
+        salidas_por_usuario: Dict[Optional[int], Dict[int, int]] = {}
+        aceptadas: List[Tuple[int, Venta]] = []
+        resultados: List[Dict[str, Any]] = [None] * len(ventas)
+        
+        for indice, datos in enumerate(ventas):
+            try:
+                venta = self._validar_venta_bulk(datos, productos, usuarios, stock_disponible)
+            except VentaError as e:
+                resultados[indice] = {"indice": indice, "ok": False, "error": str(e)}
+                continue
+            
+            salidas = salidas_por_usuario.setdefault(venta.usuario_id, {})
+            for detalle in venta.detalles:
+                stock_disponible[detalle.producto_id] -= detalle.cantidad
+                cantidades_reservadas[detalle.producto_id] = (
+                    cantidades_reservadas.get(detalle.producto_id, 0) + detalle.cantidad
+                )
+                salidas[detalle.producto_id] = salidas.get(detalle.producto_id, 0) + detalle.cantidad
+            aceptadas.append((indice, venta))
+        
+        if aceptadas:
+            # Las filas ya están bloqueadas, así que la reserva agregada no puede fallar
+            await self.producto_repository.reservar_stock(cantidades_reservadas, anotar=False)
+            for usuario_id, salidas in salidas_por_usuario.items():
+                await self.producto_repository.anotar_salidas(salidas, usuario_id)
+            await self.venta_repository.save_many([venta for _, venta in aceptadas])
+        
+        for indice, venta in aceptadas:
+            resultados[indice] = {
+                "indice": indice,
+                "ok": True,
+                "venta_id": venta.id,
+                "total": float(venta.total)
+            }
+        return resultados
+    
+    @staticmethod
+    def _validar_venta_bulk(
+        datos: Dict[str, Any],
+        productos: Dict[int, ProductoVenta],
+        usuarios: set,
+        stock_disponible: Dict[int, int]
+    ) -> Venta:
+        """Valida una venta del lote contra los productos bloqueados y el stock restante"""
+        if not datos['detalles']:
+            raise VentaInvalidaError("la venta no tiene detalles")
+        
+        usuario_id = datos.get('usuario_id')
+        if usuario_id is not None and usuario_id not in usuarios:
+            raise UsuarioNoEncontradoError(usuario_id)
+        
+        cantidades: Dict[int, int] = {}
+        for detalle in datos['detalles']:
+            if detalle['cantidad'] <= 0:
+                raise VentaInvalidaError(f"cantidad inválida para el producto {detalle['producto_id']}")
+            if detalle['producto_id'] not in productos:
+                raise ProductoNoEncontradoError(detalle['producto_id'])
+            cantidades[detalle['producto_id']] = cantidades.get(detalle['producto_id'], 0) + detalle['cantidad']
+        
+        for producto_id, cantidad in cantidades.items():
+            if stock_disponible[producto_id] < cantidad:
+                producto = productos[producto_id]
+                raise StockInsuficienteError(producto.nombre, stock_disponible[producto_id], cantidad)
+        
+        detalles = []
+        for detalle in datos['detalles']:
+            producto = productos[detalle['producto_id']]
+            detalles.append(DetalleVenta(
+                id=None,
+                producto_id=producto.id,
+                producto_nombre=producto.nombre,
+                cantidad=detalle['cantidad'],
+                precio=producto.precio,
+                subtotal=producto.precio * detalle['cantidad']
+            ))
+        
+        return Venta(
+            id=None,
+            fecha=datetime.now(),
+            total=sum((d.subtotal for d in detalles), Decimal('0.00')),
+            usuario_id=usuario_id,
+            usuario_nombre=None,
+            detalles=detalles
+        )
     
     async def obtener_venta(self, venta_id: int) -> Optional[Venta]:
         return await self.venta_repository.get_by_id(venta_id)
     
-    async def obtener_ventas(self, skip: int = 0, limit: int = 100) -> List[Dict[str, Any]]:
+    async def obtener_ventas(
+        self, skip: int = 0, limit: int = 100, cursor: Optional[str] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        Retorna la página de ventas y el cursor de la siguiente página.
+        Con `cursor` se pagina por keyset (fecha, id) y `skip` se ignora.
+        """
         print("🔍 [SERVICE] === OBTENER_VENTAS ===")
         try:
-            print(f"🔍 [SERVICE] 1. Llamando a repositorio - skip: {skip}, limit: {limit}")
-            ventas = await self.venta_repository.get_all(skip, limit)
+            print(f"🔍 [SERVICE] 1. Llamando a repositorio - skip: {skip}, limit: {limit}, cursor: {cursor}")
+            ventas = await self.venta_repository.get_all(skip, limit, cursor)
             print(f"✅ [SERVICE] 2. Repositorio retornó: {len(ventas)} ventas")
             
-            # Si el repositorio retorna diccionarios, procesarlos como tal
-            for venta in ventas:
-                print(f"Venta ID: {venta['id']}")  # Usar como diccionario
-                for detalle in venta['detalles']:
-                    print(f"  - Producto: {detalle['producto_nombre']}")
-            
-            return ventas
+            return ventas, next_cursor(ventas, limit, "fecha", "id")
         except Exception as e:
             print(f"❌ [SERVICE] ERROR en obtener_ventas: {str(e)}")
             raise
     
     async def eliminar_venta(self, venta_id: int) -> bool:
-        # Primero obtener la venta para restaurar stock
-        venta = await self.venta_repository.get_by_id(venta_id)
-        if not venta:
+        """
+        Elimina una venta devolviendo al stock lo que no se había devuelto ya.
+        Restauración y borrado van en la misma transacción (un commit).
+        """
+        # Bloquea la venta y calcula lo pendiente (vendido - devuelto) por producto
+        devolvibles = await self.devolucion_repository.bloquear_devolvibles(venta_id)
+        if devolvibles is None:
             return False
         
-        # Restaurar stock de cada producto
-        for detalle in venta.detalles:
-            await self.producto_repository.update_stock(detalle.producto_id, detalle.cantidad)
-        
-        # Eliminar venta
+        await self.producto_repository.restaurar_stock({
+            producto_id: linea.cantidad_disponible
+            for producto_id, linea in devolvibles.items()
+            if linea.cantidad_disponible > 0
+        })
         return await self.venta_repository.delete(venta_id)
     
-    async def obtener_ventas_por_fecha(self, fecha_inicio: datetime, fecha_fin: datetime) -> List[Venta]:
-        return await self.venta_repository.get_by_fecha_range(fecha_inicio, fecha_fin)
+    async def registrar_devolucion(
+        self,
+        venta_id: int,
+        detalles: Optional[List[Dict[str, Any]]] = None,
+        motivo: Optional[str] = None,
+        usuario_id: Optional[int] = None
+    ) -> Devolucion:
+        """
+        Registra una devolución total (sin `detalles`) o parcial de una venta.
+        
+        La venta se bloquea mientras se valida contra lo ya devuelto, el stock se
+        restaura en una sola sentencia y la devolución con sus detalles se guarda
+        en la misma transacción (un commit).
+        """
+        devolvibles = await self.devolucion_repository.bloquear_devolvibles(venta_id)
+        if devolvibles is None:
+            raise VentaNoEncontradaError(venta_id)
+        
+        if usuario_id is not None and not await self.venta_repository.usuarios_existentes({usuario_id}):
+            raise UsuarioNoEncontradoError(usuario_id)
+        
+        cantidades: Dict[int, int] = {}
+        if not detalles:
+            # Devolución total: todo lo que queda sin devolver
+            cantidades = {
+                producto_id: linea.cantidad_disponible
+                for producto_id, linea in devolvibles.items()
+                if linea.cantidad_disponible > 0
+            }
+            if not cantidades:
+                raise DevolucionInvalidaError(f"la venta {venta_id} ya fue devuelta por completo")
+        else:
+            for detalle in detalles:
+                producto_id = detalle['producto_id']
+                if detalle['cantidad'] <= 0:
+                    raise DevolucionInvalidaError(f"cantidad inválida para el producto {producto_id}")
+                if producto_id not in devolvibles:
+                    raise DevolucionInvalidaError(f"el producto {producto_id} no forma parte de la venta {venta_id}")
+                cantidades[producto_id] = cantidades.get(producto_id, 0) + detalle['cantidad']
+            
+            for producto_id, cantidad in cantidades.items():
+                linea = devolvibles[producto_id]
+                if cantidad > linea.cantidad_disponible:
+                    raise DevolucionInvalidaError(
+                        f"se intentan devolver {cantidad} unidades de {linea.producto_nombre}, "
+                        f"pendientes de devolución: {linea.cantidad_disponible}"
+                    )
+        
+        detalles_devolucion = [
+            DetalleDevolucion(
+                id=None,
+                producto_id=producto_id,
+                producto_nombre=devolvibles[producto_id].producto_nombre,
+                cantidad=cantidad,
+                precio=devolvibles[producto_id].precio,
+                subtotal=devolvibles[producto_id].precio * cantidad
+            )
+            for producto_id, cantidad in cantidades.items()
+        ]
+        devolucion = Devolucion(
+            id=None,
+            venta_id=venta_id,
+            fecha=datetime.now(),
+            motivo=motivo,
+            usuario_id=usuario_id,
+            total=sum((d.subtotal for d in detalles_devolucion), Decimal('0.00')),
+            detalles=detalles_devolucion
+        )
+        
+        await self.producto_repository.restaurar_stock(cantidades, usuario_id=usuario_id)
+        return await self.devolucion_repository.save(devolucion)
+    
+    async def obtener_devoluciones(self, venta_id: int) -> List[Devolucion]:
+        return await self.devolucion_repository.get_by_venta(venta_id)
+    
+    async def obtener_ventas_por_fecha(
+        self, fecha_inicio: datetime, fecha_fin: datetime, limit: int = 500, cursor: Optional[str] = None
+    ) -> Tuple[List[Venta], Optional[str]]:
+        ventas = await self.venta_repository.get_by_fecha_range(fecha_inicio, fecha_fin, limit, cursor)
+        return ventas, next_cursor(ventas, limit, "fecha", "id")
     
-    async def obtener_ventas_por_producto(self, producto_id: int) -> List[Venta]:
-        return await self.venta_repository.get_by_producto(producto_id)
+    async def obtener_ventas_por_producto(
+        self, producto_id: int, limit: int = 500, cursor: Optional[str] = None
+    ) -> Tuple[List[Venta], Optional[str]]:
+        ventas = await self.venta_repository.get_by_producto(producto_id, limit, cursor)
+        return ventas, next_cursor(ventas, limit, "fecha", "id")
     
     async def obtener_estadisticas(self) -> EstadisticasVentas:
         return await self.venta_repository.get_estadisticas()
\ No newline at end of file
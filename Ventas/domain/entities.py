@@ -38,6 +38,42 @@ class ProductoVenta:
     precio: Decimal
     stock: int
 
+@dataclass
+class DetalleDevolucion:
+    id: Optional[int]
+    producto_id: int
+    producto_nombre: str
+    cantidad: int
+    precio: Decimal
+    subtotal: Decimal
+    
+    def __post_init__(self):
+        self.subtotal = self.precio * self.cantidad
+
+@dataclass
+class Devolucion:
+    id: Optional[int]
+    venta_id: int
+    fecha: datetime
+    motivo: Optional[str]
+    usuario_id: Optional[int]
+    total: Decimal
+    detalles: List[DetalleDevolucion]
+    
+    def __post_init__(self):
+        if not self.detalles:
+            self.detalles = []
+        if not self.total and self.detalles:
+            self.total = sum(detalle.subtotal for detalle in self.detalles)
+
+@dataclass
+class ProductoDevolvible:
+    """Línea de una venta con la cantidad que todavía se puede devolver"""
+    producto_id: int
+    producto_nombre: str
+    cantidad_disponible: int
+    precio: Decimal
+
 @dataclass
 class EstadisticasVentas:
     total_ventas: int
@@ -45,4 +81,7 @@ class EstadisticasVentas:
     promedio_venta: Decimal
     total_productos_vendidos: int
     ventas_hoy: int
-    ingresos_hoy: Decimal
\ No newline at end of file
+    ingresos_hoy: Decimal
+    total_devoluciones: int = 0
+    monto_devuelto: Decimal = Decimal('0.00')
+    ingresos_netos: Decimal = Decimal('0.00')
\ No newline at end of file
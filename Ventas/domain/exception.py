@@ -16,4 +16,19 @@ class ProductoNoEncontradoError(VentaError):
 class VentaNoEncontradaError(VentaError):
     def __init__(self, venta_id: int):
         self.venta_id = venta_id
-        super().__init__(f"Venta con ID {venta_id} no encontrada")
\ No newline at end of file
+        super().__init__(f"Venta con ID {venta_id} no encontrada")
+
+class VentaInvalidaError(VentaError):
+    def __init__(self, motivo: str):
+        self.motivo = motivo
+        super().__init__(f"Venta inválida: {motivo}")
+
+class UsuarioNoEncontradoError(VentaError):
+    def __init__(self, usuario_id: int):
+        self.usuario_id = usuario_id
+        super().__init__(f"Usuario con ID {usuario_id} no encontrado")
+
+class DevolucionInvalidaError(VentaError):
+    def __init__(self, motivo: str):
+        self.motivo = motivo
+        super().__init__(f"Devolución inválida: {motivo}")
@@ -1,7 +1,7 @@
 from abc import ABC, abstractmethod
-from typing import List, Optional
+from typing import Dict, List, Optional, Set
 from datetime import datetime
-from .entities import Venta, EstadisticasVentas, ProductoVenta
+from .entities import Venta, EstadisticasVentas, ProductoVenta, Devolucion, ProductoDevolvible
 
 class VentaRepository(ABC):
     @abstractmethod
@@ -9,23 +9,33 @@ class VentaRepository(ABC):
         pass
     
     @abstractmethod
-    def get_all(self, skip: int = 0, limit: int = 100) -> List[Venta]:
+    def get_all(self, skip: int = 0, limit: int = 100, cursor: Optional[str] = None) -> List[Venta]:
         pass
     
     @abstractmethod
     def save(self, venta: Venta) -> Venta:
         pass
     
+    @abstractmethod
+    def save_many(self, ventas: List[Venta]) -> List[Venta]:
+        pass
+    
+    @abstractmethod
+    def usuarios_existentes(self, usuario_ids: Set[int]) -> Set[int]:
+        pass
+    
     @abstractmethod
     def delete(self, venta_id: int) -> bool:
         pass
     
     @abstractmethod
-    def get_by_fecha_range(self, fecha_inicio: datetime, fecha_fin: datetime) -> List[Venta]:
+    def get_by_fecha_range(
+        self, fecha_inicio: datetime, fecha_fin: datetime, limit: int = 1000, cursor: Optional[str] = None
+    ) -> List[Venta]:
         pass
     
     @abstractmethod
-    def get_by_producto(self, producto_id: int) -> List[Venta]:
+    def get_by_producto(self, producto_id: int, limit: int = 1000, cursor: Optional[str] = None) -> List[Venta]:
         pass
     
     @abstractmethod
@@ -38,5 +48,32 @@ class ProductoRepository(ABC):
         pass
     
     @abstractmethod
-    def update_stock(self, producto_id: int, cantidad: int) -> bool:
+    def bloquear_productos(self, producto_ids: Set[int]) -> Dict[int, ProductoVenta]:
+        pass
+    
+    @abstractmethod
+    def reservar_stock(
+        self, cantidades: Dict[int, int], usuario_id: Optional[int] = None, anotar: bool = True
+    ) -> Dict[int, ProductoVenta]:
+        pass
+    
+    @abstractmethod
+    def anotar_salidas(self, cantidades: Dict[int, int], usuario_id: Optional[int] = None) -> int:
+        pass
+    
+    @abstractmethod
+    def restaurar_stock(self, cantidades: Dict[int, int], usuario_id: Optional[int] = None) -> int:
+        pass
+
+class DevolucionRepository(ABC):
+    @abstractmethod
+    def bloquear_devolvibles(self, venta_id: int) -> Optional[Dict[int, ProductoDevolvible]]:
+        pass
+    
+    @abstractmethod
+    def save(self, devolucion: Devolucion) -> Devolucion:
+        pass
+    
+    @abstractmethod
+    def get_by_venta(self, venta_id: int) -> List[Devolucion]:
         pass
\ No newline at end of file
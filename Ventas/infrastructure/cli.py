@@ -0,0 +1,31 @@
+import asyncio
+import click
+
+from ...database.session import async_session, engine
+from .repository import SQLVentaRepository
+
+
+@click.group()
+def cli():
+    """🧾 Ventas - Tareas de mantenimiento"""
+    pass
+
+
+@cli.command("reconstruir-estadisticas")
+def reconstruir_estadisticas():
+    """📊 Recalcula el rollup diario de ventas (ventas_resumen_diario) desde cero"""
+
+    async def _run():
+        try:
+            async with async_session() as session:
+                return await SQLVentaRepository(session).reconstruir_resumen_diario()
+        finally:
+            await engine.dispose()
+
+    click.echo("\n🔄 Reconstruyendo ventas_resumen_diario...")
+    dias = asyncio.run(_run())
+    click.echo(f"✅ Rollup reconstruido: {dias} días")
+
+
+if __name__ == '__main__':
+    cli()
@@ -1,10 +1,11 @@
 from typing import List, Optional
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Text, Boolean, DECIMAL
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, ForeignKey, Text, Boolean, DECIMAL, Index, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from datetime import datetime
 from pydantic import BaseModel
+from ...core.busqueda import expr_documento, expr_prefijo
 
 Base = declarative_base()
 
@@ -41,6 +42,24 @@ class Venta(Base):
     # Relaciones
     usuario = relationship("Usuario", back_populates="ventas")
     detalles = relationship("DetalleVenta", back_populates="venta", cascade="all, delete-orphan")
+    
+    __table_args__ = (
+        # Paginación por keyset ORDER BY fecha DESC, id DESC
+        Index("idx_ventas_fecha_id", fecha.desc(), id.desc()),
+    )
+
+class ResumenVentaDiario(Base):
+    """Rollup diario de ventas y devoluciones, mantenido incrementalmente desde la API"""
+    __tablename__ = "ventas_resumen_diario"
+
+    fecha = Column(Date, primary_key=True)
+    cantidad_ventas = Column(Integer, nullable=False, default=0)
+    ingresos = Column(DECIMAL(14, 2), nullable=False, default=0)
+    unidades = Column(Integer, nullable=False, default=0)
+    # Devoluciones registradas ese día (no el día de la venta original)
+    cantidad_devoluciones = Column(Integer, nullable=False, default=0)
+    monto_devuelto = Column(DECIMAL(14, 2), nullable=False, default=0)
+    unidades_devueltas = Column(Integer, nullable=False, default=0)
 
 class DetalleVenta(Base):
     __tablename__ = "detalle_ventas"
@@ -73,6 +92,20 @@ class Producto(Base):
     movimientos = relationship("Movimiento", back_populates="producto")
     historial_precios = relationship("HistorialPrecio", back_populates="producto")
 
+    __table_args__ = (
+        # El nombre identifica al producto: clave del upsert de POST /productos/importar (ON CONFLICT)
+        Index("uq_productos_nombre", "nombre", unique=True),
+        # Carga/resincronización de stock bajo: range scan de stock < umbral
+        Index("idx_productos_stock", "stock"),
+        # Búsqueda /productos/buscar: palabras (GIN) y autocompletar por prefijo del nombre (btree "C").
+        # fastupdate=off: sin "pending list" que cada búsqueda tenga que recorrer (catálogo de mucha lectura)
+        Index(
+            "idx_productos_busqueda", text(f"({expr_documento('nombre', 'descripcion')})"),
+            postgresql_using="gin", postgresql_with={"fastupdate": "off"}
+        ).ddl_if(dialect="postgresql"),
+        Index("idx_productos_nombre_prefijo", text(expr_prefijo("nombre"))).ddl_if(dialect="postgresql"),
+    )
+
 class Usuario(Base):
     __tablename__ = "usuarios"
 
@@ -113,6 +146,13 @@ class Proveedor(Base):
     productos = relationship("Producto", back_populates="proveedor")
     pedidos_proveedores = relationship("PedidoProveedor", back_populates="proveedor")
 
+    __table_args__ = (
+        Index(
+            "idx_proveedores_busqueda", text(expr_documento("nombre")),
+            postgresql_using="gin", postgresql_with={"fastupdate": "off"}
+        ).ddl_if(dialect="postgresql"),
+    )
+
 class Movimiento(Base):
     __tablename__ = "movimientos"
 
@@ -120,13 +160,36 @@ class Movimiento(Base):
     producto_id = Column(Integer, ForeignKey("productos.id", ondelete="CASCADE"), nullable=False)
     tipo = Column(String(20), nullable=False)
     cantidad = Column(Integer, nullable=False)
-    fecha = Column(DateTime(timezone=True), server_default=func.now())
+    fecha = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     usuario_id = Column(Integer, ForeignKey("usuarios.id"), nullable=True)
     
     # Relaciones
     producto = relationship("Producto", back_populates="movimientos")
     usuario = relationship("Usuario", back_populates="movimientos")
 
+    __table_args__ = (
+        # Stock a una fecha: delta del ledger entre el snapshot y la fecha, por producto
+        Index("idx_movimientos_producto_fecha", producto_id, fecha),
+        # Snapshots: productos con movimientos desde el corte anterior
+        Index("idx_movimientos_fecha", fecha),
+    )
+
+class SnapshotStock(Base):
+    """Stock de un producto a una fecha de corte (proyección de movimientos)"""
+    __tablename__ = "snapshots_stock"
+
+    id = Column(Integer, primary_key=True, index=True)
+    producto_id = Column(Integer, ForeignKey("productos.id", ondelete="CASCADE"), nullable=False)
+    fecha = Column(DateTime(timezone=True), nullable=False)
+    stock = Column(Integer, nullable=False)
+
+    __table_args__ = (
+        # Snapshot más cercano a una fecha para un producto
+        Index("uq_snapshots_stock_producto_fecha", producto_id, fecha, unique=True),
+        # Último corte tomado
+        Index("idx_snapshots_stock_fecha", fecha),
+    )
+
 class Rol(Base):
     __tablename__ = "roles"
 
@@ -151,14 +214,20 @@ class PedidoProveedor(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     proveedor_id = Column(Integer, ForeignKey("proveedores.id", ondelete="CASCADE"), nullable=False)
-    fecha_pedido = Column(DateTime(timezone=True), server_default=func.now())
-    fecha_entrega = Column(DateTime(timezone=True))
+    fecha_pedido = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    fecha_entrega = Column(DateTime(timezone=True))  # NULL: pendiente de recepción
     total = Column(DECIMAL(10, 2), nullable=False)
     
     # Relaciones
     proveedor = relationship("Proveedor", back_populates="pedidos_proveedores")
     detalle_pedidos = relationship("DetallePedidoProveedor", back_populates="pedido")
 
+    __table_args__ = (
+        # GET /proveedores/pedidos: keyset ORDER BY fecha_pedido DESC, id DESC, con o sin proveedor
+        Index("idx_pedidos_proveedores_proveedor_fecha", proveedor_id, fecha_pedido, id),
+        Index("idx_pedidos_proveedores_fecha", fecha_pedido, id),
+    )
+
 class DetallePedidoProveedor(Base):
     __tablename__ = "detalle_pedidos_proveedores"
 
@@ -172,11 +241,16 @@ class DetallePedidoProveedor(Base):
     pedido = relationship("PedidoProveedor", back_populates="detalle_pedidos")
     producto = relationship("Producto")
 
+    __table_args__ = (
+        # Recepción y detalle de un pedido
+        Index("idx_detalle_pedidos_proveedores_pedido", pedido_id),
+    )
+
 class Devolucion(Base):
     __tablename__ = "devoluciones"
 
     id = Column(Integer, primary_key=True, index=True)
-    venta_id = Column(Integer, ForeignKey("ventas.id", ondelete="CASCADE"), nullable=False)
+    venta_id = Column(Integer, ForeignKey("ventas.id", ondelete="CASCADE"), nullable=False, index=True)
     fecha = Column(DateTime(timezone=True), server_default=func.now())
     motivo = Column(Text)
     usuario_id = Column(Integer, ForeignKey("usuarios.id"), nullable=True)
@@ -190,7 +264,7 @@ class DetalleDevolucion(Base):
     __tablename__ = "detalle_devoluciones"
 
     id = Column(Integer, primary_key=True, index=True)
-    devolucion_id = Column(Integer, ForeignKey("devoluciones.id", ondelete="CASCADE"), nullable=False)
+    devolucion_id = Column(Integer, ForeignKey("devoluciones.id", ondelete="CASCADE"), nullable=False, index=True)
     producto_id = Column(Integer, ForeignKey("productos.id", ondelete="CASCADE"), nullable=False)
     cantidad = Column(Integer, nullable=False)
     precio = Column(DECIMAL(10, 2), nullable=False)
@@ -213,6 +287,11 @@ class HistorialPrecio(Base):
     producto = relationship("Producto", back_populates="historial_precios")
     usuario = relationship("Usuario", back_populates="historial_precios")
 
+    __table_args__ = (
+        # GET /productos/{id}/historial-precios: keyset ORDER BY fecha_cambio DESC, id DESC por producto
+        Index("idx_historial_precios_producto_fecha", producto_id, fecha_cambio, id),
+    )
+
 class Sesion(Base):
     __tablename__ = "sesiones"
 
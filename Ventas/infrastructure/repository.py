@@ -1,137 +1,87 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
-from typing import List, Optional
+from sqlalchemy import select, func, insert, text, tuple_
+from sqlalchemy.orm import selectinload
+from typing import AsyncIterator, Dict, List, Optional, Set
 from datetime import datetime, date
 from decimal import Decimal
 
-from ..domain.entities import Venta, DetalleVenta, ProductoVenta, EstadisticasVentas
-from ..domain.repositories import VentaRepository, ProductoRepository
+from ...core.pagination import CursorInvalidoError, decode_cursor
+from ...core.http_cache import marcar_modificado_al_confirmar
+from ...productos.infrastructure.cache import invalidar_al_confirmar
+from ...productos.infrastructure.stock_bajo import registrar_stock_al_confirmar
+from ...movimientos.infrastructure.repository import SALIDA, anotar_movimientos
+from ..domain.entities import (
+    Venta, DetalleVenta, ProductoVenta, EstadisticasVentas, Devolucion, DetalleDevolucion, ProductoDevolvible
+)
+from ..domain.repositories import VentaRepository, ProductoRepository, DevolucionRepository
 from ..domain.exception import StockInsuficienteError, ProductoNoEncontradoError, VentaNoEncontradaError
 
+# Tope de ventas por respuesta en reportes; el resto se obtiene con el cursor
+MAX_VENTAS_REPORTE = 1000
+
+COLUMNAS_RESUMEN = (
+    "cantidad_ventas", "ingresos", "unidades",
+    "cantidad_devoluciones", "monto_devuelto", "unidades_devueltas"
+)
+
+async def aplicar_resumen_diario(db: AsyncSession, deltas: List[dict]):
+    """
+    Aplica deltas al rollup diario. Cada delta trae `fecha` y cualquiera de
+    COLUMNAS_RESUMEN (las que falten suman 0). El día se calcula en la base de
+    datos, igual que date(ventas.fecha).
+    Se ejecuta justo antes del commit para mantener poco tiempo el bloqueo de la fila del día.
+    """
+    if not deltas:
+        return
+    marcar_modificado_al_confirmar(db, "ventas")
+    await db.execute(
+        text(f"""
+            INSERT INTO ventas_resumen_diario (fecha, {', '.join(COLUMNAS_RESUMEN)})
+            VALUES (CAST(CAST(:fecha AS TIMESTAMPTZ) AS DATE), {', '.join(':' + c for c in COLUMNAS_RESUMEN)})
+            ON CONFLICT (fecha) DO UPDATE SET
+                {', '.join(f'{c} = ventas_resumen_diario.{c} + EXCLUDED.{c}' for c in COLUMNAS_RESUMEN)}
+        """),
+        [{"fecha": delta["fecha"], **{c: delta.get(c, 0) for c in COLUMNAS_RESUMEN}} for delta in deltas]
+    )
+
 class SQLVentaRepository(VentaRepository):
     def __init__(self, db: AsyncSession):
         self.db = db
     
     async def get_by_id(self, venta_id: int) -> Optional[Venta]:
-        from .models import Venta as VentaModel, DetalleVenta as DetalleVentaModel, Producto, Usuario
-        
-        # Consulta principal de la venta
-        result = await self.db.execute(
-            select(VentaModel)
-            .where(VentaModel.id == venta_id)
-        )
-        venta_model = result.scalar_one_or_none()
-        
-        if not venta_model:
-            return None
-        
-        # Cargar detalles con productos usando join
-        detalles_result = await self.db.execute(
-            select(DetalleVentaModel, Producto)
-            .join(Producto, DetalleVentaModel.producto_id == Producto.id)
-            .where(DetalleVentaModel.venta_id == venta_id)
-        )
-        detalles_data = detalles_result.all()
+        from .models import Venta as VentaModel
         
-        detalles = []
-        for detalle_model, producto in detalles_data:
-            detalles.append(DetalleVenta(
-                id=detalle_model.id,
-                producto_id=detalle_model.producto_id,
-                producto_nombre=producto.nombre if producto else "Producto no encontrado",
-                cantidad=detalle_model.cantidad,
-                precio=detalle_model.precio,
-                subtotal=detalle_model.cantidad * detalle_model.precio
-            ))
-        
-        # Cargar usuario si existe
-        usuario_nombre = "Sistema"
-        if venta_model.usuario_id:
-            usuario_result = await self.db.execute(
-                select(Usuario)
-                .where(Usuario.id == venta_model.usuario_id)
-            )
-            usuario = usuario_result.scalar_one_or_none()
-            usuario_nombre = usuario.nombre if usuario else "Sistema"
-        
-        return Venta(
-            id=venta_model.id,
-            fecha=venta_model.fecha,
-            total=venta_model.total,
-            usuario_id=venta_model.usuario_id,
-            usuario_nombre=usuario_nombre,
-            detalles=detalles
-        )
+        ventas = await self._stream_ventas([VentaModel.id == venta_id], 1)
+        return ventas[0] if ventas else None
     
-    async def get_all(self, skip: int = 0, limit: int = 100) -> List[dict]:
+    async def get_all(self, skip: int = 0, limit: int = 100, cursor: Optional[str] = None) -> List[dict]:
         print("🔍 [REPOSITORY] === GET_ALL VENTAS ===")
         try:
-            from .models import Venta as VentaModel, DetalleVenta as DetalleVentaModel, Producto, Usuario
-            
-            print("🔍 [REPOSITORY] 1. Importando modelos...")
+            from .models import Venta as VentaModel
             
-            # Consulta principal
-            print("🔍 [REPOSITORY] 2. Ejecutando consulta principal...")
-            result = await self.db.execute(
-                select(VentaModel)
-                .order_by(VentaModel.fecha.desc())
-                .offset(skip)
+            # Carga por lotes: 1 consulta para la página de ventas, 1 para los
+            # detalles (con su producto) y 1 para los usuarios de toda la página
+            query = (
+                self._select_ventas_con_relaciones()
+                .order_by(VentaModel.fecha.desc(), VentaModel.id.desc())
                 .limit(limit)
             )
+            if cursor:
+                query = query.where(self._despues_de_cursor(cursor))
+            else:
+                query = query.offset(skip)
+            
+            result = await self.db.execute(query)
             ventas_models = result.scalars().all()
-            print(f"✅ [REPOSITORY] 3. Consulta principal retornó: {len(ventas_models)} ventas_models")
+            print(f"✅ [REPOSITORY] Consulta principal retornó: {len(ventas_models)} ventas_models")
             
             if not ventas_models:
                 print("ℹ️  [REPOSITORY] No hay ventas en la base de datos")
                 return []
             
-            ventas = []
-            for i, venta_model in enumerate(ventas_models):
-                print(f"🔍 [REPOSITORY] 4.{i+1} Procesando venta ID: {venta_model.id}")
-                
-                # Cargar detalles
-                print(f"🔍 [REPOSITORY] 5.{i+1} Cargando detalles para venta {venta_model.id}...")
-                detalles_result = await self.db.execute(
-                    select(DetalleVentaModel, Producto)
-                    .join(Producto, DetalleVentaModel.producto_id == Producto.id)
-                    .where(DetalleVentaModel.venta_id == venta_model.id)
-                )
-                detalles_data = detalles_result.all()
-                print(f"✅ [REPOSITORY] 6.{i+1} Venta {venta_model.id} tiene {len(detalles_data)} detalles")
-                
-                detalles = []
-                for detalle_model, producto in detalles_data:
-                    detalles.append({
-                        "id": detalle_model.id,
-                        "producto_id": detalle_model.producto_id,
-                        "producto_nombre": producto.nombre if producto else "Producto no encontrado",
-                        "cantidad": detalle_model.cantidad,
-                        "precio": float(detalle_model.precio),  # Convertir Decimal a float
-                        "subtotal": float(detalle_model.cantidad * detalle_model.precio)  # Convertir Decimal a float
-                    })
-                
-                # Cargar usuario
-                usuario_nombre = "Sistema"
-                if venta_model.usuario_id:
-                    print(f"🔍 [REPOSITORY] 7.{i+1} Cargando usuario ID: {venta_model.usuario_id}")
-                    usuario_result = await self.db.execute(
-                        select(Usuario)
-                        .where(Usuario.id == venta_model.usuario_id)
-                    )
-                    usuario = usuario_result.scalar_one_or_none()
-                    usuario_nombre = usuario.nombre if usuario else "Sistema"
-                
-                venta = {
-                    "id": venta_model.id,
-                    "fecha": venta_model.fecha.isoformat() if hasattr(venta_model.fecha, 'isoformat') else str(venta_model.fecha),
-                    "total": float(venta_model.total),  # Convertir Decimal a float
-                    "usuario_id": venta_model.usuario_id,
-                    "usuario_nombre": usuario_nombre,
-                    "detalles": detalles
-                }
-                ventas.append(venta)
+            ventas = [self._venta_model_to_dict(venta_model) for venta_model in ventas_models]
             
-            print(f"✅ [REPOSITORY] 8. Retornando {len(ventas)} ventas procesadas")
+            print(f"✅ [REPOSITORY] Retornando {len(ventas)} ventas procesadas")
             return ventas
             
         except Exception as e:
@@ -141,128 +91,420 @@ class SQLVentaRepository(VentaRepository):
             traceback.print_exc()
             raise
     
+    def _select_ventas_con_relaciones(self):
+        """SELECT de ventas con detalles, productos y usuario cargados con selectinload"""
+        from .models import Venta as VentaModel, DetalleVenta as DetalleVentaModel
+        
+        return select(VentaModel).options(
+            selectinload(VentaModel.detalles).selectinload(DetalleVentaModel.producto),
+            selectinload(VentaModel.usuario)
+        )
+    
+    @staticmethod
+    def _venta_model_to_dict(venta_model) -> dict:
+        """Convierte una venta con relaciones ya cargadas al diccionario de respuesta"""
+        detalles = []
+        for detalle_model in venta_model.detalles:
+            producto = detalle_model.producto
+            detalles.append({
+                "id": detalle_model.id,
+                "producto_id": detalle_model.producto_id,
+                "producto_nombre": producto.nombre if producto else "Producto no encontrado",
+                "cantidad": detalle_model.cantidad,
+                "precio": float(detalle_model.precio),  # Convertir Decimal a float
+                "subtotal": float(detalle_model.cantidad * detalle_model.precio)  # Convertir Decimal a float
+            })
+        
+        usuario = venta_model.usuario
+        return {
+            "id": venta_model.id,
+            "fecha": venta_model.fecha.isoformat() if hasattr(venta_model.fecha, 'isoformat') else str(venta_model.fecha),
+            "total": float(venta_model.total),  # Convertir Decimal a float
+            "usuario_id": venta_model.usuario_id,
+            "usuario_nombre": usuario.nombre if usuario else "Sistema",
+            "detalles": detalles
+        }
+    
     async def save(self, venta: Venta) -> Venta:
+        """
+        Inserta la venta y todos sus detalles (un INSERT multi-fila) y hace un
+        único commit, junto con lo que ya esté pendiente en la sesión (ej. la
+        reserva de stock de SQLProductoRepository.reservar_stock).
+        """
         from .models import Venta as VentaModel, DetalleVenta as DetalleVentaModel
         
         try:
-            # Crear modelo de venta
-            venta_model = VentaModel(
-                total=venta.total,
-                usuario_id=venta.usuario_id
+            result = await self.db.execute(
+                insert(VentaModel)
+                .values(total=venta.total, usuario_id=venta.usuario_id)
+                .returning(VentaModel.id, VentaModel.fecha)
             )
-            self.db.add(venta_model)
-            await self.db.flush()  # Para obtener el ID
+            venta_id, fecha = result.one()
             
-            # Crear detalles
-            for detalle in venta.detalles:
-                detalle_model = DetalleVentaModel(
-                    venta_id=venta_model.id,
-                    producto_id=detalle.producto_id,
-                    cantidad=detalle.cantidad,
-                    precio=detalle.precio
+            if venta.detalles:
+                await self.db.execute(
+                    insert(DetalleVentaModel).values([
+                        {
+                            "venta_id": venta_id,
+                            "producto_id": detalle.producto_id,
+                            "cantidad": detalle.cantidad,
+                            "precio": detalle.precio
+                        }
+                        for detalle in venta.detalles
+                    ])
                 )
-                self.db.add(detalle_model)
             
+            venta.id = venta_id
+            venta.fecha = fecha or venta.fecha
+            await self._acumular_resumen_diario([venta])
             await self.db.commit()
+            return venta
             
-            # Recargar la venta para obtener relaciones
+        except Exception as e:
+            await self.db.rollback()
+            raise e
+    
+    async def save_many(self, ventas: List[Venta]) -> List[Venta]:
+        """
+        Inserta un lote de ventas con sus detalles usando executemany (dos
+        sentencias por lote, sin importar su tamaño) y hace un único commit.
+        """
+        from .models import Venta as VentaModel, DetalleVenta as DetalleVentaModel
+        
+        if not ventas:
+            return []
+        
+        try:
+            # sort_by_parameter_order garantiza que los ids regresen en el orden del lote
             result = await self.db.execute(
-                select(VentaModel).where(VentaModel.id == venta_model.id)
+                insert(VentaModel).returning(VentaModel.id, VentaModel.fecha, sort_by_parameter_order=True),
+                [{"total": venta.total, "usuario_id": venta.usuario_id} for venta in ventas]
             )
-            venta_model_actualizada = result.scalar_one()
+            for venta, (venta_id, fecha) in zip(ventas, result.all()):
+                venta.id = venta_id
+                venta.fecha = fecha or venta.fecha
             
-            # Actualizar ID de la venta
-            venta.id = venta_model_actualizada.id
-            return venta
+            detalles = [
+                {
+                    "venta_id": venta.id,
+                    "producto_id": detalle.producto_id,
+                    "cantidad": detalle.cantidad,
+                    "precio": detalle.precio
+                }
+                for venta in ventas
+                for detalle in venta.detalles
+            ]
+            if detalles:
+                await self.db.execute(insert(DetalleVentaModel), detalles)
+            
+            await self._acumular_resumen_diario(ventas)
+            await self.db.commit()
+            return ventas
             
         except Exception as e:
             await self.db.rollback()
             raise e
     
+    async def usuarios_existentes(self, usuario_ids: Set[int]) -> Set[int]:
+        """Retorna cuáles de los ids de usuario existen (una consulta)"""
+        from .models import Usuario
+        
+        if not usuario_ids:
+            return set()
+        result = await self.db.execute(select(Usuario.id).where(Usuario.id.in_(usuario_ids)))
+        return set(result.scalars().all())
+    
     async def delete(self, venta_id: int) -> bool:
+        try:
+            # Devoluciones de la venta (se borran en cascada): hay que descontarlas
+            # del rollup en el día en que se registraron
+            result = await self.db.execute(
+                text("""
+                    SELECT d.fecha, SUM(dd.cantidad * dd.precio) AS monto, SUM(dd.cantidad) AS unidades
+                    FROM devoluciones d
+                    JOIN detalle_devoluciones dd ON dd.devolucion_id = d.id
+                    WHERE d.venta_id = :venta_id
+                    GROUP BY d.id, d.fecha
+                """),
+                {"venta_id": venta_id}
+            )
+            deltas = [
+                {"fecha": row.fecha, "cantidad_devoluciones": -1, "monto_devuelto": -row.monto, "unidades_devueltas": -row.unidades}
+                for row in result
+            ]
+            
+            # Los detalles se borran por ON DELETE CASCADE; el subselect todavía los ve
+            result = await self.db.execute(
+                text("""
+                    WITH borrada AS (
+                        DELETE FROM ventas WHERE id = :venta_id RETURNING id, fecha, total
+                    )
+                    SELECT b.fecha, b.total,
+                           (SELECT COALESCE(SUM(d.cantidad), 0) FROM detalle_ventas d WHERE d.venta_id = b.id) AS unidades
+                    FROM borrada b
+                """),
+                {"venta_id": venta_id}
+            )
+            borrada = result.one_or_none()
+            
+            if not borrada:
+                await self.db.rollback()
+                return False
+            
+            deltas.append({
+                "fecha": borrada.fecha,
+                "cantidad_ventas": -1,
+                "ingresos": -borrada.total,
+                "unidades": -borrada.unidades
+            })
+            await aplicar_resumen_diario(self.db, deltas)
+            await self.db.commit()
+            return True
+            
+        except Exception as e:
+            await self.db.rollback()
+            raise e
+    
+    async def _acumular_resumen_diario(self, ventas: List[Venta]):
+        """Suma las ventas recién insertadas al rollup diario (misma transacción)"""
+        por_fecha: Dict[datetime, dict] = {}
+        for venta in ventas:
+            acumulado = por_fecha.setdefault(
+                venta.fecha, {"fecha": venta.fecha, "cantidad_ventas": 0, "ingresos": Decimal('0.00'), "unidades": 0}
+            )
+            acumulado["cantidad_ventas"] += 1
+            acumulado["ingresos"] += venta.total
+            acumulado["unidades"] += sum(detalle.cantidad for detalle in venta.detalles)
+        await aplicar_resumen_diario(self.db, list(por_fecha.values()))
+    
+    async def reconstruir_resumen_diario(self) -> int:
+        """
+        Recalcula el rollup diario completo desde ventas/detalle_ventas (backfill).
+        Retorna la cantidad de días generados.
+        """
+        try:
+            await self.db.execute(text("LOCK TABLE ventas_resumen_diario IN EXCLUSIVE MODE"))
+            await self.db.execute(text("DELETE FROM ventas_resumen_diario"))
+            result = await self.db.execute(
+                text("""
+                    INSERT INTO ventas_resumen_diario (
+                        fecha, cantidad_ventas, ingresos, unidades,
+                        cantidad_devoluciones, monto_devuelto, unidades_devueltas
+                    )
+                    SELECT dia, SUM(ventas), SUM(ingresos), SUM(unidades),
+                           SUM(devoluciones), SUM(monto_devuelto), SUM(unidades_devueltas)
+                    FROM (
+                        SELECT DATE(v.fecha) AS dia, 1 AS ventas, v.total AS ingresos,
+                               COALESCE(u.unidades, 0) AS unidades,
+                               0 AS devoluciones, 0 AS monto_devuelto, 0 AS unidades_devueltas
+                        FROM ventas v
+                        LEFT JOIN (
+                            SELECT venta_id, SUM(cantidad) AS unidades
+                            FROM detalle_ventas
+                            GROUP BY venta_id
+                        ) u ON u.venta_id = v.id
+                        UNION ALL
+                        SELECT DATE(d.fecha), 0, 0, 0,
+                               1, COALESCE(r.monto, 0), COALESCE(r.unidades, 0)
+                        FROM devoluciones d
+                        LEFT JOIN (
+                            SELECT devolucion_id, SUM(cantidad * precio) AS monto, SUM(cantidad) AS unidades
+                            FROM detalle_devoluciones
+                            GROUP BY devolucion_id
+                        ) r ON r.devolucion_id = d.id
+                    ) movimientos
+                    GROUP BY dia
+                """)
+            )
+            marcar_modificado_al_confirmar(self.db, "ventas")
+            await self.db.commit()
+            return result.rowcount
+        except Exception as e:
+            await self.db.rollback()
+            raise e
+    
+    async def get_by_fecha_range(
+        self,
+        fecha_inicio: datetime,
+        fecha_fin: datetime,
+        limit: int = MAX_VENTAS_REPORTE,
+        cursor: Optional[str] = None
+    ) -> List[Venta]:
         from .models import Venta as VentaModel
         
-        result = await self.db.execute(
-            select(VentaModel).where(VentaModel.id == venta_id)
-        )
-        venta_model = result.scalar_one_or_none()
-        
-        if not venta_model:
-            return False
-        
-        await self.db.delete(venta_model)
-        await self.db.commit()
-        return True
+        filtros = [VentaModel.fecha >= fecha_inicio, VentaModel.fecha <= fecha_fin]
+        return await self._stream_ventas(filtros, limit, cursor)
     
-    async def get_by_fecha_range(self, fecha_inicio: datetime, fecha_fin: datetime) -> List[Venta]:
-        from .models import Venta as VentaModel
+    async def get_by_producto(
+        self,
+        producto_id: int,
+        limit: int = MAX_VENTAS_REPORTE,
+        cursor: Optional[str] = None
+    ) -> List[Venta]:
+        from .models import Venta as VentaModel, DetalleVenta as DetalleVentaModel
         
-        result = await self.db.execute(
-            select(VentaModel)
+        # Ventas que contienen el producto (EXISTS evita el DISTINCT sobre el join)
+        contiene_producto = (
+            select(DetalleVentaModel.id)
             .where(
-                VentaModel.fecha >= fecha_inicio,
-                VentaModel.fecha <= fecha_fin
+                DetalleVentaModel.venta_id == VentaModel.id,
+                DetalleVentaModel.producto_id == producto_id
             )
-            .order_by(VentaModel.fecha.desc())
+            .exists()
         )
-        ventas_models = result.scalars().all()
+        return await self._stream_ventas([contiene_producto], limit, cursor)
+    
+    async def stream_export(
+        self,
+        fecha_inicio: Optional[datetime] = None,
+        fecha_fin: Optional[datetime] = None,
+        yield_per: int = 1000
+    ) -> AsyncIterator[dict]:
+        """
+        Itera las líneas de detalle de las ventas (una fila por detalle, con los
+        datos de la venta aplanados) usando un cursor de servidor. Solo mantiene
+        en memoria `yield_per` filas a la vez.
+        """
+        from .models import Venta as VentaModel, DetalleVenta as DetalleVentaModel, Producto, Usuario
         
-        ventas = []
-        for venta_model in ventas_models:
-            venta = await self.get_by_id(venta_model.id)
-            if venta:
-                ventas.append(venta)
+        query = (
+            select(
+                VentaModel.id.label("venta_id"),
+                VentaModel.fecha,
+                VentaModel.total,
+                VentaModel.usuario_id,
+                Usuario.nombre.label("usuario_nombre"),
+                DetalleVentaModel.id.label("detalle_id"),
+                DetalleVentaModel.producto_id,
+                Producto.nombre.label("producto_nombre"),
+                DetalleVentaModel.cantidad,
+                DetalleVentaModel.precio
+            )
+            .select_from(VentaModel)
+            .outerjoin(Usuario, Usuario.id == VentaModel.usuario_id)
+            .outerjoin(DetalleVentaModel, DetalleVentaModel.venta_id == VentaModel.id)
+            .outerjoin(Producto, Producto.id == DetalleVentaModel.producto_id)
+            .order_by(VentaModel.fecha, VentaModel.id, DetalleVentaModel.id)
+            .execution_options(yield_per=yield_per)
+        )
+        if fecha_inicio:
+            query = query.where(VentaModel.fecha >= fecha_inicio)
+        if fecha_fin:
+            query = query.where(VentaModel.fecha <= fecha_fin)
         
-        return ventas
+        result = await self.db.stream(query)
+        async for row in result.mappings():
+            fila = dict(row)
+            fila["usuario_nombre"] = fila["usuario_nombre"] or "Sistema"
+            fila["subtotal"] = (
+                fila["cantidad"] * fila["precio"] if fila["detalle_id"] is not None else None
+            )
+            yield fila
     
-    async def get_by_producto(self, producto_id: int) -> List[Venta]:
-        from .models import Venta as VentaModel, DetalleVenta as DetalleVentaModel
+    def _despues_de_cursor(self, cursor: str):
+        """Condición keyset: filas posteriores a la (fecha, id) codificada en el cursor"""
+        from .models import Venta as VentaModel
         
-        # Obtener IDs de ventas que contienen el producto
-        ventas_result = await self.db.execute(
-            select(VentaModel.id)
-            .join(DetalleVentaModel, VentaModel.id == DetalleVentaModel.venta_id)
-            .where(DetalleVentaModel.producto_id == producto_id)
-            .distinct()
-        )
-        venta_ids = ventas_result.scalars().all()
+        fecha_cursor, id_cursor = decode_cursor(cursor, 2)
+        try:
+            fecha_cursor = datetime.fromisoformat(fecha_cursor)
+            if not isinstance(id_cursor, int):
+                raise ValueError(id_cursor)
+        except (TypeError, ValueError) as e:
+            raise CursorInvalidoError(f"Cursor inválido: {cursor}") from e
+        return tuple_(VentaModel.fecha, VentaModel.id) < tuple_(fecha_cursor, id_cursor)
+    
+    async def _stream_ventas(self, filtros: list, limit: int, cursor: Optional[str] = None) -> List[Venta]:
+        """
+        Carga ventas con sus detalles, productos y usuario en una sola consulta.
         
-        ventas = []
-        for venta_id in venta_ids:
-            venta = await self.get_by_id(venta_id)
-            if venta:
-                ventas.append(venta)
+        La página de ventas (máximo `limit`, tope MAX_VENTAS_REPORTE) se resuelve en
+        una subconsulta y se une con los detalles; las filas se leen con un cursor
+        de servidor y se agrupan por venta en Python. Para continuar, usar el
+        cursor (fecha, id) de la última venta retornada.
+        """
+        from .models import Venta as VentaModel, DetalleVenta as DetalleVentaModel, Producto, Usuario
+        
+        limit = max(1, min(limit, MAX_VENTAS_REPORTE))
+        if cursor:
+            filtros = [*filtros, self._despues_de_cursor(cursor)]
         
+        pagina = (
+            select(VentaModel.id, VentaModel.fecha, VentaModel.total, VentaModel.usuario_id)
+            .where(*filtros)
+            .order_by(VentaModel.fecha.desc(), VentaModel.id.desc())
+            .limit(limit)
+            .subquery()
+        )
+        query = (
+            select(
+                pagina.c.id,
+                pagina.c.fecha,
+                pagina.c.total,
+                pagina.c.usuario_id,
+                Usuario.nombre.label("usuario_nombre"),
+                DetalleVentaModel.id.label("detalle_id"),
+                DetalleVentaModel.producto_id,
+                DetalleVentaModel.cantidad,
+                DetalleVentaModel.precio,
+                Producto.nombre.label("producto_nombre")
+            )
+            .select_from(pagina)
+            .outerjoin(Usuario, Usuario.id == pagina.c.usuario_id)
+            .outerjoin(DetalleVentaModel, DetalleVentaModel.venta_id == pagina.c.id)
+            .outerjoin(Producto, Producto.id == DetalleVentaModel.producto_id)
+            .order_by(pagina.c.fecha.desc(), pagina.c.id.desc(), DetalleVentaModel.id)
+        )
+        
+        ventas: List[Venta] = []
+        actual: Optional[Venta] = None
+        result = await self.db.stream(query)
+        async for row in result:
+            if actual is None or actual.id != row.id:
+                actual = Venta(
+                    id=row.id,
+                    fecha=row.fecha,
+                    total=row.total,
+                    usuario_id=row.usuario_id,
+                    usuario_nombre=row.usuario_nombre or "Sistema",
+                    detalles=[]
+                )
+                ventas.append(actual)
+            if row.detalle_id is not None:
+                actual.detalles.append(DetalleVenta(
+                    id=row.detalle_id,
+                    producto_id=row.producto_id,
+                    producto_nombre=row.producto_nombre or "Producto no encontrado",
+                    cantidad=row.cantidad,
+                    precio=row.precio,
+                    subtotal=row.cantidad * row.precio
+                ))
         return ventas
     
     async def get_estadisticas(self) -> EstadisticasVentas:
-        from .models import Venta as VentaModel, DetalleVenta as DetalleVentaModel
+        from .models import ResumenVentaDiario
         
-        hoy = date.today()
+        hoy = func.current_date()
         
         try:
-            # Estadísticas generales
-            result_total_ventas = await self.db.execute(select(func.count(VentaModel.id)))
-            total_ventas = result_total_ventas.scalar() or 0
-            
-            result_ingresos_totales = await self.db.execute(select(func.coalesce(func.sum(VentaModel.total), 0)))
-            ingresos_totales = result_ingresos_totales.scalar() or Decimal('0.00')
-            
-            result_total_productos = await self.db.execute(select(func.coalesce(func.sum(DetalleVentaModel.cantidad), 0)))
-            total_productos_vendidos = result_total_productos.scalar() or 0
-            
-            # Estadísticas de hoy
-            result_ventas_hoy = await self.db.execute(
-                select(func.count(VentaModel.id))
-                .where(func.date(VentaModel.fecha) == hoy)
-            )
-            ventas_hoy = result_ventas_hoy.scalar() or 0
-            
-            result_ingresos_hoy = await self.db.execute(
-                select(func.coalesce(func.sum(VentaModel.total), 0))
-                .where(func.date(VentaModel.fecha) == hoy)
+            # Una sola consulta sobre el rollup diario: O(días), no O(ventas)
+            result = await self.db.execute(
+                select(
+                    func.coalesce(func.sum(ResumenVentaDiario.cantidad_ventas), 0),
+                    func.coalesce(func.sum(ResumenVentaDiario.ingresos), 0),
+                    func.coalesce(func.sum(ResumenVentaDiario.unidades), 0),
+                    func.coalesce(func.sum(ResumenVentaDiario.cantidad_ventas).filter(ResumenVentaDiario.fecha == hoy), 0),
+                    func.coalesce(func.sum(ResumenVentaDiario.ingresos).filter(ResumenVentaDiario.fecha == hoy), 0),
+                    func.coalesce(func.sum(ResumenVentaDiario.cantidad_devoluciones), 0),
+                    func.coalesce(func.sum(ResumenVentaDiario.monto_devuelto), 0)
+                )
             )
-            ingresos_hoy = result_ingresos_hoy.scalar() or Decimal('0.00')
+            (
+                total_ventas, ingresos_totales, total_productos_vendidos, ventas_hoy, ingresos_hoy,
+                total_devoluciones, monto_devuelto
+            ) = result.one()
+            ingresos_totales = Decimal(ingresos_totales)
+            monto_devuelto = Decimal(monto_devuelto)
             
             # Calcular promedio
             promedio_venta = ingresos_totales / total_ventas if total_ventas > 0 else Decimal('0.00')
@@ -273,7 +515,10 @@ class SQLVentaRepository(VentaRepository):
                 promedio_venta=round(promedio_venta, 2),
                 total_productos_vendidos=total_productos_vendidos,
                 ventas_hoy=ventas_hoy,
-                ingresos_hoy=ingresos_hoy
+                ingresos_hoy=Decimal(ingresos_hoy),
+                total_devoluciones=total_devoluciones,
+                monto_devuelto=monto_devuelto,
+                ingresos_netos=ingresos_totales - monto_devuelto
             )
             
         except Exception as e:
@@ -309,17 +554,306 @@ class SQLProductoRepository(ProductoRepository):
             stock=producto_model.stock
         )
     
-    async def update_stock(self, producto_id: int, cantidad: int) -> bool:
+    async def bloquear_productos(self, producto_ids: Set[int]) -> Dict[int, ProductoVenta]:
+        """
+        Carga y bloquea (FOR UPDATE, en orden de id) los productos indicados en
+        una sola consulta. Los que no existen simplemente no aparecen en el resultado.
+        """
         from .models import Producto as ProductoModel
         
+        if not producto_ids:
+            return {}
         result = await self.db.execute(
-            select(ProductoModel).where(ProductoModel.id == producto_id)
+            select(ProductoModel.id, ProductoModel.nombre, ProductoModel.precio, ProductoModel.stock)
+            .where(ProductoModel.id.in_(producto_ids))
+            .order_by(ProductoModel.id)
+            .with_for_update()
         )
-        producto_model = result.scalar_one_or_none()
+        return {
+            row.id: ProductoVenta(id=row.id, nombre=row.nombre, precio=row.precio, stock=row.stock)
+            for row in result
+        }
+    
+    async def reservar_stock(
+        self, cantidades: Dict[int, int], usuario_id: Optional[int] = None, anotar: bool = True
+    ) -> Dict[int, ProductoVenta]:
+        """
+        Descuenta el stock de todos los productos de una venta en una sola sentencia,
+        que también anota cada descuento como salida en el ledger de movimientos
+        (con `anotar=False` el ledger queda a cargo de quien llama: anotar_salidas).
         
-        if not producto_model:
-            return False
+        Las filas se bloquean en orden de id (FOR UPDATE) para evitar deadlocks entre
+        checkouts concurrentes, y el UPDATE solo aplica si `stock >= cantidad`, así
+        que nunca se vende de más. No hace commit: el descuento queda en la
+        transacción de la venta. Si algún producto no existe o no alcanza, se hace
+        rollback y se lanza la excepción de dominio correspondiente.
+        
+        Retorna los productos reservados (precio y stock ya descontado) por id.
+        """
+        if not cantidades:
+            return {}
+        
+        params = self._arreglos_cantidades(cantidades)
+        ledger = """,
+                ledger AS (
+                    INSERT INTO movimientos (producto_id, tipo, cantidad, usuario_id)
+                    SELECT id, 'salida', cantidad, CAST(:usuario_id AS INTEGER) FROM reservados
+                )""" if anotar else ""
+        result = await self.db.execute(
+            text(f"""
+                WITH v AS (
+                    SELECT * FROM unnest(CAST(:productos AS integer[]), CAST(:cantidades AS integer[]))
+                        AS l(producto_id, cantidad)
+                ),
+                bloqueados AS (
+                    SELECT p.id FROM productos p
+                    JOIN v ON v.producto_id = p.id
+                    ORDER BY p.id
+                    FOR UPDATE OF p
+                ),
+                reservados AS (
+                    UPDATE productos p
+                    SET stock = p.stock - v.cantidad
+                    FROM v, bloqueados b
+                    WHERE p.id = v.producto_id
+                      AND p.id = b.id
+                      AND p.stock >= v.cantidad
+                    RETURNING p.id, p.nombre, p.precio, p.stock, p.categoria_id, p.proveedor_id, v.cantidad
+                ){ledger}
+                SELECT id, nombre, precio, stock, categoria_id, proveedor_id FROM reservados
+            """),
+            {**params, "usuario_id": usuario_id} if anotar else params
+        )
+        filas = result.fetchall()
+        reservados = {
+            row.id: ProductoVenta(id=row.id, nombre=row.nombre, precio=row.precio, stock=row.stock)
+            for row in filas
+        }
+        
+        if len(reservados) < len(cantidades):
+            await self.db.rollback()
+            await self._lanzar_error_reserva(cantidades, reservados)
+        
+        invalidar_al_confirmar(self.db, reservados.keys(), stock=True)
+        registrar_stock_al_confirmar(self.db, filas)
+        return reservados
+    
+    async def anotar_salidas(self, cantidades: Dict[int, int], usuario_id: Optional[int] = None) -> int:
+        """Anota en el ledger, a nombre de `usuario_id`, salidas ya descontadas con reservar_stock(anotar=False)"""
+        return await anotar_movimientos(
+            self.db, [(producto_id, SALIDA, cantidad) for producto_id, cantidad in cantidades.items()], usuario_id
+        )
+    
+    async def restaurar_stock(self, cantidades: Dict[int, int], usuario_id: Optional[int] = None) -> int:
+        """
+        Devuelve al stock las cantidades indicadas (devoluciones, ventas eliminadas)
+        en una sola sentencia, anotándolas como entradas en el ledger. Bloquea en orden de id igual que reservar_stock para
+        no provocar deadlocks con checkouts concurrentes. No hace commit.
+        
+        Retorna la cantidad de productos actualizados.
+        """
+        if not cantidades:
+            return 0
+        
+        params = self._arreglos_cantidades(cantidades)
+        result = await self.db.execute(
+            text("""
+                WITH v AS (
+                    SELECT * FROM unnest(CAST(:productos AS integer[]), CAST(:cantidades AS integer[]))
+                        AS l(producto_id, cantidad)
+                ),
+                bloqueados AS (
+                    SELECT p.id FROM productos p
+                    JOIN v ON v.producto_id = p.id
+                    ORDER BY p.id
+                    FOR UPDATE OF p
+                ),
+                restaurados AS (
+                    UPDATE productos p
+                    SET stock = p.stock + v.cantidad
+                    FROM v, bloqueados b
+                    WHERE p.id = v.producto_id
+                      AND p.id = b.id
+                    RETURNING p.id, p.nombre, p.stock, p.categoria_id, p.proveedor_id, v.cantidad
+                ),
+                ledger AS (
+                    INSERT INTO movimientos (producto_id, tipo, cantidad, usuario_id)
+                    SELECT id, 'entrada', cantidad, CAST(:usuario_id AS INTEGER) FROM restaurados
+                )
+                SELECT id, nombre, stock, categoria_id, proveedor_id FROM restaurados
+            """),
+            {**params, "usuario_id": usuario_id}
+        )
+        filas = result.fetchall()
+        invalidar_al_confirmar(self.db, cantidades.keys(), stock=True)
+        registrar_stock_al_confirmar(self.db, filas)
+        return len(filas)
+    
+    @staticmethod
+    def _arreglos_cantidades(cantidades: Dict[int, int]) -> Dict[str, List[int]]:
+        """Parámetros (producto_id, cantidad) como dos arreglos: dos binds sin importar cuántos productos"""
+        return {"productos": list(cantidades), "cantidades": list(cantidades.values())}
+    
+    async def _lanzar_error_reserva(self, cantidades: Dict[int, int], reservados: Dict[int, ProductoVenta]):
+        """Determina qué producto hizo fallar la reserva y lanza el error de dominio"""
+        from .models import Producto as ProductoModel
+        
+        faltantes = [pid for pid in cantidades if pid not in reservados]
+        result = await self.db.execute(
+            select(ProductoModel.id, ProductoModel.nombre, ProductoModel.stock)
+            .where(ProductoModel.id.in_(faltantes))
+        )
+        existentes = {row.id: row for row in result}
+        
+        for producto_id in faltantes:
+            if producto_id not in existentes:
+                raise ProductoNoEncontradoError(producto_id)
         
-        producto_model.stock += cantidad
-        await self.db.commit()
-        return True
\ No newline at end of file
+        # Si otro checkout repuso stock entre el UPDATE y esta consulta, se reporta
+        # igual el primer producto que no se pudo reservar
+        sin_stock = [pid for pid in faltantes if existentes[pid].stock < cantidades[pid]] or faltantes
+        producto = existentes[sin_stock[0]]
+        raise StockInsuficienteError(producto.nombre, producto.stock, cantidades[producto.id])
+
+
+class SQLDevolucionRepository(DevolucionRepository):
+    def __init__(self, db: AsyncSession):
+        self.db = db
+    
+    async def bloquear_devolvibles(self, venta_id: int) -> Optional[Dict[int, ProductoDevolvible]]:
+        """
+        Bloquea la venta (FOR UPDATE) para serializar sus devoluciones y retorna,
+        por producto, la cantidad vendida menos la ya devuelta. Retorna None si
+        la venta no existe.
+        """
+        from .models import Venta as VentaModel
+        
+        result = await self.db.execute(
+            select(VentaModel.id).where(VentaModel.id == venta_id).with_for_update()
+        )
+        if result.scalar_one_or_none() is None:
+            return None
+        
+        # Consulta aparte para leer las devoluciones confirmadas mientras se esperaba el bloqueo
+        result = await self.db.execute(
+            text("""
+                SELECT v.producto_id, p.nombre, v.cantidad - COALESCE(d.cantidad, 0) AS disponible, v.precio
+                FROM (
+                    SELECT producto_id, SUM(cantidad) AS cantidad, MAX(precio) AS precio
+                    FROM detalle_ventas
+                    WHERE venta_id = :venta_id
+                    GROUP BY producto_id
+                ) v
+                LEFT JOIN (
+                    SELECT dd.producto_id, SUM(dd.cantidad) AS cantidad
+                    FROM detalle_devoluciones dd
+                    JOIN devoluciones dv ON dv.id = dd.devolucion_id
+                    WHERE dv.venta_id = :venta_id
+                    GROUP BY dd.producto_id
+                ) d ON d.producto_id = v.producto_id
+                LEFT JOIN productos p ON p.id = v.producto_id
+            """),
+            {"venta_id": venta_id}
+        )
+        return {
+            row.producto_id: ProductoDevolvible(
+                producto_id=row.producto_id,
+                producto_nombre=row.nombre or "Producto no encontrado",
+                cantidad_disponible=row.disponible,
+                precio=row.precio
+            )
+            for row in result
+        }
+    
+    async def save(self, devolucion: Devolucion) -> Devolucion:
+        """
+        Inserta la devolución y sus detalles, la suma al rollup diario y hace un
+        único commit junto con la restauración de stock pendiente en la sesión
+        (SQLProductoRepository.restaurar_stock).
+        """
+        from .models import Devolucion as DevolucionModel, DetalleDevolucion as DetalleDevolucionModel
+        
+        try:
+            result = await self.db.execute(
+                insert(DevolucionModel)
+                .values(venta_id=devolucion.venta_id, motivo=devolucion.motivo, usuario_id=devolucion.usuario_id)
+                .returning(DevolucionModel.id, DevolucionModel.fecha)
+            )
+            devolucion_id, fecha = result.one()
+            
+            if devolucion.detalles:
+                await self.db.execute(
+                    insert(DetalleDevolucionModel).values([
+                        {
+                            "devolucion_id": devolucion_id,
+                            "producto_id": detalle.producto_id,
+                            "cantidad": detalle.cantidad,
+                            "precio": detalle.precio
+                        }
+                        for detalle in devolucion.detalles
+                    ])
+                )
+            
+            devolucion.id = devolucion_id
+            devolucion.fecha = fecha or devolucion.fecha
+            await aplicar_resumen_diario(self.db, [{
+                "fecha": devolucion.fecha,
+                "cantidad_devoluciones": 1,
+                "monto_devuelto": devolucion.total,
+                "unidades_devueltas": sum(detalle.cantidad for detalle in devolucion.detalles)
+            }])
+            await self.db.commit()
+            return devolucion
+            
+        except Exception as e:
+            await self.db.rollback()
+            raise e
+    
+    async def get_by_venta(self, venta_id: int) -> List[Devolucion]:
+        """Devoluciones de una venta con sus detalles, en una sola consulta"""
+        from .models import Devolucion as DevolucionModel, DetalleDevolucion as DetalleDevolucionModel, Producto
+        
+        result = await self.db.execute(
+            select(
+                DevolucionModel.id,
+                DevolucionModel.fecha,
+                DevolucionModel.motivo,
+                DevolucionModel.usuario_id,
+                DetalleDevolucionModel.id.label("detalle_id"),
+                DetalleDevolucionModel.producto_id,
+                DetalleDevolucionModel.cantidad,
+                DetalleDevolucionModel.precio,
+                Producto.nombre.label("producto_nombre")
+            )
+            .outerjoin(DetalleDevolucionModel, DetalleDevolucionModel.devolucion_id == DevolucionModel.id)
+            .outerjoin(Producto, Producto.id == DetalleDevolucionModel.producto_id)
+            .where(DevolucionModel.venta_id == venta_id)
+            .order_by(DevolucionModel.fecha, DevolucionModel.id, DetalleDevolucionModel.id)
+        )
+        
+        devoluciones: List[Devolucion] = []
+        actual: Optional[Devolucion] = None
+        for row in result:
+            if actual is None or actual.id != row.id:
+                actual = Devolucion(
+                    id=row.id,
+                    venta_id=venta_id,
+                    fecha=row.fecha,
+                    motivo=row.motivo,
+                    usuario_id=row.usuario_id,
+                    total=Decimal('0.00'),
+                    detalles=[]
+                )
+                devoluciones.append(actual)
+            if row.detalle_id is not None:
+                detalle = DetalleDevolucion(
+                    id=row.detalle_id,
+                    producto_id=row.producto_id,
+                    producto_nombre=row.producto_nombre or "Producto no encontrado",
+                    cantidad=row.cantidad,
+                    precio=row.precio,
+                    subtotal=row.cantidad * row.precio
+                )
+                actual.detalles.append(detalle)
+                actual.total += detalle.subtotal
+        return devoluciones
@@ -1,13 +1,25 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from datetime import datetime, date
 
-from ...database.session import get_db
+from ...database.session import get_db, get_read_db, sesion_lectura
+from ...core.pagination import NEXT_CURSOR_HEADER, CursorInvalidoError
+from ...core.http_cache import validar_cache
 from ..application.service import VentaService
-from ..application.dto import CrearVentaDTO, VentaResponseDTO, EstadisticasResponseDTO
-from ..infrastructure.repository import SQLVentaRepository, SQLProductoRepository
-from ..domain.exception import StockInsuficienteError, ProductoNoEncontradoError, VentaNoEncontradaError
+from ..application.export import csv_chunks, ndjson_chunks
+from ..application.dto import (
+    CrearVentaDTO, CrearVentasBulkDTO, VentasBulkResponseDTO, VentaResponseDTO, EstadisticasResponseDTO,
+    CrearDevolucionDTO, DevolucionResponseDTO
+)
+from ..infrastructure.repository import (
+    SQLVentaRepository, SQLProductoRepository, SQLDevolucionRepository, MAX_VENTAS_REPORTE
+)
+from ..domain.exception import (
+    StockInsuficienteError, ProductoNoEncontradoError, VentaNoEncontradaError,
+    VentaInvalidaError, DevolucionInvalidaError, UsuarioNoEncontradoError
+)
 
 router = APIRouter(prefix="/ventas", tags=["ventas"])
 
@@ -15,7 +27,12 @@ router = APIRouter(prefix="/ventas", tags=["ventas"])
 async def get_venta_service(db: AsyncSession = Depends(get_db)) -> VentaService:
     venta_repository = SQLVentaRepository(db)
     producto_repository = SQLProductoRepository(db)
-    return VentaService(venta_repository, producto_repository)
+    devolucion_repository = SQLDevolucionRepository(db)
+    return VentaService(venta_repository, producto_repository, devolucion_repository)
+
+# Listados y reportes leen de una réplica si está configurada (ver database/session.py)
+async def get_venta_lectura_service(db: AsyncSession = Depends(get_read_db)) -> VentaService:
+    return await get_venta_service(db)
 
 # ========== RUTAS FIJAS PRIMERO ==========
 
@@ -29,9 +46,14 @@ async def test_simple():
         "timestamp": datetime.now().isoformat()
     }
 
-@router.get("/estadisticas/totales", response_model=EstadisticasResponseDTO)
+# "Ventas de hoy" cambia al cambiar el día aunque no haya escrituras
+@router.get(
+    "/estadisticas/totales",
+    response_model=EstadisticasResponseDTO,
+    dependencies=[validar_cache("ventas", variante=lambda: date.today().isoformat())]
+)
 async def obtener_estadisticas(
-    venta_service: VentaService = Depends(get_venta_service)
+    venta_service: VentaService = Depends(get_venta_lectura_service)
 ):
     """
     Obtener estadísticas de ventas
@@ -46,53 +68,127 @@ async def obtener_estadisticas(
 
 @router.get("/fecha/rango/", response_model=List[VentaResponseDTO])
 async def ventas_por_fecha(  # CORRECCIÓN: Agregar async
+    response: Response,
     fecha_inicio: date,
     fecha_fin: date,
-    venta_service: VentaService = Depends(get_venta_service)
+    limit: int = Query(500, ge=1, le=MAX_VENTAS_REPORTE),
+    cursor: Optional[str] = Query(None, description="Cursor opaco devuelto en X-Next-Cursor"),
+    venta_service: VentaService = Depends(get_venta_lectura_service)
 ):
     """
-    Obtener ventas por rango de fechas
+    Obtener ventas por rango de fechas.
+    Retorna como máximo `limit` ventas; si hay más, el header `X-Next-Cursor`
+    trae el cursor para pedir la siguiente página.
     """
     try:
         fecha_inicio_dt = datetime.combine(fecha_inicio, datetime.min.time())
         fecha_fin_dt = datetime.combine(fecha_fin, datetime.max.time())
         
-        return await venta_service.obtener_ventas_por_fecha(fecha_inicio_dt, fecha_fin_dt)  # CORRECCIÓN: Agregar await
+        ventas, siguiente = await venta_service.obtener_ventas_por_fecha(fecha_inicio_dt, fecha_fin_dt, limit, cursor)
+        if siguiente:
+            response.headers[NEXT_CURSOR_HEADER] = siguiente
+        return ventas
+    except CursorInvalidoError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error al obtener ventas por fecha: {str(e)}"
         )
 
+@router.get("/producto/{producto_id}", response_model=List[VentaResponseDTO])
+async def ventas_por_producto(
+    response: Response,
+    producto_id: int,
+    limit: int = Query(500, ge=1, le=MAX_VENTAS_REPORTE),
+    cursor: Optional[str] = Query(None, description="Cursor opaco devuelto en X-Next-Cursor"),
+    venta_service: VentaService = Depends(get_venta_lectura_service)
+):
+    """
+    Obtener ventas que incluyen un producto, paginadas igual que el rango de fechas
+    """
+    try:
+        ventas, siguiente = await venta_service.obtener_ventas_por_producto(producto_id, limit, cursor)
+        if siguiente:
+            response.headers[NEXT_CURSOR_HEADER] = siguiente
+        return ventas
+    except CursorInvalidoError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error al obtener ventas por producto: {str(e)}"
+        )
+
+@router.get("/export")
+async def exportar_ventas(
+    request: Request,
+    formato: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    fecha_inicio: Optional[date] = None,
+    fecha_fin: Optional[date] = None
+):
+    """
+    Exportar ventas en NDJSON o CSV (una fila por línea de detalle).
+    
+    La respuesta se genera en streaming desde un cursor de servidor, así que la
+    memoria usada no depende de la cantidad de filas exportadas.
+    """
+    fecha_inicio_dt = datetime.combine(fecha_inicio, datetime.min.time()) if fecha_inicio else None
+    fecha_fin_dt = datetime.combine(fecha_fin, datetime.max.time()) if fecha_fin else None
+    
+    async def generar():
+        # Sesión propia: la de Depends(get_db) se cierra antes de enviar el cuerpo
+        async with sesion_lectura(request) as session:
+            filas = SQLVentaRepository(session).stream_export(fecha_inicio_dt, fecha_fin_dt)
+            chunks = csv_chunks(filas) if formato == "csv" else ndjson_chunks(filas)
+            async for chunk in chunks:
+                yield chunk
+    
+    media_type = "text/csv" if formato == "csv" else "application/x-ndjson"
+    extension = "csv" if formato == "csv" else "ndjson"
+    return StreamingResponse(
+        generar(),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="ventas.{extension}"'}
+    )
+
 # ========== RUTA RAIZ ==========
 
 @router.get("/listar_ventas", response_model=List[VentaResponseDTO])
 async def listar_ventas(
+    response: Response,
     skip: int = 0,
-    limit: int = 100,
-    venta_service: VentaService = Depends(get_venta_service)
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="Cursor opaco devuelto en X-Next-Cursor"),
+    venta_service: VentaService = Depends(get_venta_lectura_service)
 ):
     """
-    Obtener lista de ventas con paginación
+    Obtener lista de ventas con paginación.
+    
+    - Paginación por cursor: enviar el valor del header `X-Next-Cursor` de la
+      respuesta anterior en `cursor` (latencia constante sin importar la página).
+    - `skip`/`limit` se mantienen por compatibilidad (OFFSET).
     """
     print("🔍 [BACKEND] === INICIANDO LISTAR_VENTAS ===")
     try:
-        print("🔍 [BACKEND] 1. Llamando a venta_service.obtener_ventas()")
-        ventas = await venta_service.obtener_ventas(skip, limit)
-        print(f"✅ [BACKEND] 2. Ventas obtenidas: {len(ventas)}")
+        ventas, siguiente = await venta_service.obtener_ventas(skip, limit, cursor)
+        print(f"✅ [BACKEND] Ventas obtenidas: {len(ventas)}")
         
-        # Debug de la primera venta si existe - CORREGIDO para diccionarios
-        if ventas:
-            primera = ventas[0]
-            print(f"📦 [BACKEND] 3. Primera venta - ID: {primera['id']}, Total: {primera['total']}")  # ✅ Usar ['id']
-            print(f"📦 [BACKEND] 4. Detalles: {len(primera['detalles'])}")  # ✅ Usar ['detalles']
-            if primera['detalles']:
-                primer_detalle = primera['detalles'][0]
-                print(f"📦 [BACKEND] 5. Primer detalle - Producto: {primer_detalle['producto_nombre']}")  # ✅ Usar ['producto_nombre']
-        
-        print("✅ [BACKEND] 6. Retornando ventas exitosamente")
+        if siguiente:
+            response.headers[NEXT_CURSOR_HEADER] = siguiente
         return ventas
         
+    except CursorInvalidoError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     except Exception as e:
         print(f"❌ [BACKEND] ERROR en listar_ventas: {str(e)}")
         print(f"❌ [BACKEND] Tipo de error: {type(e).__name__}")
@@ -126,7 +222,7 @@ async def crear_venta(
             "productos_vendidos": len(venta.detalles)
         }
         
-    except (StockInsuficienteError, ProductoNoEncontradoError) as e:
+    except (StockInsuficienteError, ProductoNoEncontradoError, VentaInvalidaError) as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e)
@@ -137,12 +233,45 @@ async def crear_venta(
             detail=f"Error al crear venta: {str(e)}"
         )
 
+@router.post("/bulk", response_model=VentasBulkResponseDTO)
+async def crear_ventas_bulk(
+    ventas_dto: CrearVentasBulkDTO,
+    venta_service: VentaService = Depends(get_venta_service)
+):
+    """
+    Crear ventas en lote (carga de terminales POS que estuvieron offline).
+    
+    Cada venta se valida por separado: las que fallan (producto inexistente,
+    stock insuficiente, usuario inexistente) se reportan en `resultados` y el
+    resto se guarda en una sola transacción.
+    """
+    try:
+        resultados = await venta_service.crear_ventas_bulk([
+            {
+                "detalles": [detalle.model_dump() for detalle in venta.detalles],
+                "usuario_id": venta.usuario_id
+            }
+            for venta in ventas_dto.ventas
+        ])
+        creadas = sum(1 for r in resultados if r["ok"])
+        return {
+            "total": len(resultados),
+            "creadas": creadas,
+            "fallidas": len(resultados) - creadas,
+            "resultados": resultados
+        }
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error al crear ventas en lote: {str(e)}"
+        )
+
 # ========== RUTAS CON PARÁMETROS (AL FINAL) ==========
 
 @router.get("/{venta_id}", response_model=VentaResponseDTO)
 async def obtener_venta(  # CORRECCIÓN: Agregar async
     venta_id: int,
-    venta_service: VentaService = Depends(get_venta_service)
+    venta_service: VentaService = Depends(get_venta_lectura_service)
 ):
     """
     Obtener una venta específica por ID
@@ -186,4 +315,58 @@ async def eliminar_venta(  # CORRECCIÓN: Agregar async
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error al eliminar venta: {str(e)}"
-        )
\ No newline at end of file
+        )
+
+@router.post("/{venta_id}/devoluciones", response_model=DevolucionResponseDTO)
+async def registrar_devolucion(
+    venta_id: int,
+    devolucion_dto: CrearDevolucionDTO,
+    venta_service: VentaService = Depends(get_venta_service)
+):
+    """
+    Registrar una devolución de la venta.
+    
+    - Sin `detalles`: devolución total de lo que quede pendiente.
+    - Con `detalles`: devolución parcial; cada cantidad no puede superar lo
+      vendido menos lo ya devuelto.
+    
+    El stock se restaura en la misma transacción.
+    """
+    try:
+        return await venta_service.registrar_devolucion(
+            venta_id,
+            [detalle.model_dump() for detalle in devolucion_dto.detalles] if devolucion_dto.detalles else None,
+            devolucion_dto.motivo,
+            devolucion_dto.usuario_id
+        )
+    except VentaNoEncontradaError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e)
+        )
+    except (DevolucionInvalidaError, UsuarioNoEncontradoError) as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error al registrar devolución: {str(e)}"
+        )
+
+@router.get("/{venta_id}/devoluciones", response_model=List[DevolucionResponseDTO])
+async def listar_devoluciones(
+    venta_id: int,
+    venta_service: VentaService = Depends(get_venta_lectura_service)
+):
+    """
+    Obtener las devoluciones registradas de una venta
+    """
+    try:
+        return await venta_service.obtener_devoluciones(venta_id)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error al obtener devoluciones: {str(e)}"
+        )
@@ -0,0 +1,46 @@
+# benchmarks/_common.py
+"""
+Utilidades compartidas por los benchmarks.
+
+Los módulos del proyecto usan imports relativos que suben hasta la carpeta raíz
+(``from ...database.session import get_db``), así que se importan a través del
+nombre de la carpeta del proyecto como paquete.
+"""
+import importlib
+import os
+import sys
+from contextlib import contextmanager
+from pathlib import Path
+
+from sqlalchemy import event
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+if str(ROOT_DIR.parent) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR.parent))
+
+BENCH_DATABASE_URL = os.getenv("BENCH_DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+
+
+def importar(modulo: str):
+    """Importa un módulo del proyecto, ej: importar('Ventas.infrastructure.repository')"""
+    return importlib.import_module(f"{ROOT_DIR.name}.{modulo}")
+
+
+class ContadorSQL:
+    """Cuenta las sentencias SQL que el engine envía a la base de datos"""
+
+    def __init__(self, engine):
+        self.engine = engine.sync_engine if hasattr(engine, "sync_engine") else engine
+        self.total = 0
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.total += 1
+
+    @contextmanager
+    def contar(self):
+        self.total = 0
+        event.listen(self.engine, "before_cursor_execute", self._on_execute)
+        try:
+            yield self
+        finally:
+            event.remove(self.engine, "before_cursor_execute", self._on_execute)
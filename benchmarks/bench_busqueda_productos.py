@@ -0,0 +1,114 @@
+# benchmarks/bench_busqueda_productos.py
+"""
+Benchmark: latencia de /productos/buscar simulando el type-ahead del POS
+(una búsqueda por cada tecla) sobre un catálogo grande.
+
+En Postgres usa los índices idx_productos_busqueda / idx_productos_nombre_prefijo;
+en SQLite mide el índice en memoria (IndiceBusqueda).
+
+Uso:
+    BENCH_DATABASE_URL=postgresql+asyncpg://... python benchmarks/bench_busqueda_productos.py
+    BENCH_SKUS=100000 python benchmarks/bench_busqueda_productos.py
+"""
+import asyncio
+import os
+import time
+from decimal import Decimal
+
+import sqlalchemy as sa
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from _common import BENCH_DATABASE_URL, importar
+
+models = importar("Ventas.infrastructure.models")
+repositories = importar("productos.infrastructure.repositories")
+
+ES_POSTGRES = BENCH_DATABASE_URL.startswith("postgresql")
+SKUS = int(os.getenv("BENCH_SKUS", "1000000" if ES_POSTGRES else "50000"))
+
+TIPOS = ["Teclado", "Mouse", "Monitor", "Camisa", "Pantalón", "Arroz", "Silla", "Mesa", "Libro", "Cable",
+         "Cargador", "Audífonos", "Lámpara", "Café", "Zapato", "Impresora", "Router", "Disco", "Memoria", "Batería"]
+MARCAS = ["Logitech", "Samsung", "Acme", "Sony", "Nike", "Philips", "Lenovo", "HP", "Xiaomi", "Generico"]
+ADJETIVOS = ["inalámbrico", "mecánico", "algodón", "orgánico", "ergonómico"]
+
+# Lo que teclea el cajero; se busca cada prefijo ("t", "te", "tec", ...)
+TECLEOS = ["teclado logitech", "sony 12", "cafe", "lampara philips", "audifonos inalambrico", "xiaomi", "zzz"]
+
+
+async def poblar(engine):
+    async with engine.begin() as conn:
+        await conn.run_sync(models.Base.metadata.drop_all)
+        await conn.run_sync(models.Base.metadata.create_all)
+        await conn.execute(sa.insert(models.Categoria.__table__), [{"nombre": f"Categoría {i}"} for i in range(1, 6)])
+        await conn.execute(sa.insert(models.Proveedor.__table__), [{"nombre": f"Proveedor {i}"} for i in range(1, 51)])
+        if ES_POSTGRES:
+            await conn.execute(sa.text("""
+                INSERT INTO productos (nombre, descripcion, precio, stock, categoria_id, proveedor_id)
+                SELECT (CAST(:tipos AS text[]))[1 + (i % 20)] || ' ' || (CAST(:marcas AS text[]))[1 + ((i / 20) % 10)]
+                       || ' ' || substr(md5(i::text), 1, 6) || ' ' || (i % 997),
+                       'Producto ' || (CAST(:adjetivos AS text[]))[1 + (i % 5)],
+                       9.99, 100, 1 + ((i / 7) % 5), 1 + (i % 50)
+                FROM generate_series(1, :skus) i
+            """), {"tipos": TIPOS, "marcas": MARCAS, "adjetivos": ADJETIVOS, "skus": SKUS})
+        else:
+            await conn.execute(sa.insert(models.Producto.__table__), [
+                {
+                    "nombre": f"{TIPOS[i % 20]} {MARCAS[(i // 20) % 10]} {i:06x} {i % 997}",
+                    "descripcion": f"Producto {ADJETIVOS[i % 5]}",
+                    "precio": Decimal("9.99"), "stock": 100,
+                    "categoria_id": 1 + (i // 7) % 5, "proveedor_id": 1 + i % 50,
+                }
+                for i in range(1, SKUS + 1)
+            ])
+    if ES_POSTGRES:
+        # Estadísticas y visibility map como en una base en régimen (VACUUM no corre en transacción)
+        async with engine.connect() as conn:
+            conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+            await conn.execute(sa.text("VACUUM ANALYZE productos"))
+
+
+def percentil(valores, p):
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(p * len(ordenados)))]
+
+
+async def medir(session_factory, autocompletar: bool, categoria_id=None):
+    tiempos = []
+    async with session_factory() as session:
+        # El mismo repositorio que usa la ruta (en SQLite el índice en memoria se arma una vez)
+        repo = repositories.CachedProductRepository(session)
+        await repo.buscar("calentamiento", autocompletar=autocompletar)
+        for texto in TECLEOS:
+            for fin in range(1, len(texto) + 1):
+                inicio = time.perf_counter()
+                await repo.buscar(texto[:fin], limit=10, autocompletar=autocompletar, categoria_id=categoria_id)
+                tiempos.append((time.perf_counter() - inicio) * 1000)
+    return tiempos
+
+
+async def main():
+    engine = create_async_engine(BENCH_DATABASE_URL)
+    inicio = time.perf_counter()
+    await poblar(engine)
+    print(f"{SKUS:,} productos cargados en {time.perf_counter() - inicio:.1f}s ({engine.dialect.name})")
+
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    print(f"{'modo':>26} | {'búsquedas':>9} | {'p50 (ms)':>8} | {'p95 (ms)':>8} | {'p99 (ms)':>8}")
+    print("-" * 72)
+    for etiqueta, autocompletar, categoria_id in (
+        ("autocompletar", True, None),
+        ("autocompletar + categoría", True, 3),
+        ("completo", False, None),
+        ("completo + categoría", False, 3),
+    ):
+        tiempos = await medir(session_factory, autocompletar, categoria_id)
+        print(
+            f"{etiqueta:>26} | {len(tiempos):>9} | {percentil(tiempos, 0.50):>8.2f} | "
+            f"{percentil(tiempos, 0.95):>8.2f} | {percentil(tiempos, 0.99):>8.2f}"
+        )
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,100 @@
+# benchmarks/bench_catalogo_cache.py
+"""
+Benchmark: consultas a la base por lecturas del catálogo de /productos.
+
+Simula tráfico de catálogo (listado completo, detalle por id y por nombre,
+páginas por cursor) intercalado con ventas que cambian stock, y compara
+ProductRepository (todo a la base) contra CachedProductRepository.
+
+Necesita PostgreSQL: las ventas simuladas anotan su salida en el ledger de movimientos
+(unnest). Usa una base de datos dedicada: el script recrea las tablas.
+
+Uso:
+    BENCH_DATABASE_URL=postgresql+asyncpg://... python benchmarks/bench_catalogo_cache.py
+    BENCH_DATABASE_URL=postgresql+asyncpg://... python benchmarks/bench_catalogo_cache.py
+"""
+import asyncio
+import random
+import time
+from decimal import Decimal
+
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from _common import BENCH_DATABASE_URL, ContadorSQL, importar
+
+models = importar("Ventas.infrastructure.models")
+ventas_repository = importar("Ventas.infrastructure.repository")
+repositories = importar("productos.infrastructure.repositories")
+service = importar("productos.application.service")
+cache = importar("productos.infrastructure.cache")
+
+PRODUCTOS = 2000
+LECTURAS = 2000
+VENTA_CADA = 100  # una venta (cambio de stock) cada N lecturas
+
+
+async def simular(session_factory, clase_repositorio, contador: ContadorSQL):
+    cache.catalogo_cache.invalidar()
+    random.seed(7)
+    with contador.contar():
+        inicio = time.perf_counter()
+        for i in range(LECTURAS):
+            async with session_factory() as session:
+                product_service = service.ProductService(clase_repositorio(session))
+                operacion = i % 4
+                producto_id = random.randint(1, PRODUCTOS)
+                if operacion == 0:
+                    await product_service.get_catalogo_json()
+                elif operacion == 1:
+                    await product_service.get_product(producto_id)
+                elif operacion == 2:
+                    await product_service.get_product_nom(f"Producto {producto_id}")
+                else:
+                    await product_service.get_products_page(limit=50, skip=producto_id % 1000)
+
+                if i % VENTA_CADA == 0:
+                    await ventas_repository.SQLProductoRepository(session).reservar_stock({producto_id: 1})
+                    await session.commit()
+        duracion = (time.perf_counter() - inicio) * 1000
+    return contador.total, duracion
+
+
+async def main():
+    if not BENCH_DATABASE_URL.startswith("postgresql"):
+        print("⚠️  Este benchmark necesita PostgreSQL: define BENCH_DATABASE_URL=postgresql+asyncpg://...")
+        return
+
+    engine = create_async_engine(BENCH_DATABASE_URL)
+    async with engine.begin() as conn:
+        await conn.run_sync(models.Base.metadata.drop_all)
+        await conn.run_sync(models.Base.metadata.create_all)
+
+    session_factory = async_sessionmaker(engine, expire_on_commit=False, autoflush=False)
+    async with session_factory() as session:
+        categoria = models.Categoria(nombre="Bench")
+        proveedor = models.Proveedor(nombre="Bench")
+        session.add_all([categoria, proveedor])
+        await session.flush()
+        session.add_all([
+            models.Producto(
+                nombre=f"Producto {i}", precio=Decimal("9.99"), stock=1000,
+                categoria_id=categoria.id, proveedor_id=proveedor.id
+            )
+            for i in range(1, PRODUCTOS + 1)
+        ])
+        await session.commit()
+
+    contador = ContadorSQL(engine)
+    print(f"{LECTURAS} lecturas de catálogo, {PRODUCTOS} productos, una venta cada {VENTA_CADA} lecturas")
+    print(f"{'repositorio':>24} | {'sentencias':>10} | {'tiempo (ms)':>11}")
+    print("-" * 52)
+    for clase in (repositories.ProductRepository, repositories.CachedProductRepository):
+        sentencias, duracion = await simular(session_factory, clase, contador)
+        print(f"{clase.__name__:>24} | {sentencias:>10} | {duracion:>11.1f}")
+    print(f"Caché: {cache.catalogo_cache.estadisticas()}")
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,117 @@
+# benchmarks/bench_http_cache.py
+"""
+Benchmark: dashboards que consultan periódicamente las rutas de lectura, con y
+sin GET condicional (If-None-Match con el ETag de la respuesta anterior).
+
+Mide bytes de cuerpo enviados, sentencias SQL y tiempo por request. Cada
+ESCRITURA_CADA rondas se crea un proveedor, así que una parte de las
+revalidaciones devuelve 200 con el cuerpo nuevo.
+
+Uso:
+    python benchmarks/bench_http_cache.py
+    BENCH_DATABASE_URL=postgresql+asyncpg://... BENCH_RONDAS=2000 python benchmarks/bench_http_cache.py
+"""
+import os
+import time
+from contextlib import asynccontextmanager
+from decimal import Decimal
+
+import sqlalchemy as sa
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from _common import BENCH_DATABASE_URL, ContadorSQL, importar
+
+models = importar("Ventas.infrastructure.models")
+session_mod = importar("database.session")
+http_cache = importar("core.http_cache")
+categoria_router = importar("categoria.presentation.routes.categoria_router").categoria_router
+proveedores_router = importar("proveedores.presentation.routes.proveedores_router").proveedores_router
+ventas_router = importar("Ventas.presentation.controllers").router
+
+RONDAS = int(os.getenv("BENCH_RONDAS", "500"))
+ESCRITURA_CADA = int(os.getenv("BENCH_ESCRITURA_CADA", "50"))
+RUTAS = ["/categorias/", "/proveedores/?limit=500", "/ventas/estadisticas/totales"]
+
+
+async def preparar(engine):
+    async with engine.begin() as conn:
+        await conn.run_sync(models.Base.metadata.drop_all)
+        await conn.run_sync(models.Base.metadata.create_all)
+        await conn.execute(sa.insert(models.Categoria.__table__), [{"nombre": f"Categoría {i}"} for i in range(1, 51)])
+        await conn.execute(sa.insert(models.Proveedor.__table__), [
+            {"nombre": f"Proveedor {i}", "contacto": f"Contacto {i}", "telefono": "555-0100", "email": f"p{i}@ejemplo.com"}
+            for i in range(1, 301)
+        ])
+        await conn.execute(sa.insert(models.Producto.__table__), [
+            {"nombre": f"Producto {i}", "precio": Decimal("10.00"), "stock": 50, "categoria_id": 1 + i % 50, "proveedor_id": 1}
+            for i in range(1, 1001)
+        ])
+
+
+def crear_app(engine, session_factory) -> FastAPI:
+    # Los datos se cargan en el event loop del TestClient, el mismo que usan los requests
+    @asynccontextmanager
+    async def lifespan(app):
+        await preparar(engine)
+        yield
+        await engine.dispose()
+
+    app = FastAPI(lifespan=lifespan)
+
+    @app.middleware("http")
+    async def validadores_http(request: Request, call_next):
+        response = await call_next(request)
+        http_cache.aplicar_validadores(request, response)
+        return response
+
+    async def get_db():
+        async with session_factory() as session:
+            yield session
+
+    app.dependency_overrides[session_mod.get_db] = get_db
+    app.dependency_overrides[session_mod.get_read_db] = get_db
+    app.include_router(categoria_router)
+    app.include_router(proveedores_router)
+    app.include_router(ventas_router)
+    return app
+
+
+def sondear(cliente: TestClient, contador: ContadorSQL, condicional: bool, inicio_proveedores: int):
+    etags = {}
+    cuerpo = respuestas_304 = 0
+    with contador.contar():
+        inicio = time.perf_counter()
+        for ronda in range(RONDAS):
+            if ronda and ronda % ESCRITURA_CADA == 0:
+                cliente.post("/proveedores/", json={"nombre": f"Nuevo {inicio_proveedores + ronda}"})
+            for ruta in RUTAS:
+                headers = {"If-None-Match": etags[ruta]} if condicional and ruta in etags else {}
+                r = cliente.get(ruta, headers=headers)
+                if r.status_code == 304:
+                    respuestas_304 += 1
+                else:
+                    etags[ruta] = r.headers.get("etag")
+                cuerpo += len(r.content)
+        duracion = time.perf_counter() - inicio
+    requests = RONDAS * len(RUTAS)
+    return cuerpo, contador.total, duracion / requests * 1000, respuestas_304
+
+
+def main():
+    engine = create_async_engine(BENCH_DATABASE_URL)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    contador = ContadorSQL(engine)
+
+    print(f"Sondeo de {len(RUTAS)} rutas x {RONDAS} rondas ({engine.dialect.name}), una escritura cada {ESCRITURA_CADA} rondas")
+    print(f"{'modo':>14} | {'KB enviados':>11} | {'sentencias SQL':>14} | {'ms/request':>10} | {'304':>5}")
+    print("-" * 66)
+    with TestClient(crear_app(engine, session_factory)) as cliente:
+        for etiqueta, condicional, base in (("sin ETag", False, 0), ("condicional", True, RONDAS)):
+            cuerpo, sentencias, ms, no_modificados = sondear(cliente, contador, condicional, base)
+            print(f"{etiqueta:>14} | {cuerpo / 1024:>11.1f} | {sentencias:>14} | {ms:>10.3f} | {no_modificados:>5}")
+
+
+if __name__ == "__main__":
+    main()
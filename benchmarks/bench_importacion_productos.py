@@ -0,0 +1,125 @@
+# benchmarks/bench_importacion_productos.py
+"""
+Benchmark: importación masiva de productos (POST /productos/importar / CLI)
+contra el alta de a uno que hace POST /productos/CrearProductos.
+
+Genera un CSV y un NDJSON con categoría y proveedor por nombre, algunas filas
+inválidas y nombres repetidos, los importa y luego reimporta (todo actualización).
+
+Necesita PostgreSQL: el stock importado se anota en el ledger de movimientos
+(unnest). Usa una base de datos dedicada: el script recrea las tablas.
+
+Uso:
+    BENCH_DATABASE_URL=postgresql+asyncpg://... python benchmarks/bench_importacion_productos.py
+    BENCH_DATABASE_URL=postgresql+asyncpg://... BENCH_FILAS=100000 python benchmarks/bench_importacion_productos.py
+"""
+import asyncio
+import csv
+import json
+import os
+import tempfile
+import time
+
+import sqlalchemy as sa
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from _common import BENCH_DATABASE_URL, importar
+
+models = importar("Ventas.infrastructure.models")
+repositories = importar("productos.infrastructure.repositories")
+service = importar("productos.application.service")
+importacion = importar("productos.application.importacion")
+schemas = importar("productos.presentation.schemas")
+
+FILAS = int(os.getenv("BENCH_FILAS", "100000"))
+DE_A_UNO = 500  # altas individuales medidas para extrapolar
+COLUMNAS = ["nombre", "descripcion", "precio", "stock", "categoria", "proveedor"]
+
+
+def generar(directorio: str):
+    filas = []
+    for i in range(FILAS):
+        fila = {
+            "nombre": f"Producto {i}", "descripcion": f"Importado {i % 13}",
+            "precio": f"{1 + (i % 500) * 0.25:.2f}", "stock": str(i % 80),
+            "categoria": f"Categoría {i % 5}", "proveedor": f"Proveedor {i % 50}",
+        }
+        if i % 1000 == 999:
+            fila["precio"] = "-1"  # inválida
+        if i % 5000 == 4999:
+            fila["proveedor"] = "Proveedor inexistente"
+        filas.append(fila)
+    filas.extend(filas[:100])  # repetidas: gana la última
+
+    ruta_csv = os.path.join(directorio, "productos.csv")
+    with open(ruta_csv, "w", newline="", encoding="utf-8") as salida:
+        escritor = csv.DictWriter(salida, fieldnames=COLUMNAS)
+        escritor.writeheader()
+        escritor.writerows(filas)
+    ruta_json = os.path.join(directorio, "productos.ndjson")
+    with open(ruta_json, "w", encoding="utf-8") as salida:
+        for fila in filas:
+            salida.write(json.dumps(fila, ensure_ascii=False) + "\n")
+    return ruta_csv, ruta_json
+
+
+async def preparar(engine):
+    async with engine.begin() as conn:
+        await conn.run_sync(models.Base.metadata.drop_all)
+        await conn.run_sync(models.Base.metadata.create_all)
+        await conn.execute(sa.insert(models.Categoria.__table__), [{"nombre": f"Categoría {i}"} for i in range(5)])
+        await conn.execute(sa.insert(models.Proveedor.__table__), [{"nombre": f"Proveedor {i}"} for i in range(50)])
+
+
+async def de_a_uno(session_factory) -> float:
+    """Como POST /productos/CrearProductos: sesión, get_by_name e insert + commit por producto"""
+    inicio = time.perf_counter()
+    for i in range(DE_A_UNO):
+        async with session_factory() as session:
+            await service.ProductService(repositories.ProductRepository(session)).create_product(
+                schemas.ProductoCreate(nombre=f"Individual {i}", precio=9.99, stock=1, categoria_id=1, proveedor_id=1)
+            )
+    return (time.perf_counter() - inicio) / DE_A_UNO
+
+
+async def importar_archivo(session_factory, ruta: str, formato: str):
+    async with session_factory() as session:
+        with open(ruta, "rb") as entrada:
+            importador = importacion.ImportadorProductos(repositories.ProductRepository(session))
+            return await importador.importar(importacion.LECTORES[formato](entrada))
+
+
+async def main():
+    if not BENCH_DATABASE_URL.startswith("postgresql"):
+        print("⚠️  Este benchmark necesita PostgreSQL: define BENCH_DATABASE_URL=postgresql+asyncpg://...")
+        return
+
+    engine = create_async_engine(BENCH_DATABASE_URL)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    with tempfile.TemporaryDirectory() as directorio:
+        ruta_csv, ruta_json = generar(directorio)
+        await preparar(engine)
+
+        por_producto = await de_a_uno(session_factory)
+        print(f"De a uno ({engine.dialect.name}): {por_producto * 1000:.2f} ms/producto "
+              f"-> {FILAS:,} productos en ~{por_producto * FILAS:.0f}s")
+
+        print(f"{'importación':>20} | {'filas':>7} | {'insert':>7} | {'update':>7} | {'error':>5} | {'tiempo (s)':>10} | {'filas/s':>8}")
+        print("-" * 84)
+        for etiqueta, ruta, formato in (
+            ("csv (alta)", ruta_csv, "csv"),
+            ("csv (reimporta)", ruta_csv, "csv"),
+            ("ndjson (reimporta)", ruta_json, "json"),
+        ):
+            r = await importar_archivo(session_factory, ruta, formato)
+            segundos = r.duracion_ms / 1000
+            print(
+                f"{etiqueta:>20} | {r.procesadas:>7} | {r.insertados:>7} | {r.actualizados:>7} | "
+                f"{r.con_error:>5} | {segundos:>10.2f} | {r.procesadas / segundos:>8.0f}"
+            )
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
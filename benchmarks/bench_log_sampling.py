@@ -0,0 +1,67 @@
+# benchmarks/bench_log_sampling.py
+"""
+Benchmark: documentos guardados con LogSampler para un tráfico con una ruta
+caliente (/productos/), rutas normales y un 1% de errores, y qué tan bien se
+recupera el total con metadata.sample_rate (suma de 1 / sample_rate).
+
+También mide el costo por log de la decisión de muestreo.
+
+Uso:
+    python benchmarks/bench_log_sampling.py
+    BENCH_REQUESTS=200000 python benchmarks/bench_log_sampling.py
+"""
+import os
+import random
+import time
+
+from _common import importar
+
+entities = importar("observability_logs.domain.entities")
+sampling = importar("observability_logs.application.sampling")
+
+REQUESTS = int(os.getenv("BENCH_REQUESTS", "100000"))
+RUTAS = [("/productos/", 0.7), ("/categorias/", 0.1), ("/ventas/{venta_id}", 0.1), ("/proveedores/", 0.1)]
+
+
+def trafico():
+    random.seed(3)
+    rutas, pesos = zip(*RUTAS)
+    for i in range(REQUESTS):
+        ruta = random.choices(rutas, pesos)[0]
+        error = random.random() < 0.01
+        status = 500 if error else random.choice((200, 200, 200, 404))
+        yield entities.LogEntry(
+            trace_id=f"trace-{i}",
+            level="error" if error else "info",
+            category="system",
+            action="REQUEST",
+            message=f"GET {ruta} -> {status}",
+            metadata={"route": ruta, "status_code": status},
+        )
+
+
+def main():
+    politicas = {
+        "sin muestreo": None,
+        "caliente 5%": sampling.LogSampler(route_rates={"/productos/": 0.05}),
+        "caliente 5%, 2xx 20%": sampling.LogSampler(route_rates={"/productos/": 0.05}, status_rates={"2xx": 0.2}),
+    }
+    print(f"{REQUESTS:,} requests, 1% errores")
+    print(f"{'política':>22} | {'documentos':>10} | {'errores':>7} | {'total estimado':>14} | {'µs/log':>6}")
+    print("-" * 74)
+    for etiqueta, sampler in politicas.items():
+        documentos = errores = 0
+        estimado = 0.0
+        inicio = time.perf_counter()
+        for log in trafico():
+            guardados = sampler.sample(log) if sampler else [log]
+            for entry in guardados:
+                documentos += 1
+                errores += entry.level == "error"
+                estimado += 1 / entry.metadata.get("sample_rate", 1)
+        duracion = time.perf_counter() - inicio
+        print(f"{etiqueta:>22} | {documentos:>10,} | {errores:>7} | {estimado:>14,.0f} | {duracion / REQUESTS * 1e6:>6.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+# benchmarks/bench_log_writer.py
+"""
+Benchmark: latencia de los requests con ObservabilityMiddleware escribiendo cada
+log en MongoDB durante el request (ObservabilityLogService.write -> insert_one)
+contra encolarlos en BatchLogWriter (insert_many en segundo plano), y documentos
+escritos con REQUEST_START + REQUEST_END contra un span por request.
+
+MongoDB se simula con un repositorio que duerme LATENCIA ms por operación más
+un costo por documento (pymongo es bloqueante: time.sleep, no asyncio.sleep).
+
+Uso:
+    python benchmarks/bench_log_writer.py
+    BENCH_REQUESTS=2000 BENCH_LATENCIAS=0,2,10,50 python benchmarks/bench_log_writer.py
+"""
+import os
+import statistics
+import time
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from _common import importar
+
+middleware = importar("observability_logs.infrastructure.middleware")
+service = importar("observability_logs.application.service")
+batch_writer = importar("observability_logs.infrastructure.batch_writer")
+
+REQUESTS = int(os.getenv("BENCH_REQUESTS", "500"))
+LATENCIAS = [float(x) for x in os.getenv("BENCH_LATENCIAS", "0,5,20").split(",")]
+COSTO_DOCUMENTO_MS = float(os.getenv("BENCH_COSTO_DOCUMENTO_MS", "0.02"))
+
+
+class MongoLento:
+    """Repositorio con la latencia de un MongoDB remoto"""
+
+    def __init__(self, latencia_ms: float):
+        self.latencia = latencia_ms / 1000
+        self.guardados = 0
+        self.operaciones = 0
+
+    def _esperar(self, documentos: int):
+        self.operaciones += 1
+        time.sleep(self.latencia + documentos * COSTO_DOCUMENTO_MS / 1000)
+
+    def save(self, log):
+        self._esperar(1)
+        self.guardados += 1
+        return log
+
+    def save_many(self, logs):
+        self._esperar(len(logs))
+        self.guardados += len(logs)
+        return logs
+
+
+def crear_app(repositorio: MongoLento, en_lotes: bool, span: bool) -> FastAPI:
+    log_service = service.ObservabilityLogService(repositorio)
+    writer = batch_writer.BatchLogWriter(log_service.write_many, batch_size=500, flush_interval=0.2) if en_lotes else None
+
+    @asynccontextmanager
+    async def lifespan(app):
+        if writer:
+            writer.start()
+        yield
+        if writer:
+            await writer.stop()
+
+    app = FastAPI(lifespan=lifespan)
+    app.add_middleware(middleware.ObservabilityMiddleware, log_service=writer or log_service, span_mode=span)
+
+    @app.get("/productos/{producto_id}")
+    async def producto(producto_id: int):
+        return {"id": producto_id, "nombre": f"Producto {producto_id}"}
+
+    return app, writer
+
+
+def medir(latencia_ms: float, en_lotes: bool, span: bool):
+    repositorio = MongoLento(latencia_ms)
+    app, writer = crear_app(repositorio, en_lotes, span)
+    tiempos = []
+    with TestClient(app) as cliente:
+        for i in range(REQUESTS):
+            inicio = time.perf_counter()
+            cliente.get(f"/productos/{i}")
+            tiempos.append((time.perf_counter() - inicio) * 1000)
+    # Al salir del TestClient corre el shutdown: la cola se vació en MongoDB
+    assert repositorio.guardados == (1 if span else 2) * REQUESTS, (repositorio.guardados, writer and writer.stats())
+    p99 = statistics.quantiles(tiempos, n=100)[98]
+    return statistics.median(tiempos), p99, repositorio.operaciones, repositorio.guardados
+
+
+def main():
+    print(f"{REQUESTS} requests por escenario")
+    print(f"{'latencia Mongo':>14} | {'modo':>16} | {'p50 ms':>8} | {'p99 ms':>8} | {'operaciones':>11} | {'documentos':>10}")
+    print("-" * 85)
+    modos = (("directo", False, False), ("en lotes", True, False), ("span en lotes", True, True))
+    for latencia in LATENCIAS:
+        for etiqueta, en_lotes, span in modos:
+            p50, p99, operaciones, documentos = medir(latencia, en_lotes, span)
+            print(f"{latencia:>11.0f} ms | {etiqueta:>16} | {p50:>8.2f} | {p99:>8.2f} | {operaciones:>11} | {documentos:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+# benchmarks/bench_movimientos_ledger.py
+"""
+Benchmark: ledger de movimientos.
+
+- Stock a una fecha (GET /movimientos/stock): snapshot más cercano + delta del
+  ledger contra reproducir todo el ledger hasta la fecha.
+- Alta de movimientos (POST /movimientos): lotes contra un movimiento por request.
+
+Necesita PostgreSQL (el repositorio usa unnest, FOR UPDATE y timestamptz). Usa una
+base de datos dedicada: el script recrea las tablas de Ventas/infrastructure/models.py.
+
+Uso:
+    BENCH_DATABASE_URL=postgresql+asyncpg://... python benchmarks/bench_movimientos_ledger.py
+    BENCH_DATABASE_URL=postgresql+asyncpg://... BENCH_MOVIMIENTOS=1000000 python benchmarks/bench_movimientos_ledger.py
+"""
+import asyncio
+import os
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+import sqlalchemy as sa
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from _common import BENCH_DATABASE_URL, ContadorSQL, importar
+
+models = importar("Ventas.infrastructure.models")
+repository = importar("movimientos.infrastructure.repository")
+
+PRODUCTOS = int(os.getenv("BENCH_PRODUCTOS", "1000"))
+MOVIMIENTOS = int(os.getenv("BENCH_MOVIMIENTOS", "500000"))
+DIAS = 365
+CONSULTAS = 20
+LOTE = 1000
+DE_A_UNO = 300  # requests individuales medidos para extrapolar
+
+REPRODUCIR = f"""
+    SELECT m.producto_id, sum({repository._DELTA}) AS stock
+    FROM movimientos m
+    WHERE m.fecha <= :fecha AND m.producto_id BETWEEN 1 AND 100
+    GROUP BY m.producto_id
+"""
+
+
+async def preparar(engine, inicio: datetime):
+    random.seed(7)
+    stock = [0] * (PRODUCTOS + 1)
+    async with engine.begin() as conn:
+        await conn.run_sync(models.Base.metadata.drop_all)
+        await conn.run_sync(models.Base.metadata.create_all)
+        await conn.execute(sa.insert(models.Categoria.__table__), [{"nombre": "Bench"}])
+        await conn.execute(sa.insert(models.Proveedor.__table__), [{"nombre": "Bench"}])
+        await conn.execute(sa.insert(models.Producto.__table__), [
+            {"nombre": f"Producto {i}", "precio": Decimal("1.00"), "stock": 0, "categoria_id": 1, "proveedor_id": 1}
+            for i in range(1, PRODUCTOS + 1)
+        ])
+        paso = timedelta(days=DIAS) / MOVIMIENTOS
+        for desde in range(0, MOVIMIENTOS, 20000):
+            filas = []
+            for n in range(desde, min(desde + 20000, MOVIMIENTOS)):
+                producto_id = random.randint(1, PRODUCTOS)
+                tipo = "entrada" if stock[producto_id] < 5 or random.random() < 0.45 else "salida"
+                cantidad = random.randint(1, 5) if tipo == "entrada" else random.randint(1, min(5, stock[producto_id]))
+                stock[producto_id] += cantidad if tipo == "entrada" else -cantidad
+                filas.append({"producto_id": producto_id, "tipo": tipo, "cantidad": cantidad, "fecha": inicio + paso * n})
+            await conn.execute(sa.insert(models.Movimiento.__table__), filas)
+        await conn.execute(
+            sa.text("UPDATE productos SET stock = :stock WHERE id = :id"),
+            [{"id": i, "stock": stock[i]} for i in range(1, PRODUCTOS + 1)]
+        )
+        # Un snapshot por semana, como los que deja el programador de snapshots
+        for semana in range(1, DIAS // 7 + 1):
+            await conn.execute(sa.text(f"""
+                INSERT INTO snapshots_stock (producto_id, fecha, stock)
+                SELECT m.producto_id, :corte, sum({repository._DELTA}) FROM movimientos m
+                WHERE m.fecha <= :corte GROUP BY m.producto_id
+            """), {"corte": inicio + timedelta(weeks=semana)})
+
+
+async def main():
+    if not BENCH_DATABASE_URL.startswith("postgresql"):
+        print("⚠️  Este benchmark necesita PostgreSQL: define BENCH_DATABASE_URL=postgresql+asyncpg://...")
+        return
+
+    engine = create_async_engine(BENCH_DATABASE_URL)
+    inicio = datetime.now(timezone.utc) - timedelta(days=DIAS + 1)
+    await preparar(engine, inicio)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    fechas = [inicio + timedelta(days=random.uniform(1, DIAS)) for _ in range(CONSULTAS)]
+
+    print(f"Stock a una fecha ({MOVIMIENTOS:,} movimientos, 100 productos por página)")
+    print(f"{'estrategia':>24} | {'ms/consulta':>11}")
+    print("-" * 40)
+    async with session_factory() as session:
+        inicio_medicion = time.perf_counter()
+        for fecha in fechas:
+            esperado = {fila.producto_id: fila.stock for fila in await session.execute(sa.text(REPRODUCIR), {"fecha": fecha})}
+        reproducir = (time.perf_counter() - inicio_medicion) / CONSULTAS * 1000
+        repo = repository.MovimientoRepository(session)
+        inicio_medicion = time.perf_counter()
+        for fecha in fechas:
+            stock = await repo.stock_en(fecha, limit=100)
+        snapshot = (time.perf_counter() - inicio_medicion) / CONSULTAS * 1000
+        assert {s["producto_id"]: s["stock"] for s in stock if s["producto_id"] in esperado} == esperado
+    print(f"{'reproducir el ledger':>24} | {reproducir:>11.2f}")
+    print(f"{'snapshot + delta':>24} | {snapshot:>11.2f}")
+
+    contador = ContadorSQL(engine)
+    inicio_medicion = time.perf_counter()
+    for _ in range(DE_A_UNO):
+        async with session_factory() as session:
+            await repository.MovimientoRepository(session).registrar([(random.randint(1, PRODUCTOS), "entrada", 1)])
+    por_movimiento = (time.perf_counter() - inicio_medicion) / DE_A_UNO
+    lote = [(random.randint(1, PRODUCTOS), "entrada", 1) for _ in range(LOTE)]
+    with contador.contar():
+        inicio_medicion = time.perf_counter()
+        async with session_factory() as session:
+            await repository.MovimientoRepository(session).registrar(lote)
+        por_lote = time.perf_counter() - inicio_medicion
+    print(f"Alta de movimientos: de a uno {por_movimiento * 1000:.2f} ms/movimiento "
+          f"-> {LOTE:,} en ~{por_movimiento * LOTE * 1000:.0f} ms; "
+          f"un lote de {LOTE:,} en {por_lote * 1000:.1f} ms ({contador.total} sentencias)")
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,105 @@
+# benchmarks/bench_pedidos_proveedores.py
+"""
+Benchmark: recepción de un pedido a proveedor (POST /proveedores/pedidos/{id}/recibir)
+con un UPDATE de stock por lote y los movimientos en un solo INSERT, contra
+registrar una entrada por línea en el ledger (POST /movimientos con un movimiento:
+un UPDATE + INSERT + commit por producto).
+
+Necesita PostgreSQL (la recepción es un solo WITH con UPDATE ... FOR UPDATE). Usa
+una base de datos dedicada: el script recrea las tablas de Ventas/infrastructure/models.py.
+
+Uso:
+    BENCH_DATABASE_URL=postgresql+asyncpg://... python benchmarks/bench_pedidos_proveedores.py
+    BENCH_DATABASE_URL=postgresql+asyncpg://... BENCH_LINEAS=2000 python benchmarks/bench_pedidos_proveedores.py
+"""
+import asyncio
+import os
+import random
+import time
+from decimal import Decimal
+
+import sqlalchemy as sa
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from _common import BENCH_DATABASE_URL, ContadorSQL, importar
+
+models = importar("Ventas.infrastructure.models")
+movimientos_repository = importar("movimientos.infrastructure.repository")
+pedidos_repository = importar("proveedores.infrastructure.pedidos_repository")
+
+PRODUCTOS = int(os.getenv("BENCH_PRODUCTOS", "5000"))
+LINEAS = int(os.getenv("BENCH_LINEAS", "2000"))
+PEDIDOS = int(os.getenv("BENCH_PEDIDOS", "5"))
+
+
+async def preparar(engine):
+    async with engine.begin() as conn:
+        await conn.run_sync(models.Base.metadata.drop_all)
+        await conn.run_sync(models.Base.metadata.create_all)
+        await conn.execute(sa.insert(models.Categoria.__table__), [{"nombre": "Bench"}])
+        await conn.execute(sa.insert(models.Proveedor.__table__), [{"nombre": "Bench"}])
+        await conn.execute(sa.insert(models.Producto.__table__), [
+            {"nombre": f"Producto {i}", "precio": Decimal("10.00"), "stock": 100, "categoria_id": 1, "proveedor_id": 1}
+            for i in range(1, PRODUCTOS + 1)
+        ])
+
+
+def lineas_pedido():
+    productos = random.sample(range(1, PRODUCTOS + 1), LINEAS)
+    return [(producto_id, random.randint(1, 50), round(random.uniform(1, 20), 2)) for producto_id in productos]
+
+
+async def stock_total(session_factory) -> int:
+    async with session_factory() as session:
+        return (await session.execute(sa.text("SELECT sum(stock) FROM productos"))).scalar_one()
+
+
+async def main():
+    if not BENCH_DATABASE_URL.startswith("postgresql"):
+        print("⚠️  Este benchmark necesita PostgreSQL: define BENCH_DATABASE_URL=postgresql+asyncpg://...")
+        return
+
+    random.seed(11)
+    engine = create_async_engine(BENCH_DATABASE_URL)
+    await preparar(engine)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    contador = ContadorSQL(engine)
+
+    print(f"Pedido de {LINEAS:,} líneas ({engine.dialect.name}, {PRODUCTOS:,} productos)")
+    creacion = recepcion = 0.0
+    for _ in range(PEDIDOS):
+        lineas = lineas_pedido()
+        antes = await stock_total(session_factory)
+        inicio = time.perf_counter()
+        async with session_factory() as session:
+            pedido = await pedidos_repository.PedidosProveedoresRepository(session).crear(1, lineas)
+        creacion += time.perf_counter() - inicio
+        assert abs(float(pedido["total"]) - sum(c * p for _, c, p in lineas)) < 0.01
+        with contador.contar():
+            inicio = time.perf_counter()
+            async with session_factory() as session:
+                resultado = await pedidos_repository.PedidosProveedoresRepository(session).recibir(pedido["id"])
+            recepcion += time.perf_counter() - inicio
+        assert resultado["productos"] == LINEAS
+        assert await stock_total(session_factory) == antes + sum(c for _, c, _ in lineas)
+    sentencias = contador.total
+
+    lineas = lineas_pedido()
+    inicio = time.perf_counter()
+    for producto_id, cantidad, _ in lineas:
+        async with session_factory() as session:
+            await movimientos_repository.MovimientoRepository(session).registrar(
+                [(producto_id, movimientos_repository.ENTRADA, cantidad)]
+            )
+    por_linea = time.perf_counter() - inicio
+
+    print(f"{'estrategia':>28} | {'ms/pedido':>10}")
+    print("-" * 42)
+    print(f"{'crear (líneas en 1 INSERT)':>28} | {creacion / PEDIDOS * 1000:>10.1f}")
+    print(f"{'recibir (UPDATE por lote)':>28} | {recepcion / PEDIDOS * 1000:>10.1f}  ({sentencias} sentencias)")
+    print(f"{'una entrada por línea':>28} | {por_linea * 1000:>10.1f}")
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
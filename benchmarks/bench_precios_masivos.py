@@ -0,0 +1,90 @@
+# benchmarks/bench_precios_masivos.py
+"""
+Benchmark: repreciar un catálogo completo con PATCH /productos/precios
+(una sentencia con historial) contra un PATCH /productos/actualizar/{id} por producto.
+
+Necesita PostgreSQL (el reprecio usa unnest, FOR UPDATE y un UPDATE dentro de un WITH).
+Usa una base de datos dedicada: el script recrea las tablas de Ventas/infrastructure/models.py.
+
+Uso:
+    BENCH_DATABASE_URL=postgresql+asyncpg://... python benchmarks/bench_precios_masivos.py
+    BENCH_DATABASE_URL=postgresql+asyncpg://... BENCH_SKUS=20000 python benchmarks/bench_precios_masivos.py
+"""
+import asyncio
+import os
+import time
+from decimal import Decimal
+
+import sqlalchemy as sa
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from _common import BENCH_DATABASE_URL, ContadorSQL, importar
+
+models = importar("Ventas.infrastructure.models")
+repositories = importar("productos.infrastructure.repositories")
+service = importar("productos.application.service")
+schemas = importar("productos.presentation.schemas")
+
+SKUS = int(os.getenv("BENCH_SKUS", "20000"))
+DE_A_UNO = 500  # ediciones individuales medidas para extrapolar
+
+
+async def preparar(engine):
+    async with engine.begin() as conn:
+        await conn.run_sync(models.Base.metadata.drop_all)
+        await conn.run_sync(models.Base.metadata.create_all)
+        await conn.execute(sa.insert(models.Categoria.__table__), [{"nombre": f"Categoría {i}"} for i in range(1, 6)])
+        await conn.execute(sa.insert(models.Proveedor.__table__), [{"nombre": "Bench"}])
+        await conn.execute(sa.insert(models.Producto.__table__), [
+            {
+                "nombre": f"Producto {i}", "precio": Decimal("10.00") + i % 50, "stock": 10,
+                "categoria_id": 1 + i % 5, "proveedor_id": 1,
+            }
+            for i in range(1, SKUS + 1)
+        ])
+
+
+async def main():
+    if not BENCH_DATABASE_URL.startswith("postgresql"):
+        print("⚠️  Este benchmark necesita PostgreSQL: define BENCH_DATABASE_URL=postgresql+asyncpg://...")
+        return
+
+    engine = create_async_engine(BENCH_DATABASE_URL)
+    await preparar(engine)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    contador = ContadorSQL(engine)
+
+    inicio = time.perf_counter()
+    for producto_id in range(1, DE_A_UNO + 1):
+        async with session_factory() as session:
+            await service.ProductService(repositories.ProductRepository(session)).update_product(
+                producto_id, schemas.ProductoUpdate(precio=99.99)
+            )
+    por_producto = (time.perf_counter() - inicio) / DE_A_UNO
+    print(f"De a uno ({engine.dialect.name}): {por_producto * 1000:.2f} ms/producto "
+          f"-> {SKUS:,} productos en ~{por_producto * SKUS:.1f}s")
+
+    print(f"{'reprecio masivo':>28} | {'actualizados':>12} | {'sentencias':>10} | {'tiempo (ms)':>11}")
+    print("-" * 72)
+    for etiqueta, data in (
+        ("+10% todo el catálogo", schemas.ActualizacionPrecios(modo="porcentaje", valor=10, todos=True)),
+        ("+0.50 una categoría", schemas.ActualizacionPrecios(modo="monto", valor=0.5, categoria_id=3)),
+        ("lista de precios por SKU", schemas.ActualizacionPrecios(
+            precios=[{"producto_id": i, "precio": 5 + i % 97} for i in range(1, SKUS + 1)]
+        )),
+    ):
+        with contador.contar():
+            inicio = time.perf_counter()
+            async with session_factory() as session:
+                resultado = await service.ProductService(repositories.ProductRepository(session)).actualizar_precios(data)
+            duracion = (time.perf_counter() - inicio) * 1000
+        print(f"{etiqueta:>28} | {resultado.actualizados:>12} | {contador.total:>10} | {duracion:>11.1f}")
+
+    async with engine.connect() as conn:
+        historial = (await conn.execute(sa.text("SELECT count(*) FROM historial_precios"))).scalar_one()
+    print(f"Filas en historial_precios: {historial:,}")
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
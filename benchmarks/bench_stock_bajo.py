@@ -0,0 +1,115 @@
+# benchmarks/bench_stock_bajo.py
+"""
+Benchmark: GET /productos/stock-bajo desde el conjunto incremental contra la
+consulta de vista_stock_bajo (JOIN con categorías y proveedores) y contra el
+range scan de idx_productos_stock, más el costo de mantener el conjunto al
+confirmar ventas.
+
+Uso:
+    python benchmarks/bench_stock_bajo.py
+    BENCH_DATABASE_URL=postgresql+asyncpg://... BENCH_SKUS=200000 python benchmarks/bench_stock_bajo.py
+"""
+import asyncio
+import os
+import time
+from decimal import Decimal
+
+import sqlalchemy as sa
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from _common import BENCH_DATABASE_URL, importar
+
+models = importar("Ventas.infrastructure.models")
+stock_bajo_mod = importar("productos.infrastructure.stock_bajo")
+
+SKUS = int(os.getenv("BENCH_SKUS", "200000"))
+CONSULTAS = int(os.getenv("BENCH_CONSULTAS", "200"))
+
+VISTA = """
+    SELECT p.id, p.nombre, p.stock, c.nombre AS categoria, pr.nombre AS proveedor
+    FROM productos p
+    JOIN categorias c ON p.categoria_id = c.id
+    JOIN proveedores pr ON p.proveedor_id = pr.id
+    WHERE p.stock < :umbral
+    ORDER BY p.stock
+    LIMIT 100
+"""
+INDICE = """
+    SELECT id, nombre, stock, categoria_id, proveedor_id
+    FROM productos WHERE stock < :umbral ORDER BY stock LIMIT 100
+"""
+
+
+async def preparar(engine):
+    async with engine.begin() as conn:
+        await conn.run_sync(models.Base.metadata.drop_all)
+        await conn.run_sync(models.Base.metadata.create_all)
+        await conn.execute(sa.insert(models.Categoria.__table__), [{"nombre": f"Categoría {i}"} for i in range(1, 11)])
+        await conn.execute(sa.insert(models.Proveedor.__table__), [{"nombre": f"Proveedor {i}"} for i in range(1, 21)])
+        for desde in range(0, SKUS, 20000):
+            await conn.execute(sa.insert(models.Producto.__table__), [
+                {
+                    # ~1% de los productos bajo el umbral
+                    "nombre": f"Producto {i}", "precio": Decimal("10.00"), "stock": i % 1000,
+                    "categoria_id": 1 + i % 10, "proveedor_id": 1 + i % 20,
+                }
+                for i in range(desde + 1, min(desde + 20000, SKUS) + 1)
+            ])
+
+
+async def medir(session_factory, consulta) -> float:
+    inicio = time.perf_counter()
+    for _ in range(CONSULTAS):
+        async with session_factory() as session:
+            await consulta(session)
+    return (time.perf_counter() - inicio) / CONSULTAS * 1000
+
+
+async def main():
+    engine = create_async_engine(BENCH_DATABASE_URL)
+    await preparar(engine)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+
+    async def publicar(mensaje):
+        pass
+    tracker = stock_bajo_mod.StockBajoTracker(umbral=10, debounce=0, cooldown=0, resync=0, publicar=publicar)
+
+    inicio = time.perf_counter()
+    async with session_factory() as session:
+        await tracker.cargar(session)
+    carga = (time.perf_counter() - inicio) * 1000
+    print(f"Carga inicial ({engine.dialect.name}): {len(tracker):,} de {SKUS:,} productos en {carga:.1f} ms")
+
+    async def vista(session):
+        (await session.execute(sa.text(VISTA), {"umbral": 10})).fetchall()
+
+    async def indice(session):
+        (await session.execute(sa.text(INDICE), {"umbral": 10})).fetchall()
+
+    async def conjunto(session):
+        tracker.listar(limit=100)
+
+    print(f"{'GET /productos/stock-bajo':>30} | {'ms/consulta':>11}")
+    print("-" * 46)
+    for etiqueta, consulta in (
+        ("vista_stock_bajo", vista),
+        ("range scan idx_productos_stock", indice),
+        ("conjunto incremental", conjunto),
+    ):
+        print(f"{etiqueta:>30} | {await medir(session_factory, consulta):>11.3f}")
+
+    # Mantenimiento: aplicar el stock devuelto por un RETURNING de 10 productos
+    filas = [
+        {"id": i, "nombre": f"Producto {i}", "stock": i % 20, "categoria_id": 1, "proveedor_id": 1}
+        for i in range(1, 11)
+    ]
+    inicio = time.perf_counter()
+    for _ in range(10000):
+        tracker.aplicar(filas)
+    print(f"Aplicar una venta de 10 productos: {(time.perf_counter() - inicio) / 10000 * 1e6:.1f} µs")
+    await tracker.detener()
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
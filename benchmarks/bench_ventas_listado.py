@@ -0,0 +1,76 @@
+# benchmarks/bench_ventas_listado.py
+"""
+Benchmark: sentencias SQL por petición de /ventas/listar_ventas.
+
+Compara la carga por lotes de SQLVentaRepository.get_all contra el costo
+teórico de la versión anterior (1 consulta + 1 de detalles y 1 de usuario por venta).
+
+Uso:
+    python benchmarks/bench_ventas_listado.py
+    BENCH_DATABASE_URL=postgresql+asyncpg://... python benchmarks/bench_ventas_listado.py
+"""
+import asyncio
+import random
+import time
+from decimal import Decimal
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from _common import BENCH_DATABASE_URL, ContadorSQL, importar
+
+models = importar("Ventas.infrastructure.models")
+repository = importar("Ventas.infrastructure.repository")
+
+PAGINAS = (10, 100, 1000)
+DETALLES_POR_VENTA = 3
+
+
+async def poblar(session: AsyncSession, total_ventas: int):
+    usuarios = [
+        models.Usuario(nombre=f"Usuario {i}", email=f"u{i}@bench.local", password="x")
+        for i in range(20)
+    ]
+    productos = [
+        models.Producto(nombre=f"Producto {i}", precio=Decimal("9.99"), stock=1000)
+        for i in range(200)
+    ]
+    session.add_all(usuarios + productos)
+    await session.flush()
+
+    for i in range(total_ventas):
+        venta = models.Venta(total=Decimal("29.97"), usuario_id=random.choice(usuarios).id)
+        venta.detalles = [
+            models.DetalleVenta(producto_id=random.choice(productos).id, cantidad=1, precio=Decimal("9.99"))
+            for _ in range(DETALLES_POR_VENTA)
+        ]
+        session.add(venta)
+    await session.commit()
+
+
+async def main():
+    engine = create_async_engine(BENCH_DATABASE_URL)
+    async with engine.begin() as conn:
+        await conn.run_sync(models.Base.metadata.create_all)
+
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    async with session_factory() as session:
+        await poblar(session, max(PAGINAS))
+
+    contador = ContadorSQL(engine)
+    print(f"{'limit':>6} | {'sentencias (antes)':>18} | {'sentencias (ahora)':>18} | {'tiempo (ms)':>11}")
+    print("-" * 64)
+    for limit in PAGINAS:
+        async with session_factory() as session:
+            repo = repository.SQLVentaRepository(session)
+            with contador.contar():
+                inicio = time.perf_counter()
+                ventas = await repo.get_all(0, limit)
+                duracion = (time.perf_counter() - inicio) * 1000
+        antes = 1 + 2 * len(ventas)
+        print(f"{limit:>6} | {antes:>18} | {contador.total:>18} | {duracion:>11.1f}")
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,6 +1,14 @@
 from ..infraestructura.categoria_repository import CategoriaRepository
-from ..domain.models import Categoria  # Importamos el modelo
-from typing import Optional
+from ..infraestructura.resumen_cache import Resumen
+from ..domain.models import Categoria, CategoriaResumen  # Importamos el modelo
+from typing import List, Optional
+from pydantic import TypeAdapter
+
+_resumen_adapter = TypeAdapter(List[CategoriaResumen])
+
+def serializar_resumen(categorias: List[dict]) -> bytes:
+    """JSON del resumen, con la misma forma que response_model=List[CategoriaResumen]"""
+    return _resumen_adapter.dump_json(_resumen_adapter.validate_python(categorias))
 
 class CategoriaService:
     def __init__(self, categoria_repository: CategoriaRepository):
@@ -10,6 +18,10 @@ class CategoriaService:
         """Obtiene todas las categorías existentes"""
         return await self.categoria_repository.listar_todos()
     
+    async def obtener_resumen(self) -> Resumen:
+        """Categorías con cantidad de productos, stock total y valor del stock, ya serializadas"""
+        return await self.categoria_repository.resumen_json(serializar_resumen)
+    
     async def obtener_categoria_por_id(self, categoria_id: int) -> Optional[Categoria]: # type: ignore
         """Obtiene una categoría por su ID"""
         return await self.categoria_repository.obtener_por_id(categoria_id)
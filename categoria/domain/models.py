@@ -24,3 +24,9 @@ class CategoriaOut(CategoriaBase):
     
     class Config:
         from_attributes = True
+
+
+class CategoriaResumen(CategoriaOut):
+    productos: int
+    stock_total: int
+    valor_stock: float
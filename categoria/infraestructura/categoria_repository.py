@@ -1,9 +1,15 @@
 from fastapi import HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
+from sqlalchemy import text
 from sqlalchemy.exc import IntegrityError
+from typing import Callable, List
 from ..domain.models import Categoria
+from ...core.http_cache import marcar_modificado_al_confirmar
+from ...database.session import sesion_primario
+from .resumen_cache import Resumen, invalidar_resumen_al_confirmar, resumen_categorias
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 
@@ -16,6 +22,33 @@ class CategoriaRepository:
         result = await self.session.execute(select(Categoria))
         return result.scalars().all()
     
+    async def resumen(self) -> List[dict]:
+        """Cada categoría con cantidad de productos, stock total y valor del stock (un GROUP BY)"""
+        result = await self.session.execute(text("""
+            SELECT c.id, c.nombre,
+                   count(p.id) AS productos,
+                   coalesce(sum(p.stock), 0) AS stock_total,
+                   coalesce(sum(p.stock * p.precio), 0) AS valor_stock
+            FROM categorias c
+            LEFT JOIN productos p ON p.categoria_id = c.id
+            GROUP BY c.id, c.nombre
+            ORDER BY c.id
+        """))
+        return [dict(fila._mapping) for fila in result.fetchall()]
+
+    async def resumen_json(self, serializar: Callable[[List[dict]], bytes]) -> Resumen:
+        """Resumen ya serializado desde la caché, o calculado, serializado y cacheado"""
+        resumen = resumen_categorias.obtener()
+        if resumen is None:
+            version, cargado = resumen_categorias.version(), time.monotonic()
+            # Desde el primario: calculado en una réplica atrasada, un resumen previo a
+            # la escritura quedaría cacheado (y con ETag) durante todo el TTL
+            async with sesion_primario(self.session) as session:
+                filas = await CategoriaRepository(session).resumen()
+            resumen = Resumen(serializar(filas))
+            resumen_categorias.guardar(resumen, version, cargado)
+        return resumen
+    
     async def obtener_por_id(self, categoria_id: int) -> Categoria | None: # type: ignore
         """Obtiene una categoría por su ID"""
         result = await self.session.execute(
@@ -35,6 +68,8 @@ class CategoriaRepository:
         try:
             nueva_categoria = Categoria(nombre=nombre)
             self.session.add(nueva_categoria)
+            invalidar_resumen_al_confirmar(self.session)
+            marcar_modificado_al_confirmar(self.session, "categorias")
             await self.session.commit()
             await self.session.refresh(nueva_categoria)
             return nueva_categoria
@@ -63,6 +98,8 @@ class CategoriaRepository:
                 )
             
             categoria.nombre = nuevo_nombre
+            invalidar_resumen_al_confirmar(self.session)
+            marcar_modificado_al_confirmar(self.session, "categorias")
             await self.session.commit()
             await self.session.refresh(categoria)
             return categoria
@@ -91,6 +128,8 @@ class CategoriaRepository:
                 )
             
             await self.session.delete(categoria)
+            invalidar_resumen_al_confirmar(self.session)
+            marcar_modificado_al_confirmar(self.session, "categorias")
             await self.session.commit()
             return True
         except Exception as e:
@@ -0,0 +1,103 @@
+# categoria/infraestructura/resumen_cache.py
+"""
+Caché en proceso del resumen de categorías (GET /categorias/resumen): el JSON
+ya serializado y su ETag.
+
+Se invalida con los mismos eventos que la caché de catálogo: cualquier alta,
+baja o edición de productos (versión de catalogo_cache) y las escrituras de
+categorías (`invalidar_resumen_al_confirmar`, aplicado en `after_commit`). Los
+cambios de stock por ventas respetan la misma ventana de consistencia que el
+catálogo (PRODUCTOS_CACHE_VENTANA_STOCK).
+"""
+import hashlib
+import threading
+import time
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from ...core.config import settings
+from ...productos.infrastructure.cache import catalogo_cache
+
+_CLAVE_PENDIENTE = "resumen_categorias_invalidar"
+
+
+class Resumen:
+    """JSON del resumen y su ETag (hash del contenido)"""
+    __slots__ = ("json", "etag")
+
+    def __init__(self, json: bytes):
+        self.json = json
+        self.etag = f'"{hashlib.blake2b(json, digest_size=16).hexdigest()}"'
+
+
+class ResumenCategoriasCache:
+    def __init__(self, ttl: float, ventana_stock: float):
+        self.ttl = ttl
+        self.ventana_stock = ventana_stock
+        self._resumen: Optional[Resumen] = None
+        self._version_carga: Optional[tuple] = None
+        self._cargado = 0.0
+        self._version = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def version(self) -> tuple:
+        """Versión del catálogo y de las categorías; se toma antes de leer de la base"""
+        return catalogo_cache.version(), self._version
+
+    def _vigente(self, ahora: float) -> bool:
+        (catalogo, stock), propia = self.version()
+        (catalogo_carga, stock_carga), propia_carga = self._version_carga
+        if propia != propia_carga or catalogo != catalogo_carga:
+            return False
+        if ahora >= self._cargado + self.ttl:
+            return False
+        # Solo cambió stock: se tolera la ventana de consistencia desde la carga
+        return stock == stock_carga or ahora < self._cargado + self.ventana_stock
+
+    def obtener(self) -> Optional[Resumen]:
+        with self._lock:
+            if self._resumen is None or not self._vigente(time.monotonic()):
+                self.misses += 1
+                return None
+            self.hits += 1
+            return self._resumen
+
+    def guardar(self, resumen: Resumen, version: tuple, cargado: float):
+        """`version` y `cargado` (time.monotonic()) son los de antes de la consulta"""
+        with self._lock:
+            if version[1] != self._version or version[0][0] != catalogo_cache.version()[0]:
+                return  # hubo una invalidación mientras se leía de la base
+            self._resumen = resumen
+            self._version_carga = version
+            self._cargado = cargado
+
+    def invalidar(self):
+        with self._lock:
+            self._version += 1
+            self._resumen = None
+
+
+resumen_categorias = ResumenCategoriasCache(
+    ttl=settings.PRODUCTOS_CACHE_TTL,
+    ventana_stock=settings.PRODUCTOS_CACHE_VENTANA_STOCK,
+)
+
+
+def invalidar_resumen_al_confirmar(session):
+    """Registra en la sesión que el resumen se invalida cuando la transacción hace commit"""
+    session.info[_CLAVE_PENDIENTE] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _aplicar_invalidacion(session):
+    if session.info.pop(_CLAVE_PENDIENTE, False):
+        resumen_categorias.invalidar()
+
+
+@event.listens_for(Session, "after_rollback")
+def _descartar_invalidacion(session):
+    session.info.pop(_CLAVE_PENDIENTE, None)
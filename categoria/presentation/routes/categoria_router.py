@@ -1,10 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException, logger, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, logger, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 from ...infraestructura.categoria_repository import CategoriaRepository
 from ...application.categoria_service import CategoriaService
-from ....database.session import get_db
-from ...domain.models import Categoria, CategoriaBase, CategoriaCreate, CategoriaOut
+from ....database.session import get_db, get_read_db
+from ....core.http_cache import etag_coincide, validar_cache
+from ...domain.models import Categoria, CategoriaBase, CategoriaCreate, CategoriaOut, CategoriaResumen
 from pydantic import BaseModel
 
 categoria_router = APIRouter(
@@ -18,10 +19,19 @@ def get_categoria_service(session: AsyncSession = Depends(get_db)) -> CategoriaS
     repo = CategoriaRepository(session)
     return CategoriaService(repo)
 
+# Consultas de catálogo: réplica de lectura si está configurada
+def get_categoria_lectura_service(session: AsyncSession = Depends(get_read_db)) -> CategoriaService:
+    return get_categoria_service(session)
+
 # Endpoints
-@categoria_router.get("/", response_model=List[CategoriaOut], summary="Obtener todas las categorías")
+@categoria_router.get(
+    "/",
+    response_model=List[CategoriaOut],
+    summary="Obtener todas las categorías",
+    dependencies=[validar_cache("categorias")]
+)
 async def listar_todas_categorias(
-    service: CategoriaService = Depends(get_categoria_service),
+    service: CategoriaService = Depends(get_categoria_lectura_service),
     skip: int = 0,
     limit: int = 100
 ):
@@ -34,6 +44,31 @@ async def listar_todas_categorias(
     """
     return await service.obtener_todas_categorias()
 
+# Antes de /{categoria_id} para que "resumen" no se tome como id
+@categoria_router.get(
+    "/resumen",
+    response_model=List[CategoriaResumen],
+    summary="Resumen de categorías",
+    responses={304: {"description": "Sin cambios desde el ETag enviado en If-None-Match"}}
+)
+async def resumen_categorias(
+    request: Request,
+    service: CategoriaService = Depends(get_categoria_lectura_service)
+):
+    """
+    Cada categoría con la cantidad de productos, el stock total y el valor del
+    stock (stock * precio), calculado con un GROUP BY y cacheado hasta que
+    cambian productos o categorías.
+
+    Responde con ETag: enviando If-None-Match con ese valor se obtiene 304
+    sin cuerpo mientras el resumen no cambie.
+    """
+    resumen = await service.obtener_resumen()
+    headers = {"ETag": resumen.etag, "Cache-Control": "no-cache"}
+    if etag_coincide(request.headers.get("if-none-match"), resumen.etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=resumen.json, media_type="application/json", headers=headers)
+
 @categoria_router.get(
     "/{categoria_id}", 
     response_model=CategoriaOut,
@@ -44,7 +79,7 @@ async def listar_todas_categorias(
 )
 async def obtener_categoria(
     categoria_id: int,
-    service: CategoriaService = Depends(get_categoria_service)
+    service: CategoriaService = Depends(get_categoria_lectura_service)
 ):
     """
     Obtiene una categoría específica por su ID.
@@ -0,0 +1,189 @@
+# core/busqueda.py
+"""
+Búsqueda por texto compartida por productos y proveedores.
+
+En Postgres usa el full-text search nativo (sin extensiones):
+- Un índice GIN sobre un tsvector de expresión (nombre con peso A, descripción
+  con peso B) para buscar por palabras y prefijos de palabra ("tecl logi").
+- Un btree sobre el nombre normalizado en COLLATE "C" para autocompletar por
+  prefijo del nombre: se recorre en orden y corta en LIMIT, aunque el prefijo
+  tenga una letra y coincida con medio catálogo.
+
+Las expresiones de los índices se arman aquí y las consultas usan exactamente
+la misma expresión, que es lo que le permite al planner usar el índice.
+
+`IndiceBusqueda` implementa la misma semántica en memoria para SQLite, pruebas
+y catálogos chicos.
+"""
+import re
+from bisect import bisect_left
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# Se normalizan igual en Python y en SQL (translate), para que búsqueda e índice coincidan
+ACENTOS = "ÁÉÍÓÚÜÑáéíóúüñ"
+SIN_ACENTOS = "AEIOUUNaeiouun"
+_TABLA_ACENTOS = str.maketrans(ACENTOS, SIN_ACENTOS)
+
+MAX_TERMINOS = 8
+# La última palabra se busca como prefijo solo desde este largo: "1:*" o "a:*"
+# expanden a miles de términos del índice y cuestan más que toda la búsqueda
+MIN_PREFIJO = 3
+# Pesos de ts_rank por defecto: A (nombre) = 1.0, B (descripción) = 0.4
+PESO_NOMBRE = 1.0
+PESO_DESCRIPCION = 0.4
+
+
+def normalizar(texto: Optional[str]) -> str:
+    return (texto or "").translate(_TABLA_ACENTOS).lower()
+
+
+def terminos(texto: str) -> List[str]:
+    """Palabras alfanuméricas del texto ya normalizadas (seguras para armar un tsquery)"""
+    return re.findall(r"[^\W_]+", normalizar(texto))[:MAX_TERMINOS]
+
+
+def terminos_consulta(palabras: List[str]) -> List[Tuple[str, bool]]:
+    """
+    (palabra, es_prefijo) a buscar. La última palabra es prefijo si tiene al menos
+    MIN_PREFIJO letras; más corta se ignora hasta que el usuario siga tecleando
+    ("sony 1" busca "sony"), salvo que sea la única palabra, que se busca completa.
+    """
+    consulta = [(palabra, False) for palabra in palabras[:-1]]
+    ultima = palabras[-1]
+    if len(ultima) >= MIN_PREFIJO:
+        consulta.append((ultima, True))
+    elif not consulta:
+        consulta.append((ultima, False))
+    return consulta
+
+
+def consulta_tsquery(palabras: List[str], solo_nombre: bool = False) -> str:
+    """
+    tsquery con todas las palabras y la última como prefijo, ej: 'teclado & log:*'.
+    `solo_nombre` restringe las coincidencias al peso A ('teclado:A & log:*A').
+    """
+    peso = "A" if solo_nombre else ""
+    return " & ".join(
+        f"{palabra}:{'*' if prefijo else ''}{peso}" if prefijo or peso else palabra
+        for palabra, prefijo in terminos_consulta(palabras)
+    )
+
+
+def patron_prefijo(texto: str) -> str:
+    """Patrón LIKE 'texto%' con los comodines del usuario escapados"""
+    escapado = normalizar(texto).strip().replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"{escapado}%"
+
+
+def expr_sin_acentos(columna: str) -> str:
+    return f"translate({columna}, '{ACENTOS}', '{SIN_ACENTOS}')"
+
+
+def expr_documento(columna_nombre: str, columna_descripcion: Optional[str] = None) -> str:
+    """tsvector del índice GIN: nombre con peso A y, si hay, descripción con peso B"""
+    documento = f"setweight(to_tsvector('simple', {expr_sin_acentos(columna_nombre)}), 'A')"
+    if columna_descripcion:
+        descripcion = expr_sin_acentos(f"coalesce({columna_descripcion}, '')")
+        documento += f" || setweight(to_tsvector('simple', {descripcion}), 'B')"
+    return documento
+
+
+def expr_prefijo(columna_nombre: str) -> str:
+    """Nombre normalizado en COLLATE "C": LIKE 'x%' y ORDER BY usan el mismo btree"""
+    return f'lower({expr_sin_acentos(columna_nombre)}) COLLATE "C"'
+
+
+class IndiceBusqueda:
+    """
+    Índice invertido en memoria con la semántica de las consultas SQL:
+    prefijo del nombre, prefijo de palabra, ranking por peso (nombre > descripción)
+    y filtros por igualdad.
+    """
+
+    def __init__(self, filas: Iterable[dict], campo_nombre: str = "nombre", campo_descripcion: Optional[str] = None):
+        self._filas: Dict[Any, dict] = {}
+        self._nombres: List[Tuple[str, Any]] = []
+        self._pesos: Dict[str, Dict[Any, float]] = {}  # palabra -> {id: mejor peso}
+        for fila in filas:
+            fila_id = fila["id"]
+            self._filas[fila_id] = fila
+            self._nombres.append((normalizar(fila[campo_nombre]), fila_id))
+            campos = [(fila[campo_nombre], PESO_NOMBRE)]
+            if campo_descripcion:
+                campos.append((fila.get(campo_descripcion), PESO_DESCRIPCION))
+            for texto, peso in campos:
+                for palabra in re.findall(r"[^\W_]+", normalizar(texto)):
+                    ids = self._pesos.setdefault(palabra, {})
+                    ids[fila_id] = max(ids.get(fila_id, 0.0), peso)
+        self._nombres.sort()
+        self._vocabulario = sorted(self._pesos)
+
+    def __len__(self) -> int:
+        return len(self._filas)
+
+    def _coincidencias(self, palabra: str, prefijo: bool) -> Dict[Any, float]:
+        if not prefijo:
+            return self._pesos.get(palabra, {})
+        encontrados: Dict[Any, float] = {}
+        i = bisect_left(self._vocabulario, palabra)
+        while i < len(self._vocabulario) and self._vocabulario[i].startswith(palabra):
+            for fila_id, peso in self._pesos[self._vocabulario[i]].items():
+                encontrados[fila_id] = max(encontrados.get(fila_id, 0.0), peso)
+            i += 1
+        return encontrados
+
+    def _cumple(self, fila: dict, filtros: Optional[Dict[str, Any]]) -> bool:
+        return not filtros or all(fila.get(campo) == valor for campo, valor in filtros.items())
+
+    def buscar(
+        self,
+        texto: str,
+        limit: int = 10,
+        autocompletar: bool = True,
+        filtros: Optional[Dict[str, Any]] = None,
+    ) -> List[dict]:
+        """Filas ordenadas por relevancia, cada una con la clave `relevancia`"""
+        palabras = terminos(texto)
+        if not palabras:
+            return []
+        resultados: List[dict] = []
+        vistos = set()
+
+        if autocompletar:
+            # 1) El nombre empieza con lo escrito, en orden alfabético
+            prefijo = normalizar(texto).strip()
+            i = bisect_left(self._nombres, (prefijo,))
+            while len(resultados) < limit and i < len(self._nombres) and self._nombres[i][0].startswith(prefijo):
+                fila = self._filas[self._nombres[i][1]]
+                if self._cumple(fila, filtros):
+                    resultados.append({**fila, "relevancia": 1.0})
+                    vistos.add(fila["id"])
+                i += 1
+            if len(resultados) >= limit:
+                return resultados
+
+        # 2) Todas las palabras (la última como prefijo), rankeadas por peso
+        consulta = terminos_consulta(palabras)
+        puntajes: Optional[Dict[Any, float]] = None
+        for palabra, prefijo in consulta:
+            coincidencias = self._coincidencias(palabra, prefijo)
+            if autocompletar:
+                coincidencias = {k: v for k, v in coincidencias.items() if v >= PESO_NOMBRE}
+            if puntajes is None:
+                puntajes = dict(coincidencias)
+            else:
+                puntajes = {k: puntajes[k] + v for k, v in coincidencias.items() if k in puntajes}
+            if not puntajes:
+                return resultados
+
+        candidatos = sorted(
+            (fila_id for fila_id in puntajes if fila_id not in vistos),
+            key=lambda fila_id: (-puntajes[fila_id], fila_id)
+        )
+        for fila_id in candidatos:
+            fila = self._filas[fila_id]
+            if self._cumple(fila, filtros):
+                resultados.append({**fila, "relevancia": round(puntajes[fila_id] / len(consulta), 4)})
+                if len(resultados) >= limit:
+                    break
+        return resultados
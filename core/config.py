@@ -1,5 +1,4 @@
 from pydantic_settings import BaseSettings
-from pydantic import PostgresDsn
 from typing import List, Optional
 import secrets
 import json
@@ -19,12 +18,29 @@ class Settings(BaseSettings):
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
 
     # Database
-    DATABASE_URL: Optional[PostgresDsn] = None
+    DATABASE_URL: Optional[str] = None  # Cualquier URL de SQLAlchemy (incluye socket unix)
     SQLALCHEMY_DATABASE_URL: Optional[str] = None
     MONGODB_URL_DATABASE: Optional[str] = None
     MONGO_URI_APIKEYS: Optional[str] = None
-    DB_POOL_MIN: int = 1
-    DB_POOL_MAX: int = 20
+    DB_POOL_MIN: int = 10
+    DB_POOL_MAX: int = 30
+    DB_POOL_TIMEOUT: float = 5.0  # segundos esperando una conexión libre antes de fallar
+
+    # Caché de catálogo de productos (en proceso)
+    PRODUCTOS_CACHE_TTL: float = 60.0           # vigencia máxima de una entrada, en segundos
+    PRODUCTOS_CACHE_MAX_ITEMS: int = 10000      # productos individuales (LRU)
+    PRODUCTOS_CACHE_VENTANA_STOCK: float = 2.0  # segundos que se tolera stock desactualizado tras una venta
+
+    # Stock bajo (GET /productos/stock-bajo y canal WebSocket "stock_bajo")
+    STOCK_BAJO_UMBRAL: int = 10         # stock < umbral se considera bajo (igual que vista_stock_bajo)
+    STOCK_BAJO_DEBOUNCE: float = 2.0    # segundos que se agrupan los cruces antes de publicarlos
+    STOCK_BAJO_COOLDOWN: float = 30.0   # mínimo entre dos avisos del mismo producto
+    STOCK_BAJO_RESYNC: float = 60.0     # recarga desde la base (cambios de otros workers); 0 = nunca
+
+    # Ledger de movimientos (POST /movimientos, GET /movimientos/stock)
+    MOVIMIENTOS_MAX_LOTE: int = 10000               # movimientos por request
+    MOVIMIENTOS_SNAPSHOT_INTERVALO: float = 3600.0  # segundos entre snapshots de stock; 0 = solo manual
+    MOVIMIENTOS_SNAPSHOT_MARGEN: float = 60.0       # el corte queda este margen atrás (transacciones en curso)
 
     # WebSocket
     WS_HEARTBEAT_INTERVAL: int = 25
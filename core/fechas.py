@@ -0,0 +1,13 @@
+# core/fechas.py
+"""
+Fechas como parámetros de consultas sobre columnas timestamptz (movimientos,
+snapshots_stock, pedidos_proveedores).
+"""
+from datetime import datetime, timezone
+
+
+def a_utc(fecha: datetime) -> datetime:
+    """Fecha con zona horaria: una fecha sin zona (query string, cursor) se toma como UTC"""
+    if fecha.tzinfo is None:
+        return fecha.replace(tzinfo=timezone.utc)
+    return fecha
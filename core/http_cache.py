@@ -0,0 +1,194 @@
+# core/http_cache.py
+"""
+Validadores HTTP (ETag / If-None-Match y Cache-Control) para las rutas de lectura.
+
+Cada recurso ("productos", "categorias", "proveedores", "ventas") tiene un
+contador de versión en la caché compartida. Las escrituras lo incrementan al
+hacer commit (`marcar_modificado_al_confirmar`) y el ETag de una ruta se arma
+con las versiones de los recursos que lee, así que:
+
+- un If-None-Match vigente se responde 304 en la dependencia, antes de abrir la
+  sesión de base de datos y sin serializar ni hashear la respuesta;
+- todos los workers emiten el mismo ETag (con Redis; memory:// es por proceso).
+
+El incremento corre en una tarea tras el commit: el mismo worker espera las
+tareas en curso antes de leer versiones; otro worker puede ver la versión
+anterior unos milisegundos.
+
+Si la ruta lee de una caché con ventana de consistencia (catálogo, dashboard),
+`estabilizacion` evita emitir ETag durante esos segundos después de una
+escritura: si no, el ETag nuevo quedaría asociado a datos previos a la escritura
+y los clientes recibirían 304 sobre ellos.
+
+Con réplicas de lectura configuradas pasa lo mismo con el lag de replicación:
+la versión se incrementa al hacer commit en el primario, pero el cuerpo sale de
+una réplica que puede no tener la escritura todavía. Por eso, salvo que el
+cliente esté fijado al primario (cookie/header de read-your-writes), tampoco se
+emite ETag durante READ_YOUR_WRITES_SECONDS después de una escritura.
+
+Uso:
+
+    @router.get("/", dependencies=[validar_cache("productos", estabilizacion=2)])
+"""
+import asyncio
+import logging
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from fastapi import Depends, HTTPException, Request, Response, status
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from ..database.Redis_Connection import CacheCompartida, cache_compartida
+from ..database.session import READ_YOUR_WRITES_SECONDS, debe_leer_primario, replicas
+
+logger = logging.getLogger(__name__)
+
+_CLAVE_PENDIENTES = "http_cache_recursos"
+_NAMESPACE = "versiones"
+
+
+def etag_coincide(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match admite una lista de ETags, débiles (W/) o '*'"""
+    if not if_none_match:
+        return False
+    candidatos = [valor.strip() for valor in if_none_match.split(",")]
+    return "*" in candidatos or any(c.removeprefix("W/") == etag for c in candidatos)
+
+
+class VersionesRecursos:
+    """Contadores de versión por recurso y fecha de la última escritura"""
+
+    def __init__(self, cache: CacheCompartida):
+        self.cache = cache
+        # Incrementos programados en este proceso que todavía no llegaron a la caché
+        self._en_vuelo: Dict[str, asyncio.Task] = {}
+
+    def _claves(self, recurso: str) -> Tuple[str, str]:
+        return self.cache.clave(_NAMESPACE, recurso), self.cache.clave(_NAMESPACE, f"{recurso}:fecha")
+
+    async def _inicializar(self, redis, recursos: Iterable[str]):
+        # Un contador nuevo arranca en el reloj en ms: si la caché pierde la clave
+        # (reinicio, memory://) no se repiten versiones de ETags ya emitidos
+        async with redis.pipeline(transaction=False) as pipe:
+            for recurso in recursos:
+                pipe.set(self._claves(recurso)[0], int(time.time() * 1000), nx=True)
+            await pipe.execute()
+
+    async def obtener(self, recursos: Tuple[str, ...]) -> Optional[List[Tuple[int, float]]]:
+        """(versión, fecha de la última escritura) por recurso, o None si la caché no responde"""
+        pendientes = [self._en_vuelo[r] for r in recursos if r in self._en_vuelo]
+        if pendientes:
+            await asyncio.gather(*pendientes, return_exceptions=True)
+        claves = [clave for recurso in recursos for clave in self._claves(recurso)]
+        redis = self.cache.manager.redis
+        try:
+            crudos = await redis.mget(claves)
+            faltantes = [r for r, version in zip(recursos, crudos[0::2]) if version is None]
+            if faltantes:
+                await self._inicializar(redis, faltantes)
+                crudos = await redis.mget(claves)
+            return [(int(version), float(fecha or 0)) for version, fecha in zip(crudos[0::2], crudos[1::2])]
+        except Exception as e:
+            logger.warning(f"⚠️ Caché no disponible (versiones {', '.join(recursos)}): {e}")
+            return None
+
+    async def incrementar(self, recursos: Iterable[str]):
+        redis = self.cache.manager.redis
+        ahora = time.time()
+        try:
+            async with redis.pipeline(transaction=False) as pipe:
+                for recurso in recursos:
+                    version, fecha = self._claves(recurso)
+                    pipe.set(version, int(ahora * 1000), nx=True)
+                    pipe.incr(version)
+                    pipe.set(fecha, ahora)
+                await pipe.execute()
+        except Exception as e:
+            logger.warning(f"⚠️ Caché no disponible (incrementar versiones {', '.join(recursos)}): {e}")
+
+    def programar(self, recursos: Iterable[str]):
+        """Incrementa en una tarea (los eventos de commit son síncronos)"""
+        recursos = sorted(recursos)
+        try:
+            tarea = asyncio.get_running_loop().create_task(self.incrementar(recursos))
+        except RuntimeError:
+            logger.warning(f"⚠️ Sin event loop: no se incrementan las versiones de {', '.join(recursos)}")
+            return
+        for recurso in recursos:
+            self._en_vuelo[recurso] = tarea
+
+        def _terminar(t: asyncio.Task):
+            for recurso in recursos:
+                if self._en_vuelo.get(recurso) is t:
+                    del self._en_vuelo[recurso]
+        tarea.add_done_callback(_terminar)
+
+
+versiones_recursos = VersionesRecursos(cache_compartida)
+
+
+def marcar_modificado_al_confirmar(session, *recursos: str):
+    """Registra en la sesión que `recursos` cambian cuando la transacción hace commit"""
+    session.info.setdefault(_CLAVE_PENDIENTES, set()).update(recursos)
+
+
+@event.listens_for(Session, "after_commit")
+def _incrementar_versiones(session):
+    recursos = session.info.pop(_CLAVE_PENDIENTES, None)
+    if recursos:
+        versiones_recursos.programar(recursos)
+
+
+@event.listens_for(Session, "after_rollback")
+def _descartar_versiones(session):
+    session.info.pop(_CLAVE_PENDIENTES, None)
+
+
+def _ventana_replicas(request: Request) -> float:
+    """Segundos tras una escritura en que la respuesta puede salir de una réplica atrasada"""
+    if replicas.replicas and not debe_leer_primario(request):
+        return READ_YOUR_WRITES_SECONDS
+    return 0.0
+
+
+def validar_cache(
+    *recursos: str,
+    cache_control: str = "no-cache",
+    estabilizacion: float = 0.0,
+    variante: Optional[Callable[[], str]] = None,
+):
+    """
+    Dependencia para rutas GET: responde 304 si If-None-Match coincide con las
+    versiones actuales de `recursos` y, si no, deja ETag y Cache-Control para la
+    respuesta (los aplica `aplicar_validadores`). `variante` agrega al ETag lo que
+    cambia la respuesta sin pasar por una escritura (ej. la fecha de hoy).
+    """
+    async def dependencia(request: Request):
+        request.state.validadores_http = {"Cache-Control": cache_control}
+        versiones = await versiones_recursos.obtener(recursos)
+        if versiones is None:
+            return
+        ventana = max(estabilizacion, _ventana_replicas(request))
+        if ventana and any(time.time() - fecha < ventana for _, fecha in versiones):
+            return
+        partes = [str(version) for version, _ in versiones]
+        if variante is not None:
+            partes.append(variante())
+        etag = f'"{"-".join(partes)}"'
+        if etag_coincide(request.headers.get("if-none-match"), etag):
+            raise HTTPException(
+                status_code=status.HTTP_304_NOT_MODIFIED,
+                headers={"ETag": etag, "Cache-Control": cache_control}
+            )
+        request.state.validadores_http["ETag"] = etag
+    return Depends(dependencia)
+
+
+def aplicar_validadores(request: Request, response: Response):
+    """Agrega a una respuesta 2xx los validadores que dejó `validar_cache`"""
+    validadores = getattr(request.state, "validadores_http", None)
+    if validadores and 200 <= response.status_code < 300:
+        for header, valor in validadores.items():
+            if header not in response.headers:
+                response.headers[header] = valor
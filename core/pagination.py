@@ -0,0 +1,50 @@
+# core/pagination.py
+"""
+Paginación por cursor (keyset) compartida por los listados.
+
+El cursor es opaco para el cliente: un JSON con los valores de la clave de
+ordenamiento de la última fila de la página, codificado en base64 url-safe.
+"""
+import base64
+import json
+from datetime import datetime
+from typing import Any, List, Optional, Sequence
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+class CursorInvalidoError(ValueError):
+    """El cursor recibido no se pudo decodificar"""
+
+
+def encode_cursor(*values: Any) -> str:
+    """Codifica los valores de la clave de ordenamiento en un cursor opaco"""
+    payload = [v.isoformat() if isinstance(v, datetime) else v for v in values]
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> List[Any]:
+    """Decodifica un cursor y valida que tenga `size` valores"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, UnicodeError) as e:
+        raise CursorInvalidoError(f"Cursor inválido: {cursor}") from e
+
+    if not isinstance(values, list) or len(values) != size:
+        raise CursorInvalidoError(f"Cursor inválido: {cursor}")
+    return values
+
+
+def next_cursor(rows: Sequence[Any], limit: int, *keys: str) -> Optional[str]:
+    """
+    Cursor de la siguiente página, o None si la página no se llenó.
+    `rows` pueden ser diccionarios u objetos; `keys` son los campos de la clave.
+    """
+    if not rows or len(rows) < limit:
+        return None
+    last = rows[-1]
+    if isinstance(last, dict):
+        return encode_cursor(*(last[k] for k in keys))
+    return encode_cursor(*(getattr(last, k) for k in keys))
@@ -0,0 +1,446 @@
+# database/Redis_Connection.py
+"""
+Caché compartida entre workers (Redis).
+
+REDIS_URL elige el backend:
+- redis://host:6379/0  -> Redis real (redis.asyncio), compartido por todos los workers
+- fakeredis://         -> fakeredis en proceso (pruebas sin servidor)
+- memory://            -> diccionario en proceso con la misma API (default, sin dependencias)
+
+Si Redis no responde, la caché falla "abierta": se loguea y se trata como un
+miss, el request sigue yendo a la base de datos.
+
+Uso en repositorios:
+
+    @cacheado("proveedores", ttl=120, ttl_negativo=10)
+    async def obtener_resumen(self, proveedor_id: int) -> Optional[dict]:
+        ...
+
+    await cache_compartida.invalidar("proveedores", "proveedor_id=5")
+"""
+import asyncio
+import fnmatch
+import functools
+import hashlib
+import inspect
+import json
+import logging
+import os
+import time
+import uuid
+from datetime import date, datetime
+from decimal import Decimal
+from enum import Enum
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+REDIS_URL = os.getenv("REDIS_URL", "memory://")
+# Prefijo de todas las claves, para compartir el servidor con otras apps
+REDIS_PREFIJO = os.getenv("REDIS_PREFIJO", "inventario")
+# Milisegundos que un worker retiene el lock de carga de una clave (single-flight)
+REDIS_LOCK_MS = int(os.getenv("REDIS_LOCK_MS", "5000"))
+
+# Valor guardado para "no existe" (caché negativa)
+_NEGATIVO = "__none__"
+_FALTANTE = object()
+
+
+class MemoriaBackend:
+    """
+    Subconjunto de la API de redis.asyncio sobre un dict del proceso.
+    Sirve para desarrollo y pruebas; no se comparte entre workers.
+    """
+
+    def __init__(self):
+        self._datos: Dict[str, tuple] = {}  # clave -> (valor, expira | None)
+
+    def _vigente(self, clave: str) -> Optional[str]:
+        entrada = self._datos.get(clave)
+        if entrada is None:
+            return None
+        valor, expira = entrada
+        if expira is not None and expira <= time.monotonic():
+            del self._datos[clave]
+            return None
+        return valor
+
+    async def ping(self) -> bool:
+        return True
+
+    async def get(self, clave: str) -> Optional[str]:
+        return self._vigente(clave)
+
+    async def mget(self, claves: List[str]) -> List[Optional[str]]:
+        return [self._vigente(clave) for clave in claves]
+
+    async def set(self, clave: str, valor, ex: Optional[float] = None, px: Optional[int] = None, nx: bool = False):
+        if nx and self._vigente(clave) is not None:
+            return None
+        segundos = px / 1000 if px is not None else ex
+        self._datos[clave] = (str(valor), time.monotonic() + segundos if segundos else None)
+        return True
+
+    async def delete(self, *claves: str) -> int:
+        return sum(1 for clave in claves if self._datos.pop(clave, None) is not None)
+
+    async def incr(self, clave: str) -> int:
+        valor = int(self._vigente(clave) or 0) + 1
+        expira = self._datos.get(clave, (None, None))[1]
+        self._datos[clave] = (str(valor), expira)
+        return valor
+
+    async def scan_iter(self, match: str = "*", count: Optional[int] = None):
+        for clave in list(self._datos):
+            if fnmatch.fnmatchcase(clave, match) and self._vigente(clave) is not None:
+                yield clave
+
+    def pipeline(self, transaction: bool = False) -> "_MemoriaPipeline":
+        return _MemoriaPipeline(self)
+
+    async def aclose(self):
+        self._datos.clear()
+
+
+class _MemoriaPipeline:
+    """Encola comandos y los ejecuta juntos, como redis.asyncio.client.Pipeline"""
+
+    def __init__(self, backend: MemoriaBackend):
+        self._backend = backend
+        self._comandos: List[tuple] = []
+
+    def __getattr__(self, nombre: str):
+        metodo = getattr(self._backend, nombre)
+
+        def encolar(*args, **kwargs):
+            self._comandos.append((metodo, args, kwargs))
+            return self
+        return encolar
+
+    async def execute(self) -> List[Any]:
+        comandos, self._comandos = self._comandos, []
+        return [await metodo(*args, **kwargs) for metodo, args, kwargs in comandos]
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        self._comandos = []
+
+
+def _crear_cliente(url: str):
+    if url.startswith("memory://"):
+        return MemoriaBackend()
+    if url.startswith("fakeredis://"):
+        from fakeredis import aioredis as fakeredis
+        return fakeredis.FakeRedis(decode_responses=True)
+    import redis.asyncio as redis
+    return redis.from_url(url, decode_responses=True)
+
+
+class RedisManager:
+    def __init__(self, url: str = REDIS_URL):
+        self.url = url
+        self._redis = None
+
+    @property
+    def redis(self):
+        """Cliente (se crea al primer uso; redis.asyncio conecta de forma perezosa)"""
+        if self._redis is None:
+            self._redis = _crear_cliente(self.url)
+        return self._redis
+
+    async def connect(self):
+        """Verifica la conexión al iniciar. Si falla, la app sigue sin caché."""
+        try:
+            await self.redis.ping()
+            logger.info(f"🚀 Caché compartida lista ({self.url.split('://')[0]})")
+        except Exception as e:
+            logger.error(f"❌ Error conectando a Redis, la caché queda deshabilitada hasta que responda: {e}")
+
+    async def close(self):
+        if self._redis is not None:
+            await self._redis.aclose()
+            self._redis = None
+            logger.info("🔌 Conexión a Redis cerrada")
+
+
+# Singleton para usar en toda la app
+redis_manager = RedisManager()
+
+
+def _json_default(valor):
+    if isinstance(valor, (datetime, date)):
+        return valor.isoformat()
+    if isinstance(valor, Decimal):
+        return float(valor)
+    if isinstance(valor, Enum):
+        return valor.value
+    raise TypeError(f"{type(valor).__name__} no es serializable para la caché")
+
+
+class CacheCompartida:
+    """
+    Operaciones de caché con claves por namespace ("<prefijo>:<namespace>:<clave>")
+    y valores JSON. Los errores de Redis se tratan como miss.
+    """
+
+    def __init__(self, manager: RedisManager, prefijo: str = REDIS_PREFIJO, lock_ms: int = REDIS_LOCK_MS):
+        self.manager = manager
+        self.prefijo = prefijo
+        self.lock_ms = lock_ms
+        # Cargas en curso en este proceso: clave -> Future (single-flight local)
+        self._en_vuelo: Dict[str, asyncio.Future] = {}
+
+    def clave(self, namespace: str, clave: str) -> str:
+        return f"{self.prefijo}:{namespace}:{clave}"
+
+    @staticmethod
+    def _decodificar(crudo: Optional[str]):
+        if crudo is None:
+            return _FALTANTE
+        if crudo == _NEGATIVO:
+            return None
+        return json.loads(crudo)
+
+    @staticmethod
+    def _codificar(valor) -> str:
+        return _NEGATIVO if valor is None else json.dumps(valor, default=_json_default)
+
+    # ---------- operaciones básicas ----------
+
+    async def get(self, namespace: str, clave: str, default=None):
+        valor = await self._get(self.clave(namespace, clave))
+        return default if valor is _FALTANTE else valor
+
+    async def _get(self, clave_completa: str):
+        try:
+            return self._decodificar(await self.manager.redis.get(clave_completa))
+        except Exception as e:
+            logger.warning(f"⚠️ Caché no disponible (get {clave_completa}): {e}")
+            return _FALTANTE
+
+    async def set(self, namespace: str, clave: str, valor, ttl: float):
+        """Guarda `valor` (None = caché negativa) por `ttl` segundos"""
+        try:
+            await self.manager.redis.set(self.clave(namespace, clave), self._codificar(valor), px=int(ttl * 1000))
+        except Exception as e:
+            logger.warning(f"⚠️ Caché no disponible (set {namespace}:{clave}): {e}")
+
+    async def mget(self, namespace: str, claves: Iterable[str]) -> Dict[str, Any]:
+        """Un solo round-trip para varias claves. Solo retorna las que están en caché."""
+        claves = list(claves)
+        if not claves:
+            return {}
+        try:
+            crudos = await self.manager.redis.mget([self.clave(namespace, c) for c in claves])
+        except Exception as e:
+            logger.warning(f"⚠️ Caché no disponible (mget {namespace}): {e}")
+            return {}
+        encontrados = {}
+        for clave, crudo in zip(claves, crudos):
+            valor = self._decodificar(crudo)
+            if valor is not _FALTANTE:
+                encontrados[clave] = valor
+        return encontrados
+
+    async def set_many(self, namespace: str, valores: Dict[str, Any], ttl: float):
+        """Guarda varias claves en un pipeline (un round-trip)"""
+        if not valores:
+            return
+        try:
+            async with self.manager.redis.pipeline(transaction=False) as pipe:
+                for clave, valor in valores.items():
+                    pipe.set(self.clave(namespace, clave), self._codificar(valor), px=int(ttl * 1000))
+                await pipe.execute()
+        except Exception as e:
+            logger.warning(f"⚠️ Caché no disponible (set_many {namespace}): {e}")
+
+    async def invalidar(self, namespace: str, *claves: str):
+        if not claves:
+            return
+        try:
+            await self.manager.redis.delete(*[self.clave(namespace, c) for c in claves])
+        except Exception as e:
+            logger.warning(f"⚠️ Caché no disponible (invalidar {namespace}): {e}")
+
+    async def invalidar_namespace(self, namespace: str) -> int:
+        """Borra todas las claves del namespace (SCAN, no bloquea el servidor como KEYS)"""
+        borradas = 0
+        try:
+            lote = []
+            async for clave in self.manager.redis.scan_iter(match=self.clave(namespace, "*"), count=500):
+                lote.append(clave)
+                if len(lote) >= 500:
+                    borradas += await self.manager.redis.delete(*lote)
+                    lote = []
+            if lote:
+                borradas += await self.manager.redis.delete(*lote)
+        except Exception as e:
+            logger.warning(f"⚠️ Caché no disponible (invalidar_namespace {namespace}): {e}")
+        return borradas
+
+    # ---------- lectura con carga ----------
+
+    async def obtener_o_cargar(
+        self,
+        namespace: str,
+        clave: str,
+        cargar: Callable[[], Awaitable[Any]],
+        ttl: float,
+        ttl_negativo: Optional[float] = None,
+    ):
+        """
+        Retorna el valor en caché o lo carga con `cargar()`. Ante un miss, solo un
+        request por clave va a la base (single-flight): dentro del proceso se
+        comparte la misma carga y entre workers se usa un lock SET NX con expiración.
+        Un resultado None se cachea `ttl_negativo` segundos (sin valor, no se cachea).
+        """
+        clave_completa = self.clave(namespace, clave)
+        valor = await self._get(clave_completa)
+        if valor is not _FALTANTE:
+            return valor
+
+        en_vuelo = self._en_vuelo.get(clave_completa)
+        if en_vuelo is not None:
+            return await asyncio.shield(en_vuelo)
+
+        futuro = asyncio.get_running_loop().create_future()
+        self._en_vuelo[clave_completa] = futuro
+        try:
+            valor = await self._cargar_con_lock(clave_completa, cargar, ttl, ttl_negativo)
+            futuro.set_result(valor)
+            return valor
+        except BaseException as e:
+            futuro.set_exception(e)
+            futuro.exception()  # marcar como recuperada si nadie más la esperaba
+            raise
+        finally:
+            del self._en_vuelo[clave_completa]
+
+    async def _cargar_con_lock(self, clave_completa: str, cargar, ttl: float, ttl_negativo: Optional[float]):
+        redis = self.manager.redis
+        clave_lock = f"{clave_completa}:lock"
+        try:
+            obtenido = await redis.set(clave_lock, uuid.uuid4().hex, px=self.lock_ms, nx=True)
+        except Exception as e:
+            logger.warning(f"⚠️ Caché no disponible (lock {clave_completa}): {e}")
+            return await cargar()
+
+        if not obtenido:
+            # Otro worker está cargando: esperar su resultado hasta que expire su lock
+            limite = time.monotonic() + self.lock_ms / 1000
+            while time.monotonic() < limite:
+                await asyncio.sleep(0.05)
+                valor = await self._get(clave_completa)
+                if valor is not _FALTANTE:
+                    return valor
+            # El otro worker no terminó a tiempo: cargar sin esperar más
+
+        try:
+            valor = await cargar()
+            if valor is not None or ttl_negativo:
+                try:
+                    await redis.set(
+                        clave_completa, self._codificar(valor),
+                        px=int((ttl if valor is not None else ttl_negativo) * 1000)
+                    )
+                except Exception as e:
+                    logger.warning(f"⚠️ Caché no disponible (set {clave_completa}): {e}")
+            return valor
+        finally:
+            if obtenido:
+                try:
+                    await redis.delete(clave_lock)
+                except Exception:
+                    pass
+
+    async def obtener_muchos_o_cargar(
+        self,
+        namespace: str,
+        claves: Iterable[str],
+        cargar_faltantes: Callable[[List[str]], Awaitable[Dict[str, Any]]],
+        ttl: float,
+        ttl_negativo: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        """
+        Búsqueda masiva: un MGET, una sola carga para todas las claves faltantes
+        y un pipeline para guardarlas. Las claves que la carga no devuelve se
+        cachean como negativas si hay `ttl_negativo`.
+        """
+        claves = list(dict.fromkeys(claves))
+        encontrados = await self.mget(namespace, claves)
+        faltantes = [clave for clave in claves if clave not in encontrados]
+        if not faltantes:
+            return encontrados
+
+        cargados = await cargar_faltantes(faltantes)
+        await self.set_many(namespace, {c: v for c, v in cargados.items() if v is not None}, ttl)
+        if ttl_negativo:
+            await self.set_many(namespace, {c: None for c in faltantes if cargados.get(c) is None}, ttl_negativo)
+        encontrados.update(cargados)
+        return encontrados
+
+
+cache_compartida = CacheCompartida(redis_manager)
+
+
+def _clave_por_argumentos(firma: inspect.Signature, args, kwargs) -> str:
+    """Clave estable a partir de los argumentos (sin self/cls)"""
+    ligados = firma.bind(*args, **kwargs)
+    ligados.apply_defaults()
+    partes = []
+    for nombre, valor in ligados.arguments.items():
+        if nombre in ("self", "cls"):
+            continue
+        if isinstance(valor, Enum):
+            valor = valor.value
+        partes.append(f"{nombre}={valor}")
+    clave = ",".join(partes)
+    # Claves largas (listas, filtros) se resumen para no inflar la memoria de Redis
+    return clave if len(clave) <= 200 else hashlib.sha1(clave.encode()).hexdigest()
+
+
+def cacheado(
+    namespace: str,
+    ttl: float = 60,
+    ttl_negativo: Optional[float] = None,
+    clave: Optional[Callable[..., str]] = None,
+    serializar: Optional[Callable[[Any], Any]] = None,
+    deserializar: Optional[Callable[[Any], Any]] = None,
+    cache: Optional[CacheCompartida] = None,
+):
+    """
+    Cachea el resultado de un método async en la caché compartida.
+
+    - `clave(*args, **kwargs)` arma la clave; por defecto se usan los argumentos.
+    - `serializar`/`deserializar` convierten entidades a algo JSON (ej. dataclasses.asdict).
+    - `ttl_negativo` cachea también los None ("no existe") por menos tiempo.
+
+    El método decorado expone `.invalidar(*args, **kwargs)` para borrar la entrada
+    de esos argumentos y `.namespace`.
+    """
+    def decorador(func):
+        firma = inspect.signature(func)
+
+        def armar_clave(args, kwargs) -> str:
+            return clave(*args, **kwargs) if clave else _clave_por_argumentos(firma, args, kwargs)
+
+        @functools.wraps(func)
+        async def envoltura(*args, **kwargs):
+            destino = cache or cache_compartida
+
+            async def cargar():
+                resultado = await func(*args, **kwargs)
+                return serializar(resultado) if serializar and resultado is not None else resultado
+
+            valor = await destino.obtener_o_cargar(namespace, armar_clave(args, kwargs), cargar, ttl, ttl_negativo)
+            return deserializar(valor) if deserializar and valor is not None else valor
+
+        async def invalidar(*args, **kwargs):
+            await (cache or cache_compartida).invalidar(namespace, armar_clave(args, kwargs))
+
+        envoltura.invalidar = invalidar
+        envoltura.namespace = namespace
+        return envoltura
+    return decorador
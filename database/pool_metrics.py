@@ -0,0 +1,153 @@
+# database/pool_metrics.py
+"""
+Telemetría de los pools de conexiones de SQLAlchemy.
+
+Cada engine usa `PoolInstrumentado`, que mide cuánto tarda cada checkout
+(espera en la cola + conexión nueva + pre-ping) y cuenta los timeouts. Los
+gauges (en uso, overflow, disponibles) se leen del pool al momento de
+consultar, así que no cuestan nada en el camino de cada request.
+"""
+import threading
+import time
+from bisect import bisect_left
+from typing import Dict, List, Optional
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+# Límites superiores (ms) de los buckets del histograma de checkout
+BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+class HistogramaLatencia:
+    """Histograma acumulativo de latencias con buckets fijos (estilo Prometheus)"""
+
+    def __init__(self, buckets=BUCKETS_MS):
+        self.buckets = buckets
+        self.conteos = [0] * (len(buckets) + 1)  # el último es +Inf
+        self.total = 0
+        self.suma_ms = 0.0
+        self.max_ms = 0.0
+
+    def observar(self, ms: float):
+        self.conteos[bisect_left(self.buckets, ms)] += 1
+        self.total += 1
+        self.suma_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+
+    def percentil(self, p: float) -> Optional[float]:
+        """Estimación del percentil: límite superior del bucket donde cae"""
+        if not self.total:
+            return None
+        objetivo = p * self.total
+        acumulado = 0
+        for limite, conteo in zip(self.buckets, self.conteos):
+            acumulado += conteo
+            if acumulado >= objetivo:
+                return float(limite)
+        return self.max_ms
+
+    def snapshot(self) -> dict:
+        acumulado = 0
+        buckets = {}
+        for limite, conteo in zip(self.buckets, self.conteos):
+            acumulado += conteo
+            buckets[f"le_{limite}ms"] = acumulado
+        buckets["le_inf"] = self.total
+        return {
+            "buckets": buckets,
+            "count": self.total,
+            "sum_ms": round(self.suma_ms, 3),
+            "max_ms": round(self.max_ms, 3),
+            "p50_ms": self.percentil(0.50),
+            "p95_ms": self.percentil(0.95),
+            "p99_ms": self.percentil(0.99),
+        }
+
+
+class PoolTelemetria:
+    """Contadores de un pool; un objeto por engine"""
+
+    def __init__(self, nombre: str):
+        self.nombre = nombre
+        self.histograma = HistogramaLatencia()
+        self.timeouts = 0
+        self.ultimo_timeout: Optional[float] = None
+        self.pico_en_uso = 0
+        self.pico_overflow = 0
+        self._lock = threading.Lock()
+
+    def registrar_checkout(self, ms: float, pool: "PoolInstrumentado"):
+        with self._lock:
+            self.histograma.observar(ms)
+            self.pico_en_uso = max(self.pico_en_uso, pool.checkedout())
+            self.pico_overflow = max(self.pico_overflow, pool.overflow())
+
+    def registrar_timeout(self, ms: float):
+        with self._lock:
+            self.histograma.observar(ms)
+            self.timeouts += 1
+            self.ultimo_timeout = time.time()
+
+    def snapshot(self, pool: Optional["PoolInstrumentado"]) -> dict:
+        with self._lock:
+            estado = {
+                "pool": self.nombre,
+                "checkout_latency": self.histograma.snapshot(),
+                "timeouts": self.timeouts,
+                "ultimo_timeout": self.ultimo_timeout,
+                "pico_en_uso": self.pico_en_uso,
+                "pico_overflow": self.pico_overflow,
+            }
+        if pool is not None:
+            estado.update({
+                "tamano": pool.size(),
+                "max_overflow": pool._max_overflow,
+                "timeout_s": pool.timeout(),
+                "en_uso": pool.checkedout(),
+                "disponibles": pool.checkedin(),
+                # overflow() es negativo mientras el pool base no se ha llenado
+                "overflow_en_uso": max(0, pool.overflow()),
+            })
+        return estado
+
+
+class PoolInstrumentado(AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool que reporta latencia de checkout y timeouts a su PoolTelemetria"""
+
+    telemetria: Optional[PoolTelemetria] = None
+
+    def connect(self):
+        inicio = time.perf_counter()
+        try:
+            conexion = super().connect()
+        except exc.TimeoutError:
+            if self.telemetria is not None:
+                self.telemetria.registrar_timeout((time.perf_counter() - inicio) * 1000)
+            raise
+        if self.telemetria is not None:
+            self.telemetria.registrar_checkout((time.perf_counter() - inicio) * 1000, self)
+        return conexion
+
+    def recreate(self):
+        # engine.dispose() recrea el pool: conservar la telemetría acumulada
+        nuevo = super().recreate()
+        nuevo.telemetria = self.telemetria
+        return nuevo
+
+
+# Telemetría de todos los engines instrumentados, por nombre ("primario", "replica-1", ...)
+_pools: Dict[str, tuple] = {}
+
+
+def instrumentar(engine, nombre: str) -> PoolTelemetria:
+    """Asocia una PoolTelemetria al pool del engine (creado con poolclass=PoolInstrumentado)"""
+    telemetria = PoolTelemetria(nombre)
+    engine.pool.telemetria = telemetria
+    _pools[nombre] = (engine, telemetria)
+    return telemetria
+
+
+def estado_pools() -> List[dict]:
+    """Snapshot de todos los pools instrumentados"""
+    return [telemetria.snapshot(engine.pool) for engine, telemetria in _pools.values()]
@@ -62,6 +62,24 @@ CREATE TABLE Movimientos (
     usuario_id INT REFERENCES Usuarios(id) ON DELETE SET NULL
 );
 
+-- Tabla: Snapshots_Stock (stock por producto a cada corte; GET /movimientos/stock = snapshot + delta de Movimientos)
+CREATE TABLE Snapshots_Stock (
+    id SERIAL PRIMARY KEY,
+    producto_id INT NOT NULL REFERENCES Productos(id) ON DELETE CASCADE,
+    fecha TIMESTAMPTZ NOT NULL,
+    stock INT NOT NULL
+);
+
+-- Tabla: Historial_Precios (una fila por cambio de precio; la escriben PATCH /productos/precios y la edición individual)
+CREATE TABLE Historial_Precios (
+    id SERIAL PRIMARY KEY,
+    producto_id INT NOT NULL REFERENCES Productos(id) ON DELETE CASCADE,
+    precio_anterior DECIMAL(10,2) NOT NULL,
+    precio_nuevo DECIMAL(10,2) NOT NULL,
+    fecha_cambio TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP,
+    usuario_id INT REFERENCES Usuarios(id)
+);
+
 -- Tabla: Pedidos_Proveedores
 CREATE TABLE Pedidos_Proveedores (
     id SERIAL PRIMARY KEY,
@@ -98,6 +116,19 @@ CREATE TABLE Detalle_Devoluciones (
     precio DECIMAL(10,2) NOT NULL CHECK (precio >= 0)
 );
 
+-- Tabla: Ventas_Resumen_Diario (rollup para /ventas/estadisticas/totales)
+-- Se mantiene incrementalmente desde la API al crear/eliminar ventas y al registrar devoluciones.
+-- Backfill: python -m <paquete>.Ventas.infrastructure.cli reconstruir-estadisticas
+CREATE TABLE Ventas_Resumen_Diario (
+    fecha DATE PRIMARY KEY,
+    cantidad_ventas INT NOT NULL DEFAULT 0,
+    ingresos DECIMAL(14,2) NOT NULL DEFAULT 0,
+    unidades INT NOT NULL DEFAULT 0,
+    cantidad_devoluciones INT NOT NULL DEFAULT 0,
+    monto_devuelto DECIMAL(14,2) NOT NULL DEFAULT 0,
+    unidades_devueltas INT NOT NULL DEFAULT 0
+);
+
 -- Tabla: Auditoria
 CREATE TABLE Auditoria (
     id SERIAL PRIMARY KEY,
@@ -129,42 +160,52 @@ INSERT INTO categorias (nombre) VALUES
 CREATE INDEX idx_productos_categoria ON Productos(categoria_id);
 CREATE INDEX idx_productos_proveedor ON Productos(proveedor_id);
 CREATE INDEX idx_ventas_fecha ON Ventas(fecha);
+CREATE INDEX idx_ventas_fecha_id ON Ventas(fecha DESC, id DESC); -- paginación por cursor
 CREATE INDEX idx_ventas_usuario ON Ventas(usuario_id);
 CREATE INDEX idx_detalle_ventas_venta ON Detalle_Ventas(venta_id);
 CREATE INDEX idx_detalle_ventas_producto ON Detalle_Ventas(producto_id);
+CREATE INDEX idx_devoluciones_venta ON Devoluciones(venta_id);
+CREATE INDEX idx_detalle_devoluciones_devolucion ON Detalle_Devoluciones(devolucion_id);
+CREATE INDEX idx_pedidos_proveedores_proveedor_fecha ON Pedidos_Proveedores(proveedor_id, fecha_pedido, id);
+CREATE INDEX idx_pedidos_proveedores_fecha ON Pedidos_Proveedores(fecha_pedido, id);
+CREATE INDEX idx_detalle_pedidos_proveedores_pedido ON Detalle_Pedidos_Proveedores(pedido_id);
 CREATE INDEX idx_movimientos_producto_fecha ON Movimientos(producto_id, fecha);
+CREATE INDEX idx_movimientos_fecha ON Movimientos(fecha);
+CREATE UNIQUE INDEX uq_snapshots_stock_producto_fecha ON Snapshots_Stock(producto_id, fecha);
+CREATE INDEX idx_snapshots_stock_fecha ON Snapshots_Stock(fecha);
+CREATE INDEX idx_historial_precios_producto_fecha ON Historial_Precios(producto_id, fecha_cambio, id);
 CREATE INDEX idx_auditoria_fecha ON Auditoria(fecha);
 CREATE INDEX idx_auditoria_tabla ON Auditoria(tabla_afectada);
 
-
--- Trigger para actualizar stock automáticamente
-CREATE OR REPLACE FUNCTION actualizar_stock()
-RETURNS TRIGGER AS $$
-BEGIN
-    IF TG_TABLE_NAME = 'detalle_ventas' THEN
-        UPDATE Productos 
-        SET stock = stock - NEW.cantidad 
-        WHERE id = NEW.producto_id;
-    ELSIF TG_TABLE_NAME = 'movimientos' AND NEW.tipo = 'entrada' THEN
-        UPDATE Productos 
-        SET stock = stock + NEW.cantidad 
-        WHERE id = NEW.producto_id;
-    ELSIF TG_TABLE_NAME = 'movimientos' AND NEW.tipo = 'salida' THEN
-        UPDATE Productos 
-        SET stock = stock - NEW.cantidad 
-        WHERE id = NEW.producto_id;
-    END IF;
-    RETURN NEW;
-END;
-$$ LANGUAGE plpgsql;
-
-CREATE TRIGGER tr_actualizar_stock_ventas
-    AFTER INSERT ON Detalle_Ventas
-    FOR EACH ROW EXECUTE FUNCTION actualizar_stock();
-
-CREATE TRIGGER tr_actualizar_stock_movimientos
-    AFTER INSERT ON Movimientos
-    FOR EACH ROW EXECUTE FUNCTION actualizar_stock();
+-- El nombre identifica al producto: clave del upsert de POST /productos/importar (ON CONFLICT (nombre)).
+-- En una base existente, eliminar/renombrar antes los duplicados o el índice no se crea.
+CREATE UNIQUE INDEX uq_productos_nombre ON Productos(nombre);
+-- Stock bajo (GET /productos/stock-bajo): la carga en memoria lee solo stock < umbral
+CREATE INDEX idx_productos_stock ON Productos(stock);
+
+-- Búsqueda por texto (GET /productos/buscar, /proveedores/buscar): full-text nativo, sin extensiones.
+-- Las expresiones deben coincidir con core/busqueda.py (expr_documento / expr_prefijo).
+-- fastupdate = off: las búsquedas no recorren la "pending list" de inserciones recientes.
+CREATE INDEX idx_productos_busqueda ON Productos USING gin ((
+    setweight(to_tsvector('simple', translate(nombre, 'ÁÉÍÓÚÜÑáéíóúüñ', 'AEIOUUNaeiouun')), 'A')
+    || setweight(to_tsvector('simple', translate(coalesce(descripcion, ''), 'ÁÉÍÓÚÜÑáéíóúüñ', 'AEIOUUNaeiouun')), 'B')
+)) WITH (fastupdate = off);
+CREATE INDEX idx_productos_nombre_prefijo ON Productos (lower(translate(nombre, 'ÁÉÍÓÚÜÑáéíóúüñ', 'AEIOUUNaeiouun')) COLLATE "C"); -- autocompletar
+CREATE INDEX idx_proveedores_busqueda ON Proveedores USING gin (
+    setweight(to_tsvector('simple', translate(nombre, 'ÁÉÍÓÚÜÑáéíóúüñ', 'AEIOUUNaeiouun')), 'A')
+) WITH (fastupdate = off);
+
+
+-- Sin triggers de stock: Productos.stock es la proyección del ledger Movimientos y se
+-- actualiza en la misma transacción que escribe el ledger, por lotes (POST /movimientos,
+-- reservar_stock en ventas, restaurar_stock en devoluciones, pedidos a proveedores).
+-- Un trigger en Detalle_Ventas o en Movimientos descontaría el stock dos veces, y el
+-- segundo descuento no tendría fila en el ledger (GET /movimientos/stock y los
+-- snapshots, derivados hacia atrás desde Productos.stock, se desviarían).
+-- En bases creadas con una versión anterior de este script:
+DROP TRIGGER IF EXISTS tr_actualizar_stock_ventas ON Detalle_Ventas;
+DROP TRIGGER IF EXISTS tr_actualizar_stock_movimientos ON Movimientos;
+DROP FUNCTION IF EXISTS actualizar_stock();
 
 
 
@@ -6,6 +6,8 @@ import traceback  # 👈 Importante para ver el error real
 from pathlib import Path
 from fastapi import FastAPI, Request # 👈 Añadido Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 import uvicorn
 from logging.config import dictConfig
 
@@ -22,10 +24,19 @@ os.environ["PYTHONPATH"] = str(ROOT_DIR)
 # IMPORTS LOCALES
 # =======================================================
 from .database.base import Base
+from .database.session import fijar_primario_tras_escritura, replicas
+from .core.http_cache import aplicar_validadores
+from .database.pool_metrics import estado_pools
+from .database.Redis_Connection import redis_manager
+from .database.session import async_session
 from .Login.routes import router as login_router
 from .categoria.presentation.routes.categoria_router import categoria_router
 from .proveedores.presentation.routes.proveedores_router import proveedores_router
+from .proveedores.presentation.routes.pedidos_router import pedidos_router
 from .productos.presentation.routes import router as productos_router
+from .productos.infrastructure.stock_bajo import stock_bajo
+from .movimientos.presentation.routes import router as movimientos_router
+from .movimientos.infrastructure.snapshots import snapshots_stock
 from .Ventas import router as ventas_router
 from .reportes.presentation.routes.routes_reportes_metricas import router as metricas_router
 
@@ -74,10 +85,14 @@ try:
     from observability_logs.infrastructure.mongodb.connection import mongodb_connection
     from observability_logs.infrastructure.mongodb.repository import MongoDBLogRepository
     from observability_logs.infrastructure.middleware import ObservabilityMiddleware
+    from observability_logs.infrastructure.batch_writer import BatchLogWriter
     from observability_logs.infrastructure.websocket import WebSocketPublisher
-    from observability_logs.application.service import ObservabilityLogService
+    from observability_logs.application.service import ObservabilityLogService, AsyncObservabilityLogService
     from observability_logs.application.alerts import SecurityAlertService
+    from observability_logs.application.sampling import LogSampler
+    from observability_logs.application.queries import LogQueryService, AsyncLogQueryService
     from observability_logs.presentation import logs_router, ws_router
+    from observability_logs.presentation.router import configure_query_service
     from observability_logs.config import ObservabilityConfig
 
     OBSERVABILITY_AVAILABLE = True
@@ -106,32 +121,119 @@ async def inspect_requests(request: Request, call_next):
     logger.debug(f"✅ Finalizado: {request.url.path} -> Status {response.status_code}")
     return response
 
+# =======================================================
+# READ-YOUR-WRITES (RÉPLICAS DE LECTURA)
+# =======================================================
+@app.middleware("http")
+async def read_your_writes(request: Request, call_next):
+    response = await call_next(request)
+    # Tras una escritura, las lecturas del cliente van al primario unos segundos
+    fijar_primario_tras_escritura(request, response)
+    return response
+
+# =======================================================
+# VALIDADORES HTTP (ETAG / CACHE-CONTROL)
+# =======================================================
+@app.middleware("http")
+async def validadores_http(request: Request, call_next):
+    response = await call_next(request)
+    # ETag y Cache-Control que dejó la dependencia validar_cache de la ruta
+    aplicar_validadores(request, response)
+    return response
+
 # =======================================================
 # OBSERVABILITY SETUP
 # =======================================================
 if OBSERVABILITY_AVAILABLE:
     try:
         config = ObservabilityConfig()
-        mongodb_connection.initialize(config)
-        log_repository = MongoDBLogRepository()
-        log_service = ObservabilityLogService(log_repository)
+        if config.mongodb_driver == "async":
+            # Motor: consultas y escrituras de logs sin bloquear el event loop
+            from observability_logs.infrastructure.mongodb.async_connection import async_mongodb_connection
+            from observability_logs.infrastructure.mongodb.async_repository import AsyncMongoDBLogRepository
+            log_connection = async_mongodb_connection
+            log_connection.initialize(config)
+            log_repository = AsyncMongoDBLogRepository()
+            log_service = AsyncObservabilityLogService(log_repository)
+        else:
+            log_connection = mongodb_connection
+            log_connection.initialize(config)
+            log_repository = MongoDBLogRepository()
+            log_service = ObservabilityLogService(log_repository)
+        query_service_class = AsyncLogQueryService if config.mongodb_driver == "async" else LogQueryService
+        configure_query_service(query_service_class(
+            log_repository,
+            max_time_ms=config.query_max_time_ms,
+            export_max_time_ms=config.export_max_time_ms
+        ))
         ws_publisher = WebSocketPublisher() if config.ws_enabled else None
         alert_service = SecurityAlertService(log_repository)
 
+        # El middleware encola y una tarea de fondo guarda con insert_many: la latencia
+        # de MongoDB no se suma a la de cada request
+        log_writer = BatchLogWriter(
+            log_service.write_many,
+            max_queue=config.batch_max_queue,
+            batch_size=config.batch_size,
+            flush_interval=config.batch_flush_interval,
+            policy=config.batch_policy,
+            sample_rate=config.batch_sample_rate,
+        ) if config.batch_enabled else None
+
+        log_sampler = LogSampler(
+            default_rate=config.sample_rate_default,
+            route_rates=config.sample_rates_by_route,
+            status_rates=config.sample_rates_by_status,
+            keep_categories=config.sample_keep_categories,
+            tail_window=config.sample_tail_window,
+            tail_max_traces=config.sample_tail_max_traces,
+        ) if config.sampling_enabled else None
+
         app.add_middleware(
             ObservabilityMiddleware,
-            log_service=log_service,
-            ws_publisher=ws_publisher
+            log_service=log_writer or log_service,
+            ws_publisher=ws_publisher,
+            span_mode=config.span_mode,
+            slow_request_ms=config.slow_request_ms,
+            sampler=log_sampler
         )
 
+        @app.get("/internal/observability/logs", include_in_schema=False)
+        async def telemetria_logs():
+            # Contadores de muestreo por ruta: con effective_rate se re-ponderan los agregados
+            return {
+                "writer": log_writer.stats() if log_writer else None,
+                "sampling": log_sampler.stats() if log_sampler else None,
+            }
+
+        @app.on_event("startup")
+        async def create_log_indexes():
+            # Con pymongo se crean en initialize(); Motor necesita el event loop
+            if config.mongodb_driver == "async":
+                try:
+                    await log_connection.create_indexes()
+                except Exception as e:
+                    logger.error(f"❌ No se pudieron crear los índices de logs: {e}")
+
         @app.on_event("startup")
         async def start_alert_worker():
             if config.alerts_enabled:
                 asyncio.create_task(alert_worker(alert_service, config.alert_check_interval))
 
+        @app.on_event("startup")
+        async def start_log_writer():
+            if log_writer:
+                log_writer.start()
+
+        # Antes de cerrar MongoDB: guarda los logs que quedaron en la cola
+        @app.on_event("shutdown")
+        async def stop_log_writer():
+            if log_writer:
+                await log_writer.stop()
+
         @app.on_event("shutdown")
         async def shutdown_mongo():
-            mongodb_connection.close()
+            log_connection.close()
 
         app.include_router(logs_router, prefix="/observability/logs")
         app.include_router(ws_router, prefix="/observability/ws")
@@ -151,17 +253,74 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Trace-ID", "ETag"],
 )
 
 app.include_router(login_router)
 app.include_router(productos_router)
 app.include_router(categoria_router)
+app.include_router(pedidos_router)  # antes de proveedores_router: /proveedores/{proveedor_id}
 app.include_router(proveedores_router)
 app.include_router(ventas_router)
+app.include_router(movimientos_router)
 app.include_router(metricas_router, prefix="/api/metricas")
 if api_key_router:
     app.include_router(api_key_router)
 
+# =======================================================
+# POOL DE CONEXIONES: 503 RÁPIDO Y TELEMETRÍA
+# =======================================================
+@app.exception_handler(PoolTimeoutError)
+async def pool_agotado(request: Request, exc: PoolTimeoutError):
+    # No hay conexión libre tras DB_POOL_TIMEOUT: fallar rápido en vez de colgar el request
+    logger.error(f"❌ Pool de conexiones agotado en {request.url.path}: {exc}")
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Base de datos saturada, intente nuevamente en unos segundos"},
+        headers={"Retry-After": "1"}
+    )
+
+@app.get("/internal/db/pool", include_in_schema=False)
+async def telemetria_pool():
+    return {"pools": estado_pools()}
+
+@app.on_event("shutdown")
+async def cerrar_replicas():
+    await replicas.dispose()
+
+# =======================================================
+# CACHÉ COMPARTIDA (REDIS)
+# =======================================================
+@app.on_event("startup")
+async def conectar_redis():
+    await redis_manager.connect()
+
+@app.on_event("shutdown")
+async def cerrar_redis():
+    await redis_manager.close()
+
+# =======================================================
+# STOCK BAJO (CONJUNTO INCREMENTAL Y AVISOS POR WEBSOCKET)
+# =======================================================
+@app.on_event("startup")
+async def cargar_stock_bajo():
+    await stock_bajo.iniciar(async_session)
+
+@app.on_event("shutdown")
+async def detener_stock_bajo():
+    await stock_bajo.detener()
+
+# =======================================================
+# LEDGER DE MOVIMIENTOS: SNAPSHOTS PERIÓDICOS DE STOCK
+# =======================================================
+@app.on_event("startup")
+async def programar_snapshots_stock():
+    snapshots_stock.iniciar(async_session)
+
+@app.on_event("shutdown")
+async def detener_snapshots_stock():
+    await snapshots_stock.detener()
+
 @app.on_event("startup")
 async def debug_routes():
     for route in app.routes:
@@ -169,17 +328,27 @@ async def debug_routes():
 
 @app.get("/")
 async def root():
+    connected = False
+    if OBSERVABILITY_AVAILABLE:
+        if asyncio.iscoroutinefunction(log_connection.is_connected):
+            connected = await log_connection.is_connected()
+        else:
+            connected = await asyncio.to_thread(log_connection.is_connected)
     return {
         "status": "operational",
         "observability": OBSERVABILITY_AVAILABLE,
-        "mongodb": "connected" if (OBSERVABILITY_AVAILABLE and mongodb_connection.is_connected()) else "disconnected"
+        "mongodb": "connected" if connected else "disconnected"
     }
 
 async def alert_worker(alert_service, interval: int):
     while True:
         await asyncio.sleep(interval)
         try:
-            alert_service.analyze_and_alert()
+            if asyncio.iscoroutinefunction(alert_service.log_repo.get_since):
+                await alert_service.analyze_and_alert_async()
+            else:
+                # pymongo es bloqueante: se consulta fuera del event loop
+                await asyncio.to_thread(alert_service.analyze_and_alert)
         except Exception as e:
             logger.error(f"❌ Alert worker error: {e}")
 
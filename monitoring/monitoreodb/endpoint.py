@@ -3,6 +3,7 @@ from sqlalchemy import text
 import time
 from datetime import datetime
 from ...database.session import async_session
+from ...database.pool_metrics import estado_pools
 from .manager import manager
 
 router = APIRouter()
@@ -29,6 +30,14 @@ async def get_connection_stats():
     else:
         raise HTTPException(status_code=500, detail="Error al obtener estadísticas")
 
+@router.get("/pool-stats")
+async def get_pool_stats():
+    """Telemetría del pool de SQLAlchemy: latencia de checkout, en uso, overflow y timeouts"""
+    return {
+        "pools": estado_pools(),
+        "timestamp": time.time()
+    }
+
 @router.get("/connection-details")
 async def get_connection_details():
     try:
@@ -10,6 +10,7 @@ import base64
 from sqlalchemy import text
 
 from ...database.session import async_session
+from ...database.pool_metrics import estado_pools
 
 class ConnectionManager:
     def __init__(self):
@@ -96,7 +97,9 @@ class ConnectionManager:
             
             await self.broadcast({
                 "type": "connection_stats",
-                "data": self.connection_stats
+                "data": self.connection_stats,
+                # Pools de la API (latencia de checkout, overflow, timeouts); fuera del historial
+                "pools": estado_pools()
             })
             
             return self.connection_stats
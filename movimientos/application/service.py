@@ -0,0 +1,90 @@
+import logging
+from datetime import datetime
+from typing import List, Optional, Tuple
+from fastapi import HTTPException, status
+from sqlalchemy.exc import IntegrityError
+from ..presentation import schemas
+from ...core.config import settings
+from ...core.pagination import CursorInvalidoError, next_cursor
+from ..domain.exception import ProductoNoEncontradoError, StockInsuficienteError
+
+class MovimientoService:
+    def __init__(self, repository):
+        self.repository = repository
+
+    async def registrar(self, data: schemas.RegistroMovimientos) -> schemas.ResultadoMovimientos:
+        movimientos = [(m.producto_id, m.tipo, m.cantidad) for m in data.movimientos]
+        try:
+            productos = await self.repository.registrar(movimientos, usuario_id=data.usuario_id)
+        except ProductoNoEncontradoError as e:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=str(e)
+            )
+        except StockInsuficienteError as e:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=str(e)
+            )
+        except IntegrityError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="El usuario indicado no existe"
+            )
+        except Exception as e:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Error al registrar movimientos: {str(e)}"
+            )
+        return schemas.ResultadoMovimientos(
+            registrados=len(movimientos),
+            productos=[schemas.StockProducto(id=p.id, nombre=p.nombre, stock=p.stock) for p in productos]
+        )
+
+    async def listar(
+        self,
+        producto_id: Optional[int] = None,
+        desde: Optional[datetime] = None,
+        hasta: Optional[datetime] = None,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+    ) -> Tuple[List[schemas.Movimiento], Optional[str]]:
+        """Movimientos del más reciente al más antiguo y cursor de la siguiente página"""
+        try:
+            movimientos = await self.repository.listar(
+                producto_id=producto_id, desde=desde, hasta=hasta, limit=limit, cursor=cursor
+            )
+        except CursorInvalidoError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
+            )
+        return [schemas.Movimiento(**m) for m in movimientos], next_cursor(movimientos, limit, "fecha", "id")
+
+    async def stock_en(
+        self,
+        fecha: datetime,
+        producto_ids: Optional[List[int]] = None,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+    ) -> Tuple[List[schemas.StockEnFecha], Optional[str]]:
+        """Stock de cada producto a `fecha` y cursor de la siguiente página"""
+        try:
+            stock = await self.repository.stock_en(fecha, producto_ids=producto_ids, limit=limit, cursor=cursor)
+        except CursorInvalidoError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
+            )
+        return [schemas.StockEnFecha(**s) for s in stock], next_cursor(stock, limit, "producto_id")
+
+    async def tomar_snapshot(self) -> schemas.ResultadoSnapshot:
+        try:
+            corte, productos = await self.repository.tomar_snapshot(settings.MOVIMIENTOS_SNAPSHOT_MARGEN)
+        except Exception as e:
+            logging.error(f"Error al tomar el snapshot de stock: {str(e)}")
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Error al tomar el snapshot de stock"
+            )
+        return schemas.ResultadoSnapshot(corte=corte, productos=productos)
@@ -0,0 +1,14 @@
+class MovimientoError(Exception):
+    """Base exception for movimientos domain"""
+
+class StockInsuficienteError(MovimientoError):
+    def __init__(self, producto_nombre: str, stock_actual: int, salida_neta: int):
+        self.producto_nombre = producto_nombre
+        self.stock_actual = stock_actual
+        self.salida_neta = salida_neta
+        super().__init__(f"Stock insuficiente para {producto_nombre}. Stock actual: {stock_actual}, salida neta del lote: {salida_neta}")
+
+class ProductoNoEncontradoError(MovimientoError):
+    def __init__(self, producto_id: int):
+        self.producto_id = producto_id
+        super().__init__(f"Producto con ID {producto_id} no encontrado")
@@ -0,0 +1,281 @@
+# movimientos/infrastructure/repository.py
+"""
+Ledger de inventario (tabla movimientos).
+
+- Append-only: un movimiento no se edita ni se borra; una corrección es otro movimiento.
+- productos.stock es la proyección del ledger: cada lote de movimientos la
+  actualiza en la misma transacción, con un UPDATE por lote (no por fila).
+- snapshots_stock guarda el stock de los productos a una fecha de corte. El
+  stock a una fecha T es el snapshot más cercano más el delta del ledger entre
+  ambas fechas (idx_movimientos_producto_fecha), sin recorrer todo el historial.
+"""
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import sqlalchemy as sa
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ...core.fechas import a_utc
+from ...core.pagination import CursorInvalidoError, decode_cursor
+from ...productos.infrastructure.cache import invalidar_al_confirmar
+from ...productos.infrastructure.stock_bajo import registrar_stock_al_confirmar
+from ..domain.exception import ProductoNoEncontradoError, StockInsuficienteError
+
+ENTRADA = "entrada"
+SALIDA = "salida"
+
+# Efecto de una fila del ledger sobre el stock
+_DELTA = "CASE WHEN m.tipo = 'entrada' THEN m.cantidad ELSE -m.cantidad END"
+
+# Stock a una fecha: snapshot anterior + delta hasta la fecha; si no hay, snapshot
+# siguiente - delta desde la fecha; si tampoco, stock actual - delta desde la fecha.
+# Cada suma es un range scan de idx_movimientos_producto_fecha para un producto.
+_STOCK_EN_FECHA = f"""
+    WITH base AS (
+        SELECT p.id AS producto_id, p.nombre, p.stock AS stock_actual,
+               (SELECT max(s.fecha) FROM snapshots_stock s
+                WHERE s.producto_id = p.id AND s.fecha <= :fecha) AS snapshot_anterior,
+               (SELECT min(s.fecha) FROM snapshots_stock s
+                WHERE s.producto_id = p.id AND s.fecha > :fecha) AS snapshot_siguiente
+        FROM productos p
+        WHERE {{filtros}}
+        ORDER BY p.id
+        LIMIT :limit
+    )
+    SELECT b.producto_id, b.nombre,
+        CASE
+            WHEN b.snapshot_anterior IS NOT NULL THEN
+                (SELECT s.stock FROM snapshots_stock s
+                 WHERE s.producto_id = b.producto_id AND s.fecha = b.snapshot_anterior)
+                + coalesce((SELECT sum({_DELTA}) FROM movimientos m
+                            WHERE m.producto_id = b.producto_id
+                              AND m.fecha > b.snapshot_anterior AND m.fecha <= :fecha), 0)
+            WHEN b.snapshot_siguiente IS NOT NULL THEN
+                (SELECT s.stock FROM snapshots_stock s
+                 WHERE s.producto_id = b.producto_id AND s.fecha = b.snapshot_siguiente)
+                - coalesce((SELECT sum({_DELTA}) FROM movimientos m
+                            WHERE m.producto_id = b.producto_id
+                              AND m.fecha > :fecha AND m.fecha <= b.snapshot_siguiente), 0)
+            ELSE
+                b.stock_actual
+                - coalesce((SELECT sum({_DELTA}) FROM movimientos m
+                            WHERE m.producto_id = b.producto_id AND m.fecha > :fecha), 0)
+        END AS stock,
+        coalesce(b.snapshot_anterior, b.snapshot_siguiente) AS fecha_snapshot
+    FROM base b
+    ORDER BY b.producto_id
+"""
+
+
+def movimientos_por_delta(deltas: Dict[int, int]) -> List[Tuple[int, str, int]]:
+    """(producto_id, tipo, cantidad) para llevar cada producto de su stock anterior al nuevo"""
+    return [
+        (producto_id, ENTRADA if delta > 0 else SALIDA, abs(delta))
+        for producto_id, delta in deltas.items() if delta
+    ]
+
+
+async def anotar_movimientos(
+    db: AsyncSession, movimientos: Sequence[Tuple[int, str, int]], usuario_id: Optional[int] = None
+) -> int:
+    """
+    Agrega filas (producto_id, tipo, cantidad) al ledger en una sentencia, sin
+    tocar productos.stock: es para quien ya aplicó el cambio de stock en la
+    misma transacción. No hace commit.
+    """
+    if not movimientos:
+        return 0
+    await db.execute(
+        sa.text("""
+            INSERT INTO movimientos (producto_id, tipo, cantidad, usuario_id)
+            SELECT l.producto_id, l.tipo, l.cantidad, CAST(:usuario_id AS INTEGER)
+            FROM unnest(CAST(:productos AS integer[]), CAST(:tipos AS varchar[]), CAST(:cantidades AS integer[]))
+                AS l(producto_id, tipo, cantidad)
+        """),
+        {
+            "productos": [m[0] for m in movimientos],
+            "tipos": [m[1] for m in movimientos],
+            "cantidades": [m[2] for m in movimientos],
+            "usuario_id": usuario_id,
+        }
+    )
+    return len(movimientos)
+
+
+class MovimientoRepository:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def registrar(
+        self, movimientos: Sequence[Tuple[int, str, int]], usuario_id: Optional[int] = None
+    ) -> list:
+        """
+        Agrega un lote de movimientos (producto_id, tipo, cantidad) al ledger y
+        aplica el stock neto por producto en un UPDATE, todo en una transacción.
+        Las filas se bloquean en orden de id (igual que la reserva de stock de
+        las ventas). Si un producto no existe o quedaría con stock negativo no se
+        registra nada y se lanza la excepción de dominio correspondiente.
+
+        Retorna las filas (id, nombre, stock, categoria_id, proveedor_id) con el stock nuevo.
+        """
+        deltas: Dict[int, int] = {}
+        for producto_id, tipo, cantidad in movimientos:
+            deltas[producto_id] = deltas.get(producto_id, 0) + (cantidad if tipo == ENTRADA else -cantidad)
+
+        try:
+            result = await self.db.execute(
+                sa.text("""
+                    WITH v AS (
+                        SELECT * FROM unnest(CAST(:productos AS integer[]), CAST(:deltas AS integer[]))
+                            AS l(producto_id, delta)
+                    ),
+                    bloqueados AS (
+                        SELECT p.id FROM productos p
+                        JOIN v ON v.producto_id = p.id
+                        ORDER BY p.id
+                        FOR UPDATE OF p
+                    )
+                    UPDATE productos p
+                    SET stock = p.stock + v.delta
+                    FROM v, bloqueados b
+                    WHERE p.id = v.producto_id
+                      AND p.id = b.id
+                      AND p.stock + v.delta >= 0
+                    RETURNING p.id, p.nombre, p.stock, p.categoria_id, p.proveedor_id
+                """),
+                {"productos": list(deltas), "deltas": list(deltas.values())}
+            )
+            filas = result.fetchall()
+            if len(filas) < len(deltas):
+                await self.db.rollback()
+                await self._lanzar_error(deltas, {fila.id for fila in filas})
+
+            await anotar_movimientos(self.db, movimientos, usuario_id)
+            invalidar_al_confirmar(self.db, deltas.keys(), stock=True)
+            registrar_stock_al_confirmar(self.db, filas)
+            await self.db.commit()
+            return filas
+        except (ProductoNoEncontradoError, StockInsuficienteError):
+            raise
+        except Exception as e:
+            logging.error(f"Error al registrar movimientos: {str(e)}")
+            await self.db.rollback()
+            raise
+
+    async def _lanzar_error(self, deltas: Dict[int, int], aplicados: set):
+        """Determina qué producto hizo fallar el lote y lanza el error de dominio"""
+        faltantes = [producto_id for producto_id in deltas if producto_id not in aplicados]
+        result = await self.db.execute(
+            sa.select(sa.column("id"), sa.column("nombre"), sa.column("stock"))
+            .select_from(sa.table("productos"))
+            .where(sa.column("id").in_(faltantes))
+        )
+        existentes = {fila.id: fila for fila in result}
+        for producto_id in faltantes:
+            if producto_id not in existentes:
+                raise ProductoNoEncontradoError(producto_id)
+        producto = existentes[faltantes[0]]
+        raise StockInsuficienteError(producto.nombre, producto.stock, -deltas[producto.id])
+
+    async def listar(
+        self,
+        producto_id: Optional[int] = None,
+        desde: Optional[datetime] = None,
+        hasta: Optional[datetime] = None,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+    ) -> List[dict]:
+        """Movimientos del más reciente al más antiguo (keyset por fecha, id)"""
+        filtros = ["1 = 1"]
+        params = {"limit": limit}
+        if producto_id is not None:
+            filtros.append("producto_id = :producto_id")
+            params["producto_id"] = producto_id
+        if desde is not None:
+            filtros.append("fecha >= :desde")
+            params["desde"] = a_utc(desde)
+        if hasta is not None:
+            filtros.append("fecha <= :hasta")
+            params["hasta"] = a_utc(hasta)
+        if cursor:
+            try:
+                fecha_cursor, id_cursor = decode_cursor(cursor, 2)
+                params.update(fecha_cursor=a_utc(datetime.fromisoformat(fecha_cursor)), id_cursor=int(id_cursor))
+            except (TypeError, ValueError) as e:
+                raise CursorInvalidoError(f"Cursor inválido: {cursor}") from e
+            filtros.append("(fecha, id) < (:fecha_cursor, :id_cursor)")
+        # Con producto_id: idx_movimientos_producto_fecha; sin él: idx_movimientos_fecha
+        result = await self.db.execute(sa.text(f"""
+            SELECT id, producto_id, tipo, cantidad, fecha, usuario_id
+            FROM movimientos
+            WHERE {' AND '.join(filtros)}
+            ORDER BY fecha DESC, id DESC
+            LIMIT :limit
+        """), params)
+        return [dict(fila._mapping) for fila in result.fetchall()]
+
+    async def stock_en(
+        self,
+        fecha: datetime,
+        producto_ids: Optional[List[int]] = None,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+    ) -> List[dict]:
+        """Stock de cada producto a `fecha` (keyset por producto_id)"""
+        filtros = ["1 = 1"]
+        params = {"fecha": a_utc(fecha), "limit": limit}
+        if producto_ids:
+            filtros.append("p.id = ANY(CAST(:ids AS integer[]))")
+            params["ids"] = list(producto_ids)
+        if cursor:
+            try:
+                (id_cursor,) = decode_cursor(cursor, 1)
+                params["id_cursor"] = int(id_cursor)
+            except (TypeError, ValueError) as e:
+                raise CursorInvalidoError(f"Cursor inválido: {cursor}") from e
+            filtros.append("p.id > :id_cursor")
+        result = await self.db.execute(
+            sa.text(_STOCK_EN_FECHA.format(filtros=" AND ".join(filtros))), params
+        )
+        return [dict(fila._mapping) for fila in result.fetchall()]
+
+    async def ultimo_corte(self) -> Optional[datetime]:
+        result = await self.db.execute(sa.text("SELECT max(fecha) FROM snapshots_stock"))
+        corte = result.scalar_one()
+        return a_utc(corte) if corte is not None else None
+
+    async def tomar_snapshot(self, margen: float, intervalo_minimo: float = 0) -> Tuple[Optional[datetime], int]:
+        """
+        Guarda el stock a `ahora - margen` de los productos con movimientos desde
+        el corte anterior, derivado de la proyección: stock actual - delta posterior
+        al corte (una sola sentencia, así ambos se leen del mismo estado). El margen
+        deja afuera transacciones que empezaron antes del corte y aún no confirmaron.
+        Si el último corte es más reciente que `intervalo_minimo` (otro worker ya lo
+        tomó) no hace nada. Retorna (corte, productos) o (None, 0).
+        """
+        corte = datetime.now(timezone.utc) - timedelta(seconds=margen)
+        anterior = await self.ultimo_corte()
+        if anterior is not None and anterior > corte - timedelta(seconds=intervalo_minimo):
+            return None, 0
+
+        filtros = ["m.fecha <= :corte"]
+        params = {"corte": corte}
+        if anterior is not None:
+            filtros.append("m.fecha > :anterior")
+            params["anterior"] = anterior
+        try:
+            result = await self.db.execute(sa.text(f"""
+                INSERT INTO snapshots_stock (producto_id, fecha, stock)
+                SELECT p.id, :corte,
+                       p.stock - coalesce((SELECT sum({_DELTA}) FROM movimientos m
+                                           WHERE m.producto_id = p.id AND m.fecha > :corte), 0)
+                FROM productos p
+                WHERE p.id IN (SELECT m.producto_id FROM movimientos m WHERE {' AND '.join(filtros)})
+            """), params)
+            await self.db.commit()
+        except Exception as e:
+            logging.error(f"Error al tomar el snapshot de stock: {str(e)}")
+            await self.db.rollback()
+            raise
+        return corte, result.rowcount
@@ -0,0 +1,53 @@
+# movimientos/infrastructure/snapshots.py
+"""
+Snapshots periódicos de stock (snapshots_stock) cada MOVIMIENTOS_SNAPSHOT_INTERVALO
+segundos. Con varios workers, el primero que llega toma el corte y el resto lo
+saltea porque ya hay uno reciente.
+"""
+import asyncio
+import logging
+from typing import Optional
+
+from ...core.config import settings
+from .repository import MovimientoRepository
+
+logger = logging.getLogger(__name__)
+
+
+class ProgramadorSnapshots:
+    def __init__(self, intervalo: float, margen: float):
+        self.intervalo = intervalo
+        self.margen = margen
+        self._tarea: Optional[asyncio.Task] = None
+
+    async def tomar(self, session_factory, forzar: bool = False):
+        async with session_factory() as session:
+            corte, productos = await MovimientoRepository(session).tomar_snapshot(
+                self.margen, intervalo_minimo=0 if forzar else self.intervalo / 2
+            )
+        if corte is not None:
+            logger.info(f"📸 Snapshot de stock al {corte.isoformat()}: {productos} productos")
+        return corte, productos
+
+    async def _ciclo(self, session_factory):
+        while True:
+            await asyncio.sleep(self.intervalo)
+            try:
+                await self.tomar(session_factory)
+            except Exception as e:
+                logger.error(f"❌ Error al tomar el snapshot de stock: {e}")
+
+    def iniciar(self, session_factory):
+        if self.intervalo > 0 and self._tarea is None:
+            self._tarea = asyncio.create_task(self._ciclo(session_factory))
+
+    async def detener(self):
+        if self._tarea is not None:
+            self._tarea.cancel()
+            self._tarea = None
+
+
+snapshots_stock = ProgramadorSnapshots(
+    intervalo=settings.MOVIMIENTOS_SNAPSHOT_INTERVALO,
+    margen=settings.MOVIMIENTOS_SNAPSHOT_MARGEN,
+)
@@ -0,0 +1,71 @@
+from datetime import datetime
+from typing import List, Optional
+from fastapi import APIRouter, Depends, Query, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from ...database.session import get_db, get_read_db
+from ...core.pagination import NEXT_CURSOR_HEADER
+from ..application.service import MovimientoService
+from ..infrastructure.repository import MovimientoRepository
+from . import schemas
+
+router = APIRouter(prefix="/movimientos", tags=["movimientos"])
+
+async def get_movimiento_service(db: AsyncSession = Depends(get_db)):
+    return MovimientoService(MovimientoRepository(db))
+
+# Consultas del ledger: réplica de lectura si está configurada
+async def get_movimiento_lectura_service(db: AsyncSession = Depends(get_read_db)):
+    return await get_movimiento_service(db)
+
+@router.post("/", response_model=schemas.ResultadoMovimientos, status_code=status.HTTP_201_CREATED)
+async def registrar_movimientos(
+    data: schemas.RegistroMovimientos,
+    service: MovimientoService = Depends(get_movimiento_service)
+):
+    """
+    Agrega un lote de entradas/salidas al ledger y aplica el stock neto de cada
+    producto en la misma transacción. Si un producto no existe (404) o quedaría
+    con stock negativo (409) no se registra ningún movimiento del lote.
+    """
+    return await service.registrar(data)
+
+@router.get("/", response_model=List[schemas.Movimiento])
+async def listar_movimientos(
+    response: Response,
+    producto_id: Optional[int] = Query(None, gt=0),
+    desde: Optional[datetime] = Query(None, description="Desde esta fecha (inclusive)"),
+    hasta: Optional[datetime] = Query(None, description="Hasta esta fecha (inclusive)"),
+    limit: int = Query(100, ge=1, le=1000, description="Tamaño de página"),
+    cursor: Optional[str] = Query(None, description="Cursor opaco devuelto en X-Next-Cursor"),
+    service: MovimientoService = Depends(get_movimiento_lectura_service)
+):
+    """Movimientos del más reciente al más antiguo"""
+    movimientos, siguiente = await service.listar(
+        producto_id=producto_id, desde=desde, hasta=hasta, limit=limit, cursor=cursor
+    )
+    if siguiente:
+        response.headers[NEXT_CURSOR_HEADER] = siguiente
+    return movimientos
+
+@router.get("/stock", response_model=List[schemas.StockEnFecha])
+async def stock_en_fecha(
+    response: Response,
+    fecha: datetime = Query(..., description="Fecha a consultar (sin zona horaria se toma como UTC)"),
+    producto_id: Optional[List[int]] = Query(None, description="Solo estos productos (se puede repetir)"),
+    limit: int = Query(100, ge=1, le=1000, description="Tamaño de página"),
+    cursor: Optional[str] = Query(None, description="Cursor opaco devuelto en X-Next-Cursor"),
+    service: MovimientoService = Depends(get_movimiento_lectura_service)
+):
+    """
+    Stock de los productos a una fecha: el snapshot más cercano más el delta
+    del ledger entre el snapshot y la fecha.
+    """
+    stock, siguiente = await service.stock_en(fecha, producto_ids=producto_id, limit=limit, cursor=cursor)
+    if siguiente:
+        response.headers[NEXT_CURSOR_HEADER] = siguiente
+    return stock
+
+@router.post("/snapshots", response_model=schemas.ResultadoSnapshot)
+async def tomar_snapshot(service: MovimientoService = Depends(get_movimiento_service)):
+    """Toma un snapshot de stock ahora (además de los periódicos)"""
+    return await service.tomar_snapshot()
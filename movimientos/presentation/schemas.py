@@ -0,0 +1,40 @@
+from pydantic import BaseModel, Field
+from datetime import datetime
+from typing import List, Literal, Optional
+from ...core.config import settings
+
+class MovimientoCreate(BaseModel):
+    producto_id: int = Field(..., gt=0, example=1)
+    tipo: Literal["entrada", "salida"] = Field(..., example="entrada")
+    cantidad: int = Field(..., gt=0, example=10)
+
+class RegistroMovimientos(BaseModel):
+    movimientos: List[MovimientoCreate] = Field(..., min_length=1, max_length=settings.MOVIMIENTOS_MAX_LOTE)
+    usuario_id: Optional[int] = Field(None, description="Usuario que registra los movimientos")
+
+class StockProducto(BaseModel):
+    id: int
+    nombre: str
+    stock: int
+
+class ResultadoMovimientos(BaseModel):
+    registrados: int = Field(..., description="Filas agregadas al ledger")
+    productos: List[StockProducto] = Field(..., description="Stock resultante de cada producto afectado")
+
+class Movimiento(BaseModel):
+    id: int
+    producto_id: int
+    tipo: str
+    cantidad: int
+    fecha: datetime
+    usuario_id: Optional[int] = None
+
+class StockEnFecha(BaseModel):
+    producto_id: int
+    nombre: str
+    stock: int
+    fecha_snapshot: Optional[datetime] = Field(None, description="Snapshot usado como base (None: stock actual)")
+
+class ResultadoSnapshot(BaseModel):
+    corte: Optional[datetime] = Field(None, description="Fecha del corte (None: ya había uno reciente)")
+    productos: int
@@ -32,11 +32,12 @@ from .domain.events import (
 )
 
 # Application - Servicios y Fábricas
-from .application.service import ObservabilityLogService
+from .application.service import ObservabilityLogService, AsyncObservabilityLogService
 from .application.factory import LogFactory
 from .application.context import LogContext
 from .application.alerts import SecurityAlertService, AlertRule
-from .application.queries import LogQueryService
+from .application.queries import LogQueryService, AsyncLogQueryService
+from .application.sampling import LogSampler
 
 # Configuración
 from .config import ObservabilityConfig
@@ -85,11 +86,14 @@ __all__ = [
     
     # Application
     "ObservabilityLogService",
+    "AsyncObservabilityLogService",
     "LogFactory",
     "LogContext",
     "SecurityAlertService",
     "AlertRule",
     "LogQueryService",
+    "AsyncLogQueryService",
+    "LogSampler",
     
     # Config
     "ObservabilityConfig",
@@ -1,16 +1,20 @@
 """Application Layer - Casos de uso y servicios"""
 
-from .service import ObservabilityLogService
+from .service import ObservabilityLogService, AsyncObservabilityLogService
 from .factory import LogFactory
 from .context import LogContext
 from .alerts import SecurityAlertService, AlertRule
-from .queries import LogQueryService
+from .queries import LogQueryService, AsyncLogQueryService
+from .sampling import LogSampler
 
 __all__ = [
     "ObservabilityLogService",
+    "AsyncObservabilityLogService",
     "LogFactory",
     "LogContext",
     "SecurityAlertService",
     "AlertRule",
     "LogQueryService",
+    "AsyncLogQueryService",
+    "LogSampler",
 ]
\ No newline at end of file
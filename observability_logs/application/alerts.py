@@ -109,7 +109,15 @@ class SecurityAlertService:
         """Analiza logs recientes y muestra alertas en consola"""
         cutoff = datetime.utcnow() - timedelta(minutes=timeframe_minutes)
         recent_logs = self.log_repo.get_since(cutoff)
-        
+        return self._evaluate(recent_logs, timeframe_minutes)
+
+    async def analyze_and_alert_async(self, timeframe_minutes: int = 5) -> List[SecurityAlertTriggered]:
+        """Igual que analyze_and_alert, con AsyncMongoDBLogRepository (Motor)"""
+        cutoff = datetime.utcnow() - timedelta(minutes=timeframe_minutes)
+        recent_logs = await self.log_repo.get_since(cutoff)
+        return self._evaluate(recent_logs, timeframe_minutes)
+
+    def _evaluate(self, recent_logs: List[Any], timeframe_minutes: int) -> List[SecurityAlertTriggered]:
         alerts_triggered = []
         
         for rule in self.rules:
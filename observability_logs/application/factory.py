@@ -67,4 +67,47 @@ class LogFactory:
             message=message,
             context=context,
             metadata=metadata
-        )
\ No newline at end of file
+        )
+
+    @staticmethod
+    def create_span(
+        context: LogContext,
+        method: str,
+        path: str,
+        route: str,
+        status_code: int,
+        started_at: datetime,
+        duration_ms: float,
+        query_params: Optional[Dict[str, Any]] = None,
+        error: Optional[BaseException] = None
+    ) -> LogEntry:
+        """
+        Un solo documento por request (reemplaza REQUEST_START + REQUEST_END).
+        `timestamp` es el inicio; `route` es la plantilla (/productos/{id}), no la URL.
+        """
+        metadata = {
+            "method": method,
+            "path": path,
+            "route": route,
+            "query_params": query_params or {},
+            "status_code": status_code,
+            "started_at": started_at,
+            "duration_ms": round(duration_ms, 2)
+        }
+        if error is not None:
+            metadata["error_type"] = type(error).__name__
+            metadata["error_message"] = str(error)
+
+        return LogEntry(
+            trace_id=context.trace_id,
+            level=LogLevel.ERROR if error is not None or status_code >= 500 else LogLevel.INFO,
+            category=LogCategory.SYSTEM,
+            action="REQUEST",
+            message=f"{method} {route} -> {status_code}",
+            user_id=context.user_id,
+            role=context.role,
+            ip=context.ip,
+            endpoint=context.endpoint,
+            metadata=metadata,
+            timestamp=started_at
+        )
@@ -1,21 +1,109 @@
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime, timedelta
 
+from bson import ObjectId
+from bson.errors import InvalidId
+# core/ es hermano de observability_logs (la raíz del proyecto está en sys.path)
+from core.pagination import CursorInvalidoError, decode_cursor, encode_cursor
+
 # ✅ CORRECCIÓN: Uso de importación relativa para evitar el ModuleNotFoundError
+from ..domain.entities import LogEntry
 from ..infrastructure.mongodb.repository import MongoDBLogRepository
 
+# Períodos de /admin/logs/stats
+STATS_PERIODS = {
+    "1h": timedelta(hours=1),
+    "24h": timedelta(days=1),
+    "7d": timedelta(days=7),
+    "30d": timedelta(days=30),
+}
+# Severidad de alerta -> nivel del log de seguridad que la origina
+ALERT_SEVERITY_LEVELS = {
+    "CRITICAL": "critical",
+    "HIGH": "error",
+    "MEDIUM": "warning",
+    "LOW": "info",
+}
+
+
 class LogQueryService:
     """Servicio de consultas avanzadas OPTIMIZADO para MongoDB"""
     
-    def __init__(self, repository: MongoDBLogRepository):
+    def __init__(
+        self,
+        repository: MongoDBLogRepository,
+        max_time_ms: Optional[int] = None,
+        export_max_time_ms: Optional[int] = None
+    ):
         self.repository = repository
+        # maxTimeMS: una consulta poco selectiva se corta en vez de ocupar MongoDB
+        self.max_time_ms = max_time_ms
+        self.export_max_time_ms = export_max_time_ms
+
+    # ---------- /admin/logs ----------
+
+    @staticmethod
+    def _decode_cursor(cursor: Optional[str]) -> Optional[Tuple[datetime, ObjectId]]:
+        if not cursor:
+            return None
+        timestamp, log_id = decode_cursor(cursor, 2)
+        try:
+            return datetime.fromisoformat(timestamp), ObjectId(log_id)
+        except (TypeError, ValueError, InvalidId) as e:
+            raise CursorInvalidoError(f"Cursor inválido: {cursor}") from e
+
+    @staticmethod
+    def _next_cursor(logs: List[LogEntry], limit: int) -> Optional[str]:
+        if not logs or len(logs) < limit:
+            return None
+        return encode_cursor(logs[-1].timestamp, logs[-1].id)
+
+    @staticmethod
+    def _alert_filters(severity: Optional[str]) -> Dict[str, Any]:
+        return {"category": "security", "level": ALERT_SEVERITY_LEVELS.get(severity) if severity else None}
+
+    def search_page(
+        self, filters: Dict[str, Any], cursor: Optional[str] = None, limit: int = 100
+    ) -> Tuple[List[LogEntry], Optional[str]]:
+        """Una página de logs (keyset) y el cursor de la siguiente, o None si no hay más"""
+        logs = self.repository.find_page(filters, self._decode_cursor(cursor), limit, self.max_time_ms)
+        return logs, self._next_cursor(logs, limit)
+
+    def alerts_page(
+        self, severity: Optional[str] = None, cursor: Optional[str] = None, limit: int = 50
+    ) -> Tuple[List[LogEntry], Optional[str]]:
+        """Logs de seguridad que originan las alertas (las alertas no se persisten)"""
+        return self.search_page(self._alert_filters(severity), cursor, limit)
+
+    def stats(self, period: str = "24h", group_by: str = "category") -> Dict[str, Any]:
+        days = STATS_PERIODS[period] / timedelta(days=1)
+        return self.repository.get_stats(days, group_by, self.max_time_ms)
+
+    def export(self, filters: Dict[str, Any]):
+        """Iterador de todos los logs de `filters`, sin cargarlos en memoria"""
+        return self.repository.stream_filtered(filters, max_time_ms=self.export_max_time_ms)
+
+    # ---------- consultas de seguridad ----------
     
     def get_user_timeline(self, user_id: str, days: int = 7) -> Dict[str, Any]:
         """Timeline completo de usuario con agregaciones"""
+        results = self.repository.aggregate(self._user_timeline_pipeline(user_id, days))
+        return self._user_timeline(user_id, days, results)
+
+    @staticmethod
+    def _user_timeline(user_id: str, days: int, results: List[Dict]) -> Dict[str, Any]:
+        return {
+            "user_id": user_id,
+            "period": f"{days}d",
+            "timeline": results
+        }
+
+    @staticmethod
+    def _user_timeline_pipeline(user_id: str, days: int) -> List[Dict]:
         # Nota: En versiones modernas de Python se recomienda datetime.now(timezone.utc)
         since = datetime.utcnow() - timedelta(days=days)
         
-        pipeline = [
+        return [
             {"$match": {
                 "user_id": user_id,
                 "timestamp": {"$gte": since}
@@ -32,20 +120,16 @@ class LogQueryService:
             }},
             {"$sort": {"_id.date": -1, "_id.hour": -1}}
         ]
-        
-        results = self.repository.aggregate(pipeline)
-        
-        return {
-            "user_id": user_id,
-            "period": f"{days}d",
-            "timeline": results
-        }
     
     def detect_brute_force_ongoing(self, threshold: int = 10) -> List[Dict]:
         """Detecta ataques de fuerza bruta EN VIVO"""
+        return self.repository.aggregate(self._brute_force_pipeline(threshold))
+
+    @staticmethod
+    def _brute_force_pipeline(threshold: int) -> List[Dict]:
         five_min_ago = datetime.utcnow() - timedelta(minutes=5)
         
-        pipeline = [
+        return [
             {"$match": {
                 "category": "security",
                 "action": {"$regex": "FAILED"},
@@ -62,17 +146,22 @@ class LogQueryService:
             }},
             {"$sort": {"attempts": -1}}
         ]
-        
-        return self.repository.aggregate(pipeline)
     
     def get_security_dashboard(self) -> Dict[str, Any]:
         """Dashboard de seguridad en tiempo real"""
+        result = self.repository.aggregate(self._security_dashboard_pipeline())
+        if result:
+            return result[0]
+        return {}
+
+    @staticmethod
+    def _security_dashboard_pipeline() -> List[Dict]:
         now = datetime.utcnow()
         one_hour_ago = now - timedelta(hours=1)
         one_day_ago = now - timedelta(days=1)
         
         # Pipeline paralelo con $facet
-        pipeline = [
+        return [
             {"$match": {
                 "category": "security",
                 "timestamp": {"$gte": one_day_ago}
@@ -108,8 +197,35 @@ class LogQueryService:
                 ]
             }}
         ]
-        
-        result = self.repository.aggregate(pipeline)
+
+
+class AsyncLogQueryService(LogQueryService):
+    """Las mismas consultas sobre AsyncMongoDBLogRepository (Motor), como corrutinas"""
+
+    async def search_page(
+        self, filters: Dict[str, Any], cursor: Optional[str] = None, limit: int = 100
+    ) -> Tuple[List[LogEntry], Optional[str]]:
+        logs = await self.repository.find_page(filters, self._decode_cursor(cursor), limit, self.max_time_ms)
+        return logs, self._next_cursor(logs, limit)
+
+    async def alerts_page(
+        self, severity: Optional[str] = None, cursor: Optional[str] = None, limit: int = 50
+    ) -> Tuple[List[LogEntry], Optional[str]]:
+        return await self.search_page(self._alert_filters(severity), cursor, limit)
+
+    async def stats(self, period: str = "24h", group_by: str = "category") -> Dict[str, Any]:
+        days = STATS_PERIODS[period] / timedelta(days=1)
+        return await self.repository.get_stats(days, group_by, self.max_time_ms)
+
+    async def get_user_timeline(self, user_id: str, days: int = 7) -> Dict[str, Any]:
+        results = await self.repository.aggregate(self._user_timeline_pipeline(user_id, days))
+        return self._user_timeline(user_id, days, results)
+
+    async def detect_brute_force_ongoing(self, threshold: int = 10) -> List[Dict]:
+        return await self.repository.aggregate(self._brute_force_pipeline(threshold))
+
+    async def get_security_dashboard(self) -> Dict[str, Any]:
+        result = await self.repository.aggregate(self._security_dashboard_pipeline())
         if result:
             return result[0]
-        return {}
\ No newline at end of file
+        return {}
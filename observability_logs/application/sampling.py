@@ -0,0 +1,164 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from ..domain.entities import LogEntry
+from ..domain.enums import LogLevel, LogCategory
+
+
+# Rutas distintas con contador propio; el resto se suma en OTHER_ROUTES
+MAX_COUNTER_ROUTES = 1000
+OTHER_ROUTES = "<otras>"
+
+
+def trace_fraction(trace_id: str) -> float:
+    """Valor estable en [0, 1) por trace: todos los logs de un trace reciben la misma decisión"""
+    digest = hashlib.blake2b(trace_id.encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big") / 2 ** 64
+
+
+class LogSampler:
+    """
+    Decide qué logs de requests se guardan.
+
+    - Head sampling por trace: se guarda si trace_fraction(trace_id) < tasa, con
+      tasa = tasa de la ruta (o default_rate) x tasa del status. Las rutas se
+      comparan con la plantilla (/productos/{id}): primero exacta, si no el
+      prefijo más largo. Los status admiten código ("404") o clase ("4xx").
+    - Siempre se guardan los niveles de `keep_levels` (error, critical) y las
+      categorías de `keep_categories` (security, authorization).
+    - Tail sampling: lo descartado queda `tail_window` segundos en un buffer por
+      trace; si en ese tiempo llega un log que se guarda siempre, se escribe el
+      trace completo y los logs siguientes de ese trace también se guardan.
+
+    Cada log guardado lleva metadata.sample_rate (1 si se guardó sin muestreo)
+    para que las estadísticas se puedan re-ponderar con 1 / sample_rate.
+    """
+
+    def __init__(
+        self,
+        default_rate: float = 1.0,
+        route_rates: Optional[Dict[str, float]] = None,
+        status_rates: Optional[Dict[str, float]] = None,
+        keep_levels: Iterable[str] = (LogLevel.ERROR.value, LogLevel.CRITICAL.value),
+        keep_categories: Iterable[str] = (LogCategory.SECURITY.value, LogCategory.AUTHORIZATION.value),
+        tail_window: float = 30.0,
+        tail_max_traces: int = 10000,
+    ):
+        self.default_rate = default_rate
+        self.route_rates = route_rates or {}
+        # Prefijos del más largo al más corto
+        self._route_prefixes = sorted(self.route_rates, key=len, reverse=True)
+        self.status_rates = status_rates or {}
+        self.keep_levels = set(keep_levels)
+        self.keep_categories = set(keep_categories)
+        self.tail_window = tail_window
+        self.tail_max_traces = tail_max_traces
+        # trace_id -> (primer descarte, logs descartados)
+        self._tail: "OrderedDict[str, Tuple[float, List[LogEntry]]]" = OrderedDict()
+        # Traces con un log que se guarda siempre: el resto del trace también
+        self._kept_traces: "OrderedDict[str, float]" = OrderedDict()
+        self._lock = threading.Lock()
+        # route -> [vistos, guardados]
+        self.counters: Dict[str, List[int]] = {}
+        self.tail_recovered = 0
+
+    # ---------- tasas ----------
+
+    def route_rate(self, route: str) -> float:
+        if route in self.route_rates:
+            return self.route_rates[route]
+        for prefix in self._route_prefixes:
+            if route.startswith(prefix):
+                return self.route_rates[prefix]
+        return self.default_rate
+
+    def status_rate(self, status_code: Optional[int]) -> float:
+        if status_code is None:
+            return 1.0
+        code = str(status_code)
+        if code in self.status_rates:
+            return self.status_rates[code]
+        return self.status_rates.get(f"{code[0]}xx", 1.0)
+
+    @staticmethod
+    def _route(log: LogEntry) -> str:
+        return log.metadata.get("route") or log.metadata.get("path") or log.endpoint or ""
+
+    def _always_keep(self, log: LogEntry) -> bool:
+        return log.level in self.keep_levels or log.category in self.keep_categories
+
+    # ---------- decisión ----------
+
+    def keep_trace(self, trace_id: str):
+        """Marca el trace para guardarlo completo (ej. se registró un request lento)"""
+        with self._lock:
+            self._mark_kept(trace_id, time.monotonic())
+
+    def sample(self, log: LogEntry) -> List[LogEntry]:
+        """Logs a escribir ahora: [] si se descarta, o [log] más lo que el tail buffer tenía de su trace"""
+        route = self._route(log)
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            counter = self._counter(route)
+            counter[0] += 1
+
+            if self._always_keep(log) or log.trace_id in self._kept_traces:
+                self._mark_kept(log.trace_id, now)
+                rate = 1.0
+                recovered = self._tail.pop(log.trace_id, (now, []))[1]
+                self.tail_recovered += len(recovered)
+                for entry in recovered:
+                    self._counter(self._route(entry))[1] += 1
+            else:
+                rate = self.route_rate(route) * self.status_rate(log.metadata.get("status_code"))
+                if trace_fraction(log.trace_id) >= rate:
+                    self._buffer(log, now)
+                    return []
+                recovered = []
+            counter[1] += 1
+
+        log.metadata["sample_rate"] = rate
+        for entry in recovered:
+            # Guardado por tail sampling: representa solo a sí mismo
+            entry.metadata["sample_rate"] = 1.0
+        return recovered + [log]
+
+    def _counter(self, route: str) -> List[int]:
+        # Los 404 traen la URL cruda: se acota la cantidad de rutas distintas
+        if route not in self.counters and len(self.counters) >= MAX_COUNTER_ROUTES:
+            route = OTHER_ROUTES
+        return self.counters.setdefault(route, [0, 0])
+
+    def _buffer(self, log: LogEntry, now: float):
+        if not self.tail_window:
+            return
+        first_seen, logs = self._tail.get(log.trace_id, (now, []))
+        logs.append(log)
+        self._tail[log.trace_id] = (first_seen, logs)
+        while len(self._tail) > self.tail_max_traces:
+            self._tail.popitem(last=False)
+
+    def _mark_kept(self, trace_id: str, now: float):
+        self._kept_traces[trace_id] = now
+        self._kept_traces.move_to_end(trace_id)
+        while len(self._kept_traces) > self.tail_max_traces:
+            self._kept_traces.popitem(last=False)
+
+    def _expire(self, now: float):
+        limit = now - self.tail_window
+        while self._tail and next(iter(self._tail.values()))[0] < limit:
+            self._tail.popitem(last=False)
+        while self._kept_traces and next(iter(self._kept_traces.values())) < limit:
+            self._kept_traces.popitem(last=False)
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Vistos / guardados por ruta y la tasa efectiva (para re-ponderar agregados)"""
+        with self._lock:
+            return {
+                route: {"seen": seen, "kept": kept, "effective_rate": round(kept / seen, 4) if seen else 1.0}
+                for route, (seen, kept) in self.counters.items()
+            }
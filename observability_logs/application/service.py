@@ -26,4 +26,21 @@ class ObservabilityLogService:
         
         if self.event_publisher and saved_logs:
             for log in saved_logs:
-                self.event_publisher.publish(LogCreated(log_entry=log))
\ No newline at end of file
+                self.event_publisher.publish(LogCreated(log_entry=log))
+
+
+class AsyncObservabilityLogService(ObservabilityLogService):
+    """Mismo servicio sobre AsyncMongoDBLogRepository (Motor): write y write_many son corrutinas"""
+
+    async def write(self, log_entry: LogEntry) -> None:
+        saved_log = await self.repository.save(log_entry)
+
+        if self.event_publisher:
+            self.event_publisher.publish(LogCreated(log_entry=saved_log))
+
+    async def write_many(self, log_entries: List[LogEntry]) -> None:
+        saved_logs = await self.repository.save_many(log_entries)
+
+        if self.event_publisher and saved_logs:
+            for log in saved_logs:
+                self.event_publisher.publish(LogCreated(log_entry=log))
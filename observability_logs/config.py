@@ -1,4 +1,6 @@
 # observability_logs/config.py
+from typing import Dict, List, Literal
+
 from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -17,12 +19,44 @@ class ObservabilityConfig(BaseSettings):
         "observability_logs", 
         validation_alias="OBS_MONGODB_COLLECTION"
     )
+    # sync: pymongo (bloqueante) | async: Motor, no bloquea el event loop
+    mongodb_driver: Literal["sync", "async"] = Field("sync", validation_alias="OBS_MONGODB_DRIVER")
     log_retention_days: int = Field(90, validation_alias="OBS_LOG_RETENTION_DAYS")
     ws_enabled: bool = Field(True, validation_alias="OBS_WS_ENABLED")
     ws_max_connections: int = Field(1000, validation_alias="OBS_WS_MAX_CONNECTIONS")
     alerts_enabled: bool = Field(True, validation_alias="OBS_ALERTS_ENABLED")
     alert_check_interval: int = Field(60, validation_alias="OBS_ALERT_CHECK_INTERVAL")
 
+    # Un documento por request (span) en vez de REQUEST_START + REQUEST_END;
+    # el inicio solo se registra si el request supera slow_request_ms (0 = nunca)
+    span_mode: bool = Field(True, validation_alias="OBS_SPAN_MODE")
+    slow_request_ms: int = Field(1000, validation_alias="OBS_SLOW_REQUEST_MS")
+
+    # Muestreo de logs de requests (LogSampler). Tasa = ruta (o default) x status;
+    # errores y categorías de sample_keep_categories se guardan siempre.
+    # Ej: OBS_SAMPLE_RATES_BY_ROUTE='{"/productos/": 0.05}'  OBS_SAMPLE_RATES_BY_STATUS='{"2xx": 0.5}'
+    sampling_enabled: bool = Field(False, validation_alias="OBS_SAMPLING_ENABLED")
+    sample_rate_default: float = Field(1.0, validation_alias="OBS_SAMPLE_RATE_DEFAULT")
+    sample_rates_by_route: Dict[str, float] = Field({}, validation_alias="OBS_SAMPLE_RATES_BY_ROUTE")
+    sample_rates_by_status: Dict[str, float] = Field({}, validation_alias="OBS_SAMPLE_RATES_BY_STATUS")
+    sample_keep_categories: List[str] = Field(["security", "authorization"], validation_alias="OBS_SAMPLE_KEEP_CATEGORIES")
+    # Tail sampling: segundos que se retiene lo descartado por si el trace termina en error
+    sample_tail_window: float = Field(30.0, validation_alias="OBS_SAMPLE_TAIL_WINDOW")
+    sample_tail_max_traces: int = Field(10000, validation_alias="OBS_SAMPLE_TAIL_MAX_TRACES")
+
+    # Escritura en lotes: el middleware encola y una tarea de fondo hace insert_many
+    batch_enabled: bool = Field(True, validation_alias="OBS_BATCH_ENABLED")
+    batch_max_queue: int = Field(10000, validation_alias="OBS_BATCH_MAX_QUEUE")
+    batch_size: int = Field(500, validation_alias="OBS_BATCH_SIZE")
+    batch_flush_interval: float = Field(1.0, validation_alias="OBS_BATCH_FLUSH_INTERVAL")
+    # drop_oldest | sample | block
+    batch_policy: str = Field("drop_oldest", validation_alias="OBS_BATCH_POLICY")
+    batch_sample_rate: float = Field(0.1, validation_alias="OBS_BATCH_SAMPLE_RATE")
+
+    # maxTimeMS de las consultas de /admin/logs (listado, alertas, stats) y del export
+    query_max_time_ms: int = Field(5000, validation_alias="OBS_QUERY_MAX_TIME_MS")
+    export_max_time_ms: int = Field(60000, validation_alias="OBS_EXPORT_MAX_TIME_MS")
+
     # 🔥 SOLUCIÓN: Añadir "extra": "ignore" para que no explote con variables de otras DBs
     model_config = SettingsConfigDict(
         env_file=".env",
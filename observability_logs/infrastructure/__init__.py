@@ -3,12 +3,14 @@
 from .mongodb.connection import mongodb_connection
 from .mongodb.repository import MongoDBLogRepository
 from .middleware import ObservabilityMiddleware
+from .batch_writer import BatchLogWriter
 from .websocket import WebSocketPublisher, SubscriptionType
 
 __all__ = [
     "mongodb_connection",
     "MongoDBLogRepository",
     "ObservabilityMiddleware",
+    "BatchLogWriter",
     "WebSocketPublisher",
     "SubscriptionType",
 ]
\ No newline at end of file
@@ -0,0 +1,171 @@
+import asyncio
+import inspect
+import logging
+import random
+import time
+from typing import Callable, List, Optional
+
+from ..domain.entities import LogEntry
+from ..domain.enums import LogLevel
+
+logger = logging.getLogger(__name__)
+
+# Políticas cuando la cola está llena
+DROP_OLDEST = "drop_oldest"  # descarta el log más viejo de la cola
+SAMPLE = "sample"            # desde la mitad de la cola guarda una muestra; errores siempre
+BLOCK = "block"              # el request espera lugar en la cola
+POLICIES = (DROP_OLDEST, SAMPLE, BLOCK)
+
+_SIEMPRE = {LogLevel.ERROR.value, LogLevel.CRITICAL.value}
+
+
+class BatchLogWriter:
+    """
+    Escritura de logs en lotes sin bloquear el event loop.
+
+    Expone `write()` como ObservabilityLogService, así que se le puede pasar al
+    middleware en su lugar: el log entra a una cola acotada y una tarea de fondo
+    la vacía con `save_many` (insert_many ordered=False) cada `batch_size` logs o
+    cada `flush_interval` segundos. Un `save_many` síncrono (pymongo) corre en un
+    thread; uno async (Motor) se espera directamente.
+    """
+
+    def __init__(
+        self,
+        save_many: Callable[[List[LogEntry]], object],
+        max_queue: int = 10000,
+        batch_size: int = 500,
+        flush_interval: float = 1.0,
+        policy: str = DROP_OLDEST,
+        sample_rate: float = 0.1,
+        shutdown_timeout: float = 10.0,
+    ):
+        if policy not in POLICIES:
+            raise ValueError(f"Política inválida: {policy} (usar {', '.join(POLICIES)})")
+        self.save_many = save_many
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.policy = policy
+        self.sample_rate = sample_rate
+        self.shutdown_timeout = shutdown_timeout
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        # Contadores para monitoreo y para estimar lo perdido
+        self.enqueued = 0
+        self.saved = 0
+        self.dropped = 0
+        self.failed = 0
+
+    @property
+    def queue(self) -> asyncio.Queue:
+        # Se crea en el event loop que la usa
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.max_queue)
+        return self._queue
+
+    # ---------- productor (middleware) ----------
+
+    async def write(self, log_entry: LogEntry) -> None:
+        """Encola el log; solo espera con la política BLOCK y la cola llena"""
+        queue = self.queue
+        if self.policy == SAMPLE and log_entry.level not in _SIEMPRE:
+            if queue.qsize() >= self.max_queue // 2 and random.random() >= self.sample_rate:
+                self.dropped += 1
+                return
+        if queue.full():
+            if self.policy == BLOCK:
+                await queue.put(log_entry)
+                self.enqueued += 1
+                return
+            if self.policy == SAMPLE and log_entry.level not in _SIEMPRE:
+                self.dropped += 1
+                return
+            # DROP_OLDEST, o un error con SAMPLE: se pierde el más viejo
+            queue.get_nowait()
+            queue.task_done()
+            self.dropped += 1
+        queue.put_nowait(log_entry)
+        self.enqueued += 1
+
+    # ---------- consumidor ----------
+
+    async def _next_batch(self) -> List[LogEntry]:
+        """Espera el primer log y junta hasta batch_size o hasta que pase flush_interval"""
+        queue = self.queue
+        batch = [await queue.get()]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(queue.get_nowait())
+                continue
+            except asyncio.QueueEmpty:
+                pass
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _flush(self, batch: List[LogEntry]):
+        try:
+            if inspect.iscoroutinefunction(self.save_many):
+                await self.save_many(batch)
+            else:
+                await asyncio.to_thread(self.save_many, batch)
+            self.saved += len(batch)
+        except Exception as e:
+            self.failed += len(batch)
+            logger.error(f"❌ Error guardando {len(batch)} logs: {e}")
+        finally:
+            for _ in batch:
+                self.queue.task_done()
+
+    async def _run(self):
+        while True:
+            await self._flush(await self._next_batch())
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+            logger.info(
+                f"🪵 Escritura de logs en lotes: cola {self.max_queue}, lotes de {self.batch_size}, "
+                f"cada {self.flush_interval}s, política {self.policy}"
+            )
+
+    async def stop(self):
+        """Detiene el consumidor y guarda lo que quedó en la cola (flush on shutdown)"""
+        if self._task is not None:
+            # Primero deja que el consumidor vacíe la cola, sin cortar un insert_many en curso
+            try:
+                await asyncio.wait_for(self.queue.join(), self.shutdown_timeout)
+            except asyncio.TimeoutError:
+                logger.error("❌ Timeout esperando que se vacíe la cola de logs")
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        pending: List[LogEntry] = []
+        while self._queue is not None and not self._queue.empty():
+            pending.append(self._queue.get_nowait())
+        try:
+            for i in range(0, len(pending), self.batch_size):
+                await asyncio.wait_for(self._flush(pending[i:i + self.batch_size]), self.shutdown_timeout)
+        except asyncio.TimeoutError:
+            logger.error("❌ Timeout guardando los logs pendientes al apagar")
+        logger.info(f"🪵 Escritura de logs detenida: {self.stats()}")
+
+    def stats(self) -> dict:
+        return {
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "enqueued": self.enqueued,
+            "saved": self.saved,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "policy": self.policy,
+        }
@@ -2,7 +2,10 @@ from fastapi import Request
 import jwt
 from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.responses import Response
+from datetime import datetime
 from typing import Dict, Optional
+import asyncio
+import inspect
 import time
 
 # ✅ CORRECCIÓN DE IMPORTS (Añadidos .. para indicar carpetas superiores)
@@ -23,12 +26,22 @@ class ObservabilityMiddleware(BaseHTTPMiddleware):
         app,
         log_service,
         ws_publisher=None,
-        exclude_paths: list = None
+        exclude_paths: list = None,
+        span_mode: bool = True,
+        slow_request_ms: int = 1000,
+        sampler=None
     ):
         super().__init__(app)
         self.log_service = log_service
         self.ws_publisher = ws_publisher
         self.exclude_paths = exclude_paths or ["/health", "/metrics", "/docs", "/redoc"]
+        # span_mode: un documento por request al terminar (REQUEST) en vez de START + END;
+        # REQUEST_START solo se escribe si el request sigue en curso tras slow_request_ms
+        self.span_mode = span_mode
+        self.slow_request_ms = slow_request_ms
+        self._slow_tasks = set()
+        # LogSampler opcional: decide qué logs se guardan (head/tail sampling por trace)
+        self.sampler = sampler
     
     async def dispatch(self, request: Request, call_next):
         # 1. Verificar exclusión
@@ -51,6 +64,9 @@ class ObservabilityMiddleware(BaseHTTPMiddleware):
         # 4. Guardar en request.state
         request.state.log_context = context
         request.state.trace_id = trace_id
+
+        if self.span_mode:
+            return await self._dispatch_span(request, call_next, context, trace_id)
         
         # 5. Log de inicio
         start_time = time.time()
@@ -68,7 +84,7 @@ class ObservabilityMiddleware(BaseHTTPMiddleware):
             }
         )
         
-        self.log_service.write(start_log)
+        await self._write(start_log)
         
         # 6. Publicar WebSocket
         if self.ws_publisher:
@@ -93,7 +109,7 @@ class ObservabilityMiddleware(BaseHTTPMiddleware):
                 }
             )
             
-            self.log_service.write(end_log)
+            await self._write(end_log)
             
             # 9. Añadir header de trazabilidad
             response.headers["X-Trace-ID"] = trace_id
@@ -117,13 +133,93 @@ class ObservabilityMiddleware(BaseHTTPMiddleware):
                 }
             )
             
-            self.log_service.write(error_log)
+            await self._write(error_log)
             
             if self.ws_publisher:
                 await self.ws_publisher.publish(error_log)
             
             raise
     
+    async def _dispatch_span(self, request: Request, call_next, context: LogContext, trace_id: str):
+        started_at = datetime.utcnow()
+        start_time = time.perf_counter()
+        slow_timer = None
+        if self.slow_request_ms:
+            slow_timer = asyncio.get_running_loop().call_later(
+                self.slow_request_ms / 1000, self._log_slow_start, request, context, started_at
+            )
+
+        try:
+            response = await call_next(request)
+        except Exception as e:
+            await self._write_span(request, context, started_at, start_time, 500, e)
+            raise
+        finally:
+            if slow_timer:
+                slow_timer.cancel()
+
+        await self._write_span(request, context, started_at, start_time, response.status_code)
+        response.headers["X-Trace-ID"] = trace_id
+        return response
+
+    async def _write_span(
+        self,
+        request: Request,
+        context: LogContext,
+        started_at: datetime,
+        start_time: float,
+        status_code: int,
+        error: Optional[Exception] = None
+    ):
+        # La plantilla de la ruta la deja el router en el scope (None si no hubo match)
+        route = getattr(request.scope.get("route"), "path", None) or request.url.path
+        span = LogFactory.create_span(
+            context=context,
+            method=request.method,
+            path=request.url.path,
+            route=route,
+            status_code=status_code,
+            started_at=started_at,
+            duration_ms=(time.perf_counter() - start_time) * 1000,
+            query_params=dict(request.query_params),
+            error=error
+        )
+        await self._write(span)
+
+        if self.ws_publisher:
+            await self.ws_publisher.publish(span)
+
+    def _log_slow_start(self, request: Request, context: LogContext, started_at: datetime):
+        """Timer del event loop: el request lleva más de slow_request_ms sin terminar"""
+        start_log = LogFactory.create(
+            level=LogLevel.WARNING,
+            category=LogCategory.SYSTEM,
+            action="REQUEST_START",
+            message=f"{request.method} {request.url.path} (en curso > {self.slow_request_ms} ms)",
+            context=context,
+            metadata={
+                "method": request.method,
+                "path": request.url.path,
+                "query_params": dict(request.query_params),
+                "started_at": started_at,
+                "slow_threshold_ms": self.slow_request_ms
+            }
+        )
+        if self.sampler:
+            # Un request lento se guarda completo: el span final no se muestrea
+            self.sampler.keep_trace(context.trace_id)
+        task = asyncio.ensure_future(self._write(start_log))
+        self._slow_tasks.add(task)
+        task.add_done_callback(self._slow_tasks.discard)
+
+    async def _write(self, log_entry):
+        """ObservabilityLogService escribe en el momento; BatchLogWriter solo encola"""
+        entries = self.sampler.sample(log_entry) if self.sampler else [log_entry]
+        for entry in entries:
+            result = self.log_service.write(entry)
+            if inspect.isawaitable(result):
+                await result
+
     def _get_trace_id(self, request: Request) -> str:
         """Obtiene trace_id de headers o genera uno nuevo"""
         trace_id = request.headers.get("X-Trace-ID")
@@ -0,0 +1,79 @@
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorCollection, AsyncIOMotorDatabase
+from typing import Optional
+
+from observability_logs.config import ObservabilityConfig
+from pymongo.errors import OperationFailure
+
+from observability_logs.infrastructure.mongodb.connection import LEGACY_INDEXES, index_specs
+
+
+class AsyncMongoDBConnection:
+    """Singleton para conexión a MongoDB con Motor (no bloquea el event loop)"""
+
+    _instance: Optional["AsyncMongoDBConnection"] = None
+    _client: Optional[AsyncIOMotorClient] = None
+    _db: Optional[AsyncIOMotorDatabase] = None
+    _config: Optional[ObservabilityConfig] = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+        return cls._instance
+
+    def initialize(self, config: ObservabilityConfig):
+        """Crea el cliente; los índices se crean en create_indexes() (necesita event loop)"""
+        self._config = config
+        if self._client is None:
+            self._client = AsyncIOMotorClient(
+                config.mongodb_uri,
+                maxPoolSize=50,
+                serverSelectionTimeoutMS=5000
+            )
+            self._db = self._client[config.mongodb_database]
+
+    async def create_indexes(self):
+        """Crea índices para búsquedas eficientes"""
+        for keys, options in index_specs(self._config):
+            await self.logs.create_index(keys, **options)
+        existing = await self.logs.index_information()
+        for name in LEGACY_INDEXES:
+            if name in existing:
+                try:
+                    await self.logs.drop_index(name)
+                except OperationFailure:
+                    pass  # otro worker ya lo eliminó
+
+    @property
+    def db(self) -> AsyncIOMotorDatabase:
+        if self._db is None:
+            raise RuntimeError("MongoDB no inicializado. Llama initialize() primero.")
+        return self._db
+
+    @property
+    def logs(self) -> AsyncIOMotorCollection:
+        return self.db[self._get_collection_name()]
+
+    def _get_collection_name(self) -> str:
+        if self._config:
+            return self._config.mongodb_collection
+        return "observability_logs"
+
+    async def is_connected(self) -> bool:
+        try:
+            if self._client:
+                await self._client.admin.command('ping')
+                return True
+            return False
+        except Exception:
+            return False
+
+    def close(self):
+        if self._client:
+            self._client.close()
+            self._client = None
+            self._db = None
+            self._config = None
+
+
+# Singleton
+async_mongodb_connection = AsyncMongoDBConnection()
@@ -0,0 +1,146 @@
+from typing import AsyncIterator, List, Optional, Dict, Any, Tuple
+from datetime import datetime, timedelta
+from motor.motor_asyncio import AsyncIOMotorCollection
+from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING
+
+from observability_logs.domain.entities import LogEntry
+from observability_logs.infrastructure.mongodb.async_connection import async_mongodb_connection
+from observability_logs.infrastructure.mongodb.repository import (
+    build_log_query,
+    stats_from_facet,
+    stats_pipeline,
+    to_document,
+    to_entity,
+)
+
+# Documentos por ida y vuelta al servidor al recorrer un cursor
+CURSOR_BATCH_SIZE = 500
+
+
+class AsyncMongoDBLogRepository:
+    """
+    Mismo contrato que MongoDBLogRepository pero con Motor: los métodos son
+    corrutinas y no bloquean el event loop. `stream()` y `stream_aggregate()`
+    recorren el cursor por lotes sin armar la lista completa; los métodos que
+    devuelven listas se apoyan en ellos.
+    """
+
+    def __init__(self):
+        self.collection: AsyncIOMotorCollection = async_mongodb_connection.logs
+
+    async def is_connected(self) -> bool:
+        return await async_mongodb_connection.is_connected()
+
+    async def save(self, log: LogEntry) -> LogEntry:
+        """Guarda un log en MongoDB"""
+        result = await self.collection.insert_one(to_document(log))
+        log.id = str(result.inserted_id)
+        return log
+
+    async def save_many(self, logs: List[LogEntry]) -> List[LogEntry]:
+        if not logs:
+            return []
+
+        # ordered=False: un documento inválido no corta el resto del lote
+        result = await self.collection.insert_many([to_document(log) for log in logs], ordered=False)
+
+        for log, _id in zip(logs, result.inserted_ids):
+            log.id = str(_id)
+
+        return logs
+
+    # ---------- streaming ----------
+
+    async def stream(
+        self,
+        query: Dict[str, Any],
+        sort: int = DESCENDING,
+        limit: int = 0,
+        hint: Any = None,
+        max_time_ms: Optional[int] = None,
+    ) -> AsyncIterator[LogEntry]:
+        """Recorre los logs de `query` ordenados por (timestamp, _id) sin cargarlos todos en memoria"""
+        cursor = self.collection.find(query).sort([("timestamp", sort), ("_id", sort)]).batch_size(CURSOR_BATCH_SIZE)
+        if limit:
+            cursor = cursor.limit(limit)
+        if hint:
+            cursor = cursor.hint(hint)
+        if max_time_ms:
+            cursor = cursor.max_time_ms(max_time_ms)
+        async for doc in cursor:
+            yield to_entity(doc)
+
+    def stream_filtered(
+        self,
+        filters: Dict[str, Any],
+        after: Optional[Tuple[datetime, ObjectId]] = None,
+        limit: int = 0,
+        max_time_ms: Optional[int] = None,
+    ) -> AsyncIterator[LogEntry]:
+        """Logs que cumplen `filters` (ver build_log_query), del más nuevo al más viejo"""
+        query, hint = build_log_query(filters, after)
+        return self.stream(query, limit=limit, hint=hint, max_time_ms=max_time_ms)
+
+    async def find_page(
+        self,
+        filters: Dict[str, Any],
+        after: Optional[Tuple[datetime, ObjectId]] = None,
+        limit: int = 100,
+        max_time_ms: Optional[int] = None,
+    ) -> List[LogEntry]:
+        return [log async for log in self.stream_filtered(filters, after, limit, max_time_ms)]
+
+    async def stream_aggregate(
+        self,
+        pipeline: List[Dict[str, Any]],
+        max_time_ms: Optional[int] = None,
+    ) -> AsyncIterator[Dict]:
+        options = {"maxTimeMS": max_time_ms} if max_time_ms else {}
+        async for doc in self.collection.aggregate(pipeline, batchSize=CURSOR_BATCH_SIZE, **options):
+            yield doc
+
+    # ---------- consultas ----------
+
+    async def find_by_trace_id(self, trace_id: str) -> List[LogEntry]:
+        return [log async for log in self.stream({"trace_id": trace_id}, sort=ASCENDING)]
+
+    async def find_by_user(self, user_id: str, since: Optional[datetime] = None) -> List[LogEntry]:
+        query = {"user_id": user_id}
+        if since:
+            query["timestamp"] = {"$gte": since}
+        return [log async for log in self.stream(query)]
+
+    async def find_by_ip(self, ip: str, since: Optional[datetime] = None) -> List[LogEntry]:
+        query = {"ip": ip}
+        if since:
+            query["timestamp"] = {"$gte": since}
+        return [log async for log in self.stream(query)]
+
+    async def get_since(self, since: datetime) -> List[LogEntry]:
+        return [log async for log in self.stream({"timestamp": {"$gte": since}})]
+
+    async def search(self, query: Dict[str, Any], limit: int = 100) -> List[LogEntry]:
+        return [log async for log in self.stream(query, limit=limit)]
+
+    async def aggregate(self, pipeline: List[Dict[str, Any]]) -> List[Dict]:
+        return [doc async for doc in self.stream_aggregate(pipeline)]
+
+    async def count_by_category(self, since: datetime) -> Dict[str, int]:
+        pipeline = [
+            {"$match": {"timestamp": {"$gte": since}}},
+            {"$group": {"_id": "$category", "count": {"$sum": 1}}},
+            {"$sort": {"count": -1}}
+        ]
+
+        return {doc["_id"]: doc["count"] async for doc in self.stream_aggregate(pipeline)}
+
+    async def get_stats(
+        self,
+        days: float = 7,
+        group_by: str = "category",
+        max_time_ms: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        since = datetime.utcnow() - timedelta(days=days)
+        result = [doc async for doc in self.stream_aggregate(stats_pipeline(since, group_by), max_time_ms)]
+        return stats_from_facet(days, result[0] if result else {})
@@ -1,11 +1,47 @@
 from pymongo import MongoClient, ASCENDING, DESCENDING, TEXT
+from pymongo.errors import OperationFailure
 from pymongo.database import Database
 from pymongo.collection import Collection
-from typing import Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 from observability_logs.config import ObservabilityConfig
 
 
+# Índices de los listados por keyset: filtro de igualdad + (timestamp, _id), así el
+# orden de la paginación sale del índice (sin SORT en memoria)
+TIMESTAMP_INDEX = [("timestamp", DESCENDING), ("_id", DESCENDING)]
+KEYSET_INDEXES = {
+    "trace_id": [("trace_id", ASCENDING)],
+    "user_id": [("user_id", ASCENDING), *TIMESTAMP_INDEX],
+    "ip": [("ip", ASCENDING), *TIMESTAMP_INDEX],
+    "category": [("category", ASCENDING), *TIMESTAMP_INDEX],
+    "level": [("level", ASCENDING), *TIMESTAMP_INDEX],
+}
+
+# Reemplazados por los de KEYSET_INDEXES (son prefijos suyos): se eliminan al
+# crear índices para no mantener dos veces la misma clave en cada insert
+LEGACY_INDEXES = (
+    "user_id_1", "ip_1", "timestamp_-1",
+    "category_1_timestamp_-1", "level_1_timestamp_-1",
+    "user_id_1_timestamp_-1", "ip_1_timestamp_-1",
+)
+
+
+def index_specs(config: ObservabilityConfig) -> List[Tuple[Any, Dict[str, Any]]]:
+    """Índices de la colección de logs (compartidos por la conexión sync y la async)"""
+    return [
+        # trace_id y compuestos terminados en (timestamp, _id)
+        *[(keys, {}) for keys in KEYSET_INDEXES.values()],
+        (TIMESTAMP_INDEX, {}),
+
+        # Índice de texto
+        ([("message", TEXT), ("action", TEXT)], {}),
+
+        # TTL (expiración automática)
+        ("timestamp", {"expireAfterSeconds": config.log_retention_days * 86400}),
+    ]
+
+
 class MongoDBConnection:
     """Singleton para conexión a MongoDB"""
 
@@ -30,38 +66,15 @@ class MongoDBConnection:
     def _create_indexes(self, config: ObservabilityConfig):
         """Crea índices para búsquedas eficientes"""
         collection = self._db[config.mongodb_collection]
-
-        # Índices simples
-        collection.create_index([("trace_id", ASCENDING)])
-        collection.create_index([("user_id", ASCENDING)])
-        collection.create_index([("ip", ASCENDING)])
-        collection.create_index([("timestamp", DESCENDING)])
-
-        # Índices compuestos
-        collection.create_index([("category", ASCENDING), ("timestamp", DESCENDING)])
-        collection.create_index([("level", ASCENDING), ("timestamp", DESCENDING)])
-
-        collection.create_index([
-            ("user_id", ASCENDING),
-            ("timestamp", DESCENDING)
-        ])
-
-        collection.create_index([
-            ("ip", ASCENDING),
-            ("timestamp", DESCENDING)
-        ])
-
-        # Índice de texto
-        collection.create_index([
-            ("message", TEXT),
-            ("action", TEXT)
-        ])
-
-        # TTL (expiración automática)
-        collection.create_index(
-            "timestamp",
-            expireAfterSeconds=config.log_retention_days * 86400
-        )
+        for keys, options in index_specs(config):
+            collection.create_index(keys, **options)
+        existing = collection.index_information()
+        for name in LEGACY_INDEXES:
+            if name in existing:
+                try:
+                    collection.drop_index(name)
+                except OperationFailure:
+                    pass  # otro worker ya lo eliminó
 
     @property
     def db(self) -> Database:
@@ -1,11 +1,164 @@
-from typing import List, Optional, Dict, Any
+from typing import Iterator, List, Optional, Dict, Any, Tuple
 from datetime import datetime, timedelta
 from pymongo.collection import Collection
 from pymongo import ASCENDING, DESCENDING
 from bson import ObjectId
 
 from observability_logs.domain.entities import LogEntry
-from observability_logs.infrastructure.mongodb.connection import mongodb_connection
+from observability_logs.infrastructure.mongodb.connection import KEYSET_INDEXES, TIMESTAMP_INDEX, mongodb_connection
+
+# Orden del keyset: (timestamp, _id) descendente, servido por los índices de KEYSET_INDEXES
+KEYSET_SORT = [("timestamp", DESCENDING), ("_id", DESCENDING)]
+# Filtros de igualdad que admite build_log_query
+FILTER_FIELDS = ("trace_id", "user_id", "ip", "category", "level", "action")
+# Índice a usar según el filtro presente, del más selectivo al menos selectivo
+INDEX_PRIORITY = ("trace_id", "user_id", "ip", "category", "level")
+RARE_LEVELS = ("error", "critical")
+
+
+def to_document(log: LogEntry) -> Dict[str, Any]:
+    """LogEntry -> documento de MongoDB (lo comparten el repositorio sync y el async)"""
+    return {
+        "trace_id": log.trace_id,
+        "level": log.level,
+        "category": log.category,
+        "action": log.action,
+        "message": log.message,
+        "user_id": log.user_id,
+        "role": log.role,
+        "ip": log.ip,
+        "endpoint": log.endpoint,
+        "metadata": log.metadata,
+        "timestamp": log.timestamp,
+        "created_at": datetime.utcnow()
+    }
+
+
+def to_entity(doc: Dict) -> LogEntry:
+    return LogEntry(
+        id=str(doc["_id"]),
+        trace_id=doc["trace_id"],
+        level=doc["level"],
+        category=doc["category"],
+        action=doc["action"],
+        message=doc["message"],
+        user_id=doc.get("user_id"),
+        role=doc.get("role"),
+        ip=doc.get("ip"),
+        endpoint=doc.get("endpoint"),
+        metadata=doc.get("metadata", {}),
+        timestamp=doc["timestamp"]
+    )
+
+
+def build_log_query(
+    filters: Dict[str, Any],
+    after: Optional[Tuple[datetime, ObjectId]] = None
+) -> Tuple[Dict[str, Any], Any]:
+    """
+    Query y hint para listar logs por keyset (timestamp, _id) descendente.
+
+    `filters`: campos de FILTER_FIELDS más from_date / to_date. `after` es la
+    clave del último log de la página anterior. El hint es el índice compuesto
+    (campo, timestamp, _id) del filtro más selectivo, así el rango de fechas y
+    el orden salen del índice y los demás filtros se aplican sobre él.
+    """
+    query: Dict[str, Any] = {
+        field: filters[field] for field in FILTER_FIELDS if filters.get(field) is not None
+    }
+    timestamp: Dict[str, Any] = {}
+    if filters.get("from_date"):
+        timestamp["$gte"] = filters["from_date"]
+    if filters.get("to_date"):
+        timestamp["$lte"] = filters["to_date"]
+    if after:
+        after_timestamp, after_id = after
+        # El límite superior acota el índice; el $or solo desempata el mismo timestamp
+        if "$lte" not in timestamp or after_timestamp < timestamp["$lte"]:
+            timestamp["$lte"] = after_timestamp
+        query["$or"] = [{"timestamp": {"$lt": after_timestamp}}, {"_id": {"$lt": after_id}}]
+    if timestamp:
+        query["timestamp"] = timestamp
+
+    priority = INDEX_PRIORITY
+    if query.get("level") in RARE_LEVELS:
+        # error/critical son pocos: el índice de level descarta más que el de category
+        priority = ("trace_id", "user_id", "ip", "level", "category")
+    field = next((f for f in priority if f in query), None)
+    return query, KEYSET_INDEXES[field] if field else TIMESTAMP_INDEX
+
+
+def stats_pipeline(since: datetime, group_by: str = "category") -> List[Dict[str, Any]]:
+    """Un solo $facet: totales, errores, por nivel/categoría y top usuarios/IPs"""
+    return [
+        {"$match": {"timestamp": {"$gte": since}}},
+        {"$facet": {
+            "by_level": [
+                {"$group": {"_id": "$level", "count": {"$sum": 1}}}
+            ],
+            "by_category": [
+                {"$group": {"_id": "$category", "count": {"$sum": 1}}}
+            ],
+            "top_users": [
+                {"$group": {"_id": "$user_id", "count": {"$sum": 1}}},
+                {"$sort": {"count": -1}},
+                {"$limit": 10}
+            ],
+            "top_ips": [
+                {"$group": {"_id": "$ip", "count": {"$sum": 1}}},
+                {"$sort": {"count": -1}},
+                {"$limit": 10}
+            ],
+            "errors": [
+                {"$match": {"level": {"$in": ["error", "critical"]}}},
+                {"$count": "count"}
+            ],
+            "total": [
+                {"$count": "count"}
+            ],
+            # Con muestreo cada documento representa 1 / sample_rate logs
+            "estimated_total": [
+                {"$group": {"_id": None, "count": {"$sum": {
+                    "$divide": [1, {"$ifNull": ["$metadata.sample_rate", 1]}]
+                }}}}
+            ],
+            "unique_users": [
+                {"$group": {"_id": "$user_id"}},
+                {"$count": "count"}
+            ],
+            "unique_ips": [
+                {"$group": {"_id": "$ip"}},
+                {"$count": "count"}
+            ],
+            **({"by_action": [
+                {"$group": {"_id": "$action", "count": {"$sum": 1}}},
+                {"$sort": {"count": -1}},
+                {"$limit": 50}
+            ]} if group_by == "action" else {})
+        }}
+    ]
+
+
+def stats_from_facet(days: float, result: Dict[str, Any]) -> Dict[str, Any]:
+    # Sin documentos, $count devuelve una lista vacía
+    def count(facet: str):
+        return (result.get(facet) or [{}])[0].get("count", 0)
+
+    stats = {
+        "period_days": days,
+        "total": count("total"),
+        "errors": count("errors"),
+        "estimated_total": round(count("estimated_total")),
+        "unique_users": count("unique_users"),
+        "unique_ips": count("unique_ips"),
+        "by_level": {i["_id"]: i["count"] for i in result.get("by_level", [])},
+        "by_category": {i["_id"]: i["count"] for i in result.get("by_category", [])},
+        "top_users": result.get("top_users", []),
+        "top_ips": result.get("top_ips", [])
+    }
+    if "by_action" in result:
+        stats["by_action"] = {i["_id"]: i["count"] for i in result["by_action"]}
+    return stats
 
 
 class MongoDBLogRepository:
@@ -31,20 +184,7 @@ class MongoDBLogRepository:
 
     def save(self, log: LogEntry) -> LogEntry:
         """Guarda un log en MongoDB"""
-        log_dict = {
-            "trace_id": log.trace_id,
-            "level": log.level,
-            "category": log.category,
-            "action": log.action,
-            "message": log.message,
-            "user_id": log.user_id,
-            "role": log.role,
-            "ip": log.ip,
-            "endpoint": log.endpoint,
-            "metadata": log.metadata,
-            "timestamp": log.timestamp,
-            "created_at": datetime.utcnow()
-        }
+        log_dict = to_document(log)
 
         result = self.collection.insert_one(log_dict)
         log.id = str(result.inserted_id)
@@ -55,24 +195,10 @@ class MongoDBLogRepository:
         if not logs:
             return []
 
-        docs = []
-        for log in logs:
-            docs.append({
-                "trace_id": log.trace_id,
-                "level": log.level,
-                "category": log.category,
-                "action": log.action,
-                "message": log.message,
-                "user_id": log.user_id,
-                "role": log.role,
-                "ip": log.ip,
-                "endpoint": log.endpoint,
-                "metadata": log.metadata,
-                "timestamp": log.timestamp,
-                "created_at": datetime.utcnow()
-            })
-
-        result = self.collection.insert_many(docs)
+        docs = [to_document(log) for log in logs]
+
+        # ordered=False: un documento inválido no corta el resto del lote
+        result = self.collection.insert_many(docs, ordered=False)
 
         for log, _id in zip(logs, result.inserted_ids):
             log.id = str(_id)
@@ -109,6 +235,45 @@ class MongoDBLogRepository:
 
         return [self._document_to_entity(doc) for doc in cursor]
 
+    def stream(
+        self,
+        query: Dict[str, Any],
+        sort: int = DESCENDING,
+        limit: int = 0,
+        hint: Any = None,
+        max_time_ms: Optional[int] = None,
+    ) -> Iterator[LogEntry]:
+        """Recorre los logs de `query` ordenados por (timestamp, _id) sin cargarlos todos en memoria"""
+        cursor = self.collection.find(query).sort([("timestamp", sort), ("_id", sort)]).batch_size(500)
+        if limit:
+            cursor = cursor.limit(limit)
+        if hint:
+            cursor = cursor.hint(hint)
+        if max_time_ms:
+            cursor = cursor.max_time_ms(max_time_ms)
+        for doc in cursor:
+            yield self._document_to_entity(doc)
+
+    def stream_filtered(
+        self,
+        filters: Dict[str, Any],
+        after: Optional[Tuple[datetime, ObjectId]] = None,
+        limit: int = 0,
+        max_time_ms: Optional[int] = None,
+    ) -> Iterator[LogEntry]:
+        """Logs que cumplen `filters` (ver build_log_query), del más nuevo al más viejo"""
+        query, hint = build_log_query(filters, after)
+        return self.stream(query, limit=limit, hint=hint, max_time_ms=max_time_ms)
+
+    def find_page(
+        self,
+        filters: Dict[str, Any],
+        after: Optional[Tuple[datetime, ObjectId]] = None,
+        limit: int = 100,
+        max_time_ms: Optional[int] = None,
+    ) -> List[LogEntry]:
+        return list(self.stream_filtered(filters, after, limit, max_time_ms))
+
     def search(self, query: Dict[str, Any], limit: int = 100) -> List[LogEntry]:
         cursor = self.collection.find(query).sort("timestamp", DESCENDING).limit(limit)
         return [self._document_to_entity(doc) for doc in cursor]
@@ -125,62 +290,16 @@ class MongoDBLogRepository:
 
         return {doc["_id"]: doc["count"] for doc in self.collection.aggregate(pipeline)}
 
-    def get_stats(self, days: int = 7) -> Dict[str, Any]:
+    def get_stats(
+        self,
+        days: float = 7,
+        group_by: str = "category",
+        max_time_ms: Optional[int] = None,
+    ) -> Dict[str, Any]:
         since = datetime.utcnow() - timedelta(days=days)
-
-        pipeline = [
-            {"$match": {"timestamp": {"$gte": since}}},
-            {"$facet": {
-                "by_level": [
-                    {"$group": {"_id": "$level", "count": {"$sum": 1}}}
-                ],
-                "by_category": [
-                    {"$group": {"_id": "$category", "count": {"$sum": 1}}}
-                ],
-                "top_users": [
-                    {"$group": {"_id": "$user_id", "count": {"$sum": 1}}},
-                    {"$sort": {"count": -1}},
-                    {"$limit": 10}
-                ],
-                "top_ips": [
-                    {"$group": {"_id": "$ip", "count": {"$sum": 1}}},
-                    {"$sort": {"count": -1}},
-                    {"$limit": 10}
-                ],
-                "errors": [
-                    {"$match": {"level": {"$in": ["error", "critical"]}}},
-                    {"$count": "count"}
-                ],
-                "total": [
-                    {"$count": "count"}
-                ]
-            }}
-        ]
-
-        result = next(self.collection.aggregate(pipeline), {})
-
-        return {
-            "period_days": days,
-            "total": result.get("total", [{}])[0].get("count", 0),
-            "errors": result.get("errors", [{}])[0].get("count", 0),
-            "by_level": {i["_id"]: i["count"] for i in result.get("by_level", [])},
-            "by_category": {i["_id"]: i["count"] for i in result.get("by_category", [])},
-            "top_users": result.get("top_users", []),
-            "top_ips": result.get("top_ips", [])
-        }
+        options = {"maxTimeMS": max_time_ms} if max_time_ms else {}
+        result = next(self.collection.aggregate(stats_pipeline(since, group_by), **options), {})
+        return stats_from_facet(days, result)
 
     def _document_to_entity(self, doc: Dict) -> LogEntry:
-        return LogEntry(
-            id=str(doc["_id"]),
-            trace_id=doc["trace_id"],
-            level=doc["level"],
-            category=doc["category"],
-            action=doc["action"],
-            message=doc["message"],
-            user_id=doc.get("user_id"),
-            role=doc.get("role"),
-            ip=doc.get("ip"),
-            endpoint=doc.get("endpoint"),
-            metadata=doc.get("metadata", {}),
-            timestamp=doc["timestamp"]
-        )
+        return to_entity(doc)
@@ -1,114 +1,271 @@
-from fastapi import APIRouter, Depends, Query, HTTPException
-from typing import Optional, List
-from datetime import datetime, timedelta
+from fastapi import APIRouter, Depends, Query, HTTPException, status
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from pymongo.errors import ExecutionTimeout
+from typing import Any, AsyncIterator, Dict, List, Optional
+from datetime import datetime
+from itertools import islice
+import csv
+import inspect
+import io
+import json
+import logging
+
+from core.pagination import NEXT_CURSOR_HEADER, CursorInvalidoError
+
+from ..domain.entities import LogEntry
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/admin/logs", tags=["observability"])
 
+# LogQueryService o AsyncLogQueryService, según OBS_MONGODB_DRIVER (lo fija main.py)
+_query_service = None
+
+EXPORT_CHUNK = 500
+CSV_FIELDS = ["timestamp", "level", "category", "action", "message", "trace_id",
+              "user_id", "role", "ip", "endpoint", "metadata"]
+
+
+def configure_query_service(query_service):
+    global _query_service
+    _query_service = query_service
+
+
+def get_query_service():
+    if _query_service is None:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Observabilidad no inicializada")
+    return _query_service
+
+
+async def _call(method, *args):
+    """Los métodos del servicio sync (pymongo) corren en el threadpool; los async se esperan"""
+    try:
+        if inspect.iscoroutinefunction(method):
+            return await method(*args)
+        return await run_in_threadpool(method, *args)
+    except CursorInvalidoError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except ExecutionTimeout:
+        raise HTTPException(
+            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+            detail="La consulta superó el tiempo máximo: acotar fechas o filtrar por usuario, IP o categoría"
+        )
+
+
+async def _chunks(iterator, size: int = EXPORT_CHUNK) -> AsyncIterator[List[LogEntry]]:
+    """Agrupa un cursor sync (un salto al threadpool por lote) o async en listas de `size`"""
+    if hasattr(iterator, "__aiter__"):
+        chunk = []
+        async for item in iterator:
+            chunk.append(item)
+            if len(chunk) == size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+        return
+    while True:
+        chunk = await run_in_threadpool(lambda: list(islice(iterator, size)))
+        if not chunk:
+            return
+        yield chunk
+
+
+async def _first(chunks: AsyncIterator[List[LogEntry]]) -> List[LogEntry]:
+    try:
+        return await chunks.__anext__()
+    except StopAsyncIteration:
+        return []
+
+
+def _json_default(value: Any):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, default=_json_default, ensure_ascii=False)
+
+
+def _log_dict(log: LogEntry) -> Dict[str, Any]:
+    return {
+        "id": log.id,
+        "trace_id": log.trace_id,
+        "level": log.level,
+        "category": log.category,
+        "action": log.action,
+        "message": log.message,
+        "user_id": log.user_id,
+        "role": log.role,
+        "ip": log.ip,
+        "endpoint": log.endpoint,
+        "metadata": log.metadata,
+        "timestamp": log.timestamp,
+    }
+
+
+def _stream_page(logs: List[LogEntry], data: Dict[str, Any], extra: Dict[str, Any], next_cursor: Optional[str]):
+    """{"status", "data": {..., "logs": [...]}, ...extra} serializado log por log"""
+    async def body():
+        head = _dumps({"status": "success", "data": {**data, "next_cursor": next_cursor}})
+        # Se abre el objeto data para insertar la lista de logs al final
+        yield head[:-2] + ', "logs": ['
+        for i, log in enumerate(logs):
+            yield ("," if i else "") + _dumps(_log_dict(log))
+        tail = _dumps(extra)[1:] if extra else "}"
+        yield "]}" + ("," + tail if extra else tail)
+
+    headers = {NEXT_CURSOR_HEADER: next_cursor} if next_cursor else {}
+    return StreamingResponse(body(), media_type="application/json", headers=headers)
+
 
 @router.get("/")
 async def get_logs(
     trace_id: Optional[str] = Query(None),
     user_id: Optional[str] = Query(None),
+    ip: Optional[str] = Query(None),
     category: Optional[str] = Query(None),
     level: Optional[str] = Query(None),
     from_date: Optional[datetime] = Query(None),
     to_date: Optional[datetime] = Query(None),
     limit: int = Query(100, ge=1, le=1000),
-    offset: int = Query(0, ge=0)
+    cursor: Optional[str] = Query(None, description="Cursor opaco devuelto en X-Next-Cursor / next_cursor"),
+    query_service=Depends(get_query_service)
 ):
-    """Consulta avanzada de logs con filtros"""
+    """
+    Consulta de logs con filtros, del más nuevo al más viejo.
+
+    Paginación por keyset (timestamp, _id): enviar `next_cursor` de la respuesta
+    anterior en `cursor`. La consulta usa el índice compuesto del filtro más
+    selectivo (trace_id, user_id, ip, category o level) y tiene maxTimeMS.
+    """
     # Aquí iría la autenticación admin
-    
-    return {
-        "status": "success",
-        "data": {
-            "total": 0,
-            "offset": offset,
-            "limit": limit,
-            "logs": []
-        },
-        "filters_applied": {
-            "trace_id": trace_id,
-            "user_id": user_id,
-            "category": category,
-            "level": level,
-            "from_date": from_date,
-            "to_date": to_date
-        }
+    filters = {
+        "trace_id": trace_id,
+        "user_id": user_id,
+        "ip": ip,
+        "category": category,
+        "level": level,
+        "from_date": from_date,
+        "to_date": to_date,
     }
+    logs, next_cursor = await _call(query_service.search_page, filters, cursor, limit)
+
+    return _stream_page(
+        logs,
+        {"limit": limit, "count": len(logs)},
+        {"filters_applied": filters},
+        next_cursor
+    )
 
 
 @router.get("/stats")
 async def get_stats(
-    period: str = Query("24h", regex="^(1h|24h|7d|30d)$"),
-    group_by: str = Query("category", regex="^(category|level|action)$")
+    period: str = Query("24h", pattern="^(1h|24h|7d|30d)$"),
+    group_by: str = Query("category", pattern="^(category|level|action)$"),
+    query_service=Depends(get_query_service)
 ):
-    """Estadísticas agregadas de logs"""
+    """Estadísticas agregadas de logs (un solo $facet sobre el período)"""
     # Aquí iría la autenticación admin
-    
+    stats = await _call(query_service.stats, period, group_by)
+
     return {
         "status": "success",
         "data": {
             "period": period,
             "group_by": group_by,
-            "stats": {
-                "total": 1234,
-                "by_category": {
-                    "auth": 450,
-                    "security": 123,
-                    "system": 567,
-                    "api": 94
-                },
-                "by_level": {
-                    "info": 890,
-                    "warning": 45,
-                    "error": 12,
-                    "critical": 3
-                },
-                "unique_users": 42,
-                "unique_ips": 67
-            }
+            "groups": stats.get(f"by_{group_by}", {}),
+            "stats": stats
         }
     }
 
 
 @router.get("/alerts")
 async def get_alerts(
-    severity: Optional[str] = Query(None, regex="^(CRITICAL|HIGH|MEDIUM|LOW)$"),
+    severity: Optional[str] = Query(None, pattern="^(CRITICAL|HIGH|MEDIUM|LOW)$"),
     resolved: bool = Query(False),
-    limit: int = Query(50, le=100)
+    limit: int = Query(50, le=100),
+    cursor: Optional[str] = Query(None, description="Cursor opaco devuelto en X-Next-Cursor / next_cursor"),
+    query_service=Depends(get_query_service)
 ):
-    """Historial de alertas de seguridad"""
+    """
+    Historial de alertas de seguridad: los logs de categoría security que las
+    originan (las alertas solo se muestran en consola, no se persisten ni se
+    resuelven, así que `resolved=true` no devuelve resultados).
+    """
     # Aquí iría la autenticación admin
-    
-    return {
-        "status": "success",
-        "data": {
-            "total": 0,
-            "alerts": []
-        }
-    }
+    if resolved:
+        return _stream_page([], {"limit": limit, "count": 0}, {}, None)
+
+    logs, next_cursor = await _call(query_service.alerts_page, severity, cursor, limit)
+    return _stream_page(logs, {"limit": limit, "count": len(logs), "severity": severity}, {}, next_cursor)
 
 
 @router.post("/export")
 async def export_logs(
-    format: str = Query("json", regex="^(json|csv)$"),
+    format: str = Query("json", pattern="^(json|csv)$"),
     from_date: datetime = Query(...),
-    to_date: Optional[datetime] = Query(None)
+    to_date: Optional[datetime] = Query(None),
+    category: Optional[str] = Query(None),
+    level: Optional[str] = Query(None),
+    user_id: Optional[str] = Query(None),
+    ip: Optional[str] = Query(None),
+    query_service=Depends(get_query_service)
 ):
-    """Exportar logs para auditoría externa"""
+    """
+    Exportar logs para auditoría externa. La respuesta se transmite a medida que
+    se lee el cursor (lotes de 500), sin armar el archivo en memoria.
+    """
     # Aquí iría la autenticación admin
-    
-    to_date = to_date or datetime.utcnow()
-    
-    return {
-        "status": "success",
-        "data": {
-            "export_id": "exp_" + datetime.utcnow().strftime("%Y%m%d_%H%M%S"),
-            "format": format,
-            "from_date": from_date,
-            "to_date": to_date,
-            "record_count": 0,
-            "download_url": f"/admin/logs/exports/exp_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.{format}"
-        }
-    }
\ No newline at end of file
+    filters = {
+        "category": category,
+        "level": level,
+        "user_id": user_id,
+        "ip": ip,
+        "from_date": from_date,
+        "to_date": to_date or datetime.utcnow(),
+    }
+    chunks = _chunks(query_service.export(filters))
+    # El primer lote se lee antes de responder: un timeout o un error de la
+    # consulta todavía se puede devolver como status HTTP
+    first = await _call(_first, chunks)
+
+    async def rows():
+        yield first
+        try:
+            async for chunk in chunks:
+                yield chunk
+        except Exception as e:
+            # La respuesta ya empezó: solo queda cortarla
+            logger.error(f"❌ Export de logs interrumpido: {e}")
+
+    async def json_body():
+        yield "["
+        separator = ""
+        async for chunk in rows():
+            yield separator + ",".join(_dumps(_log_dict(log)) for log in chunk)
+            separator = "," if chunk else separator
+        yield "]"
+
+    async def csv_body():
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=CSV_FIELDS, extrasaction="ignore")
+        writer.writeheader()
+        async for chunk in rows():
+            for log in chunk:
+                row = _log_dict(log)
+                row["metadata"] = _dumps(row["metadata"])
+                writer.writerow(row)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        yield buffer.getvalue()
+
+    export_id = "exp_" + datetime.utcnow().strftime("%Y%m%d_%H%M%S")
+    return StreamingResponse(
+        json_body() if format == "json" else csv_body(),
+        media_type="application/json" if format == "json" else "text/csv",
+        headers={"Content-Disposition": f'attachment; filename="{export_id}.{format}"'}
+    )
@@ -0,0 +1,268 @@
+# productos/application/importacion.py
+"""
+Importación masiva de productos (POST /productos/importar y la CLI).
+
+- El archivo se lee de a un registro (CSV o JSON/NDJSON), sin cargarlo entero.
+- Se valida y escribe por lotes: una consulta por lote para resolver
+  categorías/proveedores por nombre y un INSERT ... ON CONFLICT (nombre)
+  por lote (commit por lote: un error de base solo descarta ese lote).
+- Los errores se reportan por fila y no cortan la importación.
+"""
+import asyncio
+import codecs
+import csv
+import io
+import json
+import logging
+import time
+from typing import IO, Any, Dict, Iterator, List, Optional, Set, Tuple
+
+from pydantic import ValidationError
+
+from ..presentation import schemas
+
+LOTE_POR_DEFECTO = 2000
+MAX_ERRORES = 1000
+MAX_REGISTRO_JSON = 1024 * 1024  # un objeto más grande que esto se trata como JSON inválido
+
+
+class FormatoImportacionError(ValueError):
+    """El archivo no se puede seguir leyendo (a diferencia de un error de una fila)"""
+
+
+def leer_csv(archivo: IO[bytes]) -> Iterator[dict]:
+    """
+    Registros de un CSV con encabezado (UTF-8, con o sin BOM; separador ',' o ';').
+    Los nombres de columna se pasan a minúsculas y las celdas vacías quedan en None.
+    """
+    texto = io.TextIOWrapper(archivo, encoding="utf-8-sig", newline="")
+    try:
+        encabezado = texto.readline()
+        delimitador = ";" if encabezado.count(";") > encabezado.count(",") else ","
+        campos = [campo.strip().lower() for campo in next(csv.reader([encabezado], delimiter=delimitador), [])]
+        if not campos:
+            raise FormatoImportacionError("El CSV no tiene encabezado")
+        for valores in csv.reader(texto, delimiter=delimitador):
+            if not any(valores):
+                continue
+            yield {campo: (valor.strip() or None) for campo, valor in zip(campos, valores)}
+    except (UnicodeDecodeError, csv.Error) as e:
+        raise FormatoImportacionError(f"CSV inválido: {str(e)}")
+    finally:
+        # El archivo es del llamador: que el wrapper no lo cierre al liberarse
+        texto.detach()
+
+
+def leer_json(archivo: IO[bytes], tamano_bloque: int = 64 * 1024) -> Iterator[Any]:
+    """
+    Registros de un arreglo JSON ([{...}, {...}]) o de NDJSON (un objeto por línea),
+    decodificados de a uno mientras se lee el archivo por bloques.
+    """
+    decodificador = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder("utf-8-sig")()
+    buffer, pos, fin = "", 0, False
+    arreglo: Optional[bool] = None  # None hasta ver el primer carácter
+
+    def cargar():
+        nonlocal buffer, pos, fin
+        if len(buffer) - pos > MAX_REGISTRO_JSON:
+            raise FormatoImportacionError("JSON inválido o registro demasiado grande")
+        bloque = archivo.read(tamano_bloque)
+        fin = not bloque
+        try:
+            buffer = buffer[pos:] + utf8.decode(bloque, final=fin)
+        except UnicodeDecodeError as e:
+            raise FormatoImportacionError(f"JSON inválido: {str(e)}")
+        pos = 0
+
+    separadores = " \t\r\n"
+    while True:
+        while pos < len(buffer) and buffer[pos] in separadores:
+            pos += 1
+        if pos == len(buffer):
+            if fin:
+                break
+            cargar()
+            continue
+
+        if arreglo is None:
+            arreglo = buffer[pos] == "["
+            if arreglo:
+                separadores += ","
+                pos += 1
+                continue
+        if arreglo and buffer[pos] == "]":
+            break
+
+        try:
+            registro, fin_registro = decodificador.raw_decode(buffer, pos)
+        except json.JSONDecodeError as e:
+            if fin:
+                raise FormatoImportacionError(f"JSON inválido: {e.msg}")
+            cargar()
+            continue
+        if fin_registro == len(buffer) and not fin:
+            # Un número al final del bloque puede seguir en el próximo
+            cargar()
+            continue
+        pos = fin_registro
+        yield registro
+
+
+LECTORES = {"csv": leer_csv, "json": leer_json}
+
+
+def formato_por_nombre(nombre_archivo: Optional[str]) -> Optional[str]:
+    extension = (nombre_archivo or "").rsplit(".", 1)[-1].lower()
+    if extension == "csv":
+        return "csv"
+    if extension in ("json", "ndjson", "jsonl"):
+        return "json"
+    return None
+
+
+def _mensaje_validacion(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(parte) for parte in detalle['loc'])}: {detalle['msg']}" for detalle in error.errors()
+    )
+
+
+class ImportadorProductos:
+    """Valida y hace upsert por lotes sobre un ProductRepository"""
+
+    def __init__(self, repository, tamano_lote: int = LOTE_POR_DEFECTO, max_errores: int = MAX_ERRORES):
+        self.repository = repository
+        self.tamano_lote = tamano_lote
+        self.max_errores = max_errores
+        # Referencias ya resueltas en lotes anteriores: {nombre: id o None}, ids existentes
+        self._por_nombre: Dict[str, Dict[str, Optional[int]]] = {"categorias": {}, "proveedores": {}}
+        self._ids: Dict[str, Set[int]] = {"categorias": set(), "proveedores": set()}
+        self._ids_faltantes: Dict[str, Set[int]] = {"categorias": set(), "proveedores": set()}
+
+    async def importar(self, registros: Iterator[Any]) -> schemas.ResultadoImportacion:
+        inicio = time.perf_counter()
+        self._resultado = schemas.ResultadoImportacion(
+            procesadas=0, insertados=0, actualizados=0, con_error=0, lotes=0, duracion_ms=0, completo=True
+        )
+        registros = iter(registros)
+        while True:
+            # Leer y validar es CPU y E/S de archivo sincrónica: fuera del event loop
+            validas, agotado, error_formato = await asyncio.to_thread(self._leer_lote, registros)
+            if validas:
+                await self._escribir_lote(validas)
+            if error_formato:
+                self._resultado.completo = False
+                self._registrar_error(self._resultado.procesadas + 1, None, error_formato)
+                break
+            if agotado:
+                break
+
+        self._resultado.duracion_ms = round((time.perf_counter() - inicio) * 1000, 1)
+        logging.info(
+            f"📦 Importación de productos: {self._resultado.procesadas} filas, {self._resultado.insertados} "
+            f"insertados, {self._resultado.actualizados} actualizados, {self._resultado.con_error} con error "
+            f"en {self._resultado.duracion_ms} ms"
+        )
+        return self._resultado
+
+    def _registrar_error(self, fila: int, nombre: Optional[str], error: str):
+        self._resultado.con_error += 1
+        if len(self._resultado.errores) < self.max_errores:
+            self._resultado.errores.append(schemas.ErrorImportacion(fila=fila, nombre=nombre, error=error))
+
+    def _leer_lote(
+        self, registros: Iterator[Any]
+    ) -> Tuple[List[Tuple[int, schemas.ProductoImportacion]], bool, Optional[str]]:
+        """(filas válidas, archivo terminado, error de formato) de hasta tamano_lote registros"""
+        validas = []
+        try:
+            for leidas, registro in enumerate(registros, start=1):
+                self._resultado.procesadas += 1
+                fila = self._resultado.procesadas
+                if not isinstance(registro, dict):
+                    self._registrar_error(fila, None, "Se esperaba un objeto con los campos del producto")
+                else:
+                    try:
+                        validas.append((fila, schemas.ProductoImportacion(**registro)))
+                    except ValidationError as e:
+                        nombre = registro.get("nombre")
+                        self._registrar_error(fila, None if nombre is None else str(nombre), _mensaje_validacion(e))
+                if leidas >= self.tamano_lote:
+                    return validas, False, None
+        except FormatoImportacionError as e:
+            return validas, True, str(e)
+        return validas, True, None
+
+    async def _resolver(self, tabla: str, nombres: Set[str], ids: Set[int]):
+        """Una consulta por tabla y lote, solo con lo que no se resolvió antes"""
+        nombres = {nombre for nombre in nombres if nombre not in self._por_nombre[tabla]}
+        ids = ids - self._ids[tabla] - self._ids_faltantes[tabla]
+        if not nombres and not ids:
+            return
+        por_nombre, existentes = await self.repository.resolver_referencias(tabla, nombres, ids)
+        for nombre in nombres:
+            self._por_nombre[tabla][nombre] = por_nombre.get(nombre)
+        self._ids[tabla] |= existentes
+        self._ids_faltantes[tabla] |= ids - existentes
+
+    def _referencia(self, tabla: str, id_: Optional[int], nombre: Optional[str]) -> Tuple[Optional[int], Optional[str]]:
+        """(id, error) de la categoría/proveedor de una fila (obligatorios); el id tiene prioridad sobre el nombre"""
+        etiqueta = "Categoría" if tabla == "categorias" else "Proveedor"
+        if id_ is not None:
+            if id_ in self._ids[tabla]:
+                return id_, None
+            return None, f"{etiqueta} con id {id_} no existe"
+        if nombre is not None:
+            encontrado = self._por_nombre[tabla].get(nombre)
+            if encontrado is None:
+                return None, f"{etiqueta} '{nombre}' no existe"
+            return encontrado, None
+        # Igual que en el alta individual: el catálogo exige categoría y proveedor
+        campo = "categoria" if tabla == "categorias" else "proveedor"
+        return None, f"Falta {etiqueta.lower()} ({campo}_id o {campo})"
+
+    async def _escribir_lote(self, validas: List[Tuple[int, schemas.ProductoImportacion]]):
+        self._resultado.lotes += 1
+        for tabla, campo_id, campo_nombre in (
+            ("categorias", "categoria_id", "categoria"),
+            ("proveedores", "proveedor_id", "proveedor"),
+        ):
+            await self._resolver(
+                tabla,
+                {getattr(p, campo_nombre) for _, p in validas if getattr(p, campo_id) is None and getattr(p, campo_nombre)},
+                {getattr(p, campo_id) for _, p in validas if getattr(p, campo_id) is not None},
+            )
+
+        # Un nombre repetido en el lote: queda la última fila (igual que entre lotes)
+        por_nombre: Dict[str, Tuple[int, dict]] = {}
+        sin_referencia = 0
+        for fila, producto in validas:
+            categoria_id, error = self._referencia("categorias", producto.categoria_id, producto.categoria)
+            if not error:
+                proveedor_id, error = self._referencia("proveedores", producto.proveedor_id, producto.proveedor)
+            if error:
+                self._registrar_error(fila, producto.nombre, error)
+                sin_referencia += 1
+                continue
+            por_nombre[producto.nombre] = (fila, {
+                "nombre": producto.nombre,
+                "descripcion": producto.descripcion,
+                "precio": producto.precio,
+                "stock": producto.stock,
+                "categoria_id": categoria_id,
+                "proveedor_id": proveedor_id,
+            })
+
+        unicas = [datos for _, datos in por_nombre.values()]
+        if not unicas:
+            return
+        repetidas = len(validas) - sin_referencia - len(unicas)
+        try:
+            insertados, actualizados = await self.repository.upsert_productos(unicas)
+        except Exception as e:
+            logging.error(f"❌ Error al importar un lote de productos: {str(e)}")
+            for fila, datos in por_nombre.values():
+                self._registrar_error(fila, datos["nombre"], f"Error de base de datos en el lote: {str(e)}")
+            return
+        self._resultado.insertados += insertados
+        self._resultado.actualizados += actualizados + repetidas
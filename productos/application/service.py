@@ -1,7 +1,18 @@
 import logging
-from typing import Optional, List
+from typing import Optional, List, Tuple
 from fastapi import HTTPException, status
+from pydantic import TypeAdapter
+from sqlalchemy.exc import IntegrityError
 from ..presentation import schemas
+from .importacion import LECTORES, FormatoImportacionError, ImportadorProductos
+from ...core.busqueda import terminos
+from ...core.pagination import CursorInvalidoError, decode_cursor, next_cursor
+
+_catalogo_adapter = TypeAdapter(List[schemas.Producto])
+
+def serializar_catalogo(productos: List[dict]) -> bytes:
+    """JSON del listado completo, con la misma forma que response_model=list[schemas.Producto]"""
+    return _catalogo_adapter.dump_json(_catalogo_adapter.validate_python(productos))
 
 class ProductService:
     def __init__(self, repository):
@@ -34,6 +45,179 @@ class ProductService:
                 detail=f"Error al obtener listado de productos: {str(e)}"
             )
 
+    async def get_catalogo_json(self) -> bytes:
+        """Catálogo completo ya serializado (desde la caché si el repositorio la tiene)"""
+        try:
+            if hasattr(self.repository, "obtener_catalogo_json"):
+                return await self.repository.obtener_catalogo_json(serializar_catalogo)
+            return serializar_catalogo(await self.repository.obtener_todos_productos())
+        except Exception as e:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Error al obtener listado de productos: {str(e)}"
+            )
+
+    async def get_products_page(
+        self, limit: int = 100, skip: int = 0, cursor: Optional[str] = None
+    ) -> Tuple[List[schemas.Producto], Optional[str]]:
+        """Página de productos y cursor de la siguiente página (keyset por id)"""
+        after_id = None
+        if cursor:
+            try:
+                (after_id,) = decode_cursor(cursor, 1)
+                if not isinstance(after_id, int):
+                    raise CursorInvalidoError(f"Cursor inválido: {cursor}")
+            except CursorInvalidoError as e:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=str(e)
+                )
+        try:
+            products = await self.repository.obtener_productos_pagina(limit=limit, skip=skip, after_id=after_id)
+        except Exception as e:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Error al obtener listado de productos: {str(e)}"
+            )
+        return [schemas.Producto(**product) for product in products], next_cursor(products, limit, "id")
+
+    async def buscar_productos(
+        self,
+        texto: str,
+        limit: int = 10,
+        autocompletar: bool = True,
+        categoria_id: Optional[int] = None,
+        proveedor_id: Optional[int] = None,
+    ) -> List[schemas.ProductoBusqueda]:
+        if not terminos(texto):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="El texto de búsqueda debe tener al menos una letra o número"
+            )
+        try:
+            productos = await self.repository.buscar(
+                texto, limit=limit, autocompletar=autocompletar,
+                categoria_id=categoria_id, proveedor_id=proveedor_id
+            )
+        except Exception as e:
+            logging.error(f"Error al buscar productos: {str(e)}")
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Error al buscar productos: {str(e)}"
+            )
+        return [schemas.ProductoBusqueda(**producto) for producto in productos]
+
+    async def importar_productos(self, archivo, formato: str, tamano_lote: int) -> schemas.ResultadoImportacion:
+        """Upsert por lotes desde un archivo binario CSV o JSON/NDJSON; los errores se informan por fila"""
+        if formato not in LECTORES:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Formato no soportado: use csv o json"
+            )
+        importador = ImportadorProductos(self.repository, tamano_lote=tamano_lote)
+        try:
+            return await importador.importar(LECTORES[formato](archivo))
+        except FormatoImportacionError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
+            )
+        except Exception as e:
+            logging.error(f"Error al importar productos: {str(e)}")
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Error al importar productos: {str(e)}"
+            )
+
+    async def actualizar_precios(self, data: schemas.ActualizacionPrecios) -> schemas.ResultadoPrecios:
+        """Reprecio masivo en una sola sentencia, con historial de cada cambio"""
+        filtros = {"producto_ids": data.producto_ids, "categoria_id": data.categoria_id, "proveedor_id": data.proveedor_id}
+        precios = None
+        if data.precios is not None:
+            if data.modo is not None or any(v is not None for v in filtros.values()):
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Use `precios` o `modo`/`valor` con filtros, no ambos"
+                )
+            # Un id repetido se queda con el último precio
+            precios = {p.producto_id: p.precio for p in data.precios}
+            kwargs = {"precios": precios}
+        else:
+            if data.modo is None or data.valor is None:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Indique `precios` o `modo` y `valor`"
+                )
+            if all(v is None for v in filtros.values()) and not data.todos:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Indique producto_ids, categoria_id o proveedor_id (o todos=true para todo el catálogo)"
+                )
+            if data.modo == "fijo" and data.valor <= 0:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="El precio debe ser mayor a 0"
+                )
+            if data.modo == "porcentaje" and data.valor <= -100:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="El porcentaje debe ser mayor a -100"
+                )
+            factor, suma = {
+                "fijo": (0, data.valor),
+                "porcentaje": (1 + data.valor / 100, 0),
+                "monto": (1, data.valor),
+            }[data.modo]
+            kwargs = {"factor": factor, "suma": suma, **filtros}
+
+        try:
+            resumen = await self.repository.actualizar_precios(usuario_id=data.usuario_id, **kwargs)
+        except IntegrityError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="El usuario indicado no existe"
+            )
+        except Exception as e:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Error al actualizar precios: {str(e)}"
+            )
+        return schemas.ResultadoPrecios(
+            **resumen,
+            sin_cambios=resumen["encontrados"] - resumen["actualizados"] - resumen["precio_invalido"],
+            no_encontrados=len(precios) - resumen["encontrados"] if precios is not None else 0
+        )
+
+    async def get_historial_precios(
+        self, producto_id: int, limit: int = 50, cursor: Optional[str] = None
+    ) -> Tuple[List[schemas.HistorialPrecio], Optional[str]]:
+        """Cambios de precio del más reciente al más antiguo y cursor de la siguiente página"""
+        try:
+            cambios = await self.repository.historial_precios(producto_id, limit=limit, cursor=cursor)
+        except CursorInvalidoError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
+            )
+        if not cambios and not cursor and not await self.repository.get_by_id(producto_id):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Producto no encontrado"
+            )
+        return [schemas.HistorialPrecio(**c) for c in cambios], next_cursor(cambios, limit, "fecha_cambio", "id")
+
+    async def get_stock_bajo(
+        self,
+        limit: int = 100,
+        categoria_id: Optional[int] = None,
+        proveedor_id: Optional[int] = None,
+        umbral: Optional[int] = None,
+    ) -> List[schemas.ProductoStockBajo]:
+        productos = await self.repository.stock_bajo(
+            limit=limit, categoria_id=categoria_id, proveedor_id=proveedor_id, umbral=umbral
+        )
+        return [schemas.ProductoStockBajo(**p) for p in productos]
+
     async def get_product_nom(self, nombre: str) -> schemas.Producto:
         product = await self.repository.get_by_name(nombre)
         if not product:
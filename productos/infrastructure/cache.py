@@ -0,0 +1,224 @@
+# productos/infrastructure/cache.py
+"""
+Caché en proceso del catálogo de productos.
+
+- Productos individuales por id y por nombre (TTL + LRU).
+- El listado completo ya serializado a JSON, listo para responder sin pasar
+  por Pydantic en cada request.
+
+La invalidación se dispara por eventos: los repositorios registran qué cambió
+en la sesión (`invalidar_al_confirmar`) y se aplica en `after_commit`, así un
+lector concurrente no vuelve a cachear datos previos al commit. Los cambios de
+stock (ventas, devoluciones) no tiran la caché al instante: la dejan vigente
+como máximo PRODUCTOS_CACHE_VENTANA_STOCK segundos más (ventana de consistencia),
+para que un checkout por segundo no obligue a releer el catálogo en cada request.
+
+La caché es por proceso: con varios workers, cada uno invalida la suya y el
+resto converge por TTL.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Set
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from ...core.config import settings
+from ...core.http_cache import marcar_modificado_al_confirmar
+
+_CLAVE_PENDIENTES = "catalogo_invalidar"
+
+
+class _Entrada:
+    __slots__ = ("valor", "expira")
+
+    def __init__(self, valor, expira: float):
+        self.valor = valor
+        self.expira = expira
+
+
+class Listado:
+    """Catálogo completo ordenado por id; el JSON y el índice de búsqueda se generan una vez, al primer uso"""
+    __slots__ = ("productos", "ids", "json", "indice")
+
+    def __init__(self, productos: List[dict]):
+        self.productos = productos
+        self.ids = [producto["id"] for producto in productos]
+        self.json: Optional[bytes] = None
+        self.indice = None  # IndiceBusqueda
+
+
+class CatalogoCache:
+    def __init__(self, ttl: float, max_items: int, ventana_stock: float):
+        self.ttl = ttl
+        self.max_items = max_items
+        self.ventana_stock = ventana_stock
+        self._por_id: "OrderedDict[int, _Entrada]" = OrderedDict()
+        self._id_por_nombre: Dict[str, int] = {}
+        self._listado: Optional[_Entrada] = None  # valor: Listado
+        self._version = 0
+        self._version_stock = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    # ---------- lecturas ----------
+
+    def obtener(self, producto_id: int) -> Optional[dict]:
+        with self._lock:
+            entrada = self._por_id.get(producto_id)
+            if entrada is None or entrada.expira <= time.monotonic():
+                self.misses += 1
+                return None
+            self._por_id.move_to_end(producto_id)
+            self.hits += 1
+            return entrada.valor
+
+    def obtener_por_nombre(self, nombre: str) -> Optional[dict]:
+        with self._lock:
+            producto_id = self._id_por_nombre.get(nombre)
+        if producto_id is None:
+            with self._lock:
+                self.misses += 1
+            return None
+        producto = self.obtener(producto_id)
+        # El nombre pudo cambiar desde que se indexó
+        return producto if producto and producto["nombre"] == nombre else None
+
+    def obtener_listado(self) -> Optional[Listado]:
+        """Catálogo completo o None si no está vigente"""
+        with self._lock:
+            if self._listado is None or self._listado.expira <= time.monotonic():
+                self.misses += 1
+                return None
+            self.hits += 1
+            return self._listado.valor
+
+    def version(self) -> tuple:
+        """Cambia con cada invalidación; sirve para descartar cargas que quedaron viejas"""
+        return self._version, self._version_stock
+
+    def _expiracion(self, version: Optional[tuple]) -> Optional[float]:
+        """
+        Expiración para una carga iniciada en `version`: None si hubo una invalidación
+        (descartar), la ventana de stock si solo cambió stock, o el TTL completo.
+        """
+        ahora = time.monotonic()
+        if version is None:
+            return ahora + self.ttl
+        if version[0] != self._version:
+            return None
+        if version[1] != self._version_stock:
+            return ahora + min(self.ttl, self.ventana_stock)
+        return ahora + self.ttl
+
+    # ---------- escrituras ----------
+
+    def guardar(self, producto: dict, version: Optional[tuple] = None):
+        with self._lock:
+            expira = self._expiracion(version)
+            if expira is None:
+                return  # hubo una invalidación mientras se leía de la base
+            self._guardar(producto, expira)
+
+    def guardar_listado(self, listado: Listado, version: tuple):
+        with self._lock:
+            expira = self._expiracion(version)
+            if expira is None:
+                return
+            self._listado = _Entrada(listado, expira)
+            for producto in listado.productos[: self.max_items]:
+                self._guardar(producto, expira)
+
+    def _guardar(self, producto: dict, expira: float):
+        producto_id = producto["id"]
+        anterior = self._por_id.pop(producto_id, None)
+        if anterior is not None:
+            self._id_por_nombre.pop(anterior.valor["nombre"], None)
+        self._por_id[producto_id] = _Entrada(producto, expira)
+        self._id_por_nombre[producto["nombre"]] = producto_id
+        while len(self._por_id) > self.max_items:
+            _, expulsada = self._por_id.popitem(last=False)
+            self._id_por_nombre.pop(expulsada.valor["nombre"], None)
+
+    # ---------- invalidación ----------
+
+    def invalidar(self, producto_ids: Optional[Iterable[int]] = None):
+        """Descarta los productos indicados (o todos) y el listado completo"""
+        with self._lock:
+            self._version += 1
+            self._listado = None
+            if producto_ids is None:
+                self._por_id.clear()
+                self._id_por_nombre.clear()
+                return
+            for producto_id in producto_ids:
+                entrada = self._por_id.pop(producto_id, None)
+                if entrada is not None:
+                    self._id_por_nombre.pop(entrada.valor["nombre"], None)
+
+    def invalidar_stock(self, producto_ids: Iterable[int]):
+        """Acota la vigencia de los productos (y del listado) a la ventana de stock"""
+        with self._lock:
+            self._version_stock += 1
+            limite = time.monotonic() + self.ventana_stock
+            if self._listado is not None:
+                self._listado.expira = min(self._listado.expira, limite)
+            for producto_id in producto_ids:
+                entrada = self._por_id.get(producto_id)
+                if entrada is not None:
+                    entrada.expira = min(entrada.expira, limite)
+
+    def estadisticas(self) -> dict:
+        with self._lock:
+            return {
+                "productos": len(self._por_id),
+                "listado": self._listado is not None,
+                "hits": self.hits,
+                "misses": self.misses,
+                "ttl": self.ttl,
+                "ventana_stock": self.ventana_stock,
+            }
+
+
+catalogo_cache = CatalogoCache(
+    ttl=settings.PRODUCTOS_CACHE_TTL,
+    max_items=settings.PRODUCTOS_CACHE_MAX_ITEMS,
+    ventana_stock=settings.PRODUCTOS_CACHE_VENTANA_STOCK,
+)
+
+
+def invalidar_al_confirmar(session, producto_ids: Optional[Iterable[int]] = None, stock: bool = False):
+    """
+    Registra en la sesión (AsyncSession o Session) una invalidación del catálogo
+    que se aplica cuando la transacción hace commit. `producto_ids=None` invalida todo.
+    """
+    marcar_modificado_al_confirmar(session, "productos")
+    pendientes = session.info.setdefault(_CLAVE_PENDIENTES, {"todo": False, "ids": set(), "stock": set()})
+    if producto_ids is None:
+        pendientes["todo"] = True
+    elif stock:
+        pendientes["stock"].update(producto_ids)
+    else:
+        pendientes["ids"].update(producto_ids)
+
+
+@event.listens_for(Session, "after_commit")
+def _aplicar_invalidaciones(session):
+    pendientes = session.info.pop(_CLAVE_PENDIENTES, None)
+    if not pendientes:
+        return
+    if pendientes["todo"]:
+        catalogo_cache.invalidar()
+        return
+    if pendientes["ids"]:
+        catalogo_cache.invalidar(pendientes["ids"])
+    stock: Set[int] = pendientes["stock"] - pendientes["ids"]
+    if stock:
+        catalogo_cache.invalidar_stock(stock)
+
+
+@event.listens_for(Session, "after_rollback")
+def _descartar_invalidaciones(session):
+    session.info.pop(_CLAVE_PENDIENTES, None)
@@ -0,0 +1,47 @@
+import asyncio
+import click
+
+from ...database.session import async_session, engine
+from ..application.importacion import LECTORES, LOTE_POR_DEFECTO, ImportadorProductos, formato_por_nombre
+from .repositories import ProductRepository
+
+
+@click.group()
+def cli():
+    """📦 Productos - Tareas de mantenimiento"""
+    pass
+
+
+@cli.command("importar")
+@click.argument("archivo", type=click.Path(exists=True, dir_okay=False))
+@click.option("--formato", type=click.Choice(sorted(LECTORES)), default=None, help="Por defecto, según la extensión")
+@click.option("--lote", type=click.IntRange(100, 5000), default=LOTE_POR_DEFECTO, show_default=True, help="Filas por transacción")
+def importar(archivo, formato, lote):
+    """📥 Alta/actualización masiva de productos desde un CSV o JSON"""
+    formato = formato or formato_por_nombre(archivo)
+    if not formato:
+        raise click.BadParameter("No se pudo deducir el formato, use --formato", param_hint="--formato")
+
+    async def _run():
+        try:
+            async with async_session() as session:
+                with open(archivo, "rb") as entrada:
+                    importador = ImportadorProductos(ProductRepository(session), tamano_lote=lote)
+                    return await importador.importar(LECTORES[formato](entrada))
+        finally:
+            await engine.dispose()
+
+    click.echo(f"\n🔄 Importando {archivo}...")
+    resultado = asyncio.run(_run())
+    for error in resultado.errores:
+        click.echo(f"   ⚠️ Fila {error.fila} ({error.nombre or '-'}): {error.error}")
+    click.echo(
+        f"✅ {resultado.procesadas} filas en {resultado.duracion_ms / 1000:.1f}s: {resultado.insertados} insertados, "
+        f"{resultado.actualizados} actualizados, {resultado.con_error} con error"
+    )
+    if not resultado.completo:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    cli()
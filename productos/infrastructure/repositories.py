@@ -1,8 +1,48 @@
-from typing import Optional, List
+from bisect import bisect_right
+from typing import Callable, Dict, Iterable, Optional, List, Set, Tuple
 import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
 from sqlalchemy.ext.asyncio import AsyncSession
 import logging
+from datetime import datetime
 from ...productos.models.models import Producto 
+from ...core.pagination import CursorInvalidoError, decode_cursor
+from ...database.session import sesion_primario
+from ...core.busqueda import IndiceBusqueda, consulta_tsquery, expr_documento, expr_prefijo, patron_prefijo, terminos
+from .cache import Listado, catalogo_cache, invalidar_al_confirmar
+from .stock_bajo import registrar_stock_al_confirmar, stock_bajo
+from ...movimientos.infrastructure.repository import anotar_movimientos, movimientos_por_delta
+
+# Expresiones de los índices de búsqueda (idx_productos_busqueda, idx_productos_nombre_prefijo)
+_DOCUMENTO = expr_documento("nombre", "descripcion")
+_PREFIJO = expr_prefijo("nombre")
+# Cambio masivo de precios: precio nuevo = ROUND(precio * factor + suma, 2) para cada producto objetivo
+_PRECIOS = """
+    WITH objetivo AS ({objetivo}),
+    viejos AS (
+        -- FOR UPDATE: con ventas/ediciones concurrentes se calcula sobre el precio vigente
+        SELECT p.id, p.precio AS anterior, ROUND(p.precio * o.factor + o.suma, 2) AS nuevo
+        FROM productos p JOIN objetivo o ON o.id = p.id
+        FOR UPDATE OF p
+    ),
+    cambios AS (
+        UPDATE productos p SET precio = v.nuevo
+        FROM viejos v
+        WHERE p.id = v.id AND v.nuevo > 0 AND v.nuevo <> v.anterior
+        RETURNING p.id, v.anterior, v.nuevo
+    ),
+    historial AS (
+        INSERT INTO historial_precios (producto_id, precio_anterior, precio_nuevo, usuario_id)
+        SELECT id, anterior, nuevo, :usuario_id FROM cambios
+        RETURNING 1
+    )
+    SELECT
+        (SELECT count(*) FROM viejos) AS encontrados,
+        (SELECT count(*) FROM historial) AS actualizados,
+        (SELECT count(*) FROM viejos WHERE nuevo <= 0) AS precio_invalido
+"""
+# Coincidencias por palabra que se rankean: acota el costo de términos muy frecuentes
+BUSQUEDA_CANDIDATOS = 200
 
 class ProductRepository:
     def __init__(self, db: AsyncSession):
@@ -28,7 +68,12 @@ class ProductRepository:
             """),
             data
         )
-        return result.fetchone()
+        producto = result.fetchone()
+        # El stock inicial entra al ledger como primer movimiento
+        await anotar_movimientos(self.db, movimientos_por_delta({producto.id: producto.stock}))
+        invalidar_al_confirmar(self.db, [producto.id])
+        registrar_stock_al_confirmar(self.db, [producto])
+        return producto
     
     async def obtener_todos_productos(self) -> List[dict]:
         try:
@@ -39,12 +84,278 @@ class ProductRepository:
             logging.error(f"Error al obtener productos: {str(e)}")
             raise Exception(f"Error al obtener productos: {str(e)}")
         
+    async def obtener_productos_pagina(
+        self, limit: int = 100, skip: int = 0, after_id: Optional[int] = None
+    ) -> List[dict]:
+        """
+        Página de productos ordenada por id.
+        Con `after_id` usa keyset (WHERE id > :after_id) y `skip` se ignora.
+        """
+        try:
+            if after_id is not None:
+                query = sa.text("SELECT * FROM productos WHERE id > :after_id ORDER BY id LIMIT :limit")
+                params = {"after_id": after_id, "limit": limit}
+            else:
+                query = sa.text("SELECT * FROM productos ORDER BY id LIMIT :limit OFFSET :skip")
+                params = {"limit": limit, "skip": skip}
+            result = await self.db.execute(query, params)
+            return [dict(row._mapping) for row in result.fetchall()]
+        except Exception as e:
+            logging.error(f"Error al obtener página de productos: {str(e)}")
+            raise Exception(f"Error al obtener productos: {str(e)}")
+        
+    async def buscar(
+        self,
+        texto: str,
+        limit: int = 10,
+        autocompletar: bool = True,
+        categoria_id: Optional[int] = None,
+        proveedor_id: Optional[int] = None,
+    ) -> List[dict]:
+        """
+        Productos que coinciden con `texto`, ordenados por relevancia.
+        `autocompletar` pone primero los nombres que empiezan con el texto y busca
+        palabras solo en el nombre; si no, busca en nombre y descripción.
+        """
+        palabras = terminos(texto)
+        if not palabras:
+            return []
+        filtros = {
+            campo: valor
+            for campo, valor in (("categoria_id", categoria_id), ("proveedor_id", proveedor_id))
+            if valor is not None
+        }
+        if self.db.get_bind().dialect.name != "postgresql":
+            return (await self._indice_busqueda()).buscar(texto, limit, autocompletar, filtros)
+
+        condiciones = "".join(f" AND {campo} = :{campo}" for campo in filtros)
+        resultados: List[dict] = []
+        if autocompletar:
+            # Recorre el btree en orden y corta en LIMIT, aunque el prefijo sea de una letra
+            result = await self.db.execute(
+                sa.text(f"""
+                    SELECT *, 1.0::real AS relevancia FROM productos
+                    WHERE {_PREFIJO} LIKE :patron{condiciones}
+                    ORDER BY {_PREFIJO}, id
+                    LIMIT :limit
+                """),
+                {"patron": patron_prefijo(texto), "limit": limit, **filtros}
+            )
+            resultados = [dict(fila._mapping) for fila in result.fetchall()]
+            if len(resultados) >= limit:
+                return resultados
+
+        result = await self.db.execute(
+            sa.text(f"""
+                SELECT p.*, ts_rank({_DOCUMENTO}, to_tsquery('simple', :consulta)) AS relevancia
+                FROM (
+                    SELECT * FROM productos
+                    WHERE {_DOCUMENTO} @@ to_tsquery('simple', :consulta){condiciones}
+                    LIMIT :candidatos
+                ) p
+                ORDER BY relevancia DESC, p.id
+                LIMIT :limit
+            """),
+            {
+                "consulta": consulta_tsquery(palabras, solo_nombre=autocompletar),
+                "candidatos": BUSQUEDA_CANDIDATOS,
+                "limit": limit + len(resultados),
+                **filtros,
+            }
+        )
+        vistos = {producto["id"] for producto in resultados}
+        for fila in result.fetchall():
+            if len(resultados) >= limit:
+                break
+            if fila.id not in vistos:
+                resultados.append(dict(fila._mapping))
+        return resultados
+
+    async def _indice_busqueda(self) -> IndiceBusqueda:
+        """Índice en memoria para bases sin full-text search (SQLite en pruebas)"""
+        return IndiceBusqueda(await self.obtener_todos_productos(), campo_descripcion="descripcion")
+
+    async def resolver_referencias(
+        self, tabla: str, nombres: Iterable[str], ids: Iterable[int]
+    ) -> Tuple[Dict[str, int], Set[int]]:
+        """
+        Una consulta para varias categorías o proveedores (`tabla`): retorna
+        {nombre: id} de los nombres encontrados y el conjunto de ids que existen.
+        """
+        nombres, ids = list(nombres), list(ids)
+        if not nombres and not ids:
+            return {}, set()
+        referencias = sa.table(tabla, sa.column("id"), sa.column("nombre"))
+        result = await self.db.execute(
+            sa.select(referencias.c.id, referencias.c.nombre).where(
+                sa.or_(referencias.c.nombre.in_(nombres), referencias.c.id.in_(ids))
+            )
+        )
+        por_nombre, existentes = {}, set()
+        for fila in result.fetchall():
+            por_nombre.setdefault(fila.nombre, fila.id)
+            existentes.add(fila.id)
+        return por_nombre, existentes
+
+    async def upsert_productos(self, filas: List[dict]) -> Tuple[int, int]:
+        """
+        Inserta o actualiza (por nombre) un lote con INSERT ... ON CONFLICT y hace commit.
+        Las filas sin stock no lo modifican al actualizar (al insertar queda en 0);
+        descripción, categoría y proveedor vacíos conservan el valor actual.
+        Cada cambio de stock queda como movimiento en el ledger.
+        Retorna (insertados, actualizados).
+        """
+        tabla = Producto.__table__
+        columnas = ["nombre", "descripcion", "precio", "stock", "categoria_id", "proveedor_id"]
+
+        nombres = [f["nombre"] for f in filas]
+        try:
+            # Stock previo de los que ya existen (bloqueados): la diferencia va al ledger
+            result = await self.db.execute(
+                sa.select(tabla.c.nombre, tabla.c.stock).where(tabla.c.nombre.in_(nombres)).with_for_update()
+            )
+            stock_previo = {fila.nombre: fila.stock for fila in result}
+            actualizados = len(stock_previo)
+
+            for actualiza_stock in (True, False):
+                grupo = [
+                    {**f, "stock": f["stock"] if actualiza_stock else 0}
+                    for f in filas if (f["stock"] is not None) == actualiza_stock
+                ]
+                if not grupo:
+                    continue
+                # Un INSERT ... SELECT FROM unnest(arreglos): una sentencia preparada y un viaje por lote
+                origen = sa.func.unnest(*[
+                    sa.bindparam(c, type_=postgresql.ARRAY(tabla.c[c].type)) for c in columnas
+                ]).table_valued(*columnas).render_derived()
+                stmt = postgresql.insert(tabla).from_select(columnas, sa.select(origen))
+                parametros = {c: [f[c] for f in grupo] for c in columnas}
+                cambios = {
+                    "precio": stmt.excluded.precio,
+                    "descripcion": sa.func.coalesce(stmt.excluded.descripcion, tabla.c.descripcion),
+                    "categoria_id": sa.func.coalesce(stmt.excluded.categoria_id, tabla.c.categoria_id),
+                    "proveedor_id": sa.func.coalesce(stmt.excluded.proveedor_id, tabla.c.proveedor_id),
+                }
+                if actualiza_stock:
+                    cambios["stock"] = stmt.excluded.stock
+                await self.db.execute(
+                    stmt.on_conflict_do_update(index_elements=[tabla.c.nombre], set_=cambios), parametros
+                )
+
+            # Stock resultante del lote (las filas sin stock pueden ser altas con 0)
+            result = await self.db.execute(
+                sa.select(tabla.c.id, tabla.c.nombre, tabla.c.stock, tabla.c.categoria_id, tabla.c.proveedor_id)
+                .where(tabla.c.nombre.in_(nombres))
+            )
+            resultantes = result.fetchall()
+            await anotar_movimientos(self.db, movimientos_por_delta({
+                fila.id: fila.stock - stock_previo.get(fila.nombre, 0) for fila in resultantes
+            }))
+            registrar_stock_al_confirmar(self.db, resultantes)
+            invalidar_al_confirmar(self.db)
+            await self.db.commit()
+        except Exception:
+            await self.db.rollback()
+            raise
+        return len(filas) - actualizados, actualizados
+
+    async def actualizar_precios(
+        self,
+        factor: float = 1.0,
+        suma: float = 0.0,
+        producto_ids: Optional[List[int]] = None,
+        categoria_id: Optional[int] = None,
+        proveedor_id: Optional[int] = None,
+        precios: Optional[Dict[int, float]] = None,
+        usuario_id: Optional[int] = None,
+    ) -> Dict[str, int]:
+        """
+        Cambia precios en bloque y registra cada cambio en historial_precios, en una
+        transacción y con una sola invalidación de la caché del catálogo.
+        - `precios` ({producto_id: precio}): precio fijo por producto.
+        - Si no: precio * factor + suma para los productos que cumplen todos los
+          filtros (sin filtros, todo el catálogo).
+        Los productos cuyo precio no cambia o quedaría <= 0 no se tocan.
+        Retorna {"encontrados", "actualizados", "precio_invalido"}.
+        """
+        params = {"usuario_id": usuario_id}
+        if precios is not None:
+            objetivo = """
+                SELECT l.id, 0 AS factor, l.precio AS suma
+                FROM unnest(CAST(:ids AS integer[]), CAST(:precios AS numeric[])) AS l(id, precio)
+            """
+            params.update(ids=list(precios), precios=[str(p) for p in precios.values()])
+        else:
+            filtros = ["1 = 1"]
+            if producto_ids is not None:
+                filtros.append("id = ANY(CAST(:ids AS integer[]))")
+                params["ids"] = list(producto_ids)
+            if categoria_id is not None:
+                filtros.append("categoria_id = :categoria_id")
+                params["categoria_id"] = categoria_id
+            if proveedor_id is not None:
+                filtros.append("proveedor_id = :proveedor_id")
+                params["proveedor_id"] = proveedor_id
+            objetivo = f"""
+                SELECT id, CAST(:factor AS numeric) AS factor, CAST(:suma AS numeric) AS suma
+                FROM productos WHERE {' AND '.join(filtros)}
+            """
+            params.update(factor=str(factor), suma=str(suma))
+
+        try:
+            result = await self.db.execute(sa.text(_PRECIOS.format(objetivo=objetivo)), params)
+            resumen = dict(result.one()._mapping)
+            invalidar_al_confirmar(self.db)
+            await self.db.commit()
+            return resumen
+        except Exception as e:
+            logging.error(f"Error al actualizar precios: {str(e)}")
+            await self.db.rollback()
+            raise
+
+    async def historial_precios(
+        self, producto_id: int, limit: int = 50, cursor: Optional[str] = None
+    ) -> List[dict]:
+        """Cambios de precio del producto, del más reciente al más antiguo (keyset por fecha_cambio, id)"""
+        filtros = ["producto_id = :producto_id"]
+        params = {"producto_id": producto_id, "limit": limit}
+        if cursor:
+            try:
+                fecha_cursor, id_cursor = decode_cursor(cursor, 2)
+                params.update(fecha_cursor=datetime.fromisoformat(fecha_cursor), id_cursor=int(id_cursor))
+            except (TypeError, ValueError) as e:
+                raise CursorInvalidoError(f"Cursor inválido: {cursor}") from e
+            filtros.append("(fecha_cambio, id) < (:fecha_cursor, :id_cursor)")
+        # idx_historial_precios_producto_fecha: recorrido hacia atrás del índice, corta en LIMIT
+        result = await self.db.execute(sa.text(f"""
+            SELECT id, producto_id, precio_anterior, precio_nuevo, fecha_cambio, usuario_id
+            FROM historial_precios
+            WHERE {' AND '.join(filtros)}
+            ORDER BY fecha_cambio DESC, id DESC
+            LIMIT :limit
+        """), params)
+        return [dict(fila._mapping) for fila in result.fetchall()]
+
+    async def stock_bajo(
+        self,
+        limit: int = 100,
+        categoria_id: Optional[int] = None,
+        proveedor_id: Optional[int] = None,
+        umbral: Optional[int] = None,
+    ) -> List[dict]:
+        """Productos bajo el umbral desde el conjunto en memoria (se carga la primera vez)"""
+        if not stock_bajo.cargado:
+            await stock_bajo.cargar(self.db)
+        return stock_bajo.listar(limit=limit, categoria_id=categoria_id, proveedor_id=proveedor_id, umbral=umbral)
+
     async def delete(self, id: int) -> bool:
         try:
             product = await self.db.get(Producto, id)
             if not product:
                 return False
             await self.db.delete(product)
+            invalidar_al_confirmar(self.db, [id])
+            registrar_stock_al_confirmar(self.db, eliminados=[id])
             await self.db.commit()
             return True
         except Exception as e:
@@ -67,6 +378,22 @@ class ProductRepository:
             if not set_clauses:
                 return None  # No hay campos para actualizar
                 
+            stock_anterior = None
+            if "stock" in params:
+                # Ajuste manual: la diferencia con el stock vigente (fila bloqueada) va al ledger
+                result = await self.db.execute(
+                    sa.select(Producto.stock).where(Producto.id == product_id).with_for_update()
+                )
+                stock_anterior = result.scalar_one_or_none()
+
+            if "precio" in params:
+                # Historial del cambio de precio, en la misma transacción que el UPDATE
+                await self.db.execute(sa.text("""
+                    INSERT INTO historial_precios (producto_id, precio_anterior, precio_nuevo)
+                    SELECT id, precio, :precio FROM productos
+                    WHERE id = :product_id AND precio <> :precio
+                """), {"product_id": product_id, "precio": params["precio"]})
+
             query = f"""
                 UPDATE productos 
                 SET {', '.join(set_clauses)}
@@ -75,12 +402,97 @@ class ProductRepository:
             """
             
             result = await self.db.execute(sa.text(query), params)
+            updated_product = result.fetchone()
+            if updated_product and stock_anterior is not None:
+                await anotar_movimientos(
+                    self.db, movimientos_por_delta({product_id: updated_product.stock - stock_anterior})
+                )
+            invalidar_al_confirmar(self.db, [product_id])
+            if updated_product:
+                registrar_stock_al_confirmar(self.db, [updated_product])
             await self.db.commit()
             
-            updated_product = result.fetchone()
             return dict(updated_product._mapping) if updated_product else None
             
         except Exception as e:
             logging.error(f"Error al actualizar el producto: {str(e)}")
             await self.db.rollback()
-            raise e
\ No newline at end of file
+            raise e
+
+
+class CachedProductRepository(ProductRepository):
+    """
+    ProductRepository que sirve las lecturas del catálogo desde catalogo_cache.
+    Las escrituras son las del repositorio base, que registran la invalidación
+    para aplicarla al hacer commit.
+    """
+
+    @staticmethod
+    def _a_modelo(datos: dict) -> Producto:
+        # Instancia transitoria (fuera de la sesión): los consumidores leen atributos
+        return Producto(**{c.name: datos[c.name] for c in Producto.__table__.columns if c.name in datos})
+
+    # Los fallos se llenan desde el primario (sesion_primario): la caché es de todo
+    # el proceso y una réplica atrasada dejaría filas previas a la última escritura
+    # guardadas con la versión posterior a la invalidación durante todo el TTL.
+
+    async def get_by_id(self, product_id: int) -> Optional[Producto]:
+        datos = catalogo_cache.obtener(product_id)
+        if datos is None:
+            version = catalogo_cache.version()
+            async with sesion_primario(self.db) as session:
+                result = await session.execute(sa.text("SELECT * FROM productos WHERE id = :id"), {"id": product_id})
+                fila = result.fetchone()
+            if fila is None:
+                return None
+            datos = dict(fila._mapping)
+            catalogo_cache.guardar(datos, version)
+        return self._a_modelo(datos)
+
+    async def get_by_name(self, nombre: str):
+        datos = catalogo_cache.obtener_por_nombre(nombre)
+        if datos is None:
+            version = catalogo_cache.version()
+            async with sesion_primario(self.db) as session:
+                fila = await ProductRepository(session).get_by_name(nombre)
+            if fila is None:
+                return None
+            datos = dict(fila._mapping)
+            catalogo_cache.guardar(datos, version)
+        return self._a_modelo(datos)
+
+    async def _listado(self) -> Listado:
+        """Catálogo completo desde la caché, o cargado con una consulta y cacheado"""
+        listado = catalogo_cache.obtener_listado()
+        if listado is None:
+            version = catalogo_cache.version()
+            async with sesion_primario(self.db) as session:
+                productos = await ProductRepository(session).obtener_todos_productos()
+            listado = Listado(sorted(productos, key=lambda p: p["id"]))
+            catalogo_cache.guardar_listado(listado, version)
+        return listado
+
+    async def obtener_todos_productos(self) -> List[dict]:
+        return list((await self._listado()).productos)
+
+    async def _indice_busqueda(self) -> IndiceBusqueda:
+        # Se arma una vez por cada carga del catálogo
+        listado = await self._listado()
+        if listado.indice is None:
+            listado.indice = IndiceBusqueda(listado.productos, campo_descripcion="descripcion")
+        return listado.indice
+
+    async def obtener_catalogo_json(self, serializar: Callable[[List[dict]], bytes]) -> bytes:
+        """Listado completo ya serializado; se serializa una vez por cada carga del catálogo"""
+        listado = await self._listado()
+        if listado.json is None:
+            listado.json = serializar(listado.productos)
+        return listado.json
+
+    async def obtener_productos_pagina(
+        self, limit: int = 100, skip: int = 0, after_id: Optional[int] = None
+    ) -> List[dict]:
+        listado = await self._listado()
+        inicio = bisect_right(listado.ids, after_id) if after_id is not None else skip
+        return listado.productos[inicio:inicio + limit]
+
@@ -0,0 +1,301 @@
+# productos/infrastructure/stock_bajo.py
+"""
+Seguimiento incremental de productos con stock bajo (stock < STOCK_BAJO_UMBRAL,
+el mismo criterio que la vista vista_stock_bajo).
+
+- Conjunto ordenado en memoria (stock, id) con solo los productos bajo el umbral:
+  GET /productos/stock-bajo responde sin recorrer la tabla.
+- Los repositorios registran en la sesión el stock nuevo de lo que tocan
+  (`registrar_stock_al_confirmar`, con lo que ya devuelve su RETURNING) y se
+  aplica en `after_commit`, igual que la invalidación de la caché del catálogo.
+- Cuando un producto cruza el umbral (en cualquier sentido) se publica por el
+  canal "stock_bajo" del WebSocketManager. El envío se agrupa cada
+  STOCK_BAJO_DEBOUNCE segundos y un mismo producto se notifica como máximo una
+  vez cada STOCK_BAJO_COOLDOWN segundos; si vuelve al estado ya notificado antes
+  del envío, no se publica nada.
+- El conjunto es por proceso: cada STOCK_BAJO_RESYNC segundos se recarga desde
+  la base (idx_productos_stock) para ver las ventas de otros workers, y los
+  cruces que aparezcan ahí se notifican igual.
+"""
+import asyncio
+import logging
+import time
+from bisect import bisect_left, insort
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+import sqlalchemy as sa
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from ...core.config import settings
+
+CANAL_STOCK_BAJO = "stock_bajo"
+CAMPOS = ("id", "nombre", "stock", "categoria_id", "proveedor_id")
+
+_CLAVE_PENDIENTES = "stock_bajo_cambios"
+
+logger = logging.getLogger(__name__)
+
+
+def _fila(origen: Any) -> dict:
+    """Snapshot de los campos seguidos desde un Row, un modelo o un diccionario"""
+    if isinstance(origen, dict):
+        return {campo: origen.get(campo) for campo in CAMPOS}
+    if hasattr(origen, "_mapping"):
+        mapping = origen._mapping
+        return {campo: mapping.get(campo) for campo in CAMPOS}
+    return {campo: getattr(origen, campo, None) for campo in CAMPOS}
+
+
+async def _publicar_ws(mensaje: dict):
+    # Import diferido: el módulo de WebSocket arrastra su pool de asyncpg
+    from ...webSocket.infrastructure.websocket.manager import ws_manager
+    await ws_manager.broadcast(CANAL_STOCK_BAJO, mensaje)
+
+
+class StockBajoTracker:
+    def __init__(
+        self,
+        umbral: int,
+        debounce: float,
+        cooldown: float,
+        resync: float,
+        publicar: Optional[Callable[[dict], Awaitable[None]]] = None,
+    ):
+        self.umbral = umbral
+        self.debounce = debounce
+        self.cooldown = cooldown
+        self.resync = resync
+        self.publicar = publicar or _publicar_ws
+        self._productos: Dict[int, dict] = {}  # solo los que están bajo el umbral
+        self._orden: List[Tuple[int, int]] = []  # (stock, id) ordenado
+        self._cargado_en: Optional[float] = None
+        # Cruces pendientes de publicar: id -> último snapshot visto
+        self._pendientes: Dict[int, dict] = {}
+        self._notificados: Dict[int, float] = {}  # id bajo el umbral ya notificado -> cuándo
+        self._ultimo_envio: Dict[int, float] = {}
+        self._envio: Optional[asyncio.Task] = None
+        self._sincronizacion: Optional[asyncio.Task] = None
+        self.publicados = 0
+
+    # ---- conjunto ordenado ----
+
+    def _quitar(self, producto_id: int):
+        fila = self._productos.pop(producto_id, None)
+        if fila is not None:
+            i = bisect_left(self._orden, (fila["stock"], producto_id))
+            if i < len(self._orden) and self._orden[i] == (fila["stock"], producto_id):
+                del self._orden[i]
+
+    def _poner(self, fila: dict):
+        self._productos[fila["id"]] = fila
+        insort(self._orden, (fila["stock"], fila["id"]))
+
+    def es_bajo(self, stock: Optional[int]) -> bool:
+        return stock is not None and stock < self.umbral
+
+    @property
+    def cargado(self) -> bool:
+        return self._cargado_en is not None
+
+    def aplicar(self, filas: Iterable[dict], eliminados: Iterable[int] = ()):
+        """Aplica stock ya confirmado en la base y encola los cruces de umbral"""
+        for fila in filas:
+            self._actualizar(fila)
+        for producto_id in eliminados:
+            self._actualizar({"id": producto_id, "stock": None}, eliminado=True)
+        if self._pendientes:
+            self._programar_envio()
+
+    def _actualizar(self, fila: dict, eliminado: bool = False):
+        producto_id = fila["id"]
+        anterior = self._productos.get(producto_id)
+        self._quitar(producto_id)
+        bajo = not eliminado and self.es_bajo(fila["stock"])
+        if bajo:
+            self._poner(fila)
+        if (anterior is not None) != bajo:
+            if eliminado:
+                fila = {**anterior, "stock": None}
+            self._pendientes[producto_id] = {**fila, "eliminado": eliminado}
+
+    def listar(
+        self,
+        limit: int = 100,
+        categoria_id: Optional[int] = None,
+        proveedor_id: Optional[int] = None,
+        umbral: Optional[int] = None,
+    ) -> List[dict]:
+        """Productos bajo el umbral (o uno menor), del menor stock al mayor"""
+        resultado = []
+        for stock, producto_id in self._orden:
+            if umbral is not None and stock >= umbral:
+                break
+            fila = self._productos[producto_id]
+            if categoria_id is not None and fila["categoria_id"] != categoria_id:
+                continue
+            if proveedor_id is not None and fila["proveedor_id"] != proveedor_id:
+                continue
+            resultado.append(fila)
+            if len(resultado) >= limit:
+                break
+        return resultado
+
+    def __len__(self) -> int:
+        return len(self._productos)
+
+    # ---- carga y resincronización ----
+
+    async def cargar(self, session):
+        """
+        Recarga el conjunto desde la base (un range scan de idx_productos_stock).
+        La primera carga no notifica; las siguientes notifican los cruces que
+        hizo otro worker.
+        """
+        result = await session.execute(
+            sa.text("""
+                SELECT id, nombre, stock, categoria_id, proveedor_id
+                FROM productos WHERE stock < :umbral
+            """),
+            {"umbral": self.umbral}
+        )
+        actuales = {fila.id: _fila(fila) for fila in result.fetchall()}
+        salieron = [producto_id for producto_id in self._productos if producto_id not in actuales]
+        repuestos = {}
+        if salieron and self.cargado:
+            result = await session.execute(
+                sa.select(*[sa.column(c) for c in CAMPOS]).select_from(sa.table("productos"))
+                .where(sa.column("id").in_(salieron))
+            )
+            repuestos = {fila.id: _fila(fila) for fila in result.fetchall()}
+
+        if not self.cargado:
+            self._productos, self._orden = {}, []
+            for fila in actuales.values():
+                self._poner(fila)
+            # Lo que ya estaba bajo al arrancar se considera notificado
+            ahora = time.monotonic()
+            self._notificados = {producto_id: ahora for producto_id in actuales}
+        else:
+            self.aplicar(
+                [*actuales.values(), *repuestos.values()],
+                eliminados=[producto_id for producto_id in salieron if producto_id not in repuestos]
+            )
+        self._cargado_en = time.monotonic()
+        logger.info(f"📉 Stock bajo: {len(self._productos)} productos bajo {self.umbral}")
+
+    async def _sincronizar(self, session_factory):
+        while True:
+            await asyncio.sleep(self.resync)
+            try:
+                async with session_factory() as session:
+                    await self.cargar(session)
+            except Exception as e:
+                logger.error(f"❌ Error al resincronizar stock bajo: {e}")
+
+    async def iniciar(self, session_factory):
+        try:
+            async with session_factory() as session:
+                await self.cargar(session)
+        except Exception as e:
+            logger.error(f"❌ No se pudo cargar el stock bajo: {e}")
+        if self.resync > 0 and self._sincronizacion is None:
+            self._sincronizacion = asyncio.create_task(self._sincronizar(session_factory))
+
+    async def detener(self):
+        for tarea in (self._sincronizacion, self._envio):
+            if tarea is not None:
+                tarea.cancel()
+        self._sincronizacion = self._envio = None
+        if self._pendientes:
+            await self._enviar(forzar=True)
+
+    # ---- notificaciones con debounce ----
+
+    def _programar_envio(self):
+        if self._envio is not None and not self._envio.done():
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return  # fuera de la app (CLI): no hay a quién notificar
+        self._envio = loop.create_task(self._enviar_tras_espera())
+
+    async def _enviar_tras_espera(self):
+        await asyncio.sleep(self.debounce)
+        self._envio = None
+        await self._enviar()
+        if self._pendientes:
+            # Productos en cooldown: se reintentan en la próxima ventana
+            self._programar_envio()
+
+    async def _enviar(self, forzar: bool = False):
+        ahora = time.monotonic()
+        productos = []
+        for producto_id, fila in list(self._pendientes.items()):
+            if not forzar and ahora - self._ultimo_envio.get(producto_id, float("-inf")) < self.cooldown:
+                continue
+            del self._pendientes[producto_id]
+            bajo = producto_id in self._productos
+            if bajo == (producto_id in self._notificados):
+                continue  # volvió al estado ya notificado dentro de la ventana
+            if bajo:
+                self._notificados[producto_id] = ahora
+                fila = self._productos[producto_id]
+            else:
+                self._notificados.pop(producto_id, None)
+            self._ultimo_envio[producto_id] = ahora
+            productos.append({
+                **{campo: fila.get(campo) for campo in CAMPOS},
+                "estado": "bajo" if bajo else ("eliminado" if fila.get("eliminado") else "repuesto"),
+            })
+        # Los cooldown vencidos ya no hacen falta
+        self._ultimo_envio = {k: v for k, v in self._ultimo_envio.items() if ahora - v < self.cooldown}
+        if not productos:
+            return
+        try:
+            await self.publicar({"type": "stock_bajo", "umbral": self.umbral, "productos": productos})
+            self.publicados += 1
+        except Exception as e:
+            logger.error(f"❌ Error al publicar stock bajo: {e}")
+
+    def estadisticas(self) -> dict:
+        return {
+            "productos": len(self._productos),
+            "umbral": self.umbral,
+            "pendientes": len(self._pendientes),
+            "publicados": self.publicados,
+            "cargado_hace_s": round(time.monotonic() - self._cargado_en, 1) if self.cargado else None,
+        }
+
+
+stock_bajo = StockBajoTracker(
+    umbral=settings.STOCK_BAJO_UMBRAL,
+    debounce=settings.STOCK_BAJO_DEBOUNCE,
+    cooldown=settings.STOCK_BAJO_COOLDOWN,
+    resync=settings.STOCK_BAJO_RESYNC,
+)
+
+
+def registrar_stock_al_confirmar(session, filas: Iterable[Any] = (), eliminados: Iterable[int] = ()):
+    """
+    Registra en la sesión el stock nuevo de productos (Row, modelo o dict con
+    id, nombre, stock, categoria_id, proveedor_id) para aplicarlo al hacer commit.
+    """
+    pendientes = session.info.setdefault(_CLAVE_PENDIENTES, {"filas": {}, "eliminados": set()})
+    for origen in filas:
+        fila = _fila(origen)
+        pendientes["filas"][fila["id"]] = fila
+    pendientes["eliminados"].update(eliminados)
+
+
+@event.listens_for(Session, "after_commit")
+def _aplicar_cambios(session):
+    pendientes = session.info.pop(_CLAVE_PENDIENTES, None)
+    if pendientes and stock_bajo.cargado:
+        stock_bajo.aplicar(pendientes["filas"].values(), pendientes["eliminados"])
+
+
+@event.listens_for(Session, "after_rollback")
+def _descartar_cambios(session):
+    session.info.pop(_CLAVE_PENDIENTES, None)
@@ -1,12 +1,20 @@
 from typing import Any, Dict, Optional, Set, Union
-from fastapi import APIRouter, Depends, HTTPException, Path, status
+from fastapi import (
+    APIRouter, Depends, File, HTTPException, Path, Query, Response, UploadFile, WebSocket,
+    WebSocketDisconnect, status
+)
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.engine import Row
-from ...database.session import get_db
+from ...core.config import settings
+from ...database.session import get_db, get_read_db
+from ...core.pagination import NEXT_CURSOR_HEADER
+from ...core.http_cache import validar_cache
 from ...productos.presentation import schemas
 from ...database.UnitofWork import UnitOfWork
 from ..application.service import ProductService
-from ..infrastructure.repositories import ProductRepository
+from ..application.importacion import LOTE_POR_DEFECTO, formato_por_nombre
+from ..infrastructure.repositories import ProductRepository, CachedProductRepository
+from ..infrastructure.stock_bajo import CANAL_STOCK_BAJO, stock_bajo
 import logging
 
 logger = logging.getLogger(__name__)
@@ -31,16 +39,43 @@ def fila_a_diccionario(
         raise ValueError(f"No se pudo convertir el objeto: {str(e)}")
 
 async def get_product_service(db: AsyncSession = Depends(get_db)):
-    repository = ProductRepository(db)
+    # Lecturas desde la caché de catálogo; las escrituras la invalidan al hacer commit
+    repository = CachedProductRepository(db)
     return ProductService(repository)
 
-@router.get("/", response_model=list[schemas.Producto])
+# Consultas de catálogo: réplica de lectura si está configurada
+async def get_product_lectura_service(db: AsyncSession = Depends(get_read_db)):
+    return await get_product_service(db)
+
+# El catálogo cacheado tolera stock viejo durante la ventana de stock: sin ETag en ese lapso
+@router.get(
+    "/",
+    response_model=list[schemas.Producto],
+    dependencies=[validar_cache("productos", estabilizacion=settings.PRODUCTOS_CACHE_VENTANA_STOCK)]
+)
 async def listar_productos(
-    service: ProductService = Depends(get_product_service)):
-    
+    response: Response,
+    skip: Optional[int] = Query(None, ge=0, description="Items a saltar (OFFSET, compatibilidad)"),
+    limit: Optional[int] = Query(None, ge=1, le=1000, description="Tamaño de página"),
+    cursor: Optional[str] = Query(None, description="Cursor opaco devuelto en X-Next-Cursor"),
+    service: ProductService = Depends(get_product_lectura_service)):
+    """
+    Lista productos. Sin parámetros retorna el catálogo completo; con `limit`
+    y/o `cursor` pagina por id y expone el siguiente cursor en `X-Next-Cursor`.
+    """
     try:
-        productos = await service.get_all_products()
+        if skip is None and limit is None and cursor is None:
+            # JSON prearmado del catálogo completo: sin Postgres ni Pydantic por request
+            return Response(content=await service.get_catalogo_json(), media_type="application/json")
+
+        productos, siguiente = await service.get_products_page(
+            limit=limit or 100, skip=skip or 0, cursor=cursor
+        )
+        if siguiente:
+            response.headers[NEXT_CURSOR_HEADER] = siguiente
         return productos
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error al listar productos: {e}")
         raise HTTPException(
@@ -49,6 +84,26 @@ async def listar_productos(
         )
 
 
+@router.get("/buscar", response_model=list[schemas.ProductoBusqueda])
+async def buscar_productos(
+    q: str = Query(..., min_length=1, max_length=100, description="Texto a buscar"),
+    limit: int = Query(10, ge=1, le=50, description="Máximo de resultados"),
+    autocompletar: bool = Query(True, description="Prioriza nombres que empiezan con el texto (type-ahead del POS)"),
+    categoria_id: Optional[int] = Query(None, gt=0),
+    proveedor_id: Optional[int] = Query(None, gt=0),
+    service: ProductService = Depends(get_product_lectura_service)
+):
+    """
+    Búsqueda de productos por nombre y descripción, ordenada por relevancia.
+    Con `autocompletar=true` (default) solo se busca en el nombre y primero van
+    los que empiezan con `q`; con `false` se busca también en la descripción.
+    """
+    return await service.buscar_productos(
+        q, limit=limit, autocompletar=autocompletar,
+        categoria_id=categoria_id, proveedor_id=proveedor_id
+    )
+
+
 @router.post("/CrearProductos", response_model=schemas.Producto, status_code=status.HTTP_201_CREATED)
 async def crear_producto(producto: schemas.ProductoCreate):
     try:
@@ -70,10 +125,102 @@ async def crear_producto(producto: schemas.ProductoCreate):
             detail=f"Error al crear producto: {e}"
         )
 
+@router.post("/importar", response_model=schemas.ResultadoImportacion)
+async def importar_productos(
+    archivo: UploadFile = File(..., description="CSV con encabezado o JSON (arreglo u objeto por línea)"),
+    formato: Optional[str] = Query(None, pattern="^(csv|json)$", description="Por defecto, según la extensión"),
+    lote: int = Query(LOTE_POR_DEFECTO, ge=100, le=5000, description="Filas por lote (una transacción por lote)"),
+    service: ProductService = Depends(get_product_service)
+):
+    """
+    Alta/actualización masiva por nombre (INSERT ... ON CONFLICT). Columnas:
+    nombre, precio, descripcion, stock, categoria_id o categoria (nombre),
+    proveedor_id o proveedor (nombre). Sin stock se conserva el actual.
+    Las filas inválidas se informan en `errores` y no frenan el resto.
+    """
+    formato = formato or formato_por_nombre(archivo.filename)
+    if not formato:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="No se pudo deducir el formato: indique ?formato=csv o ?formato=json"
+        )
+    return await service.importar_productos(archivo.file, formato, lote)
+
+@router.patch("/precios", response_model=schemas.ResultadoPrecios)
+async def actualizar_precios(
+    data: schemas.ActualizacionPrecios,
+    service: ProductService = Depends(get_product_service)
+):
+    """
+    Reprecio masivo: precio fijo por producto (`precios`) o una regla (`modo`:
+    fijo, porcentaje o monto) sobre producto_ids, categoría y/o proveedor.
+    Se aplica en una sola sentencia y cada cambio queda en historial_precios.
+    """
+    return await service.actualizar_precios(data)
+
+@router.get("/stock-bajo", response_model=list[schemas.ProductoStockBajo])
+async def listar_stock_bajo(
+    limit: int = Query(100, ge=1, le=1000),
+    categoria_id: Optional[int] = Query(None, gt=0),
+    proveedor_id: Optional[int] = Query(None, gt=0),
+    umbral: Optional[int] = Query(
+        None, ge=1, le=settings.STOCK_BAJO_UMBRAL,
+        description="Umbral menor al configurado (STOCK_BAJO_UMBRAL)"
+    ),
+    service: ProductService = Depends(get_product_lectura_service)
+):
+    """
+    Productos con stock menor al umbral, del menor stock al mayor. Sale del
+    conjunto que se mantiene al confirmar cada cambio de stock, sin recorrer la tabla.
+    """
+    return await service.get_stock_bajo(
+        limit=limit, categoria_id=categoria_id, proveedor_id=proveedor_id, umbral=umbral
+    )
+
+@router.websocket("/stock-bajo/ws")
+async def stock_bajo_ws(websocket: WebSocket):
+    """
+    Avisos de cruce de umbral ({"type": "stock_bajo", "productos": [...]}, con
+    estado bajo, repuesto o eliminado). Al conectar se envía la lista actual.
+    """
+    # Import diferido, igual que en la publicación: el manager arrastra su pool de asyncpg
+    from ...webSocket.infrastructure.websocket.manager import ws_manager
+
+    await websocket.accept()
+    await ws_manager.connect(websocket, CANAL_STOCK_BAJO, {"user_id": None})
+    try:
+        await websocket.send_json({
+            "type": "stock_bajo_snapshot",
+            "umbral": stock_bajo.umbral,
+            "productos": stock_bajo.listar(limit=1000),
+        })
+        while True:
+            # Mantener conexión viva
+            if await websocket.receive_text() == "ping":
+                await websocket.send_text("pong")
+    except WebSocketDisconnect:
+        pass
+    finally:
+        await ws_manager.disconnect(websocket, CANAL_STOCK_BAJO)
+
+@router.get("/{producto_id}/historial-precios", response_model=list[schemas.HistorialPrecio])
+async def historial_precios(
+    response: Response,
+    producto_id: int = Path(..., gt=0),
+    limit: int = Query(50, ge=1, le=500, description="Tamaño de página"),
+    cursor: Optional[str] = Query(None, description="Cursor opaco devuelto en X-Next-Cursor"),
+    service: ProductService = Depends(get_product_lectura_service)
+):
+    """Cambios de precio del producto, del más reciente al más antiguo"""
+    cambios, siguiente = await service.get_historial_precios(producto_id, limit=limit, cursor=cursor)
+    if siguiente:
+        response.headers[NEXT_CURSOR_HEADER] = siguiente
+    return cambios
+
 @router.get("/{producto_id}", response_model=schemas.Producto)
 async def obtener_producto(
     producto_id: int = Path(..., gt=0),
-    service: ProductService = Depends(get_product_service)
+    service: ProductService = Depends(get_product_lectura_service)
 ):
     product = await service.get_product(producto_id)
     return fila_a_diccionario(product)
@@ -86,7 +233,7 @@ async def obtener_producto(
 )
 async def obtener_producto_por_nombre(
     nombre_producto: str = Path(..., description="Nombre exacto del producto a buscar"),
-    service: ProductService = Depends(get_product_service)
+    service: ProductService = Depends(get_product_lectura_service)
 ):
     producto = await service.get_product_nom(nombre_producto)
     return fila_a_diccionario(producto)
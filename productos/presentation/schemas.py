@@ -1,5 +1,6 @@
 from pydantic import BaseModel, Field, validator
-from typing import Optional
+from datetime import datetime
+from typing import List, Literal, Optional
 
 class ProductoBase(BaseModel):
     nombre: str = Field(..., min_length=1, max_length=100, example="Teclado mecánico", description="Nombre del producto")
@@ -42,3 +43,87 @@ class Producto(ProductoBase):
                 "proveedor_id": 1
             }
         }
+
+class ProductoBusqueda(Producto):
+    relevancia: float = Field(..., example=1.0, description="Puntaje de coincidencia; mayor es más relevante")
+
+class ProductoImportacion(BaseModel):
+    """Fila de POST /productos/importar. Categoría y proveedor se indican por id o por nombre"""
+    nombre: str = Field(..., min_length=1, max_length=100)
+    descripcion: Optional[str] = Field(None, max_length=500)
+    precio: float = Field(..., gt=0)
+    stock: Optional[int] = Field(None, ge=0, description="Vacío: al actualizar se conserva el stock actual")
+    categoria_id: Optional[int] = None
+    categoria: Optional[str] = Field(None, description="Nombre de la categoría (alternativa a categoria_id)")
+    proveedor_id: Optional[int] = None
+    proveedor: Optional[str] = Field(None, description="Nombre del proveedor (alternativa a proveedor_id)")
+
+    @validator('precio', pre=True)
+    def validar_precio(cls, value):
+        # CSV exportado con configuración regional en español: "10,50"
+        if isinstance(value, str):
+            return value.replace(",", ".")
+        return value
+
+    @validator('nombre')
+    def validar_nombre(cls, value):
+        if value.strip() == '':
+            raise ValueError("El nombre no puede estar vacío")
+        return value.strip()
+
+class ErrorImportacion(BaseModel):
+    fila: int = Field(..., example=12, description="Número de registro en el archivo (1 = primer dato)")
+    nombre: Optional[str] = None
+    error: str
+
+class ResultadoImportacion(BaseModel):
+    procesadas: int = Field(..., description="Registros leídos del archivo")
+    insertados: int
+    actualizados: int
+    con_error: int
+    lotes: int
+    duracion_ms: float
+    completo: bool = Field(..., description="False si la lectura se cortó por un error de formato")
+    errores: List[ErrorImportacion] = Field(default_factory=list, description="Primeros errores por fila")
+
+class PrecioProducto(BaseModel):
+    producto_id: int = Field(..., gt=0)
+    precio: float = Field(..., gt=0)
+
+class ActualizacionPrecios(BaseModel):
+    """
+    Cambio masivo de precios. O bien `precios` (precio fijo por producto), o bien
+    `modo` + `valor` aplicado a los productos que cumplan los filtros.
+    """
+    modo: Optional[Literal["fijo", "porcentaje", "monto"]] = Field(
+        None, example="porcentaje", description="fijo: precio = valor; porcentaje: +valor%; monto: +valor"
+    )
+    valor: Optional[float] = Field(None, example=10, description="Precio, porcentaje o monto según `modo` (puede ser negativo)")
+    producto_ids: Optional[List[int]] = Field(None, max_length=50000)
+    categoria_id: Optional[int] = Field(None, gt=0)
+    proveedor_id: Optional[int] = Field(None, gt=0)
+    todos: bool = Field(False, description="Confirmación para aplicar `modo` a todo el catálogo sin filtros")
+    precios: Optional[List[PrecioProducto]] = Field(None, max_length=50000)
+    usuario_id: Optional[int] = Field(None, description="Usuario que registra el cambio en historial_precios")
+
+class ResultadoPrecios(BaseModel):
+    encontrados: int = Field(..., description="Productos alcanzados por la operación")
+    actualizados: int = Field(..., description="Productos con precio cambiado (una fila de historial cada uno)")
+    sin_cambios: int = Field(..., description="El precio nuevo era igual al actual")
+    precio_invalido: int = Field(..., description="Omitidos porque el precio resultante era <= 0")
+    no_encontrados: int = Field(0, description="Ids de `precios` que no existen")
+
+class HistorialPrecio(BaseModel):
+    id: int
+    producto_id: int
+    precio_anterior: float
+    precio_nuevo: float
+    fecha_cambio: Optional[datetime] = None
+    usuario_id: Optional[int] = None
+
+class ProductoStockBajo(BaseModel):
+    id: int
+    nombre: str
+    stock: int
+    categoria_id: Optional[int] = None
+    proveedor_id: Optional[int] = None
@@ -0,0 +1,84 @@
+from ..infrastructure.pedidos_repository import PedidosProveedoresRepository
+from ..domain.schemas import PedidoCreate, PedidoOut, PedidoDetalleOut, RecepcionPedidoOut
+from typing import List, Optional, Tuple
+from datetime import datetime
+from fastapi import HTTPException, status
+from sqlalchemy.exc import IntegrityError
+from ...core.pagination import CursorInvalidoError, next_cursor
+
+class PedidosProveedoresService:
+    def __init__(self, pedidos_repository: PedidosProveedoresRepository):
+        self.pedidos_repository = pedidos_repository
+
+    async def crear_pedido(self, pedido_data: PedidoCreate) -> PedidoOut:
+        if not await self.pedidos_repository.proveedor_existe(pedido_data.proveedor_id):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Proveedor con ID {pedido_data.proveedor_id} no encontrado"
+            )
+        inexistentes = await self.pedidos_repository.productos_inexistentes(
+            [linea.producto_id for linea in pedido_data.lineas]
+        )
+        if inexistentes:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Productos no encontrados: {inexistentes[:20]}"
+            )
+        pedido = await self.pedidos_repository.crear(
+            pedido_data.proveedor_id,
+            [(linea.producto_id, linea.cantidad, linea.precio) for linea in pedido_data.lineas]
+        )
+        return PedidoOut(**pedido)
+
+    async def listar_pedidos(
+        self,
+        proveedor_id: Optional[int] = None,
+        desde: Optional[datetime] = None,
+        hasta: Optional[datetime] = None,
+        pendientes: Optional[bool] = None,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+    ) -> Tuple[List[PedidoOut], Optional[str]]:
+        """Pedidos del más reciente al más antiguo y cursor de la siguiente página"""
+        try:
+            pedidos = await self.pedidos_repository.listar(
+                proveedor_id=proveedor_id, desde=desde, hasta=hasta,
+                pendientes=pendientes, limit=limit, cursor=cursor
+            )
+        except CursorInvalidoError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
+            )
+        return [PedidoOut(**p) for p in pedidos], next_cursor(pedidos, limit, "fecha_pedido", "id")
+
+    async def obtener_pedido(self, pedido_id: int) -> PedidoDetalleOut:
+        pedido = await self.pedidos_repository.obtener(pedido_id)
+        if pedido is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Pedido con ID {pedido_id} no encontrado"
+            )
+        return PedidoDetalleOut(**pedido)
+
+    async def recibir_pedido(self, pedido_id: int, usuario_id: Optional[int] = None) -> RecepcionPedidoOut:
+        try:
+            recepcion = await self.pedidos_repository.recibir(pedido_id, usuario_id=usuario_id)
+        except IntegrityError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="El usuario indicado no existe"
+            )
+        if recepcion is None:
+            # Sin fila pendiente: o no existe o ya se recibió
+            pedido = await self.pedidos_repository.obtener(pedido_id)
+            if pedido is None:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail=f"Pedido con ID {pedido_id} no encontrado"
+                )
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"El pedido {pedido_id} ya fue recibido el {pedido['fecha_entrega'].isoformat()}"
+            )
+        return RecepcionPedidoOut(**recepcion)
@@ -2,6 +2,7 @@ from ..infrastructure.proveedores_repository import ProveedoresRepository
 from ..domain.schemas import ProveedorCreate, ProveedorUpdate
 from typing import Optional, List
 from fastapi import HTTPException
+from ...core.pagination import CursorInvalidoError, decode_cursor, next_cursor
 
 class ProveedoresService:
     def __init__(self, proveedores_repository: ProveedoresRepository):
@@ -10,6 +11,16 @@ class ProveedoresService:
     async def obtener_proveedores(self, skip: int = 0, limit: int = 100):
         return await self.proveedores_repository.listar_proveedores(skip=skip, limit=limit)
 
+    async def obtener_proveedores_pagina(self, limit: int = 100, skip: int = 0, cursor: Optional[str] = None):
+        """Retorna (proveedores, siguiente_cursor) paginando por id"""
+        after_id = None
+        if cursor:
+            (after_id,) = decode_cursor(cursor, 1)
+            if not isinstance(after_id, int):
+                raise CursorInvalidoError(f"Cursor inválido: {cursor}")
+        proveedores = await self.proveedores_repository.listar_proveedores(skip=skip, limit=limit, after_id=after_id)
+        return proveedores, next_cursor(proveedores, limit, "id")
+
     async def obtener_proveedor_por_id(self, proveedor_id: int):
         return await self.proveedores_repository.obtener_por_id(proveedor_id)
 
@@ -25,5 +36,5 @@ class ProveedoresService:
     async def verificar_proveedor_existente(self, nombre: str):
         return await self.proveedores_repository.existe_proveedor(nombre)
 
-    async def buscar_proveedores_por_nombre(self, nombre: str):
-        return await self.proveedores_repository.buscar_por_nombre(nombre)
\ No newline at end of file
+    async def buscar_proveedores_por_nombre(self, nombre: str, limit: int = 50):
+        return await self.proveedores_repository.buscar_por_nombre(nombre, limit=limit)
\ No newline at end of file
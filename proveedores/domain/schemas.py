@@ -1,7 +1,9 @@
 from pydantic import BaseModel, EmailStr, Field
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 
+MAX_LINEAS_PEDIDO = 10000
+
 class ProveedorBase(BaseModel):
     nombre: str = Field(..., min_length=1, max_length=100, description="Nombre del proveedor")
     contacto: Optional[str] = Field(None, max_length=100, description="Persona de contacto")
@@ -21,4 +23,41 @@ class ProveedorOut(ProveedorBase):
     id: int
     
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+# Pedidos a proveedores (órdenes de compra)
+
+class LineaPedidoCreate(BaseModel):
+    producto_id: int = Field(..., gt=0)
+    cantidad: int = Field(..., gt=0)
+    precio: float = Field(..., ge=0, description="Costo unitario")
+
+class PedidoCreate(BaseModel):
+    proveedor_id: int = Field(..., gt=0)
+    lineas: List[LineaPedidoCreate] = Field(..., min_length=1, max_length=MAX_LINEAS_PEDIDO)
+
+class PedidoOut(BaseModel):
+    id: int
+    proveedor_id: int
+    fecha_pedido: datetime
+    fecha_entrega: Optional[datetime] = Field(None, description="None: pendiente de recepción")
+    total: float
+
+class LineaPedidoOut(BaseModel):
+    id: int
+    producto_id: int
+    cantidad: int
+    precio: float
+
+class PedidoDetalleOut(PedidoOut):
+    lineas: List[LineaPedidoOut]
+
+class RecepcionPedido(BaseModel):
+    usuario_id: Optional[int] = Field(None, description="Usuario que registra la entrada en el ledger de movimientos")
+
+class RecepcionPedidoOut(BaseModel):
+    pedido_id: int
+    fecha_entrega: datetime
+    total: float
+    productos: int = Field(..., description="Productos con stock actualizado")
+    unidades: int = Field(..., description="Unidades ingresadas al stock")
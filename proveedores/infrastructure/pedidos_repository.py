@@ -0,0 +1,209 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import text
+from datetime import datetime
+from typing import List, Optional, Tuple
+from ...core.fechas import a_utc
+from ...core.pagination import CursorInvalidoError, decode_cursor
+from ...productos.infrastructure.cache import invalidar_al_confirmar
+from ...productos.infrastructure.stock_bajo import registrar_stock_al_confirmar
+import logging
+
+logger = logging.getLogger(__name__)
+
+_COLUMNAS_PEDIDO = "id, proveedor_id, fecha_pedido, fecha_entrega, total"
+
+# Recepción en una sentencia: marca el pedido como entregado (si seguía pendiente)
+# recalculando el total, suma al stock las cantidades por producto con un solo UPDATE
+# (filas bloqueadas en orden de id, como la reserva de las ventas) y anota las
+# entradas en el ledger de movimientos.
+_RECIBIR = """
+    WITH pedido AS (
+        UPDATE pedidos_proveedores
+        SET fecha_entrega = now(),
+            total = (SELECT coalesce(sum(d.cantidad * d.precio), 0)
+                     FROM detalle_pedidos_proveedores d WHERE d.pedido_id = :pedido_id)
+        WHERE id = :pedido_id AND fecha_entrega IS NULL
+        RETURNING id, fecha_entrega, total
+    ),
+    lineas AS (
+        SELECT d.producto_id, sum(d.cantidad) AS cantidad
+        FROM detalle_pedidos_proveedores d
+        JOIN pedido pe ON pe.id = d.pedido_id
+        GROUP BY d.producto_id
+    ),
+    bloqueados AS (
+        SELECT p.id FROM productos p
+        JOIN lineas l ON l.producto_id = p.id
+        ORDER BY p.id
+        FOR UPDATE OF p
+    ),
+    recibidos AS (
+        UPDATE productos p
+        SET stock = p.stock + l.cantidad
+        FROM lineas l, bloqueados b
+        WHERE p.id = l.producto_id AND p.id = b.id
+        RETURNING p.id, p.nombre, p.stock, p.categoria_id, p.proveedor_id, l.cantidad
+    ),
+    ledger AS (
+        INSERT INTO movimientos (producto_id, tipo, cantidad, usuario_id)
+        SELECT id, 'entrada', cantidad, CAST(:usuario_id AS INTEGER) FROM recibidos
+    )
+    SELECT pe.fecha_entrega, pe.total, r.id, r.nombre, r.stock, r.categoria_id, r.proveedor_id, r.cantidad
+    FROM pedido pe
+    LEFT JOIN recibidos r ON true
+"""
+
+
+class PedidosProveedoresRepository:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def proveedor_existe(self, proveedor_id: int) -> bool:
+        result = await self.session.execute(
+            text("SELECT 1 FROM proveedores WHERE id = :id"), {"id": proveedor_id}
+        )
+        return result.first() is not None
+
+    async def productos_inexistentes(self, producto_ids: List[int]) -> List[int]:
+        """Ids de la lista que no están en productos (una consulta)"""
+        ids = sorted(set(producto_ids))
+        result = await self.session.execute(
+            text("SELECT id FROM productos WHERE id = ANY(CAST(:ids AS integer[]))"), {"ids": ids}
+        )
+        existentes = {fila.id for fila in result}
+        return [producto_id for producto_id in ids if producto_id not in existentes]
+
+    async def crear(self, proveedor_id: int, lineas: List[Tuple[int, int, float]]) -> dict:
+        """
+        Crea el pedido con todas sus líneas (producto_id, cantidad, precio) en una
+        sentencia y calcula el total en SQL. Hace commit.
+        """
+        try:
+            result = await self.session.execute(
+                text("INSERT INTO pedidos_proveedores (proveedor_id, total) VALUES (:proveedor_id, 0) RETURNING id"),
+                {"proveedor_id": proveedor_id}
+            )
+            pedido_id = result.scalar_one()
+            await self.session.execute(
+                text("""
+                    INSERT INTO detalle_pedidos_proveedores (pedido_id, producto_id, cantidad, precio)
+                    SELECT :pedido_id, l.producto_id, l.cantidad, l.precio
+                    FROM unnest(CAST(:productos AS integer[]), CAST(:cantidades AS integer[]),
+                                CAST(:precios AS numeric[])) AS l(producto_id, cantidad, precio)
+                """),
+                {
+                    "pedido_id": pedido_id,
+                    "productos": [linea[0] for linea in lineas],
+                    "cantidades": [linea[1] for linea in lineas],
+                    "precios": [str(linea[2]) for linea in lineas],
+                }
+            )
+            result = await self.session.execute(
+                text(f"""
+                    UPDATE pedidos_proveedores
+                    SET total = (SELECT coalesce(sum(cantidad * precio), 0)
+                                 FROM detalle_pedidos_proveedores WHERE pedido_id = :pedido_id)
+                    WHERE id = :pedido_id
+                    RETURNING {_COLUMNAS_PEDIDO}
+                """),
+                {"pedido_id": pedido_id}
+            )
+            pedido = dict(result.one()._mapping)
+            await self.session.commit()
+            return pedido
+        except Exception as e:
+            logger.error(f"Error al crear el pedido: {str(e)}")
+            await self.session.rollback()
+            raise
+
+    async def listar(
+        self,
+        proveedor_id: Optional[int] = None,
+        desde: Optional[datetime] = None,
+        hasta: Optional[datetime] = None,
+        pendientes: Optional[bool] = None,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+    ) -> List[dict]:
+        """Pedidos del más reciente al más antiguo (keyset por fecha_pedido, id)"""
+        filtros = ["1 = 1"]
+        params = {"limit": limit}
+        if proveedor_id is not None:
+            filtros.append("proveedor_id = :proveedor_id")
+            params["proveedor_id"] = proveedor_id
+        if desde is not None:
+            filtros.append("fecha_pedido >= :desde")
+            params["desde"] = a_utc(desde)
+        if hasta is not None:
+            filtros.append("fecha_pedido <= :hasta")
+            params["hasta"] = a_utc(hasta)
+        if pendientes is not None:
+            filtros.append("fecha_entrega IS NULL" if pendientes else "fecha_entrega IS NOT NULL")
+        if cursor:
+            try:
+                fecha_cursor, id_cursor = decode_cursor(cursor, 2)
+                params.update(fecha_cursor=a_utc(datetime.fromisoformat(fecha_cursor)), id_cursor=int(id_cursor))
+            except (TypeError, ValueError) as e:
+                raise CursorInvalidoError(f"Cursor inválido: {cursor}") from e
+            filtros.append("(fecha_pedido, id) < (:fecha_cursor, :id_cursor)")
+        # Con proveedor: idx_pedidos_proveedores_proveedor_fecha; sin él: idx_pedidos_proveedores_fecha
+        result = await self.session.execute(text(f"""
+            SELECT {_COLUMNAS_PEDIDO}
+            FROM pedidos_proveedores
+            WHERE {' AND '.join(filtros)}
+            ORDER BY fecha_pedido DESC, id DESC
+            LIMIT :limit
+        """), params)
+        return [dict(fila._mapping) for fila in result.fetchall()]
+
+    async def obtener(self, pedido_id: int) -> Optional[dict]:
+        result = await self.session.execute(
+            text(f"SELECT {_COLUMNAS_PEDIDO} FROM pedidos_proveedores WHERE id = :pedido_id"),
+            {"pedido_id": pedido_id}
+        )
+        fila = result.first()
+        if fila is None:
+            return None
+        pedido = dict(fila._mapping)
+        result = await self.session.execute(
+            text("""
+                SELECT id, producto_id, cantidad, precio
+                FROM detalle_pedidos_proveedores
+                WHERE pedido_id = :pedido_id
+                ORDER BY id
+            """),
+            {"pedido_id": pedido_id}
+        )
+        pedido["lineas"] = [dict(linea._mapping) for linea in result.fetchall()]
+        return pedido
+
+    async def recibir(self, pedido_id: int, usuario_id: Optional[int] = None) -> Optional[dict]:
+        """
+        Recibe un pedido pendiente: stock de todas sus líneas, movimientos de
+        entrada y total, en una transacción. Retorna None si el pedido no existe
+        o ya fue recibido.
+        """
+        params = {"pedido_id": pedido_id, "usuario_id": usuario_id}
+        try:
+            filas = (await self.session.execute(text(_RECIBIR), params)).fetchall()
+            if not filas:
+                await self.session.rollback()
+                return None
+            fecha_entrega, total = filas[0].fecha_entrega, filas[0].total
+            recibidos = [fila for fila in filas if fila.id is not None]
+            unidades = sum(fila.cantidad for fila in recibidos)
+
+            invalidar_al_confirmar(self.session, [fila.id for fila in recibidos], stock=True)
+            registrar_stock_al_confirmar(self.session, recibidos)
+            await self.session.commit()
+        except Exception as e:
+            logger.error(f"Error al recibir el pedido {pedido_id}: {str(e)}")
+            await self.session.rollback()
+            raise
+        return {
+            "pedido_id": pedido_id,
+            "fecha_entrega": fecha_entrega,
+            "total": total,
+            "productos": len(recibidos),
+            "unidades": unidades,
+        }
@@ -1,20 +1,30 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy import and_, or_
+from sqlalchemy import and_, or_, text
 from ..domain.models import Proveedores
+from ...core.http_cache import marcar_modificado_al_confirmar
+from ...core.busqueda import consulta_tsquery, expr_documento, expr_prefijo, patron_prefijo, terminos
 from typing import Optional, List
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Expresión del índice GIN idx_proveedores_busqueda y del orden por prefijo del nombre
+_DOCUMENTO = expr_documento("nombre")
+_PREFIJO = expr_prefijo("nombre")
+
 class ProveedoresRepository:
     def __init__(self, session: AsyncSession):
         self.session = session
     
-    async def listar_proveedores(self, skip: int = 0, limit: int = 100):
-        result = await self.session.execute(
-            select(Proveedores).offset(skip).limit(limit)
-        )
+    async def listar_proveedores(self, skip: int = 0, limit: int = 100, after_id: Optional[int] = None):
+        query = select(Proveedores).order_by(Proveedores.id).limit(limit)
+        if after_id is not None:
+            # Keyset: usa el índice de la PK en lugar de descartar filas con OFFSET
+            query = query.where(Proveedores.id > after_id)
+        else:
+            query = query.offset(skip)
+        result = await self.session.execute(query)
         return result.scalars().all()
 
     async def obtener_por_id(self, proveedor_id: int):
@@ -26,6 +36,7 @@ class ProveedoresRepository:
     async def crear(self, proveedor_data):
         proveedor = Proveedores(**proveedor_data.dict())
         self.session.add(proveedor)
+        marcar_modificado_al_confirmar(self.session, "proveedores")
         await self.session.commit()
         await self.session.refresh(proveedor)
         return proveedor
@@ -36,6 +47,7 @@ class ProveedoresRepository:
             update_data = proveedor_data.dict(exclude_unset=True)
             for field, value in update_data.items():
                 setattr(proveedor, field, value)
+            marcar_modificado_al_confirmar(self.session, "proveedores")
             await self.session.commit()
             await self.session.refresh(proveedor)
         return proveedor
@@ -44,6 +56,7 @@ class ProveedoresRepository:
         proveedor = await self.obtener_por_id(proveedor_id)
         if proveedor:
             await self.session.delete(proveedor)
+            marcar_modificado_al_confirmar(self.session, "proveedores")
             await self.session.commit()
         return proveedor
 
@@ -53,8 +66,29 @@ class ProveedoresRepository:
         )
         return result.scalar_one_or_none() is not None
 
-    async def buscar_por_nombre(self, nombre: str):
+    async def buscar_por_nombre(self, nombre: str, limit: int = 50):
+        """
+        Proveedores con todas las palabras de `nombre` (la última como prefijo),
+        primero los que empiezan con el texto. En Postgres usa el índice GIN.
+        """
+        palabras = terminos(nombre)
+        if not palabras:
+            return []
+        if self.session.get_bind().dialect.name != "postgresql":
+            result = await self.session.execute(
+                select(Proveedores).where(Proveedores.nombre.ilike(f"%{nombre}%")).order_by(Proveedores.id).limit(limit)
+            )
+            return result.scalars().all()
+
         result = await self.session.execute(
-            select(Proveedores).where(Proveedores.nombre.ilike(f"%{nombre}%"))
+            select(Proveedores)
+            .where(text(f"{_DOCUMENTO} @@ to_tsquery('simple', :consulta)"))
+            .order_by(
+                text(f"({_PREFIJO} LIKE :patron) DESC"),
+                text(f"ts_rank({_DOCUMENTO}, to_tsquery('simple', :consulta)) DESC"),
+                Proveedores.id
+            )
+            .limit(limit)
+            .params(consulta=consulta_tsquery(palabras), patron=patron_prefijo(nombre))
         )
         return result.scalars().all()
\ No newline at end of file
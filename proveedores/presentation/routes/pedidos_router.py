@@ -0,0 +1,121 @@
+from fastapi import APIRouter, Body, Depends, HTTPException, Path, Query, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from ...application.pedidos_service import PedidosProveedoresService
+from ...infrastructure.pedidos_repository import PedidosProveedoresRepository
+from ...domain.schemas import PedidoCreate, PedidoOut, PedidoDetalleOut, RecepcionPedido, RecepcionPedidoOut
+from ....database.session import get_db, get_read_db
+from ....core.pagination import NEXT_CURSOR_HEADER
+from typing import List, Literal, Optional
+from datetime import datetime
+
+# Se incluye antes que proveedores_router para que /proveedores/pedidos no caiga en /proveedores/{proveedor_id}
+pedidos_router = APIRouter(prefix="/proveedores/pedidos", tags=["pedidos proveedores"])
+
+# Dependencia para el servicio
+async def get_pedidos_service(session: AsyncSession = Depends(get_db)) -> PedidosProveedoresService:
+    return PedidosProveedoresService(PedidosProveedoresRepository(session))
+
+# Consultas de pedidos: réplica de lectura si está configurada
+async def get_pedidos_lectura_service(session: AsyncSession = Depends(get_read_db)) -> PedidosProveedoresService:
+    return await get_pedidos_service(session)
+
+#endpoint crear_pedido
+@pedidos_router.post(
+    "/",
+    response_model=PedidoOut,
+    status_code=status.HTTP_201_CREATED,
+    summary="Crear un pedido a proveedor",
+    description="Crea el pedido con todas sus líneas en una transacción; el total se calcula en la base de datos"
+)
+async def crear_pedido(
+    pedido_data: PedidoCreate,
+    service: PedidosProveedoresService = Depends(get_pedidos_service)
+):
+    try:
+        return await service.crear_pedido(pedido_data)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error al crear el pedido: {str(e)}"
+        )
+
+#endpoint listar_pedidos
+@pedidos_router.get(
+    "/",
+    response_model=List[PedidoOut],
+    status_code=status.HTTP_200_OK,
+    summary="Listar pedidos a proveedores",
+    description="Pedidos del más reciente al más antiguo, filtrables por proveedor, fecha y estado. Usa `cursor` (header X-Next-Cursor) para la siguiente página"
+)
+async def listar_pedidos(
+    response: Response,
+    proveedor_id: Optional[int] = Query(None, gt=0, description="Solo pedidos de este proveedor"),
+    desde: Optional[datetime] = Query(None, description="Pedidos desde esta fecha (inclusive)"),
+    hasta: Optional[datetime] = Query(None, description="Pedidos hasta esta fecha (inclusive)"),
+    estado: Optional[Literal["pendiente", "recibido"]] = Query(None, description="Filtrar por estado de recepción"),
+    limit: int = Query(50, ge=1, le=500, description="Tamaño de página"),
+    cursor: Optional[str] = Query(None, description="Cursor opaco devuelto en X-Next-Cursor"),
+    service: PedidosProveedoresService = Depends(get_pedidos_lectura_service)
+):
+    try:
+        pedidos, siguiente = await service.listar_pedidos(
+            proveedor_id=proveedor_id, desde=desde, hasta=hasta,
+            pendientes=None if estado is None else estado == "pendiente",
+            limit=limit, cursor=cursor
+        )
+        if siguiente:
+            response.headers[NEXT_CURSOR_HEADER] = siguiente
+        return pedidos
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error al obtener pedidos: {str(e)}"
+        )
+
+#endpoint obtener_pedido
+@pedidos_router.get(
+    "/{pedido_id}",
+    response_model=PedidoDetalleOut,
+    status_code=status.HTTP_200_OK,
+    summary="Obtener un pedido con sus líneas"
+)
+async def obtener_pedido(
+    pedido_id: int = Path(..., gt=0, description="ID del pedido"),
+    service: PedidosProveedoresService = Depends(get_pedidos_lectura_service)
+):
+    try:
+        return await service.obtener_pedido(pedido_id)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error al obtener el pedido: {str(e)}"
+        )
+
+#endpoint recibir_pedido
+@pedidos_router.post(
+    "/{pedido_id}/recibir",
+    response_model=RecepcionPedidoOut,
+    status_code=status.HTTP_200_OK,
+    summary="Recibir un pedido",
+    description="Suma al stock todas las líneas del pedido con un único UPDATE, registra las entradas en movimientos y cierra el pedido. 409 si ya fue recibido"
+)
+async def recibir_pedido(
+    pedido_id: int = Path(..., gt=0, description="ID del pedido"),
+    recepcion: Optional[RecepcionPedido] = Body(None),
+    service: PedidosProveedoresService = Depends(get_pedidos_service)
+):
+    try:
+        return await service.recibir_pedido(pedido_id, usuario_id=recepcion.usuario_id if recepcion else None)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error al recibir el pedido: {str(e)}"
+        )
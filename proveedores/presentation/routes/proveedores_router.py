@@ -1,9 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException, Path, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Path, Query, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from ...application.proveedores_service import ProveedoresService
 from ...infrastructure.proveedores_repository import ProveedoresRepository
 from ...domain.schemas import ProveedorCreate,ProveedorUpdate,ProveedorOut
-from ....database.session import get_db
+from ....database.session import get_db, get_read_db
+from ....core.pagination import NEXT_CURSOR_HEADER, CursorInvalidoError
+from ....core.http_cache import validar_cache
 from typing import List, Optional
 from pydantic import BaseModel, EmailStr, Field
 from datetime import datetime
@@ -40,31 +42,47 @@ async def get_proveedores_service(session: AsyncSession = Depends(get_db)) -> Pr
     repo = ProveedoresRepository(session)
     return ProveedoresService(repo)
 
+# Consultas de catálogo: réplica de lectura si está configurada
+async def get_proveedores_lectura_service(session: AsyncSession = Depends(get_read_db)) -> ProveedoresService:
+    return await get_proveedores_service(session)
+
 #endpoint mostrar_Proveedores
 @proveedores_router.get(
     "/",
     response_model=List[ProveedoresOut],
     status_code=status.HTTP_200_OK,
     summary="Obtener todos los proveedores",
-    description="Retorna una lista paginada de todos los proveedores registrados"
+    description="Retorna una lista paginada de proveedores. Usa `cursor` (header X-Next-Cursor) para paginación por keyset; `skip`/`limit` se mantienen por compatibilidad",
+    dependencies=[validar_cache("proveedores")]
 )
 async def listar_proveedores(
+    response: Response,
     skip: int = Query(0, ge=0, description="Items a saltar"),
-    limit: int = Query(100, le=500, description="Límite de items por página"),
-    session: AsyncSession = Depends(get_db)
+    limit: int = Query(100, ge=1, le=500, description="Límite de items por página"),
+    cursor: Optional[str] = Query(None, description="Cursor opaco devuelto en X-Next-Cursor"),
+    session: AsyncSession = Depends(get_read_db)
 ):
     try:
         repo = ProveedoresRepository(session)
         service = ProveedoresService(repo)
-        proveedores = await service.obtener_proveedores(skip=skip, limit=limit)
+        proveedores, siguiente = await service.obtener_proveedores_pagina(limit=limit, skip=skip, cursor=cursor)
         
         if not proveedores:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="No se encontraron proveedores"
             )
-            
+        
+        if siguiente:
+            response.headers[NEXT_CURSOR_HEADER] = siguiente
         return proveedores
+    except HTTPException:
+        raise
+    except CursorInvalidoError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -81,7 +99,7 @@ async def listar_proveedores(
 )
 async def obtener_proveedor(
     proveedor_id: int = Path(..., gt=0, description="ID del proveedor"),
-    service: ProveedoresService = Depends(get_proveedores_service)
+    service: ProveedoresService = Depends(get_proveedores_lectura_service)
 ):
     try:
         proveedor = await service.obtener_proveedor_por_id(proveedor_id)
@@ -188,14 +206,15 @@ async def eliminar_proveedor(
     response_model=List[ProveedoresOut],
     status_code=status.HTTP_200_OK,
     summary="Buscar proveedores por nombre",
-    description="Busca proveedores cuyo nombre coincida con el término de búsqueda"
+    description="Busca proveedores cuyo nombre contenga todas las palabras del término (la última como prefijo), ordenados por relevancia"
 )
 async def buscar_proveedores(
     nombre: str = Path(..., description="Término de búsqueda"),
-    service: ProveedoresService = Depends(get_proveedores_service)
+    limit: int = Query(50, ge=1, le=200, description="Máximo de resultados"),
+    service: ProveedoresService = Depends(get_proveedores_lectura_service)
 ):
     try:
-        proveedores = await service.buscar_proveedores_por_nombre(nombre)
+        proveedores = await service.buscar_proveedores_por_nombre(nombre, limit=limit)
         
         if not proveedores:
             raise HTTPException(
@@ -7,6 +7,7 @@ from ...application.use_cases.metricas_use_cases import (
     ObtenerHistoricoUseCase, CrearKPIConfigUseCase
 )
 from ...infraestructure.repositories.metricas_repository_imp import MetricasRepositoryImpl
+from ....database.Redis_Connection import cacheado
 
 class MetricasService:
     def __init__(self):
@@ -16,6 +17,8 @@ class MetricasService:
         self.obtener_historico_uc = ObtenerHistoricoUseCase(self.metricas_repository)
         self.crear_kpi_config_uc = CrearKPIConfigUseCase(self.metricas_repository)
     
+    # Cacheado en la caché compartida: todos los workers sirven el mismo dashboard
+    @cacheado("metricas:dashboard", ttl=30)
     async def obtener_dashboard(self, periodo: str, usuario_id: Optional[str] = None) -> Dict[str, Any]:
         """Obtener dashboard de métricas"""
         from ...domain.entities.metricas import Periodo
@@ -97,6 +100,7 @@ class MetricasService:
             "timestamp": realtime.timestamp.isoformat()
         }
     
+    @cacheado("metricas:historico", ttl=60)
     async def obtener_metricas_historicas(self, metrica_id: str, dias: int = 7) -> List[Dict[str, Any]]:
         """Obtener datos históricos de una métrica"""
         historicos = await self.obtener_historico_uc.execute(metrica_id, dias)
@@ -1,6 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException, Query, status, Body
 from typing import List, Optional, Dict, Any
 import logging
+import time
 from datetime import datetime
 from pydantic import BaseModel, Field
 
@@ -24,6 +25,8 @@ except ImportError:
     from domain.entities.metricas import Periodo, Tendencia
     from domain.entities.Alertas import TipoAlerta, SeveridadAlerta
 
+from ....core.http_cache import validar_cache
+
 # Crear router
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -115,7 +118,18 @@ class EstadisticasAlertasResponse(BaseModel):
     ultima_actualizacion: str
 
 # =========== ENDPOINTS DE MÉTRICAS ===========
-@router.get("/dashboard", response_model=DashboardResponse)
+# El dashboard se cachea 30 s en el servicio: el ETag también cambia cada 30 s y no
+# se emite en los 30 s siguientes a una escritura (el cuerpo puede ser previo a ella)
+@router.get(
+    "/dashboard",
+    response_model=DashboardResponse,
+    dependencies=[validar_cache(
+        "ventas", "productos",
+        cache_control="private, max-age=30",
+        estabilizacion=30,
+        variante=lambda: str(int(time.time() // 30))
+    )]
+)
 async def obtener_dashboard(
     periodo: Periodo = Query(Periodo.MENSUAL, description="Período de tiempo"),
     usuario_id: Optional[str] = Query(None, description="ID del usuario"),